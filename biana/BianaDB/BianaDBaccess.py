@@ -34,11 +34,20 @@ import biana.utilities.int_ascii as int_ascii
 
 # Biana specific
 import biana.BianaObjects as BianaObjects
+from biana.BianaObjects import output_utilities
 from BianaDatabase import BianaDatabase
 
 # Enable debugging for web php scripts
 debug_web = 0 #1; #!
 
+# Token indices of descriptive searchable attributes (see BianaDBaccess.create_fulltext_token_indices)
+FULLTEXT_TOKEN_REGEX = re.compile("\w+")
+FULLTEXT_TOKEN_MAX_LENGTH = 40
+FULLTEXT_BOOLEAN_OPERATORS_REGEX = re.compile("(^|\s)[-+<>~@]|[\"()]")   # Searches using boolean mode operators are done with MATCH ... AGAINST
+
+# Number of values from which attribute values are resolved by joining a temporary table instead of using IN lists (see BianaDBaccess.get_user_entities_IDs_by_attribute_values)
+RESOLVE_TEMPORARY_TABLE_MIN_SIZE = 50000
+
 
 # a hard-coded version id assigned to source to prevent a previously created biana database <-> source code inconsistencies
 #BIANA_SOURCE_CODE_VERSION = "Mar_16_09"   #Dynamic attributes biana database specific
@@ -78,6 +87,8 @@ class BianaDBaccess(object):
         self.validSources = None
         self.valid_source_database_ids = {}
         self.available_unification_protocols = None  # Key: Description. Value: ID
+        self.user_entity_relation_tables = {}        # Key: Description. Value: name of the table with precalculated user entity relations (None if not available)
+        self.fulltext_token_index_tables = {}        # Key: attribute. Value: name of the table with the token index of the attribute (None if not available)
 
         # Ontology related variables
         self.available_ontology_names = None   # Stores the available ontologies
@@ -165,6 +176,24 @@ class BianaDBaccess(object):
     def isOptimizedForRunning(self):
         return self.db_optimized_for=="running"
 
+    def enable_query_profiler(self, explain_threshold=None):
+        """
+        Starts recording the queries executed through this connection (see ConnectorDB.DB.enable_profiler). Returns the QueryProfiler object
+        """
+        return self.db.enable_profiler( explain_threshold = explain_threshold )
+
+    def disable_query_profiler(self):
+        """
+        Stops recording queries. Returns the QueryProfiler object used (or None if it was not enabled)
+        """
+        return self.db.disable_profiler()
+
+    def get_query_profiler(self):
+        """
+        Returns the QueryProfiler object recording the queries, or None if it is not enabled
+        """
+        return self.db.get_profiler()
+
     def reconnect(self):
         self.db = ConnectorDB.DB(dbname=self.dbname, dbhost=self.dbhost, dbuser=self.dbuser, dbpassword=self.dbpassword, dbport=self.dbport, dbsocket=self.dbsocket, lock_tables=self.lock_tables)
 
@@ -564,13 +593,16 @@ class BianaDBaccess(object):
 
 
 
-    def optimize_database_for(self, mode, optimize=False):
+    def optimize_database_for(self, mode, optimize=False, create_token_indices=True):
         """
         Performs some modifications in database in order to optimize database access efficiency for parsing or running
         
         "mode" can take two different values: "running" or "parsing"
 
         "optimize" parameter will be only used if mode is "running"
+
+        "create_token_indices" will be only used if mode is "running". If True, the token indices of descriptive searchable attributes are created (see create_fulltext_token_indices).
+        Existing indices are only created again if the database was not optimized for running
         """
 
         if mode == "parsing":
@@ -589,6 +621,9 @@ class BianaDBaccess(object):
             # Precalculate relations hierarchy
             self._update_relations_hierarchy()
 
+            if create_token_indices:
+                self.create_fulltext_token_indices( replace = self.db_optimized_for != "running" )
+
             
             
 
@@ -616,29 +651,27 @@ class BianaDBaccess(object):
         # Check if there is temporal data to be processed in temporal buffer
         # Process relations hierarchy temporal data
         if len( self.temporal_data["relations_hierarchy_parents"] )>0:
-            hierarchy_set = set()
 
             eE_eERid_dict = self.temporal_data["relations_hierarchy_parents"]
 
-            def get_all_parents(eEid):
-                parents = set()
-                if( eE_eERid_dict.has_key(eEid) ):
-                    parents.update(eE_eERid_dict[eEid])
-                    for current_eEid in eE_eERid_dict[eEid]:
-                        parents.update(get_all_parents(current_eEid))
-                return parents
-
-            for eEid in self.temporal_data["relations_hierarchy_parents"].keys():
-                for current_parent in get_all_parents(eEid):
-                    hierarchy_set.add((current_parent,eEid))
-
-
-            for current_eERid, current_eEid in hierarchy_set:
-                self.db.insert_db_content( self.db._get_insert_sql_query( table = self.biana_database.EXTENDED_EXTERNAL_ENTITY_RELATION_PARTICIPANT_TABLE,
-                                                                          column_values = (("externalEntityRelationParticipantID", self._get_new_external_entity_relation_participant_id()), 
-                                                                                           (self.biana_database.external_entity_relation_id_col, current_eERid),
-                                                                                           (self.biana_database.externalEntityID_col, current_eEid )),
-                                                                          use_buffer = True ))
+            relation_ancestors = self._get_relations_hierarchy_ancestors(eE_eERid_dict)
+
+            # Rows are inserted through the insert buffer, which joins them in multiple row inserts
+            for eEid, parents in eE_eERid_dict.iteritems():
+                if relation_ancestors.has_key(eEid):
+                    all_parents = relation_ancestors[eEid]
+                else:
+                    all_parents = set(parents)
+                    for current_parent in parents:
+                        all_parents.update(relation_ancestors[current_parent])
+
+                for current_eERid in all_parents:
+                    self.db.insert_db_content( self.db._get_insert_sql_query( table = self.biana_database.EXTENDED_EXTERNAL_ENTITY_RELATION_PARTICIPANT_TABLE,
+                                                                              column_values = (("externalEntityRelationParticipantID", self._get_new_external_entity_relation_participant_id()), 
+                                                                                               (self.biana_database.external_entity_relation_id_col, current_eERid),
+                                                                                               (self.biana_database.externalEntityID_col, eEid )),
+                                                                              use_buffer = True ))
+
         # If database has been modified, add the control id
         if self.db_version_modified:
             self._update_bianaDB_autoincrement_fields()
@@ -649,6 +682,95 @@ class BianaDBaccess(object):
 
 
 
+    def _get_relations_hierarchy_ancestors(self, eE_eERid_dict):
+        """
+        Returns a dictionary with the set of all the ancestors of each relation in the hierarchy (relations in which it participates directly or through other relations)
+
+        "eE_eERid_dict" is a dictionary with the parent relations of each external entity (or relation)
+
+        The hierarchy is traversed iteratively (Tarjan's strongly connected components algorithm), so ancestors of each relation are computed only once
+        and deep hierarchies do not reach the recursion limit. If the hierarchy has cycles, all relations in a cycle have the same ancestors (including themselves)
+        """
+
+        def get_parents(eEid):
+            return eE_eERid_dict.get(eEid, ())
+
+        index = {}
+        lowlink = {}
+        stack = []
+        on_stack = set()
+        relation_ancestors = {}
+        num_cycles = 0
+
+        # Only relations (entities that are parents of other entities) are memoized
+        roots = set()
+        for parents in eE_eERid_dict.itervalues():
+            roots.update(parents)
+
+        for root in roots:
+
+            if index.has_key(root):
+                continue
+
+            index[root] = lowlink[root] = len(index)
+            stack.append(root)
+            on_stack.add(root)
+            work = [(root, iter(get_parents(root)))]
+
+            while len(work)>0:
+                (eEid, parents_iter) = work[-1]
+
+                new_eEid = None
+                for current_parent in parents_iter:
+                    if not index.has_key(current_parent):
+                        new_eEid = current_parent
+                        break
+                    elif current_parent in on_stack:
+                        lowlink[eEid] = min(lowlink[eEid], index[current_parent])
+
+                if new_eEid is not None:
+                    index[new_eEid] = lowlink[new_eEid] = len(index)
+                    stack.append(new_eEid)
+                    on_stack.add(new_eEid)
+                    work.append((new_eEid, iter(get_parents(new_eEid))))
+                    continue
+
+                work.pop()
+                if len(work)>0:
+                    lowlink[work[-1][0]] = min(lowlink[work[-1][0]], lowlink[eEid])
+
+                if lowlink[eEid] == index[eEid]:
+                    # eEid is the root of a strongly connected component: all its ancestors outside the component have already been computed
+                    component = set()
+                    while True:
+                        current_eEid = stack.pop()
+                        on_stack.discard(current_eEid)
+                        component.add(current_eEid)
+                        if current_eEid == eEid:
+                            break
+
+                    ancestors = set()
+                    is_cycle = False
+                    for current_eEid in component:
+                        for current_parent in get_parents(current_eEid):
+                            if current_parent in component:
+                                is_cycle = True
+                            else:
+                                ancestors.add(current_parent)
+                                ancestors.update(relation_ancestors[current_parent])
+                    if is_cycle:
+                        num_cycles += 1
+                        ancestors.update(component)
+
+                    for current_eEid in component:
+                        relation_ancestors[current_eEid] = ancestors
+
+        if num_cycles > 0:
+            sys.stderr.write("Relations hierarchy has %s cycles\n" %num_cycles)
+
+        return relation_ancestors
+
+
     ####################################################################################
     #  METHODS USED TO MANAGE AVAILABLE PROTEIN TYPES AND DATABASES IN BIANA DATABASE  #
     ####################################################################################
@@ -717,35 +839,65 @@ class BianaDBaccess(object):
 	return
 
 
-    def _rollback(self):
+    def _rollback(self, checkpoint=None, only_inserted_tables=False, chunk_size=100000):
         """
         Method used to undo all the changes from an stable data insert
+
+        "checkpoint" is a parsing checkpoint (as returned by get_parsing_checkpoint). If given, only the changes done after the checkpoint are undone
+        and the external database being parsed is kept
+
+        "only_inserted_tables" is used to undo a failed parsing from the same BianaDBaccess object that has inserted the data: only the tables in which
+        this connection has inserted data are modified, and rows are deleted by ranges of "chunk_size" identifiers up to the last identifier assigned.
+        Otherwise, all the tables with identifier columns are checked
         """
 
-        max_external_entity_id  = self._get_last_stable_external_entity_id()
+        if checkpoint is None:
+            max_external_entity_id  = self._get_last_stable_external_entity_id()
+            max_external_entity_relation_participant_id  = self._get_last_stable_external_entity_relation_participant_id()
+            max_key_id = self._get_last_stable_key_id()
+            max_protein_sequence_id = self._get_last_stable_sequenceProtein_id()
+            max_nucleotide_sequence_id = self._get_last_stable_sequenceNucleotide_id()
+        else:
+            max_external_entity_id = checkpoint["externalEntityID"]
+            max_external_entity_relation_participant_id = checkpoint["externalEntityRelationParticipantID"]
+            max_key_id = checkpoint["keyID"]
+            max_protein_sequence_id = checkpoint["proteinSequenceID"]
+            max_nucleotide_sequence_id = checkpoint["nucleotideSequenceID"]
+
+        if only_inserted_tables:
+            inserted_tables = set(self.db.get_inserted_tables())
+            last_external_entity_id = self._get_last_external_entity_id()
+            last_external_entity_relation_participant_id = self._get_last_external_entity_relation_participant_id()
+            last_protein_sequence_id = self._get_last_sequenceProtein_id()
+            last_nucleotide_sequence_id = self._get_last_sequenceNucleotide_id()
+        else:
+            inserted_tables = None
+            last_external_entity_id = None
+            last_external_entity_relation_participant_id = None
+            last_protein_sequence_id = None
+            last_nucleotide_sequence_id = None
 
-        max_external_entity_relation_participant_id  = self._get_last_stable_external_entity_relation_participant_id()
+        def delete_range(table, column, min_value, max_value):
+            if inserted_tables is None or table in inserted_tables:
+                self._delete_id_range( table = table, column = column, min_value = min_value, max_value = max_value, chunk_size = chunk_size )
 
         for current_table in self.biana_database.get_tables():
             if current_table.has_field("externalEntityID"):
-                self.db.insert_db_content( sql_query = self.db._get_delete_sql_query( table = current_table.get_table_name(),
-                                                                                      fixed_conditions = [("externalEntityID",">",max_external_entity_id, None)] ),
-                                           answer_mode = None )
+                delete_range( current_table.get_table_name(), "externalEntityID", max_external_entity_id, last_external_entity_id )
 
             if current_table.has_field("externalEntityRelationParticipantID"):
-                self.db.insert_db_content( sql_query = self.db._get_delete_sql_query( table = current_table.get_table_name(),
-                                                                                      fixed_conditions = [("externalEntityRelationParticipantID",">",max_external_entity_relation_participant_id, None)] ),
-                                           answer_mode = None )
+                delete_range( current_table.get_table_name(), "externalEntityRelationParticipantID", max_external_entity_relation_participant_id, last_external_entity_relation_participant_id )
 
 
         # Delete keyID
-        max_key_id = self._get_last_stable_key_id()
-        transfer_tables_list = self.db.select_db_content( sql_query = "SHOW TABLES",
-                                                          answer_mode = "list" )
+        if inserted_tables is None:
+            transfer_tables_list = self.db.select_db_content( sql_query = "SHOW TABLES",
+                                                              answer_mode = "list" )
+        else:
+            # Key attribute tables created by this connection
+            transfer_tables_list = [ self._get_key_attribute_table_name( key_id = current_key_id ) for current_key_id in set(self.key_attribute_ids.values()) ]
 
-        self.db.insert_db_content( sql_query = self.db._get_delete_sql_query( table = self.biana_database.EXTERNAL_DATABASE_ATTRIBUTE_TRANSFER_TABLE.get_table_name(),
-                                                                              fixed_conditions = [("keyID",">",max_key_id, None)] ),
-                                   answer_mode = None )
+        delete_range( self.biana_database.EXTERNAL_DATABASE_ATTRIBUTE_TRANSFER_TABLE.get_table_name(), "keyID", max_key_id, None )
 
         regex = re.compile("key_attribute_(\d+)")
         for current_table in transfer_tables_list:
@@ -757,38 +909,116 @@ class BianaDBaccess(object):
         # Other tables to delete information
         # Ontology specific information
         for current_table in [self.biana_database.ONTOLOGY_IS_A_TABLE.get_table_name(), self.biana_database.ONTOLOGY_IS_PART_OF_TABLE.get_table_name() ]:
-            self.db.insert_db_content( sql_query = self.db._get_delete_sql_query( table = current_table,
-                                                                                  fixed_conditions = [("externalEntityID",">",max_external_entity_id, None)] ),
-                                       answer_mode = None )
+            delete_range( current_table, "externalEntityID", max_external_entity_id, last_external_entity_id )
         
-        self.db.insert_db_content( sql_query = self.db._get_delete_sql_query( table = self.biana_database.EXTENDED_ONTOLOGY_HIERARCHY_TABLE.get_table_name(),
-                                                                              fixed_conditions = [("parentExternalEntityID",">",max_external_entity_id, None)] ),
-                                   answer_mode = None )
-
-        self.db.insert_db_content( sql_query = self.db._get_delete_sql_query( table = self.biana_database.EXTENDED_ONTOLOGY_HIERARCHY_TABLE.get_table_name(),
-                                                                              fixed_conditions = [("childExternalEntityID",">",max_external_entity_id,None)] ),
-                                   answer_mode = None )
-
+        delete_range( self.biana_database.EXTENDED_ONTOLOGY_HIERARCHY_TABLE.get_table_name(), "parentExternalEntityID", max_external_entity_id, last_external_entity_id )
+        delete_range( self.biana_database.EXTENDED_ONTOLOGY_HIERARCHY_TABLE.get_table_name(), "childExternalEntityID", max_external_entity_id, last_external_entity_id )
 
         # Remove sequences
-        max_protein_sequence_id = self._get_last_stable_sequenceProtein_id()
-        self.db.insert_db_content( sql_query = self.db._get_delete_sql_query( table = self.biana_database.EXTERNAL_ATTRIBUTES_DESCRIPTION_TABLES["proteinSequence"].get_table_name(),
-                                                                              fixed_conditions = [("proteinSequenceID",">",max_protein_sequence_id,None)] ),
-                                   answer_mode = None )
-
-        max_nucleotide_sequence_id = self._get_last_stable_sequenceNucleotide_id()
-        self.db.insert_db_content( sql_query = self.db._get_delete_sql_query( table = self.biana_database.EXTERNAL_ATTRIBUTES_DESCRIPTION_TABLES["nucleotideSequence"].get_table_name(),
-                                                                              fixed_conditions = [("nucleotideSequenceID",">",max_nucleotide_sequence_id,None)] ),
-                                   answer_mode = None )
+        delete_range( self.biana_database.EXTERNAL_ATTRIBUTES_DESCRIPTION_TABLES["proteinSequence"].get_table_name(), "proteinSequenceID", max_protein_sequence_id, last_protein_sequence_id )
+        delete_range( self.biana_database.EXTERNAL_ATTRIBUTES_DESCRIPTION_TABLES["nucleotideSequence"].get_table_name(), "nucleotideSequenceID", max_nucleotide_sequence_id, last_nucleotide_sequence_id )
             
         # DELETE ALL external Databases without parsing time, as it means the parsing has not been finished...
+        # (except the one that is going to be resumed)
+        external_database_conditions = [("parsingTime","IS","NULL",None)]
+        if checkpoint is not None:
+            external_database_conditions.append(("externalDatabaseID","<>",checkpoint["externalDatabaseID"],None))
+
         self.db.insert_db_content( sql_query = self.db._get_delete_sql_query( table = self.biana_database.EXTERNAL_DATABASE_TABLE.get_table_name(),
-                                                                              fixed_conditions = [("parsingTime","IS","NULL",None)] ),
+                                                                              fixed_conditions = external_database_conditions ),
                                    answer_mode = None )
 
         return
 
 
+    def _delete_id_range(self, table, column, min_value, max_value=None, chunk_size=100000):
+        """
+        Deletes the rows of "table" with "column" greater than "min_value"
+
+        If "max_value" is known, rows are deleted by ranges of "chunk_size" values up to "max_value", reporting the progress
+        """
+
+        if max_value is None:
+            self.db.insert_db_content( sql_query = self.db._get_delete_sql_query( table = table,
+                                                                                  fixed_conditions = [(column,">",min_value,None)] ),
+                                       answer_mode = None )
+            return
+
+        min_value = int(min_value)
+        max_value = int(max_value)
+        current_value = min_value
+
+        while current_value < max_value:
+            upper_value = min(current_value+chunk_size, max_value)
+            self.db.insert_db_content( sql_query = self.db._get_delete_sql_query( table = table,
+                                                                                  fixed_conditions = [(column,">",current_value,None),
+                                                                                                      (column,"<=",upper_value,None)] ),
+                                       answer_mode = None )
+            current_value = upper_value
+            if max_value-min_value > chunk_size:
+                sys.stderr.write("Rollback of %s.%s: %s%%\r" %(table, column, (current_value-min_value)*100/(max_value-min_value)))
+
+        if max_value-min_value > chunk_size:
+            sys.stderr.write("\n")
+
+        return
+
+
+    def get_parsing_checkpoint(self, externalDatabase):
+        """
+        Returns a dictionary with the last autoincrement values assigned, together with the temporal data needed to finish the parsing of "externalDatabase"
+
+        The insert buffer is not emptied: the checkpoint is only valid once the buffer elements with rows at this moment have been sent to the database
+        (see ConnectorDB.DB.get_buffer_state)
+
+        Used by parsers to resume an unfinished parsing with restore_parsing_checkpoint
+        """
+
+        return { "externalDatabaseID": externalDatabase.get_id(),
+                 "externalEntityID": self._get_last_external_entity_id(),
+                 "externalEntityRelationParticipantID": self._get_last_external_entity_relation_participant_id(),
+                 "proteinSequenceID": self._get_last_sequenceProtein_id(),
+                 "nucleotideSequenceID": self._get_last_sequenceNucleotide_id(),
+                 "keyID": self._get_last_key_id(),
+                 "temporal_data": self.temporal_data }
+
+
+    def restore_parsing_checkpoint(self, externalDatabase, checkpoint):
+        """
+        Prepares the database to continue the unfinished parsing of "externalDatabase" from "checkpoint" (as returned by get_parsing_checkpoint)
+
+        All the information inserted after the checkpoint is deleted and new identifiers continue from the checkpoint values
+        """
+
+        if externalDatabase.get_id() != checkpoint["externalDatabaseID"]:
+            raise ValueError("Checkpoint does not correspond to external database %s" %externalDatabase)
+
+        parsing_time = self.db.select_db_content( self.db._get_select_sql_query( tables = [self.biana_database.EXTERNAL_DATABASE_TABLE.get_table_name()],
+                                                                                 columns = ["parsingTime"],
+                                                                                 fixed_conditions = [("externalDatabaseID","=",externalDatabase.get_id())] ),
+                                                  answer_mode = "list", remove_duplicates = "no" )
+        if parsing_time != [None]:
+            raise ValueError("Parsing of external database %s cannot be resumed: it has been removed or it has already finished" %externalDatabase)
+
+        sys.stderr.write("Deleting information inserted after the last checkpoint\n")
+        self._rollback( checkpoint = checkpoint )
+
+        self.db.set_current_autoincrement(table="externalEntity", attribute="externalEntityID", value=checkpoint["externalEntityID"])
+        self.db.set_current_autoincrement(table="externalEntityRelationParticipant", attribute="externalEntityRelationParticipantID", value=checkpoint["externalEntityRelationParticipantID"])
+        self.db.set_current_autoincrement(table="sequenceProtein", attribute="proteinSequenceID", value=checkpoint["proteinSequenceID"])
+        self.db.set_current_autoincrement(table="sequenceNucleotide", attribute="nucleotideSequenceID", value=checkpoint["nucleotideSequenceID"])
+        self.db.set_current_autoincrement(table="externalDatabaseAttributeTransfer", attribute="keyID", value=checkpoint["keyID"])
+
+        self.temporal_data = checkpoint["temporal_data"]
+
+        # Use the checkpointed external database object (it keeps the attributes and types found until the checkpoint)
+        self._get_valid_source_dbs().setdefault(externalDatabase.get_name(), {})[externalDatabase.get_version()] = externalDatabase
+        self.valid_source_database_ids[externalDatabase.get_id()] = externalDatabase
+
+        # Mark the database as modified
+        self.db_version_modified = 1
+
+
     def _get_db_versions_list(self):
 
         if self.db_versions_list is None:
@@ -941,6 +1171,9 @@ class BianaDBaccess(object):
                                                                  answer_mode="last_id" )
 
             externalDatabase.set_id(externalDatabaseID = new_database_identifier)
+
+            # Token indices would not include the values of the new database
+            self.drop_fulltext_token_indices()
                                                                  
             # Add this external database in the current external databases on memory
             if self._get_valid_source_dbs().has_key(externalDatabase.get_name()):
@@ -1786,6 +2019,182 @@ class BianaDBaccess(object):
 
 
 
+    def create_fulltext_token_indices(self, replace=True, block_size=1000000):
+        """
+        Creates the token indices of the descriptive searchable attributes (such as description, keyword or name)
+
+        A token index stores, for each word of the values of the attribute (in lowercase, without the minimum length of MySQL full text indices), the external entities
+        having it. Searches by these attributes use the token indices instead of MATCH ... AGAINST while the database is optimized for running
+
+        If "replace" is False, only the indices that do not exist are created. Indices are dropped when a new external database is inserted (see drop_fulltext_token_indices)
+
+        Attribute values are read by ranges of "block_size" external entity identifiers
+        """
+
+        for current_attribute in sorted(self.biana_database.VALID_EXTERNAL_ENTITY_DESCRIPTIVE_SEARCHABLE_ATTRIBUTE_TYPES_SET):
+
+            attr_table = self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[current_attribute]
+
+            index_table = copy.deepcopy(self.biana_database.FULLTEXT_TOKEN_INDEX_TABLE)  # It is necessary to do a copy because we are going to change its name...
+            index_table.set_table_name(new_name = "%s%s" %(attr_table.get_table_name(), index_table.get_table_name()))
+
+            if replace is False and len(self.db.select_db_content( "SHOW TABLES LIKE '%s'" %index_table.get_table_name(), answer_mode = "list" )) > 0:
+                self.fulltext_token_index_tables[current_attribute] = index_table.get_table_name()
+                continue
+
+            print "Creating token index of %s" %current_attribute
+
+            self.db.insert_db_content( "DROP TABLE IF EXISTS %s" %index_table.get_table_name(), answer_mode = None )
+            self.db.insert_db_content( index_table.create_mysql_query(), answer_mode = None )
+
+            max_external_entity_id = self.db.select_db_content( self.db._get_select_sql_query( tables = [attr_table],
+                                                                                                columns = ["MAX(externalEntityID)"] ),
+                                                                answer_mode = "single" )
+
+            for current_min_id in xrange(0, int(max_external_entity_id or 0), block_size):
+                data = self.db.select_db_content( self.db._get_select_sql_query( tables = [attr_table],
+                                                                                 columns = ["externalEntityID","value"],
+                                                                                 fixed_conditions = [("externalEntityID",">",current_min_id,None),
+                                                                                                     ("externalEntityID","<=",current_min_id+block_size,None)] ),
+                                                  answer_mode = "raw", remove_duplicates = "no" )
+
+                for (externalEntityID, value) in data:
+                    for current_token in self._get_fulltext_tokens(value):
+                        self.db.insert_db_content( self.db._get_insert_sql_query( table = index_table,
+                                                                                  column_values = (("token", current_token),
+                                                                                                   ("externalEntityID", externalEntityID)),
+                                                                                  use_buffer = True ))
+
+            self.db._empty_buffer()
+
+            self.fulltext_token_index_tables[current_attribute] = index_table.get_table_name()
+
+        return
+
+
+    def drop_fulltext_token_indices(self):
+        """
+        Drops the token indices of the descriptive searchable attributes, as they are not updated when new values are inserted
+
+        They are created again the next time the database is optimized for running
+        """
+
+        table_list = self.db.select_db_content( "SHOW TABLES LIKE '%%%s'" %self.biana_database.FULLTEXT_TOKEN_INDEX_TABLE.get_table_name().replace("_","\\_"),
+                                                answer_mode = "list" )
+
+        if len(table_list) > 0:
+            self.db.insert_db_content( self.db._get_drop_sql_query( table_list = table_list ) )
+
+        self.fulltext_token_index_tables = {}
+
+
+    def _get_fulltext_tokens(self, value):
+        """
+        Returns the set of tokens of a descriptive attribute value, as stored in the token indices
+        """
+        return set([ x[:FULLTEXT_TOKEN_MAX_LENGTH] for x in FULLTEXT_TOKEN_REGEX.findall(str(value).lower()) ])
+
+
+    def _get_fulltext_token_index_table_name(self, attribute_identifier):
+        """
+        Returns the name of the table with the token index of the attribute, or None if it has not been created or the database is not optimized for running
+        (as the index is not updated while parsing)
+        """
+
+        attribute_identifier = attribute_identifier.lower()
+
+        if self.db_optimized_for != "running":
+            return None
+
+        if not self.fulltext_token_index_tables.has_key(attribute_identifier):
+
+            table_name = "%s%s" %(self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[attribute_identifier].get_table_name(), self.biana_database.FULLTEXT_TOKEN_INDEX_TABLE.get_table_name())
+            if len(self.db.select_db_content( "SHOW TABLES LIKE '%s'" %table_name, answer_mode = "list" )) == 0:
+                table_name = None
+
+            self.fulltext_token_index_tables[attribute_identifier] = table_name
+
+        return self.fulltext_token_index_tables[attribute_identifier]
+
+
+    def _get_fulltext_token_index_queries(self, attribute_identifier, values_list):
+        """
+        Returns the list of queries (one for each value in "values_list") selecting the external entities whose attribute value contains all the words of the value,
+        using the token index of the attribute. A word ending with "*" matches all the tokens starting with it
+
+        Each query joins the token index once for each word of the value (through its primary key)
+
+        Returns None if the attribute has no token index or if any value uses boolean mode operators
+        """
+
+        index_table = self._get_fulltext_token_index_table_name(attribute_identifier)
+
+        if index_table is None:
+            return None
+
+        queries = []
+
+        for current_value in values_list:
+            current_value = str(current_value).strip().lower()
+            if FULLTEXT_BOOLEAN_OPERATORS_REGEX.search(current_value):
+                return None
+            tokens = set()
+            prefix_tokens = set()
+            for current_word in current_value.split():
+                word_tokens = [ x[:FULLTEXT_TOKEN_MAX_LENGTH] for x in FULLTEXT_TOKEN_REGEX.findall(current_word) ]
+                if len(word_tokens) == 0:
+                    continue
+                if current_word.endswith("*"):
+                    prefix_tokens.add(word_tokens.pop())
+                tokens.update(word_tokens)
+
+            if len(tokens) == 0 and len(prefix_tokens) == 0:
+                continue
+
+            # Exact tokens first, as they are more selective
+            conditions = [ ("=", x) for x in sorted(tokens) ] + [ ("LIKE", "%s%%" %x.replace("_","\\_")) for x in sorted(prefix_tokens) ]
+
+            tables = []
+            fixed_conditions = []
+            join_conditions = []
+            for current_index in xrange(len(conditions)):
+                alias = "T%s" %current_index
+                tables.append( (index_table, alias) )
+                fixed_conditions.append( ("%s.token" %alias, conditions[current_index][0], conditions[current_index][1]) )
+                if current_index > 0:
+                    join_conditions.append( ("%s.externalEntityID" %alias, "=", "T0.externalEntityID") )
+
+            queries.append( self.db._get_select_sql_query( tables = tables,
+                                                           columns = ["T0.externalEntityID"],
+                                                           fixed_conditions = fixed_conditions,
+                                                           join_conditions = join_conditions ) )
+
+        return queries
+
+
+    def _get_fulltext_search_condition(self, attribute_identifier, table, values_list, match_condition):
+        """
+        Returns the condition to restrict the rows of "table" (an attribute table or its alias) to the ones matching "values_list" for a descriptive searchable attribute
+
+        If the search can be answered with the token index of the attribute, the condition restricts the external entities to the ones selected by a subquery on the index.
+        Otherwise, "match_condition" (the MATCH ... AGAINST condition) is returned
+        """
+
+        queries = self._get_fulltext_token_index_queries(attribute_identifier, values_list)
+
+        if queries is None:
+            return match_condition
+
+        if len(queries) == 0:
+            return ("%s.externalEntityID" %table, "IN", "(NULL)")
+
+        if len(queries) == 1:
+            return ("%s.externalEntityID" %table, "IN", "(%s)" %queries[0])
+
+        # The union is used as a derived table so that it is evaluated only once
+        return ("%s.externalEntityID" %table, "IN", "(SELECT externalEntityID FROM (%s) AS tokenSearch)" %" UNION ".join(queries))
+
+
     def _get_list_external_entities_IDs_by_attribute_SQLstat(self, attribute_identifier, field_values, source_databases=[], attribute_restrictions=None, expand_ontology_attributes=True ):
         """
         Gets a list of external entities that have an attribute with "attribute_value" value
@@ -1837,9 +2246,12 @@ class BianaDBaccess(object):
 
 
                 if BianaObjects.ExternalEntityAttribute.isFullTextSearchable(attribute_identifier, self.biana_database):
-                    sqlStat.add_element( join_conditions = [ ("MATCH (Q%s.value)" %num,
-                                                              "AGAINST",
-                                                              "('%s' IN BOOLEAN MODE)" %("\",\"".join(values_list))) ] )
+                    sqlStat.add_element( join_conditions = [ self._get_fulltext_search_condition( attribute_identifier = current_restriction_attribute,
+                                                                                                  table = "Q%s" %num,
+                                                                                                  values_list = values_list,
+                                                                                                  match_condition = ("MATCH (Q%s.value)" %num,
+                                                                                                                     "AGAINST",
+                                                                                                                     "('%s' IN BOOLEAN MODE)" %("\",\"".join(values_list))) ) ] )
                 else:
 
                     if self._is_ontology_linked_attribute( current_restriction_attribute ):
@@ -1885,9 +2297,12 @@ class BianaDBaccess(object):
                                                          "IN",
                                                          "(\"%s\")" % "\",\"".join(values_list) )] )
             elif BianaObjects.ExternalEntityAttribute.isFullTextSearchable(attribute_identifier, self.biana_database):
-                sqlStat.add_element( join_conditions = [("MATCH (%s.value)" %table,
-                                                         "AGAINST",
-                                                         "('%s' IN BOOLEAN MODE)" % " ".join(values_list) )] )
+                sqlStat.add_element( join_conditions = [ self._get_fulltext_search_condition( attribute_identifier = attribute_identifier,
+                                                                                              table = table,
+                                                                                              values_list = values_list,
+                                                                                              match_condition = ("MATCH (%s.value)" %table,
+                                                                                                                 "AGAINST",
+                                                                                                                 "('%s' IN BOOLEAN MODE)" % " ".join(values_list) ) ) ] )
 		#print sqlStat
             else:
                 if self._is_ontology_linked_attribute( attribute_identifier ):
@@ -1955,9 +2370,12 @@ class BianaDBaccess(object):
             join_conditions = [("key1.externalEntityID","=","%s.externalEntityID" %(self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[attribute_identifier]))]
 
             if BianaObjects.ExternalEntityAttribute.isFullTextSearchable(attribute_identifier, self.biana_database):
-                join_conditions.append(("MATCH (%s.value)" %self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[attribute_identifier],
-                                        "AGAINST",
-                                        "('%s' IN BOOLEAN MODE)" % " ".join([ str(actual_restriction[1]) for actual_restriction in field_values ] ) ))
+                join_conditions.append( self._get_fulltext_search_condition( attribute_identifier = attribute_identifier,
+                                                                             table = self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[attribute_identifier],
+                                                                             values_list = [ actual_restriction[1] for actual_restriction in field_values ],
+                                                                             match_condition = ("MATCH (%s.value)" %self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[attribute_identifier],
+                                                                                                "AGAINST",
+                                                                                                "('%s' IN BOOLEAN MODE)" % " ".join([ str(actual_restriction[1]) for actual_restriction in field_values ] ) ) ) )
             else:
                 join_conditions.append(("%s.value" %self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[attribute_identifier],
                                         "IN",
@@ -2013,9 +2431,12 @@ class BianaDBaccess(object):
             join_conditions = [("key1.externalEntityID","=","%s.externalEntityID" %(self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[attribute_identifier]))]
 
             if BianaObjects.ExternalEntityAttribute.isFullTextSearchable(attribute_identifier, self.biana_database):
-                join_conditions.append(("MATCH (%s.value)" %self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[attribute_identifier],
-                                        "AGAINST",
-                                        "('%s' IN BOOLEAN MODE)" % " ".join([ str(actual_restriction[1]) for actual_restriction in field_values ] ) ))
+                join_conditions.append( self._get_fulltext_search_condition( attribute_identifier = attribute_identifier,
+                                                                             table = self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[attribute_identifier],
+                                                                             values_list = [ actual_restriction[1] for actual_restriction in field_values ],
+                                                                             match_condition = ("MATCH (%s.value)" %self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[attribute_identifier],
+                                                                                                "AGAINST",
+                                                                                                "('%s' IN BOOLEAN MODE)" % " ".join([ str(actual_restriction[1]) for actual_restriction in field_values ] ) ) ) )
             else:
                 join_conditions.append(("%s.value" %self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[attribute_identifier],
                                         "IN",
@@ -2100,9 +2521,12 @@ class BianaDBaccess(object):
                 join_conditions.append( ("nq.value","=","childs.childs") )
                 
             if BianaObjects.ExternalEntityAttribute.isFullTextSearchable(current_restriction_attribute, self.biana_database):
-                join_conditions.append(("MATCH (nq.value)",
-                                        "AGAINST",
-                                        "('%s' IN BOOLEAN MODE)" %("\",\"".join(map(str,values_list))) ))
+                join_conditions.append( self._get_fulltext_search_condition( attribute_identifier = current_restriction_attribute,
+                                                                             table = "nq",
+                                                                             values_list = values_list,
+                                                                             match_condition = ("MATCH (nq.value)",
+                                                                                                "AGAINST",
+                                                                                                "('%s' IN BOOLEAN MODE)" %("\",\"".join(map(str,values_list))) ) ) )
             else:
                 join_conditions.append(("nq.value",
                                         "IN",
@@ -2175,9 +2599,12 @@ class BianaDBaccess(object):
                 values_list = [ x for x in str(current_restriction_values).split(",") ]
 
                 if BianaObjects.ExternalEntityAttribute.isFullTextSearchable(current_restriction_attribute, self.biana_database):
-                    join_conditions.append(("MATCH (q.value)",
-                                            "AGAINST",
-                                            "('%s' IN BOOLEAN MODE)" %("\",\"".join(map(str,values_list))) ))
+                    join_conditions.append( self._get_fulltext_search_condition( attribute_identifier = current_restriction_attribute,
+                                                                                 table = "q",
+                                                                                 values_list = values_list,
+                                                                                 match_condition = ("MATCH (q.value)",
+                                                                                                    "AGAINST",
+                                                                                                    "('%s' IN BOOLEAN MODE)" %("\",\"".join(map(str,values_list))) ) ) )
 
 		if BianaObjects.ExternalEntityAttribute.isNumericAttribute(current_restriction_attribute, self.biana_database) or BianaObjects.ExternalEntityAttribute.isSpecialAttribute(current_restriction_attribute, self.biana_database):
                     regex = re.compile("([><=]*)([\d\.]+)")
@@ -2432,6 +2859,126 @@ class BianaDBaccess(object):
         return initial_list
 
 
+    def get_user_entities_IDs_by_attribute_values(self, unification_protocol_name, attribute_identifier, values_list, attribute_restrictions=None, negative_attribute_restrictions=None, only_uniques=False, temporary_table_min_size=RESOLVE_TEMPORARY_TABLE_MIN_SIZE):
+        """
+        Returns a dictionary { value: list of (userEntityID, type) } with the user entities having each of the values in "values_list" of attribute "attribute_identifier"
+
+        Values are compared case insensitively, keys are the values as given in "values_list". Values without user entities are not included.
+        The value "*" returns all the user entities having the attribute, as in get_list_user_entities_IDs_by_attribute
+
+        All values are resolved with the same query, split in chunks if the IN list is too long (see ConnectorDB.select_db_content_in_chunks).
+        When there are "temporary_table_min_size" values or more, they are inserted in a temporary table that is joined instead.
+        Full text searchable and ontology linked attributes are resolved with a query for each value
+        """
+
+        values_dict = {}    # lower cased value: list of given values
+        for current_value in values_list:
+            current_value = str(current_value).strip()
+            values_dict.setdefault(current_value.lower(), []).append(current_value)
+
+        return_dict = {}
+
+        if len(values_dict) == 0:
+            return return_dict
+
+        if( attribute_identifier.lower() == "proteinsequenceid" or
+            BianaObjects.ExternalEntityAttribute.isFullTextSearchable(attribute_identifier, self.biana_database) or
+            self._is_ontology_linked_attribute(attribute_identifier) ):
+
+            for current_value in set([ x for current_list in values_dict.itervalues() for x in current_list ]):
+                current_uEs = self.get_list_user_entities_IDs_by_attribute( unification_protocol_name = unification_protocol_name,
+                                                                            attribute_identifier = attribute_identifier,
+                                                                            field_values = [("value",current_value)],
+                                                                            attribute_restrictions = attribute_restrictions,
+                                                                            negative_attribute_restrictions = negative_attribute_restrictions,
+                                                                            include_type = True,
+                                                                            only_uniques = only_uniques )
+                if len(current_uEs) > 0:
+                    return_dict[current_value] = current_uEs
+            return return_dict
+
+        if "*" in values_dict:
+            current_uEs = self.get_list_user_entities_IDs_by_attribute( unification_protocol_name = unification_protocol_name,
+                                                                        attribute_identifier = attribute_identifier,
+                                                                        field_values = [("value","*")],
+                                                                        attribute_restrictions = attribute_restrictions,
+                                                                        negative_attribute_restrictions = negative_attribute_restrictions,
+                                                                        include_type = True,
+                                                                        only_uniques = only_uniques )
+            if len(current_uEs) > 0:
+                return_dict["*"] = current_uEs
+            del values_dict["*"]
+            if len(values_dict) == 0:
+                return return_dict
+
+        # Values are queried as given (binary columns are compared case sensitively), lower cased values are only used to map the results back
+        query_values = list(set([ x for current_list in values_dict.itervalues() for x in current_list ]))
+
+        self._load_available_unification_protocols()
+
+        unif_table = self._get_user_entity_table_name(unification_protocol_name=unification_protocol_name)
+        attr_table = self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[attribute_identifier.lower()].get_table_name()
+
+        tables = [ attr_table, (unif_table,"u"), (self.biana_database.EXTERNAL_ENTITY_TABLE,"e") ]
+        join_conditions = [ ("u.externalEntityID","=","%s.externalEntityID" %attr_table),
+                            ("u.externalEntityID","=","e.externalEntityID") ]
+        fixed_conditions = []
+
+        if only_uniques:
+            fixed_conditions.append(("%s.type" %attr_table, "=", "unique"))
+
+        def get_query(current_values=None, values_table=None):
+            current_tables = list(tables)
+            current_join_conditions = list(join_conditions)
+            if values_table is not None:
+                current_tables.append(values_table)
+                current_join_conditions.append(("%s.value" %attr_table,"=","%s.value" %values_table))
+            else:
+                current_join_conditions.append(("%s.value" %attr_table,"IN","(\"%s\")" %"\",\"".join([ x.replace('\\','\\\\').replace('"','\\"') for x in current_values ])))
+
+            general_query = self.db._get_select_sql_query( tables = current_tables,
+                                                           columns = ["%s.value" %attr_table, "u.userEntityID", "e.type"],
+                                                           fixed_conditions = fixed_conditions,
+                                                           join_conditions = current_join_conditions,
+                                                           group_conditions = ["%s.value" %attr_table, "u.userEntityID", "e.type"] )
+
+            restricted_query = self._apply_restrictions_to_query( query = general_query,
+                                                                  unification_protocol_name = unification_protocol_name,
+                                                                  attribute_restrictions = attribute_restrictions,
+                                                                  column_name_to_restrict="userEntityID" )
+
+            return self._apply_negative_restrictions_to_query( query = restricted_query,
+                                                               unification_protocol_name = unification_protocol_name,
+                                                               column_name_to_restrict="userEntityID",
+                                                               negative_attribute_restrictions = negative_attribute_restrictions )
+
+        if len(query_values) < temporary_table_min_size:
+            data = self.db.select_db_content_in_chunks( lambda x: get_query(current_values = x), query_values, answer_mode = "raw" )
+        else:
+            # Temporary tables are only visible by the connection that creates them, so the query is not executed in the pool
+            values_table = "_resolvedValues"
+            self.db.insert_db_content( "DROP TEMPORARY TABLE IF EXISTS %s" %values_table, answer_mode = None )
+            self.db.insert_db_content( "CREATE TEMPORARY TABLE %s (INDEX(value)) SELECT value FROM %s LIMIT 0" %(values_table, attr_table), answer_mode = None )
+            for current_value in query_values:
+                self.db.insert_db_content( self.db._get_insert_sql_query( table = values_table,
+                                                                          column_values = [("value",current_value)],
+                                                                          use_buffer = True ) )
+            if self.db._uses_buffer():
+                self.db._empty_buffer()
+            data = self.db.select_db_content( get_query(values_table = values_table), answer_mode = "raw", remove_duplicates = "no" )
+            self.db.insert_db_content( "DROP TEMPORARY TABLE IF EXISTS %s" %values_table, answer_mode = None )
+
+        for (value, userEntityID, type) in data:
+            for current_value in values_dict.get(str(value).lower(), []):
+                return_dict.setdefault(current_value, []).append((userEntityID, type))
+
+        # A user entity is found once for each value of the same case
+        for current_value, current_uEs in return_dict.iteritems():
+            return_dict[current_value] = list(set(current_uEs))
+
+        return return_dict
+
+
 
     ####################################################################################
     #               SPECIFIC METHODS FOR ATTRIBUTE DESCRIPTION DATABASES               #
@@ -3276,20 +3823,28 @@ class BianaDBaccess(object):
 
         # Save the unification protocol...
         for actual_unification_atom_element in protocol.get_unification_atom_elements():
-            atom_id = self.db.insert_db_content( self.db._get_insert_sql_query( table = self.biana_database.USER_ENTITY_PROTOCOL_ATOMS_TABLE,
-                                                                                column_values = [ ("unificationProtocolID",protocol_id),
-                                                                                                  ("externalDatabaseID_A",actual_unification_atom_element.get_externalDatabaseID_A() ),
-                                                                                                  ("externalDatabaseID_B",actual_unification_atom_element.get_externalDatabaseID_B() ) ],
-                                                                                use_buffer=False ),
-                                                 answer_mode = "last_id" )
+            self._insert_unification_atom_element(protocol_id, actual_unification_atom_element)
+
+
+    def _insert_unification_atom_element(self, protocol_id, unification_atom_element):
+        """
+        Saves a unification atom element of the protocol "protocol_id" into the database
+        """
 
-            crossed_attributes = actual_unification_atom_element.get_external_attribute_list()
+        atom_id = self.db.insert_db_content( self.db._get_insert_sql_query( table = self.biana_database.USER_ENTITY_PROTOCOL_ATOMS_TABLE,
+                                                                            column_values = [ ("unificationProtocolID",protocol_id),
+                                                                                              ("externalDatabaseID_A",unification_atom_element.get_externalDatabaseID_A() ),
+                                                                                              ("externalDatabaseID_B",unification_atom_element.get_externalDatabaseID_B() ) ],
+                                                                            use_buffer=False ),
+                                             answer_mode = "last_id" )
 
-            for actual_crossed_attribute in crossed_attributes:
-                self.db.insert_db_content( self.db._get_insert_sql_query( table = self.biana_database.USER_ENTITY_PROTOCOL_ATOM_ATTRIBUTES_TABLE,
-                                                                          column_values = [ ("unificationAtomID",atom_id),
-                                                                                            ("cross_referenced_code",actual_crossed_attribute)],
-                                                                          use_buffer = False) )
+        crossed_attributes = unification_atom_element.get_external_attribute_list()
+
+        for actual_crossed_attribute in crossed_attributes:
+            self.db.insert_db_content( self.db._get_insert_sql_query( table = self.biana_database.USER_ENTITY_PROTOCOL_ATOM_ATTRIBUTES_TABLE,
+                                                                      column_values = [ ("unificationAtomID",atom_id),
+                                                                                        ("cross_referenced_code",actual_crossed_attribute)],
+                                                                      use_buffer = False) )
                                
 
     def create_new_user_entities(self, protocol):
@@ -3301,7 +3856,7 @@ class BianaDBaccess(object):
         # WE COULD CHECK IF A PREVIOUS UNIFICATION WITH THE SAME PARAMETERS HAS BEEN PREVIOUSLY DONE...
 
 
-        if self.isOptimizedForRunning is False:
+        if not self.isOptimizedForRunning():
             self.optimize_database_for( mode="running", optimize=True )
 
         self._create_new_unification_protocol_tables(protocol)
@@ -3464,33 +4019,310 @@ class BianaDBaccess(object):
         return
 
 
-    def _unify_promiscuous_external_entities( self, protocol ):
+    def update_user_entities(self, protocol, max_list_size=10000):
         """
-        
+        Updates the user entities of an existing unification protocol (incremental unification), as for example after parsing a new external database
+
+        "protocol" is the UnificationProtocol object that has to be followed. Its description must be the one of an existing protocol. Its unification
+        atom elements and databases not used yet by the existing protocol are added to it
+
+        Only the equivalences involving external entities newer than the last external entity unified by the protocol (or external entities of databases
+        added to the protocol) are computed. They are merged with the existing user entities using a union-find, so that only the rows of the new external
+        entities and of the user entities that are merged are inserted or updated. The resulting partition is the same as the one of create_new_user_entities
+
+        If the user entity relations of the protocol have been precalculated (create_user_entity_relations_table), the ones of the changed user entities are recalculated
+
+        "max_list_size" is the maximum number of identifiers used in each IN list
+        """
+
+        if not self.isOptimizedForRunning():
+            self.optimize_database_for( mode="running", optimize=True )
+
+        self._load_available_unification_protocols()
+
+        unification_protocol_name = protocol.get_description().lower()
+
+        if self.available_unification_protocols.get(unification_protocol_name) is None:
+            raise ValueError("ERROR. Trying to update an unexisting unification protocol")
+
+        existing_protocol = self.available_unification_protocols[unification_protocol_name]
+        protocol.id = existing_protocol.get_id()
+
+        unification_table = self._get_user_entity_table_name(unification_protocol_name=unification_protocol_name)
+
+        # The last external entity unified by the protocol: all the external entities parsed later have greater identifiers
+        last_external_entity_id = self.db.select_db_content( "SELECT MAX(externalEntityID) FROM %s" %unification_table, answer_mode = "single" )
+        if last_external_entity_id is None:
+            last_external_entity_id = 0
+
+        # Unification atom elements not used yet by the protocol
+        def get_atom_key(unification_atom_element):
+            return (unification_atom_element.get_externalDatabaseIDs(), tuple(sorted(unification_atom_element.get_external_attribute_list())))
+
+        existing_atom_keys = set([ get_atom_key(x) for x in existing_protocol.get_unification_atom_elements() ])
+        existing_atoms = []
+        new_atoms = []
+        for actual_unification_atom_element in protocol.get_unification_atom_elements():
+            if get_atom_key(actual_unification_atom_element) in existing_atom_keys:
+                existing_atoms.append(actual_unification_atom_element)
+            else:
+                new_atoms.append(actual_unification_atom_element)
+
+        # Databases not used yet by the protocol (databases without unification atoms are only found in the unification table)
+        existing_databases = existing_protocol.get_database_ids()
+        new_databases = set()
+        for actual_database in protocol.get_database_ids():
+            if actual_database in existing_databases:
+                continue
+            query = self.db._get_select_sql_query( tables = [(unification_table,"u"),
+                                                             (self.biana_database.EXTERNAL_ENTITY_TABLE,"e")],
+                                                   columns = ["u.externalEntityID"],
+                                                   join_conditions = [("u.externalEntityID","=","e.externalEntityID")],
+                                                   fixed_conditions = [("e.externalDatabaseID","=",actual_database)] )
+            if self.db.select_db_content( "%s LIMIT 1" %query, answer_mode = "single" ) is None:
+                new_databases.add(actual_database)
+
+        print "Updating unification protocol %s (last external entity unified: %s. New databases: %s. New unification atoms: %s)" %(protocol.get_description(), last_external_entity_id,
+                                                                                                                                    len(new_databases), len(new_atoms))
+
+        for actual_unification_atom_element in new_atoms:
+            self._insert_unification_atom_element(protocol.id, actual_unification_atom_element)
+
+        # External entities that have to be added
+        new_external_entities = []
+        for actual_database in protocol.get_database_ids():
+	    if self.get_external_database(database_id = actual_database).get_promiscuity():
+                continue
+            fixed_conditions = [("externalDatabaseID","=",actual_database),
+                                ("type","!=","relation")]
+            if actual_database not in new_databases:
+                fixed_conditions.append( (self.biana_database.externalEntityID_col,">",last_external_entity_id) )
+            new_external_entities.extend( self.db.select_db_content( self.db._get_select_sql_query( tables = [self.biana_database.EXTERNAL_ENTITY_TABLE],
+                                                                                                    columns = [self.biana_database.externalEntityID_col],
+                                                                                                    fixed_conditions = fixed_conditions ),
+                                                                     answer_mode = "list", remove_duplicates = "no" ) )
+
+        # New equivalences: all the equivalences of new atoms, and the ones involving new external entities for the existing atoms
+        queries = []
+        for actual_unification_atom_element in existing_atoms:
+            for restricted_alias in ("e1","e2"):
+                queries.append( self._get_equivalent_external_entities(actual_unification_atom_element,
+                                                                       min_external_entity_id = last_external_entity_id,
+                                                                       restricted_alias = restricted_alias) )
+        for actual_unification_atom_element in new_atoms:
+            queries.append( self._get_equivalent_external_entities(actual_unification_atom_element) )
+
+        equivalences = []
+        for query in queries:
+	    if query is not None:
+                equivalences.extend( self.db.select_db_content( query, answer_mode = "raw", remove_duplicates = "no" ) )
+
+        # User entities of the external entities already unified that are equivalent to new ones
+        new_external_entities_set = set(new_external_entities)
+        old_external_entities = set()
+        for (eE1, eE2) in equivalences:
+            if eE1 not in new_external_entities_set:
+                old_external_entities.add(eE1)
+            if eE2 not in new_external_entities_set:
+                old_external_entities.add(eE2)
+        old_external_entities = list(old_external_entities)
+
+        external_entity_user_entity_dict = {}
+        for current_index in xrange(0, len(old_external_entities), max_list_size):
+            data = self.db.select_db_content( self.db._get_select_sql_query( tables = [unification_table],
+                                                                             columns = ["externalEntityID","userEntityID"],
+                                                                             fixed_conditions = [("externalEntityID","IN","(%s)" %",".join(map(str,old_external_entities[current_index:current_index+max_list_size])),None)] ),
+                                              answer_mode = "raw", remove_duplicates = "no" )
+            external_entity_user_entity_dict.update(data)
+
+        next_user_entity_id = self.db.select_db_content( "SELECT MAX(userEntityID) FROM %s" %unification_table, answer_mode = "single" )
+        if next_user_entity_id is None:
+            next_user_entity_id = 0
+        next_user_entity_id += 1
+
+        (new_rows, merged_user_entities) = self._merge_user_entity_components( equivalences = equivalences,
+                                                                              new_external_entities = new_external_entities,
+                                                                              external_entity_user_entity_dict = external_entity_user_entity_dict,
+                                                                              next_user_entity_id = next_user_entity_id )
+
+        print "Inserting %s new external entities and merging %s user entities" %(len(new_rows), len(merged_user_entities))
+
+        for (userEntityID, externalEntityID) in new_rows:
+            self.db.insert_db_content( self.db._get_insert_sql_query( table = unification_table,
+                                                                      column_values = [("userEntityID", userEntityID),
+                                                                                       ("externalEntityID", externalEntityID)],
+                                                                      use_buffer = "yes" ) )
+        self.db._empty_buffer()
+
+        # Merged user entities: their rows are moved to the user entity they are merged with (promiscuous external entities already there are ignored)
+        target_user_entities_dict = {}
+        for (userEntityID, target_userEntityID) in merged_user_entities.iteritems():
+            target_user_entities_dict.setdefault(target_userEntityID, []).append(userEntityID)
+
+        for (target_userEntityID, user_entities_list) in target_user_entities_dict.iteritems():
+            user_entities_str = "(%s)" %",".join(map(str,user_entities_list))
+            self.db.insert_db_content( self.db._get_update_sql_query( table = unification_table,
+                                                                      update_column_values = [("userEntityID",target_userEntityID)],
+                                                                      fixed_conditions = [("userEntityID","IN",user_entities_str,None)],
+                                                                      ignore_duplicates = True ),
+                                       answer_mode = None )
+            self.db.insert_db_content( self.db._get_delete_sql_query( table = unification_table,
+                                                                      fixed_conditions = [("userEntityID","IN",user_entities_str,None)] ),
+                                       answer_mode = None )
+
+        # Promiscuous external entities
+        self._unify_promiscuous_external_entities( protocol = protocol, unification_atom_elements = existing_atoms, min_external_entity_id = last_external_entity_id )
+        self._unify_promiscuous_external_entities( protocol = protocol, unification_atom_elements = new_atoms )
+
+        # Precalculated user entity relations
+        if self._get_user_entity_relation_table_name(unification_protocol_name) is not None:
+
+            promiscuous_changes = len([ x for x in new_databases if self.get_external_database(database_id = x).get_promiscuity() ]) > 0
+            for actual_unification_atom_element in new_atoms:
+                for actual_database in actual_unification_atom_element.get_externalDatabaseIDs():
+                    if self.get_external_database(database_id = actual_database).get_promiscuity():
+                        promiscuous_changes = True
+
+            if promiscuous_changes:
+                # Promiscuous external entities may have been added to any existing user entity
+                self.create_user_entity_relations_table(unification_protocol_name)
+            else:
+                # User entities with new external entities (including promiscuous ones) or merged
+                changed_user_entities = set([ x[0] for x in new_rows ])
+                changed_user_entities.update(target_user_entities_dict.keys())
+                changed_user_entities.update( self.db.select_db_content( self.db._get_select_sql_query( tables = [unification_table],
+                                                                                                        columns = ["userEntityID"],
+                                                                                                        fixed_conditions = [("externalEntityID",">",last_external_entity_id)],
+                                                                                                        distinct_columns = True ),
+                                                                         answer_mode = "list" ) )
+                self._update_user_entity_relations( unification_protocol_name = unification_protocol_name,
+                                                    user_entity_ids = changed_user_entities,
+                                                    removed_user_entity_ids = merged_user_entities.keys(),
+                                                    max_list_size = max_list_size )
+
+        self.available_unification_protocols = None
+
+        return
+
+
+    def _merge_user_entity_components(self, equivalences, new_external_entities, external_entity_user_entity_dict, next_user_entity_id):
+        """
+        Merges new external entities into existing user entities (used in incremental unification)
+
+        "equivalences" is a list of (externalEntityID1, externalEntityID2) pairs
+
+        "new_external_entities" is the list of external entities that are not in any user entity yet
+
+        "external_entity_user_entity_dict" is a dictionary with the user entity of the external entities already unified appearing in "equivalences"
+
+        "next_user_entity_id" is the identifier used for the first new user entity
+
+        Returns a tuple (new_rows, merged_user_entities), where new_rows is a list of (userEntityID, externalEntityID) to insert and merged_user_entities
+        a dictionary { userEntityID: userEntityID with which it is merged }. Merged user entities take the lowest identifier among them
+        """
+
+        # Union-find: new external entities are represented by their identifier and existing user entities by their identifier with negative sign
+        parent = {}
+
+        def find(node):
+            root = node
+            while parent[root] != root:
+                root = parent[root]
+            while parent[node] != root:
+                parent[node], node = root, parent[node]
+            return root
+
+        def get_node(externalEntityID):
+            if external_entity_user_entity_dict.has_key(externalEntityID):
+                node = -external_entity_user_entity_dict[externalEntityID]
+            else:
+                node = externalEntityID
+            if not parent.has_key(node):
+                parent[node] = node
+            return node
+
+        for externalEntityID in new_external_entities:
+            get_node(externalEntityID)
+
+        for (externalEntityID1, externalEntityID2) in equivalences:
+            root1 = find(get_node(externalEntityID1))
+            root2 = find(get_node(externalEntityID2))
+            if root1 != root2:
+                # Existing user entities (negative) are kept as roots
+                if root2 < root1:
+                    root1, root2 = root2, root1
+                parent[root2] = root1
+
+        components_dict = {}
+        for node in parent:
+            components_dict.setdefault(find(node), []).append(node)
+
+        new_rows = []
+        merged_user_entities = {}
+
+        # Sorted to assign the identifiers of new user entities in the same order in all executions
+        for component in sorted(components_dict.itervalues(), key=min):
+            user_entities = sorted([ -x for x in component if x < 0 ])
+            external_entities = sorted([ x for x in component if x > 0 ])
+            if len(user_entities) > 0:
+                userEntityID = user_entities[0]
+                for current_user_entity in user_entities[1:]:
+                    merged_user_entities[current_user_entity] = userEntityID
+            else:
+                userEntityID = next_user_entity_id
+                next_user_entity_id += 1
+            new_rows.extend([ (userEntityID, x) for x in external_entities ])
+
+        return (new_rows, merged_user_entities)
+
+
+    def _unify_promiscuous_external_entities( self, protocol, unification_atom_elements=None, min_external_entity_id=None ):
+        """
+        Adds to the user entities of the protocol the promiscuous external entities equivalent to their external entities
+
+        "unification_atom_elements" is the list of unification atom elements to use. By default, all the atoms of the protocol
+
+        If "min_external_entity_id" is not None, only the equivalences in which one of the external entities is greater than it are added
         """
 
+        if unification_atom_elements is None:
+            unification_atom_elements = protocol.get_unification_atom_elements()
+
         print "Adding promiscuous external entities"
 
         #self.db.set_lock_tables( False )
 
         unification_table = self._get_user_entity_table_name(unification_protocol_name=protocol.description)
 
-        # Get all promiscuous external entities
-        for actual_unification_atom_element in protocol.get_unification_atom_elements():
+        # Promiscuity of each external database, asked only once
+        promiscuity_dict = {}
+        def is_promiscuous(external_database_id):
+            if not promiscuity_dict.has_key(external_database_id):
+                promiscuity_dict[external_database_id] = self.get_external_database(database_id = external_database_id).get_promiscuity()
+            return promiscuity_dict[external_database_id]
+
+        # Group the unification atom elements by promiscuous database and unifying attributes, so that the equivalences of all the
+        # non promiscuous databases unified with the same promiscuous database by the same attributes are inserted with a single query
+        groups_dict = {}
+        for actual_unification_atom_element in unification_atom_elements:
 	    db_id_A = actual_unification_atom_element.get_externalDatabaseID_A()
 	    db_id_B = actual_unification_atom_element.get_externalDatabaseID_B()
 
 	    # If only one of the external database is promiscuous
 	    #xor = lambda x,y: x!=y and (x or y) # using built-in xor: x^y
-	    if not (self.get_external_database(database_id = db_id_A).get_promiscuity() ^ self.get_external_database(database_id = db_id_B).get_promiscuity()):
+	    if not (is_promiscuous(db_id_A) ^ is_promiscuous(db_id_B)):
 		continue
 
-	    if self.get_external_database(database_id = db_id_A).get_promiscuity():
+	    if is_promiscuous(db_id_A):
 		promiscuous_db_id, non_promiscuous_db_id = db_id_A, db_id_B
 	    else:
 		promiscuous_db_id, non_promiscuous_db_id = db_id_B, db_id_A
 
-	    attribute_list = actual_unification_atom_element.get_external_attribute_list()
+	    attribute_list = tuple(sorted(actual_unification_atom_element.get_external_attribute_list()))
+
+            groups_dict.setdefault((promiscuous_db_id, attribute_list), set()).add(non_promiscuous_db_id)
+
+        for (promiscuous_db_id, attribute_list), non_promiscuous_db_ids in groups_dict.iteritems():
 
             # Get the equivalences of the user entities for this promiscuous external entities
             tables = [ (unification_table, "u"),
@@ -3500,7 +4332,9 @@ class BianaDBaccess(object):
             columns = ["userEntityID", "eE2.externalEntityID"]
 
 	    join_conditions = [ ("eE1.externalEntityID", "=", "u.externalEntityID") ]
-	    fixed_conditions = [ ("eE2.type","!=","relation"), ("eE1.externalDatabaseID","=",non_promiscuous_db_id), ("eE2.externalDatabaseID","=",promiscuous_db_id) ]
+	    fixed_conditions = [ ("eE2.type","!=","relation"),
+                                 ("eE1.externalDatabaseID","IN","(%s)" %(", ".join(map(str,sorted(non_promiscuous_db_ids)))),None),
+                                 ("eE2.externalDatabaseID","=",promiscuous_db_id) ]
 
 	    for attribute_index in xrange(len(attribute_list)):
 		unifying_attribute = attribute_list[attribute_index]
@@ -3516,30 +4350,28 @@ class BianaDBaccess(object):
 		if unifying_attribute.lower()=="pdb":
 		    join_conditions.append( ("a1_%s.chain"%attribute_index,"=","a2_%s.chain"%attribute_index) )
 
-            get_equivalences_query = self.db._get_select_sql_query( tables = tables, 
-                                                                    columns = columns,
-                                                                    join_conditions = join_conditions,
-                                                                    fixed_conditions = fixed_conditions )
-            #print get_equivalences_query
-
-            # Insert them in the user entities table
-
-            # Trying to insert directly, without being in a temporary table.
-            # Probably this is slow... If it is:
-            #     Insert all information in a temporary table
-            #     Disable indices from unification table
-            #     Put all information of temporary table into unification table
-            #     Enable indices from unification table
-            #     Delete temporary table
-            
-            #self.db.insert_db_content( sql_query = "INSERT INTO %s (userEntityID, externalEntityID) (%s)" %(unification_table,
-            #                                                                                                get_equivalences_query ),
-            #                           answer_mode = None )
-
-            self.db.insert_db_content( sql_query = self.db._get_nested_insert_sql_query( table = unification_table,
-                                                                                         columns = ["userEntityID", "externalEntityID"],
-                                                                                         subquery = get_equivalences_query ),
-                                       answer_mode = None)
+            # Only new equivalences: one query restricting each of the external entities (so that indices can be used)
+            if min_external_entity_id is None:
+                restricted_conditions_list = [ [] ]
+            else:
+                restricted_conditions_list = [ [("eE1.externalEntityID",">",min_external_entity_id)],
+                                               [("eE2.externalEntityID",">",min_external_entity_id)] ]
+
+            for restricted_conditions in restricted_conditions_list:
+
+                # DISTINCT, as the same pair can be found through several non promiscuous databases or attribute values
+                get_equivalences_query = self.db._get_select_sql_query( tables = tables, 
+                                                                        columns = columns,
+                                                                        join_conditions = join_conditions,
+                                                                        fixed_conditions = fixed_conditions + restricted_conditions,
+                                                                        distinct_columns = True )
+
+                # Insert them directly in the user entities table (pairs already inserted by another group are ignored)
+                self.db.insert_db_content( sql_query = self.db._get_nested_insert_sql_query( table = unification_table,
+                                                                                             columns = ["userEntityID", "externalEntityID"],
+                                                                                             subquery = get_equivalences_query,
+                                                                                             ignore_duplicates = True ),
+                                           answer_mode = None)
             # Finished
 
 
@@ -3577,6 +4409,12 @@ class BianaDBaccess(object):
         self.db.insert_db_content( self.db._get_delete_sql_query(table = self.biana_database.USER_ENTITY_PROTOCOL_TABLE,
                                                                  fixed_conditions = [("unificationProtocolID","=", unificationProtocolObj.get_id())]) )
 
+        # Drop precalculated relations table
+        relation_table_name = self._get_user_entity_relation_table_name(unification_protocol_name)
+        if relation_table_name is not None:
+            self.db.insert_db_content( self.db._get_drop_sql_query( [relation_table_name] ) )
+        self.user_entity_relation_tables.pop(unification_protocol_name, None)
+
         # Drop unification table
         self.db.insert_db_content( self.db._get_drop_sql_query( [self._get_user_entity_table_name(unification_protocol_name=unification_protocol_name)] ) )
 
@@ -3610,6 +4448,28 @@ class BianaDBaccess(object):
         return unification_protocol_atoms 
 
 
+    def get_equivalent_external_entities_from_list(self, externalEntitiesList, attribute):
+        """
+        Returns an iterator of lists of external entities (from "externalEntitiesList") that share a value of "attribute" (values are compared case insensitively)
+
+        Values are fetched in chunks of external entities (see ConnectorDB.select_db_content_in_chunks)
+        """
+
+        attr_table = self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[attribute.lower()].get_table_name()
+
+        def get_query(external_entity_ids):
+            return self.db._get_select_sql_query( tables = [attr_table],
+                                                  columns = ["externalEntityID","value"],
+                                                  join_conditions = [("externalEntityID","IN","(%s)" %",".join(map(str,external_entity_ids)))] )
+
+        value_to_eE = {}
+        for externalEntityID, value in self.db.select_db_content_in_chunks( get_query, externalEntitiesList, answer_mode = "raw" ):
+            value_to_eE.setdefault(str(value).lower(), []).append(externalEntityID)
+
+        for current_eE_list in value_to_eE.itervalues():
+            if len(current_eE_list) > 1:
+                yield current_eE_list
+
     def get_equivalent_user_entities_from_list(self, userEntitiesList, attribute, protocol_id):
         """
         """
@@ -3643,9 +4503,11 @@ class BianaDBaccess(object):
 
         
 
-    def _get_equivalent_external_entities(self, unification_atom_element):
+    def _get_equivalent_external_entities(self, unification_atom_element, min_external_entity_id=None, restricted_alias="e1"):
         """
         returns the query to obtain the list of equivalent
+
+        If "min_external_entity_id" is not None, only the equivalences in which the external entity "restricted_alias" ("e1" or "e2") is greater than it are returned
         """
         
         actual_atom_element = unification_atom_element
@@ -3704,6 +4566,9 @@ class BianaDBaccess(object):
         fixed_conditions.append( ("e1.externalDatabaseID","=",actual_atom_element.get_externalDatabaseID_A()) )
         fixed_conditions.append( ("e2.externalDatabaseID","=",actual_atom_element.get_externalDatabaseID_B()) )
 
+        if min_external_entity_id is not None:
+            fixed_conditions.append( ("%s.externalEntityID" %restricted_alias,">",min_external_entity_id) )
+
         fixed_conditions.append( ("e1.type","!=","relation") )        #JAVI RECENTLY ADDED. MAY DECREASE UNIFYING EFICIENCY... ADDED TO AVOID ADDING relations to unification. It can also be filtered in a posterior step
         fixed_conditions.append( ("e2.type","!=","relation") )
         
@@ -3846,10 +4711,10 @@ class BianaDBaccess(object):
                                                  answer_mode = "raw" )
                 for current_sequence in data:
                     if( current_sequence[1]=="dna" ):
-                        eE_dict[current_data[0]].add_attribute(BianaObjects.ExternalEntityAttribute(attribute_identifier=current_attribute,
+                        eE_dict[current_sequence[0]].add_attribute(BianaObjects.ExternalEntityAttribute(attribute_identifier=current_attribute,
                                                                                                     value=BianaObjects.DNASequence(sequence=current_sequence[2])))
                     elif( current_sequence[1]=="rna" ):
-                        eE_dict[current_data[0]].add_attribute(BianaObjects.ExternalEntityAttribute(attribute_identifier=current_attribute,
+                        eE_dict[current_sequence[0]].add_attribute(BianaObjects.ExternalEntityAttribute(attribute_identifier=current_attribute,
                                                                                                     value=BianaObjects.RNASequence(sequence=current_sequence[2])))
                         
                 continue
@@ -3968,32 +4833,34 @@ class BianaDBaccess(object):
 	if only_uniques:
 	    fixed_conditions.append(("%s.type" % attr_table, "=", "unique"))
 
-        if attribute_identifier.lower()=="proteinsequence":
-            query = self.db._get_select_sql_query( tables = [attr_table,unif_table,
-                                                             self.biana_database.EXTERNAL_ATTRIBUTES_DESCRIPTION_TABLES["proteinSequence"]],
-                                                   columns = ["userEntityID","UNCOMPRESS(sequence) AS seq"],
-						   fixed_conditions = fixed_conditions,
-                                                   join_conditions = [("userEntityID","IN","(%s)" %",".join(map(str,listUserEntityID))),
-                                                                      ("%s.externalEntityID" %attr_table,"=","%s.externalEntityID" %unif_table),
-                                                                      ("%s.value" %attr_table,"=","%s.sequenceMD5" %self.biana_database.EXTERNAL_ATTRIBUTES_DESCRIPTION_TABLES["proteinSequence"])],
-                                                   group_conditions = ["userEntityID","seq"] )
-        elif attribute_identifier.lower()=="proteinsequenceid":
-            query = self.db._get_select_sql_query( tables = [attr_table,unif_table,
-                                                             self.biana_database.EXTERNAL_ATTRIBUTES_DESCRIPTION_TABLES["proteinSequence"]],
-                                                   columns = ["userEntityID","proteinSequenceID"],
-                                                   join_conditions = [("userEntityID","IN","(%s)" %",".join(map(str,listUserEntityID))),
-                                                                      ("%s.externalEntityID" %attr_table,"=","%s.externalEntityID" %unif_table),
-                                                                      ("%s.value" %attr_table,"=","%s.sequenceMD5" %self.biana_database.EXTERNAL_ATTRIBUTES_DESCRIPTION_TABLES["proteinSequence"])],
-                                                   group_conditions = ["userEntityID","proteinSequenceID"] )
-        else:
-            query = self.db._get_select_sql_query( tables = [attr_table,unif_table],
-                                                   columns = ["userEntityID","value"],
-						   fixed_conditions = fixed_conditions,
-                                                   join_conditions = [("userEntityID","IN","(%s)" %",".join(map(str,listUserEntityID))),
-                                                                      ("%s.externalEntityID" %attr_table,"=","%s.externalEntityID" %unif_table)],
-                                                   group_conditions = ["userEntityID","value"] )
+        # Queries are executed in chunks of user entities (see ConnectorDB.select_db_content_in_chunks)
+        def get_query(user_entity_ids):
+            if attribute_identifier.lower()=="proteinsequence":
+                return self.db._get_select_sql_query( tables = [attr_table,unif_table,
+                                                                self.biana_database.EXTERNAL_ATTRIBUTES_DESCRIPTION_TABLES["proteinSequence"]],
+                                                      columns = ["userEntityID","UNCOMPRESS(sequence) AS seq"],
+                                                      fixed_conditions = fixed_conditions,
+                                                      join_conditions = [("userEntityID","IN","(%s)" %",".join(map(str,user_entity_ids))),
+                                                                         ("%s.externalEntityID" %attr_table,"=","%s.externalEntityID" %unif_table),
+                                                                         ("%s.value" %attr_table,"=","%s.sequenceMD5" %self.biana_database.EXTERNAL_ATTRIBUTES_DESCRIPTION_TABLES["proteinSequence"])],
+                                                      group_conditions = ["userEntityID","seq"] )
+            elif attribute_identifier.lower()=="proteinsequenceid":
+                return self.db._get_select_sql_query( tables = [attr_table,unif_table,
+                                                                self.biana_database.EXTERNAL_ATTRIBUTES_DESCRIPTION_TABLES["proteinSequence"]],
+                                                      columns = ["userEntityID","proteinSequenceID"],
+                                                      join_conditions = [("userEntityID","IN","(%s)" %",".join(map(str,user_entity_ids))),
+                                                                         ("%s.externalEntityID" %attr_table,"=","%s.externalEntityID" %unif_table),
+                                                                         ("%s.value" %attr_table,"=","%s.sequenceMD5" %self.biana_database.EXTERNAL_ATTRIBUTES_DESCRIPTION_TABLES["proteinSequence"])],
+                                                      group_conditions = ["userEntityID","proteinSequenceID"] )
+            else:
+                return self.db._get_select_sql_query( tables = [attr_table,unif_table],
+                                                      columns = ["userEntityID","value"],
+                                                      fixed_conditions = fixed_conditions,
+                                                      join_conditions = [("userEntityID","IN","(%s)" %",".join(map(str,user_entity_ids))),
+                                                                         ("%s.externalEntityID" %attr_table,"=","%s.externalEntityID" %unif_table)],
+                                                      group_conditions = ["userEntityID","value"] )
 
-        data = self.db.select_db_content( query, answer_mode = "raw" )
+        data = self.db.select_db_content_in_chunks( get_query, listUserEntityID, answer_mode = "raw" )
 
         return_dict = {}
 
@@ -4013,16 +4880,16 @@ class BianaDBaccess(object):
 
                 columns = ["userEntityID","transferred.value"]
 
-                join_conditions = [("userEntityID","IN","(%s)" %",".join(map(str,listUserEntityID))),
-                                   ("%s.externalEntityID" %unif_table,"=","key2.externalEntityID"),
+                join_conditions = [("%s.externalEntityID" %unif_table,"=","key2.externalEntityID"),
                                    ("key1.value","=","key2.value"),
                                    ("transferred.externalEntityID","=","key1.externalEntityID")]
 
-                query = self.db._get_select_sql_query( tables = tables,
-                                                       columns = columns,
-                                                       join_conditions = join_conditions )
+                def get_transfer_query(user_entity_ids):
+                    return self.db._get_select_sql_query( tables = tables,
+                                                          columns = columns,
+                                                          join_conditions = [("userEntityID","IN","(%s)" %",".join(map(str,user_entity_ids)))] + join_conditions )
 
-                data = self.db.select_db_content( query, answer_mode = "raw" )
+                data = self.db.select_db_content_in_chunks( get_transfer_query, listUserEntityID, answer_mode = "raw" )
 
                 for current_data in data:
                     return_dict.setdefault(current_data[0],[]).append(str(current_data[1]))
@@ -4072,8 +4939,29 @@ class BianaDBaccess(object):
                                                                          fixed_conditions = [("userEntityID","=",userEntityID)] ),
                                           answer_mode = "list" )
 
+    def _get_dict_eE_for_uE_list(self, unification_protocol_name, userEntityID_list):
+        """
+        Returns a dictionary { userEntityID: list of externalEntityIDs } with the external entities of the user entities in "userEntityID_list"
 
-    def get_user_entity_relations_by_sharing_attributes(self, unification_protocol_name, userEntityID_list, listAttributes, limit_to_userEntityID_list=False, attribute_restrictions=[], negative_attribute_restrictions=[], ontology_expansion_level=None):
+        Queries are executed in chunks of user entities (see ConnectorDB.select_db_content_in_chunks)
+        """
+
+        unif_table = self._get_user_entity_table_name(unification_protocol_name=unification_protocol_name)
+
+        def get_query(user_entity_ids):
+            return self.db._get_select_sql_query( tables = [unif_table],
+                                                  columns = ["userEntityID","externalEntityID"],
+                                                  join_conditions = [("userEntityID","IN","(%s)" %",".join(map(str,user_entity_ids)))] )
+
+        return_dict = {}
+
+        for userEntityID, externalEntityID in self.db.select_db_content_in_chunks( get_query, userEntityID_list, answer_mode = "raw" ):
+            return_dict.setdefault(userEntityID,[]).append(externalEntityID)
+
+        return return_dict
+
+
+    def get_user_entity_relations_by_sharing_attributes(self, unification_protocol_name, userEntityID_list, listAttributes, limit_to_userEntityID_list=False, attribute_restrictions=[], negative_attribute_restrictions=[], ontology_expansion_level=None, use_inverted_index=True, max_user_entities_by_value=None):
         """
         Returns a list of relations between user entities, in which the share attributes listed in listAttributes
         
@@ -4082,6 +4970,11 @@ class BianaDBaccess(object):
         "expand_ontology_attributes": Boolean to specify if ontology attributes should be expanded to lower levels
 
         "ontology_expansion_level": Dictionary to specigy the category level to which should be considered equivalent two ontology attributes (for example, family level in scop)
+
+        "use_inverted_index": If True, relations are built in the client from the attribute values of the user entities (see _get_user_entity_relations_by_sharing_attributes_index)
+                              instead of joining the attribute tables in the database. Parameterizable attributes (such as proteinsequence with blast parameters) always use the database join
+
+        "max_user_entities_by_value": Values shared by more user entities than this are ignored (only used with the inverted index). If None, all values are used
         """
 
         # TODO: APPLY "ontology_expansion_level" attribute
@@ -4089,6 +4982,15 @@ class BianaDBaccess(object):
         if len(userEntityID_list)==0:
             return []
 
+        if use_inverted_index and len([ x for current_attribute_group in listAttributes for x in current_attribute_group if len(x[1])>0 ]) == 0:
+            return self._get_user_entity_relations_by_sharing_attributes_index( unification_protocol_name = unification_protocol_name,
+                                                                               userEntityID_list = userEntityID_list,
+                                                                               listAttributes = listAttributes,
+                                                                               limit_to_userEntityID_list = limit_to_userEntityID_list,
+                                                                               attribute_restrictions = attribute_restrictions,
+                                                                               negative_attribute_restrictions = negative_attribute_restrictions,
+                                                                               max_user_entities_by_value = max_user_entities_by_value )
+
         equivalent_uE_pair_queries = []
 
         for current_attribute_group in listAttributes:
@@ -4132,6 +5034,128 @@ class BianaDBaccess(object):
 
         return new_results
 
+    def _get_user_entity_relations_by_sharing_attributes_index(self, unification_protocol_name, userEntityID_list, listAttributes, limit_to_userEntityID_list=False, attribute_restrictions=[], negative_attribute_restrictions=[], max_user_entities_by_value=None):
+        """
+        Same as get_user_entity_relations_by_sharing_attributes, but relations are built in the client
+
+        For each attribute, the values of the user entities are fetched (together with the rest of user entities having these values, unless "limit_to_userEntityID_list")
+        and indexed by value. Relations are obtained from the user entities of each value. Values with more than "max_user_entities_by_value" user entities are ignored
+        """
+
+        user_entities_set = set([ int(x) for x in userEntityID_list ])
+
+        # Relations of each attribute, shared between attribute groups
+        attribute_relations = {}
+        relations = set()
+
+        for current_attribute_group in listAttributes:
+            group_relations = None
+            for (current_attribute, parameter_and_value_list) in current_attribute_group:
+                if not attribute_relations.has_key(current_attribute.lower()):
+                    value_index = self._get_user_entity_values_index( unification_protocol_name = unification_protocol_name,
+                                                                      userEntityID_list = user_entities_set,
+                                                                      attribute_identifier = current_attribute,
+                                                                      limit_to_userEntityID_list = limit_to_userEntityID_list )
+                    current_relations = set()
+                    for current_user_entities in value_index.itervalues():
+                        if max_user_entities_by_value is not None and len(current_user_entities) > max_user_entities_by_value:
+                            continue
+                        for userEntityID1 in current_user_entities & user_entities_set:
+                            for userEntityID2 in current_user_entities:
+                                if userEntityID1 != userEntityID2:
+                                    current_relations.add((userEntityID1,userEntityID2))
+                    attribute_relations[current_attribute.lower()] = current_relations
+                    del value_index
+                if group_relations is None:
+                    group_relations = set(attribute_relations[current_attribute.lower()])
+                else:
+                    group_relations &= attribute_relations[current_attribute.lower()]
+            if group_relations is not None:
+                relations.update(group_relations)
+
+        del attribute_relations
+
+        if len(relations)==0:
+            return []
+
+        uE2_set = set([ x[1] for x in relations ])
+
+        # Apply restrictions
+        uE2_set = self._filter_user_entities_by_restrictions( unification_protocol_name = unification_protocol_name,
+                                                              userEntityID_list = uE2_set,
+                                                              attribute_restrictions = attribute_restrictions,
+                                                              negative_attribute_restrictions = negative_attribute_restrictions )
+
+        uE2_types_dict = self.get_user_entity_type(unification_protocol_name, uE2_set)
+
+        return [ (userEntityID1, userEntityID2, uE2_types_dict[userEntityID2]) for (userEntityID1, userEntityID2) in relations if uE2_types_dict.has_key(userEntityID2) ]
+
+    def _filter_user_entities_by_restrictions(self, unification_protocol_name, userEntityID_list, attribute_restrictions=[], negative_attribute_restrictions=[]):
+        """
+        Returns the set of user entities in "userEntityID_list" that fulfill the attribute restrictions and the negative attribute restrictions
+        """
+
+        if len(attribute_restrictions)==0 and len(negative_attribute_restrictions)==0:
+            return set(userEntityID_list)
+
+        unif_table = self._get_user_entity_table_name(unification_protocol_name=unification_protocol_name)
+
+        def get_query(user_entity_ids):
+            query = self.db._get_select_sql_query( tables = [unif_table],
+                                                   columns = ["userEntityID"],
+                                                   join_conditions = [("userEntityID","IN","(%s)" %",".join(map(str,user_entity_ids)))],
+                                                   group_conditions = ["userEntityID"] )
+            restricted_query = self._apply_restrictions_to_query( query = query,
+                                                                  unification_protocol_name = unification_protocol_name,
+                                                                  attribute_restrictions = attribute_restrictions,
+                                                                  column_name_to_restrict="userEntityID" )
+            return self._apply_negative_restrictions_to_query( query = restricted_query,
+                                                               unification_protocol_name = unification_protocol_name,
+                                                               column_name_to_restrict="userEntityID",
+                                                               negative_attribute_restrictions = negative_attribute_restrictions )
+
+        return set( self.db.select_db_content_in_chunks( get_query, userEntityID_list, answer_mode = "list" ) )
+
+    def _get_user_entity_values_index(self, unification_protocol_name, userEntityID_list, attribute_identifier, limit_to_userEntityID_list=False):
+        """
+        Returns a dictionary { value: set of userEntityIDs } with the values of "attribute_identifier" of the user entities in "userEntityID_list"
+
+        If "limit_to_userEntityID_list" is False, the sets include all the user entities having the value, not only the ones in "userEntityID_list".
+        Values are compared case insensitively (keys are lower cased values)
+        """
+
+        unif_table = self._get_user_entity_table_name(unification_protocol_name=unification_protocol_name)
+        attr_table = self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[attribute_identifier.lower()].get_table_name()
+
+        def get_user_entities_query(user_entity_ids):
+            return self.db._get_select_sql_query( tables = [(unif_table,"u"), (attr_table,"a")],
+                                                  columns = ["u.userEntityID","a.value"],
+                                                  join_conditions = [("u.userEntityID","IN","(%s)" %",".join(map(str,user_entity_ids))),
+                                                                     ("u.externalEntityID","=","a.externalEntityID")],
+                                                  group_conditions = ["u.userEntityID","a.value"] )
+
+        def get_values_query(values):
+            return self.db._get_select_sql_query( tables = [(unif_table,"u"), (attr_table,"a")],
+                                                  columns = ["u.userEntityID","a.value"],
+                                                  join_conditions = [("a.value","IN","(\"%s\")" %"\",\"".join([ x.replace('\\','\\\\').replace('"','\\"') for x in values ])),
+                                                                     ("u.externalEntityID","=","a.externalEntityID")],
+                                                  group_conditions = ["u.userEntityID","a.value"] )
+
+        value_index = {}
+        values = set()
+
+        for userEntityID, value in self.db.select_db_content_in_chunks( get_user_entities_query, userEntityID_list, answer_mode = "raw" ):
+            value_index.setdefault(str(value).lower(), set()).add(userEntityID)
+            values.add(str(value))
+
+        if not limit_to_userEntityID_list and len(values)>0:
+            for userEntityID, value in self.db.select_db_content_in_chunks( get_values_query, values, answer_mode = "raw" ):
+                current_user_entities = value_index.get(str(value).lower())
+                if current_user_entities is not None:
+                    current_user_entities.add(userEntityID)
+
+        return value_index
+
     def _get_list_external_entities_for_user_entities(self, unification_protocol_name, userEntityID_list):
         
         tables = [ "%s u" %(self._get_user_entity_table_name(unification_protocol_name=unification_protocol_name) ) ]
@@ -4286,6 +5310,19 @@ class BianaDBaccess(object):
         if len(userEntityID_list)==0:
             return []
 
+        relation_table_name = self._get_user_entity_relation_table_name(unification_protocol_name)
+        if relation_table_name is not None:
+            return self._get_precalculated_user_entity_relations( relation_table_name = relation_table_name,
+                                                                  unification_protocol_name = unification_protocol_name,
+                                                                  userEntityID_list = userEntityID_list,
+                                                                  attribute_restrictions = attribute_restrictions,
+                                                                  negative_attribute_restrictions = negative_attribute_restrictions,
+                                                                  listRelationType = listRelationType,
+                                                                  dictRelationAttributeRestriction = dictRelationAttributeRestriction,
+                                                                  use_self_relations = use_self_relations,
+                                                                  limit_to_userEntityID_list = limit_to_userEntityID_list,
+                                                                  use_nested_relations = use_nested_relations )
+
         if use_nested_relations:
             PARTICIPANT_TABLE = self.biana_database.EXTENDED_EXTERNAL_ENTITY_RELATION_PARTICIPANT_TABLE.get_table_name()
         else:
@@ -4306,7 +5343,7 @@ class BianaDBaccess(object):
 
         #group_conditions = ["u1.userEntityID","u2.userEntityID","r.externalEntityRelationID, r.type, e.type"]
 
-        fixed_conditions = [("u1.userEntityID","IN","(%s)" %",".join([ str(x) for x in userEntityID_list]),None)]
+        fixed_conditions = []
         join_conditions = [("p1.externalEntityID","=","u1.externalEntityID"),
                            ("p1.externalEntityRelationID","=","p2.externalEntityRelationID"),
                            ("p2.externalEntityID","=","u2.externalEntityID"),
@@ -4340,84 +5377,122 @@ class BianaDBaccess(object):
         if len(listRelationType) > 0:
             fixed_conditions.append(("r.type","IN","(\"%s\")" % "\",\"".join([ relationType for relationType in listRelationType]),None ))                
                 
-        # Get the interacting user entities
-        query = self.db._get_select_sql_query( tables = tables,
-                                               columns = columns,
-                                               fixed_conditions = fixed_conditions, 
-                                               join_conditions = join_conditions,
-                                               distinct_columns = True )
-                                               # group_conditions = group_conditions )
+        # Get the interacting user entities (queries are executed in chunks of user entities, see ConnectorDB.select_db_content_in_chunks)
+        def get_query(user_entity_ids):
+            query = self.db._get_select_sql_query( tables = tables,
+                                                   columns = columns,
+                                                   fixed_conditions = [("u1.userEntityID","IN","(%s)" %",".join([ str(x) for x in user_entity_ids]),None)] + fixed_conditions, 
+                                                   join_conditions = join_conditions,
+                                                   distinct_columns = True )
+                                                   # group_conditions = group_conditions )
 
 
-        query = self._apply_restrictions_to_query( query = query,
-                                                   unification_protocol_name = unification_protocol_name,
-                                                   attribute_restrictions= attribute_restrictions,
-                                                   column_name_to_restrict="userEntityID2" )
-                                                   #column_name_to_restrict="userEntityID" )
+            query = self._apply_restrictions_to_query( query = query,
+                                                       unification_protocol_name = unification_protocol_name,
+                                                       attribute_restrictions= attribute_restrictions,
+                                                       column_name_to_restrict="userEntityID2" )
+                                                       #column_name_to_restrict="userEntityID" )
 
-        query = self._apply_negative_restrictions_to_query( query = query,
-                                                            unification_protocol_name = unification_protocol_name,
-                                                            negative_attribute_restrictions = negative_attribute_restrictions,
-                                                            column_name_to_restrict="userEntityID2" )
-                                                            #column_name_to_restrict="userEntityID" )
+            query = self._apply_negative_restrictions_to_query( query = query,
+                                                                unification_protocol_name = unification_protocol_name,
+                                                                negative_attribute_restrictions = negative_attribute_restrictions,
+                                                                column_name_to_restrict="userEntityID2" )
+                                                                #column_name_to_restrict="userEntityID" )
+            return query
 
 
         #print query
         
-        interacting_uE = list(self.db.select_db_content( query, answer_mode = "raw" ))
+        interacting_uE = self.db.select_db_content_in_chunks( get_query, userEntityID_list, answer_mode = "raw" )
 
         if( use_self_relations is True ):
 
-            # Get self interactions
-            fixed_conditions = [("u1.userEntityID","IN","(%s)" %",".join([ str(x) for x in userEntityID_list]),None)]
+            interacting_uE.extend( self._get_user_entity_self_relations( unification_protocol_name = unification_protocol_name,
+                                                                         userEntityID_list = userEntityID_list,
+                                                                         attribute_restrictions = attribute_restrictions,
+                                                                         negative_attribute_restrictions = negative_attribute_restrictions,
+                                                                         listRelationType = listRelationType,
+                                                                         dictRelationAttributeRestriction = dictRelationAttributeRestriction,
+                                                                         use_nested_relations = use_nested_relations ) )
 
-            if len(listRelationType) > 0:
-                fixed_conditions.append(("r.type","IN","(\"%s\")" % "\",\"".join([ relationType for relationType in listRelationType]),None ))
+        #print len(interacting_uE)
 
-            tables = ["%s u1" %(self._get_user_entity_table_name(unification_protocol_name=unification_protocol_name)),
-                      "%s p1" %PARTICIPANT_TABLE,
-                      "%s c" %self.biana_database.EXTERNAL_ENTITY_RELATION_PARTICIPANT_ATTRIBUTE_TABLES_DICT["cardinality"].get_table_name(),
-                      "%s r" %(self.biana_database.EXTERNAL_ENTITY_RELATION_TABLE.get_table_name()),
-		      "%s e" %(self.biana_database.EXTERNAL_ENTITY_TABLE.get_table_name())]
+        return interacting_uE
 
-            columns = ["u1.userEntityID","r.externalEntityRelationID", ("r.type", "type"), ("e.type", "etype") ]
 
+    def _get_user_entity_self_relations(self, unification_protocol_name, userEntityID_list, attribute_restrictions = [], negative_attribute_restrictions = [], listRelationType=[], dictRelationAttributeRestriction={}, use_nested_relations=True):
+        """
+        Returns the self relations (participants with cardinality greater than 1) of the user entities in "userEntityID_list", in the same format as get_user_entity_relations
+        """
 
-            join_conditions = [("p1.externalEntityID","=","u1.externalEntityID"),
-                               ("c.externalEntityRelationParticipantID","=","p1.externalEntityRelationParticipantID"),
-                               ("c.value",">",1),
-                               ("r.externalEntityRelationID","=","p1.externalEntityRelationID"), 
-			       ("p1.externalEntityID", "=", "e.externalEntityID")]
+        if len(userEntityID_list)==0:
+            return []
+
+        relation_table_name = self._get_user_entity_relation_table_name(unification_protocol_name)
+        if relation_table_name is not None:
+            return self._get_precalculated_user_entity_relations( relation_table_name = relation_table_name,
+                                                                  unification_protocol_name = unification_protocol_name,
+                                                                  userEntityID_list = userEntityID_list,
+                                                                  attribute_restrictions = attribute_restrictions,
+                                                                  negative_attribute_restrictions = negative_attribute_restrictions,
+                                                                  listRelationType = listRelationType,
+                                                                  dictRelationAttributeRestriction = dictRelationAttributeRestriction,
+                                                                  use_nested_relations = use_nested_relations,
+                                                                  only_self_relations = True )
+
+        if use_nested_relations:
+            PARTICIPANT_TABLE = self.biana_database.EXTENDED_EXTERNAL_ENTITY_RELATION_PARTICIPANT_TABLE.get_table_name()
+        else:
+            PARTICIPANT_TABLE = self.biana_database.EXTERNAL_ENTITY_RELATION_PARTICIPANT_TABLE.get_table_name()
+
+        # Get self interactions
+        fixed_conditions = []
+
+        if len(listRelationType) > 0:
+            fixed_conditions.append(("r.type","IN","(\"%s\")" % "\",\"".join([ relationType for relationType in listRelationType]),None ))
+
+        tables = ["%s u1" %(self._get_user_entity_table_name(unification_protocol_name=unification_protocol_name)),
+                  "%s p1" %PARTICIPANT_TABLE,
+                  "%s c" %self.biana_database.EXTERNAL_ENTITY_RELATION_PARTICIPANT_ATTRIBUTE_TABLES_DICT["cardinality"].get_table_name(),
+                  "%s r" %(self.biana_database.EXTERNAL_ENTITY_RELATION_TABLE.get_table_name()),
+		  "%s e" %(self.biana_database.EXTERNAL_ENTITY_TABLE.get_table_name())]
 
+        columns = ["u1.userEntityID","r.externalEntityRelationID", ("r.type", "type"), ("e.type", "etype") ]
 
+
+        join_conditions = [("p1.externalEntityID","=","u1.externalEntityID"),
+                           ("c.externalEntityRelationParticipantID","=","p1.externalEntityRelationParticipantID"),
+                           ("c.value",">",1),
+                           ("r.externalEntityRelationID","=","p1.externalEntityRelationID"), 
+			   ("p1.externalEntityID", "=", "e.externalEntityID")]
+
+
+        def get_self_query(user_entity_ids):
             query = self.db._get_select_sql_query( tables = tables,
                                                    columns = columns,
-                                                   fixed_conditions =  fixed_conditions,
+                                                   fixed_conditions = [("u1.userEntityID","IN","(%s)" %",".join([ str(x) for x in user_entity_ids]),None)] + fixed_conditions,
                                                    join_conditions = join_conditions )
-            
+        
             query = self._apply_relation_restrictions_to_query( query = query,
                                                                 attribute_restrictions_dict = dictRelationAttributeRestriction, 
                                                                 column_name_to_restrict="externalEntityRelationID" )
-            
+        
 
             query = self._apply_restrictions_to_query( query = query,
                                                        unification_protocol_name = unification_protocol_name,
                                                        attribute_restrictions= attribute_restrictions,
                                                        column_name_to_restrict="userEntityID" )
-            
+        
             query = self._apply_negative_restrictions_to_query( query = query,
                                                                 unification_protocol_name = unification_protocol_name,
                                                                 negative_attribute_restrictions = negative_attribute_restrictions,
                                                                 column_name_to_restrict="userEntityID" )
+            return query
 
-            #print query
-
-            #interacting_uE.extend([ (x,x,y,z,"self_type") for x,y,z in self.db.select_db_content( query, answer_mode="raw" )])
-            interacting_uE.extend([ (x,x,y,z,t) for x,y,z,t in self.db.select_db_content( query, answer_mode="raw" )])
+        #print query
 
-        #print len(interacting_uE)
-
-        return interacting_uE
+        #interacting_uE.extend([ (x,x,y,z,"self_type") for x,y,z in self.db.select_db_content( query, answer_mode="raw" )])
+        return [ (x,x,y,z,t) for x,y,z,t in self.db.select_db_content_in_chunks( get_self_query, userEntityID_list, answer_mode="raw" ) ]
 
 
     def NEWget_user_entity_relations(self, unification_protocol_name, userEntityID_list, attribute_restrictions = [], negative_attribute_restrictions = [], listRelationType=[], dictRelationAttributeRestriction={}, use_self_relations=True, limit_to_userEntityID_list=False, use_nested_relations=True):
@@ -4529,6 +5604,17 @@ class BianaDBaccess(object):
         
         """
 
+        relation_table_name = self._get_user_entity_relation_table_name(unification_protocol_name)
+        if relation_table_name is not None:
+            return self._get_precalculated_user_entity_relations( relation_table_name = relation_table_name,
+                                                                  unification_protocol_name = unification_protocol_name,
+                                                                  attribute_restrictions = attribute_restrictions,
+                                                                  negative_attribute_restrictions = negative_attribute_restrictions,
+                                                                  listRelationType = listRelationType,
+                                                                  dictRelationAttributeRestriction = dictRelationAttributeRestriction,
+                                                                  use_self_relations = use_self_relations,
+                                                                  use_nested_relations = use_nested_relations )
+
         if use_nested_relations:
             PARTICIPANT_TABLE = self.biana_database.EXTENDED_EXTERNAL_ENTITY_RELATION_PARTICIPANT_TABLE.get_table_name()
         else:
@@ -4643,15 +5729,566 @@ class BianaDBaccess(object):
 
 
 
-    def get_user_entity_relations(self, unification_protocol_name, userEntityID_list, attribute_restrictions = [], negative_attribute_restrictions = [], listRelationType=[], dictRelationAttributeRestriction={}, use_self_relations=True, limit_to_userEntityID_list=False, use_nested_relations=True):
+    def get_user_entity_relations(self, unification_protocol_name, userEntityID_list, attribute_restrictions = [], negative_attribute_restrictions = [], listRelationType=[], dictRelationAttributeRestriction={}, use_self_relations=True, limit_to_userEntityID_list=False, use_nested_relations=True, adjacency_cache=None):
+        """
+        Returns the list of relations (userEntityID1, userEntityID2, externalEntityRelationID, type, etype) where the user entities in "userEntityID_list" are involved
+
+        "adjacency_cache" is an optional query_cache.QueryResultCache kept by the caller (i.e. a session) to store the relations of each user entity by relation type
+        (see _get_cached_user_entity_relations). It is not used when there are relation attribute restrictions
+        """
+        if adjacency_cache is not None and len(dictRelationAttributeRestriction)==0:
+            return self._get_cached_user_entity_relations(unification_protocol_name, userEntityID_list, adjacency_cache, attribute_restrictions, negative_attribute_restrictions, listRelationType, use_self_relations, limit_to_userEntityID_list, use_nested_relations)
 	#return self.NEWget_user_entity_relations(unification_protocol_name, userEntityID_list, attribute_restrictions, negative_attribute_restrictions, listRelationType, dictRelationAttributeRestriction, use_self_relations, limit_to_userEntityID_list, use_nested_relations)
 	return self.OLDget_user_entity_relations(unification_protocol_name, userEntityID_list, attribute_restrictions, negative_attribute_restrictions, listRelationType, dictRelationAttributeRestriction, use_self_relations, limit_to_userEntityID_list, use_nested_relations)
 
     
 
+    def _get_cached_user_entity_relations(self, unification_protocol_name, userEntityID_list, adjacency_cache, attribute_restrictions = [], negative_attribute_restrictions = [], listRelationType=[], use_self_relations=True, limit_to_userEntityID_list=False, use_nested_relations=True):
+        """
+        Same as get_user_entity_relations (without relation attribute restrictions), but using "adjacency_cache"
+
+        The cache stores, with the key (unification protocol, use_nested_relations, relation type, userEntityID), a tuple (relations, self relations) with the
+        partners of the user entity (without restrictions). Only the user entities and relation types not in the cache are queried, and restrictions are applied to the cached relations
+
+        When relations are limited to "userEntityID_list" (i.e. the last level of a network) and some user entities are not in the cache, the limited query is used instead
+        (it is much faster than fetching all the partners), and its partial lists of partners are not cached
+        """
+
+        if len(userEntityID_list)==0:
+            return []
+
+        if len(listRelationType) > 0:
+            relation_types = set([ x.lower() for x in listRelationType ])
+        else:
+            relation_types = set(self.get_valid_external_entity_relation_types())
+
+        cache_key = (str(unification_protocol_name).lower(), use_nested_relations)
+
+        # Only numeric identifiers can be user entities in the database
+        user_entity_ids = set([ int(x) for x in userEntityID_list if str(x).isdigit() ])
+
+        # Relations of the user entities of this call { (relation type, userEntityID): (relations, self relations) }
+        adjacency = {}
+
+        # User entities not in the cache are grouped by the relation types they need, so that they are queried together
+        missing_dict = {}
+        for current_uE in user_entity_ids:
+            missing_types = []
+            for current_type in relation_types:
+                cached = adjacency_cache.get(cache_key + (current_type, current_uE), "get_user_entity_relations")
+                if cached is None:
+                    missing_types.append(current_type)
+                else:
+                    adjacency[(current_type, current_uE)] = cached
+            if len(missing_types) > 0:
+                missing_dict.setdefault(tuple(sorted(missing_types)), []).append(current_uE)
+
+        if limit_to_userEntityID_list is True and len(missing_dict) > 0:
+            return self.OLDget_user_entity_relations( unification_protocol_name = unification_protocol_name,
+                                                      userEntityID_list = userEntityID_list,
+                                                      attribute_restrictions = attribute_restrictions,
+                                                      negative_attribute_restrictions = negative_attribute_restrictions,
+                                                      listRelationType = listRelationType,
+                                                      use_self_relations = use_self_relations,
+                                                      limit_to_userEntityID_list = True,
+                                                      use_nested_relations = use_nested_relations )
+
+        for missing_types, missing_user_entities in missing_dict.iteritems():
+            for current_type in missing_types:
+                for current_uE in missing_user_entities:
+                    adjacency[(current_type, current_uE)] = ([], [])
+
+            for (uE1, uE2, eErID, relation_type, partner_type) in self.OLDget_user_entity_relations( unification_protocol_name = unification_protocol_name,
+                                                                                                    userEntityID_list = missing_user_entities,
+                                                                                                    listRelationType = missing_types,
+                                                                                                    use_self_relations = False,
+                                                                                                    use_nested_relations = use_nested_relations ):
+                adjacency.setdefault((relation_type.lower(), uE1), ([], []))[0].append((uE2, eErID, relation_type, partner_type))
+
+            for (uE1, uE2, eErID, relation_type, partner_type) in self._get_user_entity_self_relations( unification_protocol_name = unification_protocol_name,
+                                                                                                       userEntityID_list = missing_user_entities,
+                                                                                                       listRelationType = missing_types,
+                                                                                                       use_nested_relations = use_nested_relations ):
+                adjacency.setdefault((relation_type.lower(), uE1), ([], []))[1].append((uE2, eErID, relation_type, partner_type))
+
+            for current_type in missing_types:
+                for current_uE in missing_user_entities:
+                    adjacency_cache.put(cache_key + (current_type, current_uE), adjacency[(current_type, current_uE)])
+
+        interacting_uE = []
+        for current_uE in user_entity_ids:
+            for current_type in relation_types:
+                (relations, self_relations) = adjacency[(current_type, current_uE)]
+                interacting_uE.extend([ (current_uE,) + x for x in relations ])
+                if use_self_relations is True:
+                    interacting_uE.extend([ (current_uE,) + x for x in self_relations ])
+
+        # Restrictions are applied to the partners
+        if limit_to_userEntityID_list is True:
+            interacting_uE = [ x for x in interacting_uE if x[1] in user_entity_ids ]
+
+        if len(attribute_restrictions)>0 or len(negative_attribute_restrictions)>0:
+            valid_user_entities = self._filter_user_entities_by_restrictions( unification_protocol_name = unification_protocol_name,
+                                                                              userEntityID_list = set([ x[1] for x in interacting_uE ]),
+                                                                              attribute_restrictions = attribute_restrictions,
+                                                                              negative_attribute_restrictions = negative_attribute_restrictions )
+            interacting_uE = [ x for x in interacting_uE if x[1] in valid_user_entities ]
+
+        return interacting_uE
+
+
+    def create_user_entity_relations_table(self, unification_protocol_name, replace=True):
+        """
+        Precalculates and stores in database the relations between the user entities of a unification protocol
+
+        Once precalculated, get_user_entity_relations and get_relations read the relations from this table instead of joining the unification and
+        participant tables, and update_user_entities keeps it up to date
+
+        If "replace" is False and the relations of the protocol have already been precalculated, nothing is done
+        """
+
+        self._load_available_unification_protocols()
+
+        unification_protocol_name = str(unification_protocol_name).lower()
+
+        if self.available_unification_protocols.get(unification_protocol_name) is None:
+            raise ValueError("ERROR. User entity relations can only be precalculated for an existing unification protocol")
+
+        if replace is False and self._get_user_entity_relation_table_name(unification_protocol_name) is not None:
+            return
+
+        relation_table = copy.deepcopy(self.biana_database.USER_ENTITY_RELATION_TABLE)  # It is necessary to do a copy because we are going to change its name...
+        relation_table.set_table_name(new_name = "%s%s" %(relation_table.get_table_name(), self.available_unification_protocols[unification_protocol_name].get_id()))
+
+        print "Precalculating user entity relations in %s" %relation_table.get_table_name()
+
+        self.db.insert_db_content( "DROP TABLE IF EXISTS %s" %relation_table.get_table_name(), answer_mode = None )
+        self.db.insert_db_content( relation_table.create_mysql_query(), answer_mode = None )
+
+        self.db._disable_indices( table_list = [relation_table] )
+
+        self._insert_user_entity_relations( unification_protocol_name = unification_protocol_name,
+                                            relation_table_name = relation_table.get_table_name() )
+
+        self.db._enable_indices( table_list = [relation_table] )
+
+        self.user_entity_relation_tables[unification_protocol_name] = relation_table.get_table_name()
+
+        return
+
+
+    def _get_user_entity_relation_table_name(self, unification_protocol_name):
+        """
+        Returns the name of the table with the precalculated user entity relations of the protocol, or None if they have not been precalculated
+        """
+
+        unification_protocol_name = str(unification_protocol_name).lower()
+
+        if not self.user_entity_relation_tables.has_key(unification_protocol_name):
+
+            self._load_available_unification_protocols()
+
+            table_name = None
+
+            if self.available_unification_protocols.get(unification_protocol_name) is not None:
+                table_name = "%s%s" %(self.biana_database.USER_ENTITY_RELATION_TABLE.get_table_name(), self.available_unification_protocols[unification_protocol_name].get_id())
+                if len(self.db.select_db_content( "SHOW TABLES LIKE '%s'" %table_name, answer_mode = "list" )) == 0:
+                    table_name = None
+
+            self.user_entity_relation_tables[unification_protocol_name] = table_name
+
+        return self.user_entity_relation_tables[unification_protocol_name]
+
+
+    def _insert_user_entity_relations(self, unification_protocol_name, relation_table_name, user_entity_ids=None, max_list_size=10000):
+        """
+        Inserts into "relation_table_name" the relations between the user entities of the protocol
+
+        If "user_entity_ids" is not None, only the relations in which any of these user entities participates are inserted
+        """
+
+        for query in self._get_user_entity_relation_queries( unification_protocol_name = unification_protocol_name,
+                                                             user_entity_ids = user_entity_ids,
+                                                             max_list_size = max_list_size ):
+
+            self.db.insert_db_content( self.db._get_nested_insert_sql_query( table = relation_table_name,
+                                                                             columns = ["userEntityID1", "userEntityID2", "externalEntityRelationID", "type", "etype", "externalDatabaseID", "nested", "self_relation"],
+                                                                             subquery = query,
+                                                                             ignore_duplicates = True ),
+                                       answer_mode = None )
+
+        return
+
+
+    def _get_user_entity_relation_queries(self, unification_protocol_name, user_entity_ids=None, max_list_size=10000):
+        """
+        Returns the list of select queries that obtain the relations between the user entities of the protocol, with the columns of the precalculated
+        relations table (userEntityID1, userEntityID2, externalEntityRelationID, type, etype, externalDatabaseID, nested, self_relation)
+
+        Queries must be used in order: relations between direct participants are returned first, so that they are kept as not nested when duplicates are ignored
+
+        If "user_entity_ids" is not None, only the relations in which any of these user entities participates are obtained
+        """
+
+        unif_table = self._get_user_entity_table_name(unification_protocol_name=unification_protocol_name)
+
+        queries = []
+
+        # Conditions to restrict the user entities. Relations are searched for each of the two participants
+        if user_entity_ids is None:
+            restrictions_list = [ (None, None) ]
+        else:
+            user_entity_ids = list(user_entity_ids)
+            restrictions_list = []
+            for current_index in xrange(0, len(user_entity_ids), max_list_size):
+                user_entities_str = "(%s)" %",".join(map(str,user_entity_ids[current_index:current_index+max_list_size]))
+                restrictions_list.append( ("u1", user_entities_str) )
+                restrictions_list.append( ("u2", user_entities_str) )
+
+        for (PARTICIPANT_TABLE, nested) in [ (self.biana_database.EXTERNAL_ENTITY_RELATION_PARTICIPANT_TABLE.get_table_name(), 0),
+                                             (self.biana_database.EXTENDED_EXTERNAL_ENTITY_RELATION_PARTICIPANT_TABLE.get_table_name(), 1) ]:
+
+            for (restricted_alias, user_entities_str) in restrictions_list:
+
+                if restricted_alias is None:
+                    fixed_conditions = []
+                else:
+                    fixed_conditions = [ ("%s.userEntityID" %restricted_alias,"IN",user_entities_str,None) ]
+
+                # Relations between different participants
+                queries.append( self.db._get_select_sql_query( tables = [ (unif_table,"u1"),
+                                                                          (PARTICIPANT_TABLE,"p1"),
+                                                                          (unif_table,"u2"),
+                                                                          (PARTICIPANT_TABLE,"p2"),
+                                                                          (self.biana_database.EXTERNAL_ENTITY_RELATION_TABLE,"r"),
+                                                                          (self.biana_database.EXTERNAL_ENTITY_TABLE,"e"),
+                                                                          (self.biana_database.EXTERNAL_ENTITY_TABLE,"re") ],
+                                                               columns = [ "u1.userEntityID", "u2.userEntityID", "r.externalEntityRelationID", "r.type", "e.type", "re.externalDatabaseID", str(nested), "0" ],
+                                                               fixed_conditions = fixed_conditions,
+                                                               join_conditions = [ ("p1.externalEntityRelationID","=","p2.externalEntityRelationID"),
+                                                                                   ("p1.externalEntityID","=","u1.externalEntityID"),
+                                                                                   ("p2.externalEntityID","=","u2.externalEntityID"),
+                                                                                   ("p1.externalEntityID","!=","p2.externalEntityID"),
+                                                                                   ("p1.externalEntityRelationID","=","r.externalEntityRelationID"),
+                                                                                   ("p2.externalEntityID","=","e.externalEntityID"),
+                                                                                   ("re.externalEntityID","=","r.externalEntityRelationID") ] ) )
+
+                if restricted_alias == "u2":
+                    continue
+
+                # Self relations (participants with cardinality greater than 1)
+                queries.append( self.db._get_select_sql_query( tables = [ (unif_table,"u1"),
+                                                                          (PARTICIPANT_TABLE,"p1"),
+                                                                          (self.biana_database.EXTERNAL_ENTITY_RELATION_PARTICIPANT_ATTRIBUTE_TABLES_DICT["cardinality"],"c"),
+                                                                          (self.biana_database.EXTERNAL_ENTITY_RELATION_TABLE,"r"),
+                                                                          (self.biana_database.EXTERNAL_ENTITY_TABLE,"e"),
+                                                                          (self.biana_database.EXTERNAL_ENTITY_TABLE,"re") ],
+                                                               columns = [ "u1.userEntityID", "u1.userEntityID", "r.externalEntityRelationID", "r.type", "e.type", "re.externalDatabaseID", str(nested), "1" ],
+                                                               fixed_conditions = fixed_conditions,
+                                                               join_conditions = [ ("p1.externalEntityID","=","u1.externalEntityID"),
+                                                                                   ("c.externalEntityRelationParticipantID","=","p1.externalEntityRelationParticipantID"),
+                                                                                   ("c.value",">",1),
+                                                                                   ("r.externalEntityRelationID","=","p1.externalEntityRelationID"),
+                                                                                   ("p1.externalEntityID","=","e.externalEntityID"),
+                                                                                   ("re.externalEntityID","=","r.externalEntityRelationID") ] ) )
+
+        return queries
+
+
+    def _update_user_entity_relations(self, unification_protocol_name, user_entity_ids, removed_user_entity_ids=[], max_list_size=10000):
+        """
+        Recalculates the precalculated relations in which the user entities "user_entity_ids" participate, and removes the relations of "removed_user_entity_ids"
+        """
+
+        relation_table_name = self._get_user_entity_relation_table_name(unification_protocol_name)
+
+        if relation_table_name is None:
+            return
+
+        user_entity_ids = list(user_entity_ids)
+        all_user_entity_ids = user_entity_ids + list(removed_user_entity_ids)
+
+        for current_index in xrange(0, len(all_user_entity_ids), max_list_size):
+            user_entities_str = "(%s)" %",".join(map(str,all_user_entity_ids[current_index:current_index+max_list_size]))
+            for current_column in ("userEntityID1", "userEntityID2"):
+                self.db.insert_db_content( self.db._get_delete_sql_query( table = relation_table_name,
+                                                                          fixed_conditions = [(current_column,"IN",user_entities_str,None)] ),
+                                           answer_mode = None )
+
+        if len(user_entity_ids) > 0:
+            self._insert_user_entity_relations( unification_protocol_name = unification_protocol_name,
+                                                relation_table_name = relation_table_name,
+                                                user_entity_ids = user_entity_ids,
+                                                max_list_size = max_list_size )
+
+        return
+
+
+    def _get_precalculated_user_entity_relations(self, relation_table_name, unification_protocol_name, userEntityID_list=None, attribute_restrictions = [], negative_attribute_restrictions = [], listRelationType=[], dictRelationAttributeRestriction={}, use_self_relations=True, limit_to_userEntityID_list=False, use_nested_relations=True, only_self_relations=False):
+        """
+        Returns the relations of the user entities in "userEntityID_list" (all relations if it is None) from the precalculated relations table
+
+        The result has the same format as get_user_entity_relations: a list of (userEntityID1, userEntityID2, externalEntityRelationID, type, etype)
+
+        If "only_self_relations" is True, only self relations are returned
+        """
+
+        columns = [ ("ur.userEntityID1","userEntityID1"),
+                    ("ur.userEntityID2","userEntityID2"),
+                    ("ur.externalEntityRelationID","externalEntityRelationID"),
+                    ("ur.type","type"),
+                    ("ur.etype","etype") ]
+
+        fixed_conditions = []
+
+        if userEntityID_list is not None:
+            if limit_to_userEntityID_list is True:
+                fixed_conditions.append(("ur.userEntityID2","IN","(%s)" %",".join([ str(x) for x in userEntityID_list]),None))
+
+        if len(listRelationType) > 0:
+            fixed_conditions.append(("ur.type","IN","(\"%s\")" % "\",\"".join([ relationType for relationType in listRelationType]),None ))
+
+        if not use_nested_relations:
+            fixed_conditions.append(("ur.nested","=",0))
+
+        if only_self_relations:
+            fixed_conditions.append(("ur.self_relation","=",1))
+        elif not use_self_relations:
+            fixed_conditions.append(("ur.self_relation","=",0))
+
+        def get_query(user_entity_ids=None):
+            if user_entity_ids is None:
+                user_entity_conditions = []
+            else:
+                user_entity_conditions = [("ur.userEntityID1","IN","(%s)" %",".join([ str(x) for x in user_entity_ids]),None)]
+
+            query = self.db._get_select_sql_query( tables = [(relation_table_name,"ur")],
+                                                   columns = columns,
+                                                   fixed_conditions = user_entity_conditions + fixed_conditions )
+
+            query = self._apply_relation_restrictions_to_query( query = query,
+                                                                attribute_restrictions_dict = dictRelationAttributeRestriction, 
+                                                                column_name_to_restrict="externalEntityRelationID" )
+
+            # In self relations userEntityID2 is equal to userEntityID1
+            query = self._apply_restrictions_to_query( query = query,
+                                                       unification_protocol_name = unification_protocol_name,
+                                                       attribute_restrictions= attribute_restrictions,
+                                                       column_name_to_restrict="userEntityID2" )
+
+            query = self._apply_negative_restrictions_to_query( query = query,
+                                                                unification_protocol_name = unification_protocol_name,
+                                                                negative_attribute_restrictions = negative_attribute_restrictions,
+                                                                column_name_to_restrict="userEntityID2" )
+            return query
+
+        if userEntityID_list is None:
+            return list(self.db.select_db_content( get_query(), answer_mode = "raw", remove_duplicates = "no" ))
+
+        return self.db.select_db_content_in_chunks( get_query, userEntityID_list, answer_mode = "raw" )
+
+
+    def export_unification_protocol_to_sqlite(self, unification_protocol_name, file_name, attribute_list=[], relation_attribute_list=[], block_size=1000000):
+        """
+        Exports a unification protocol to the SQLite file "file_name", that can be used without database server through a BianaSQLiteAccess object
+        (for example, to start a session with dbhost "sqlite" and the file as dbname)
+
+        The file contains the user entities of the protocol, their external entities and types, the relations between them (with the same content as the
+        precalculated relations table), the external databases and the values of the attributes in "attribute_list" (for the external entities of the protocol)
+        and "relation_attribute_list" (for the relations), including transferred attributes. The default attributes of the external databases are always exported
+
+        If "file_name" exists, it is replaced
+        """
+
+        import os
+        import BianaSQLiteAccess
+
+        self._load_available_unification_protocols()
+
+        unification_protocol_name = str(unification_protocol_name).lower()
+
+        if self.available_unification_protocols.get(unification_protocol_name) is None:
+            raise ValueError("ERROR. Only existing unification protocols can be exported")
+
+        unif_table = self._get_user_entity_table_name(unification_protocol_name=unification_protocol_name)
+
+        external_databases = self._get_valid_source_databases_by_id().values()
+
+        attributes = set([ x.lower() for x in attribute_list ])
+        attributes.update([ x.get_default_eE_attribute().lower() for x in external_databases if x.get_default_eE_attribute() and self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT.has_key(x.get_default_eE_attribute().lower()) ])
+        relation_attributes = set([ x.lower() for x in relation_attribute_list ])
+
+        for current_attribute in attributes.union(relation_attributes):
+            if current_attribute not in ("proteinsequence", "proteinsequenceid") and not self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT.has_key(current_attribute):
+                raise ValueError("Attribute %s cannot be exported" %current_attribute)
+
+        if os.path.exists(file_name):
+            os.remove(file_name)
+
+        connection = BianaSQLiteAccess.sqlite3.connect(file_name)
+        connection.text_factory = str
+        cursor = connection.cursor()
+
+        BianaSQLiteAccess.create_export_tables(connection)
+
+        # General information
+        cursor.executemany( "INSERT INTO exportInfo (name, value) VALUES (?,?)",
+                            [ ("version", str(BianaSQLiteAccess.SQLITE_EXPORT_VERSION)),
+                              ("unification_protocol", unification_protocol_name),
+                              ("database", "%s@%s" %(self.dbname, self.dbhost)),
+                              ("date", time.strftime("%Y-%m-%d %H:%M:%S")),
+                              ("versionable_attributes", ",".join(self.versionable_external_entity_identifier_attributes)) ] )
+
+        cursor.executemany( "INSERT INTO externalDatabase VALUES (?,?,?,?,?,?,?,?)",
+                            [ (x.get_id(), x.get_name(), x.get_version(), BianaSQLiteAccess.to_text(x.get_parsed_file()), BianaSQLiteAccess.to_text(x.get_parsing_date()),
+                               x.get_description(), x.get_default_eE_attribute(), int(bool(x.get_promiscuity()))) for x in external_databases ] )
+
+        cursor.executemany( "INSERT INTO externalEntityRelationType VALUES (?)",
+                            [ (x,) for x in self.get_valid_external_entity_relation_types() ] )
+
+        # User entities and their external entities
+        print "Exporting user entities of %s" %unification_protocol_name
+
+        self._export_query_to_sqlite( cursor = cursor,
+                                      query = self.db._get_select_sql_query( tables = [unif_table],
+                                                                             columns = ["userEntityID","externalEntityID"] ),
+                                      insert_query = "INSERT INTO userEntityUnification VALUES (?,?)",
+                                      block_size = block_size )
+
+        self._export_query_to_sqlite( cursor = cursor,
+                                      query = self.db._get_select_sql_query( tables = [ (unif_table,"u"), (self.biana_database.EXTERNAL_ENTITY_TABLE,"e") ],
+                                                                             columns = ["e.externalEntityID","e.externalDatabaseID","e.type"],
+                                                                             join_conditions = [("u.externalEntityID","=","e.externalEntityID")] ),
+                                      insert_query = "INSERT OR IGNORE INTO externalEntity VALUES (?,?,?)",
+                                      block_size = block_size )
+
+        # Relations between user entities
+        print "Exporting relations of %s" %unification_protocol_name
+
+        for query in self._get_user_entity_relation_queries( unification_protocol_name = unification_protocol_name ):
+            self._export_query_to_sqlite( cursor = cursor,
+                                          query = query,
+                                          insert_query = "INSERT OR IGNORE INTO userEntityRelation VALUES (?,?,?,?,?,?,?,?)",
+                                          block_size = block_size )
+
+        relation_ids = [ x[0] for x in cursor.execute("SELECT DISTINCT externalEntityRelationID FROM userEntityRelation").fetchall() ]
+
+        def get_relation_query(relation_ids_list):
+            return self.db._get_select_sql_query( tables = [ (self.biana_database.EXTERNAL_ENTITY_TABLE,"e"), (self.biana_database.EXTERNAL_ENTITY_RELATION_TABLE,"r") ],
+                                                  columns = ["e.externalEntityID","e.externalDatabaseID","e.type","r.type"],
+                                                  join_conditions = [("e.externalEntityID","IN","(%s)" %",".join(map(str,relation_ids_list))),
+                                                                     ("r.externalEntityRelationID","=","e.externalEntityID")] )
+
+        relations_data = self.db.select_db_content_in_chunks( get_relation_query, relation_ids, answer_mode = "raw" )
+        cursor.executemany( "INSERT OR IGNORE INTO externalEntity VALUES (?,?,?)", [ x[:3] for x in relations_data ] )
+        cursor.executemany( "INSERT OR IGNORE INTO externalEntityRelation VALUES (?,?)", [ (x[0],x[3]) for x in relations_data ] )
+        del relations_data
+
+        def get_participant_query(relation_ids_list):
+            return self.db._get_select_sql_query( tables = [self.biana_database.EXTERNAL_ENTITY_RELATION_PARTICIPANT_TABLE],
+                                                  columns = ["externalEntityRelationParticipantID","externalEntityRelationID","externalEntityID"],
+                                                  join_conditions = [("externalEntityRelationID","IN","(%s)" %",".join(map(str,relation_ids_list)))] )
+
+        cursor.executemany( "INSERT OR IGNORE INTO externalEntityRelationParticipant VALUES (?,?,?)",
+                            self.db.select_db_content_in_chunks( get_participant_query, relation_ids, answer_mode = "raw" ) )
+
+        # Attributes
+        attribute_tables = []
+
+        for current_attribute in sorted(attributes.union(relation_attributes)):
+
+            print "Exporting attribute %s" %current_attribute
+
+            if current_attribute in ("proteinsequence", "proteinsequenceid"):
+                attr_table = self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT["proteinsequence"]
+            else:
+                attr_table = self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[current_attribute]
+
+            sqlite_table = "%s%s" %(attr_table.get_table_name(), current_attribute=="proteinsequenceid" and "ID" or "")
+            BianaSQLiteAccess.create_attribute_table(connection, sqlite_table)
+            attribute_tables.append(sqlite_table)
+
+            cursor.execute( "INSERT INTO exportedAttribute VALUES (?,?,?)",
+                            (current_attribute, sqlite_table, int(BianaObjects.ExternalEntityAttribute.isNumericAttribute(current_attribute, self.biana_database))) )
+
+            insert_query = "INSERT INTO %s VALUES (?,?,?)" %sqlite_table
+
+            if current_attribute == "proteinsequence":
+                value_column = "UNCOMPRESS(s.sequence)"
+            elif current_attribute == "proteinsequenceid":
+                value_column = "s.proteinSequenceID"
+            else:
+                value_column = "a.value"
+
+            def get_attribute_query(id_table=None, id_list=None):
+                tables = [ (attr_table,"a") ]
+                join_conditions = []
+                if value_column != "a.value":
+                    tables.append( (self.biana_database.EXTERNAL_ATTRIBUTES_DESCRIPTION_TABLES["proteinSequence"],"s") )
+                    join_conditions.append( ("a.value","=","s.sequenceMD5") )
+                if id_table is not None:
+                    tables.append( (id_table,"u") )
+                    join_conditions.append( ("u.externalEntityID","=","a.externalEntityID") )
+                else:
+                    join_conditions.append( ("a.externalEntityID","IN","(%s)" %",".join(map(str,id_list))) )
+                return self.db._get_select_sql_query( tables = tables,
+                                                      columns = ["a.externalEntityID", value_column, "a.type"],
+                                                      join_conditions = join_conditions )
+
+            if current_attribute in attributes:
+                self._export_query_to_sqlite( cursor = cursor,
+                                              query = get_attribute_query( id_table = unif_table ),
+                                              insert_query = insert_query,
+                                              block_size = block_size )
+
+            if current_attribute in relation_attributes:
+                cursor.executemany( insert_query,
+                                    [ (x[0], BianaSQLiteAccess.to_text(x[1]), x[2]) for x in self.db.select_db_content_in_chunks( lambda y: get_attribute_query( id_list = y ), relation_ids, answer_mode = "raw" ) ] )
+
+            # Transferred attributes are stored for the external entities having the key attribute
+            if current_attribute in attributes and self._is_transferred_attribute(current_attribute):
+                for current_transfer in self.transferred_attributes[current_attribute]:
+                    query = self.db._get_select_sql_query( tables = [ (unif_table,"u"),
+                                                                      (self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[current_attribute],"transferred"),
+                                                                      (self._get_key_attribute_table_name( key_id = self.key_attribute_ids[(current_transfer[0],current_transfer[1])] ),"key1"),
+                                                                      (self.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[current_transfer[1]],"key2") ],
+                                                           columns = ["key2.externalEntityID","transferred.value","CONCAT('transferred_',transferred.type)"],
+                                                           join_conditions = [("u.externalEntityID","=","key2.externalEntityID"),
+                                                                              ("key1.value","=","key2.value"),
+                                                                              ("transferred.externalEntityID","=","key1.externalEntityID")] )
+                    self._export_query_to_sqlite( cursor = cursor,
+                                                  query = query,
+                                                  insert_query = insert_query,
+                                                  block_size = block_size )
+
+        print "Creating indices"
+
+        BianaSQLiteAccess.create_export_indices(connection, attribute_tables)
+
+        connection.commit()
+        connection.close()
+
+        return
+
+
+    def _export_query_to_sqlite(self, cursor, query, insert_query, block_size=1000000):
+        """
+        Executes the select "query" and inserts its results with "insert_query" using the SQLite "cursor", reading them in blocks of "block_size" rows
+
+        Values are inserted as strings (SQLite converts them to numbers in numeric columns)
+        """
+
+        import BianaSQLiteAccess
+
+        for data in self.db.select_db_content_in_blocks( query, block_size = block_size ):
+            cursor.executemany( insert_query, [ map(BianaSQLiteAccess.to_text, current_row) for current_row in data ] )
+
+        return
+
+
     # TO CHECK NEGATIVE RESTRICTIONS
     #def get_expanded_entity_relations(self, unification_protocol_name, userEntityID_list, expansionAttributesList=[], listRelationType=[], use_self_relations=True, limit_to_userEntityID_list=False, expansionLevel=2, attribute_restrictions=[], negative_attribute_restrictions=[]):
-    def get_expanded_entity_relations(self, unification_protocol_name, userEntityID_list, expansionAttributesList=[], listRelationType=[], use_self_relations=True, limit_to_userEntityID_list=False, expansionLevel=2, attribute_restrictions=[], negative_attribute_restrictions=[], dictRelationAttributeRestriction = {}):
+    def get_expanded_entity_relations(self, unification_protocol_name, userEntityID_list, expansionAttributesList=[], listRelationType=[], use_self_relations=True, limit_to_userEntityID_list=False, expansionLevel=2, attribute_restrictions=[], negative_attribute_restrictions=[], dictRelationAttributeRestriction = {}, max_user_entities_by_value=None, adjacency_cache=None):
         """
         unification_protocol_name: name of the unification protocol to be used 
         
@@ -4668,6 +6305,10 @@ class BianaDBaccess(object):
         expansionLevel: number of relations (edges) to look further during inference based on shared attributes
         
         attribute_restrictions: restrictions to be applied on the attributes  # TODO!!!! NOT USED NOW.
+
+        max_user_entities_by_value: attribute values shared by more user entities than this are not used to infer relations (see get_user_entity_relations_by_sharing_attributes)
+
+        adjacency_cache: cache used to store the relations of the user entities (see get_user_entity_relations)
         """
 
 
@@ -4678,7 +6319,8 @@ class BianaDBaccess(object):
         # First, it is necessary to obtain u2 user entities (those that share attributes with u1) WITHOUT USING RESTRICTIONS
         u1_u2_set = set( self.get_user_entity_relations_by_sharing_attributes( unification_protocol_name = unification_protocol_name,
                                                                                userEntityID_list = userEntityID_list,
-                                                                               listAttributes = expansionAttributesList ) )
+                                                                               listAttributes = expansionAttributesList,
+                                                                               max_user_entities_by_value = max_user_entities_by_value ) )
 
         # Then, it is necessary to obtain u3 user entities (those having relations with u2). u3 ARE PREDICTIONS!        
         u2_list = [ x[1] for x in u1_u2_set ]
@@ -4691,7 +6333,8 @@ class BianaDBaccess(object):
                                                                     listRelationType = listRelationType,
                                                                     dictRelationAttributeRestriction = dictRelationAttributeRestriction,   # Added to add restrictions
                                                                     use_self_relations = True,
-                                                                    limit_to_userEntityID_list = False )
+                                                                    limit_to_userEntityID_list = False,
+                                                                    adjacency_cache = adjacency_cache )
 
 
         #(80171L, 8118L, 1182323L, 'interaction', 'protein')
@@ -4740,38 +6383,30 @@ class BianaDBaccess(object):
 
             u3set = set(map(str,u3_externalEntityRelationID.keys()))
 
-            done = 0
-
-            itime = time.time()
-
-            for current_uE3 in u3set:
-                done += 1
-
-                temp_u3_u4_sharing_attributes = self.get_user_entity_relations_by_sharing_attributes( unification_protocol_name = unification_protocol_name,
-                                                                                                      userEntityID_list = [current_uE3],
-                                                                                                      listAttributes = expansionAttributesList
-                                                                                                      )
-
-                for current_uE3, current_uE4, current_uE4_type in temp_u3_u4_sharing_attributes:
-                    for current_eErID in u3_externalEntityRelationID[current_uE3]:                 # TODO: Problem, we don't store the original relation....
-                        for current_uE1 in u3_u1_predictions[current_uE3]:
-                            if use_self_relations is False and current_uE1==current_uE4:
-                                pass
-                            else:
-                                predicted_uEr.append((current_uE1,
-                                                      current_uE4,
-                                                      eErID,
-                                                      #None,
-                                                      #BianaObjects.UserEntityExpandedRelation( userEntity1Source = u1_u2[current_uE1],
-                                                      #                                         userEntity2Source = current_uE3,
-                                                      #                                         attribute_identifier = None,
-                                                      #                                         attribute_values = None,
-                                                      #                                         externalEntityRelationID = current_eErID ),
-                                                      "inferred_" + u3_relation_type[current_uE3],
-                                                      current_uE4_type))
+            # All the u3 user entities are expanded together
+            temp_u3_u4_sharing_attributes = self.get_user_entity_relations_by_sharing_attributes( unification_protocol_name = unification_protocol_name,
+                                                                                                  userEntityID_list = list(u3set),
+                                                                                                  listAttributes = expansionAttributesList,
+                                                                                                  max_user_entities_by_value = max_user_entities_by_value )
+
+            for current_uE3, current_uE4, current_uE4_type in temp_u3_u4_sharing_attributes:
+                for current_eErID in u3_externalEntityRelationID[current_uE3]:                 # TODO: Problem, we don't store the original relation....
+                    for current_uE1 in u3_u1_predictions[current_uE3]:
+                        if use_self_relations is False and current_uE1==current_uE4:
+                            pass
+                        else:
+                            predicted_uEr.append((current_uE1,
+                                                  current_uE4,
+                                                  eErID,
+                                                  #None,
+                                                  #BianaObjects.UserEntityExpandedRelation( userEntity1Source = u1_u2[current_uE1],
+                                                  #                                         userEntity2Source = current_uE3,
+                                                  #                                         attribute_identifier = None,
+                                                  #                                         attribute_values = None,
+                                                  #                                         externalEntityRelationID = current_eErID ),
+                                                  "inferred_" + u3_relation_type[current_uE3],
+                                                  current_uE4_type))
 
-                #if done%100 == 0:
-                #    print "%s done in %s seconds [%s]" %(done, time.time()-itime,len(predicted_uEr))
 
 
 
@@ -4809,9 +6444,11 @@ class BianaDBaccess(object):
     #                METHODS FOR OUTPUTING DATA IN THE DATABASE                        #
     ####################################################################################
 
-    def output_relations(self, outmethod, unification_protocol_name, attribute_restrictions = [], negative_attribute_restrictions = [], listRelationType = [], dictRelationAttributeRestriction={}, use_self_relations=True, use_nested_relations=True):
+    def output_relations(self, outmethod, unification_protocol_name, attribute_restrictions = [], negative_attribute_restrictions = [], listRelationType = [], dictRelationAttributeRestriction={}, use_self_relations=True, use_nested_relations=True, block_size=100000, buffer_size=1048576):
         """
 	    Output all the relation information in a given Biana db with given unification protocol to a tab separated text file
+
+	    Relations are fetched in blocks of "block_size" rows and written through "outmethod" in blocks of "buffer_size" characters as they arrive
         """
 
         if use_nested_relations:
@@ -4884,16 +6521,18 @@ class BianaDBaccess(object):
                                                             column_name_to_restrict="userEntityID2" )
 
         # Set block size not to limit mem usage
-        database_block_limit=1000000
+        database_block_limit=block_size
         database_block_offset=0
 	
-	outmethod("%s\n" % "\t".join(["User Entity Id 1", "User Entity Id 2", "Relation Id", "Relation Type", "Source DB Name"]))
+	table_writer = output_utilities.TabulatedTableWriter( out_method = outmethod, columns = ["User Entity Id 1", "User Entity Id 2", "Relation Id", "Relation Type", "Source DB Name"], buffer_size = buffer_size )
+	table_writer.write_header()
         interacting_uE = self.db.select_db_content( query + " LIMIT %s OFFSET %s" % (database_block_limit, database_block_offset), answer_mode = "raw", remove_duplicates="no" )
 	while len(interacting_uE) > 0: 
             database_block_offset += database_block_limit
 	    #for u1, u2, r, type, dbname in interacting_uE:
-	    for values in interacting_uE:
-		outmethod("%s\n" % "\t".join(map(str, values)))
+	    table_writer.add_rows(interacting_uE)
+	    if len(interacting_uE) < database_block_limit:
+		break
 	    interacting_uE = self.db.select_db_content( query + " LIMIT %s OFFSET %s" % (database_block_limit, database_block_offset), answer_mode = "raw", remove_duplicates="no" )
 
         if( use_self_relations is True ):
@@ -4942,17 +6581,26 @@ class BianaDBaccess(object):
 	    while len(interacting_uE) > 0: 
 		database_block_offset += database_block_limit
 		for values in interacting_uE:
-		    outmethod("%s\t%s\n" % (values[0], "\t".join(map(str, values))))
+		    table_writer.add_row( (values[0],) + tuple(values) )
+		if len(interacting_uE) < database_block_limit:
+		    break
 		interacting_uE = self.db.select_db_content( query + " LIMIT %s OFFSET %s" % (database_block_limit, database_block_offset), answer_mode = "raw", remove_duplicates="no" )
+
+        table_writer.close()
         return 
 
     def output_user_entities(self, outpath, unification_protocol_name, only_uniques = False):
 	attributes = ["uniprotaccession", "uniprotentry", "genesymbol", "geneid"]
-	[ self._output_user_entities_by_attribute(open(outpath + attribute + ".txt", 'w').write, unification_protocol_name, attribute, only_uniques) for attribute in attributes ]
+	for attribute in attributes:
+	    out_fd = open(outpath + attribute + ".txt", 'w')
+	    self._output_user_entities_by_attribute(out_fd.write, unification_protocol_name, attribute, only_uniques)
+	    out_fd.close()
 
-    def _output_user_entities_by_attribute(self, outmethod, unification_protocol_name, attribute, only_uniques = False):
+    def _output_user_entities_by_attribute(self, outmethod, unification_protocol_name, attribute, only_uniques = False, block_size=100000, buffer_size=1048576):
         """
         Output basic information of user entities in BIANA database associated with this object with given unification protocol
+
+        Rows are fetched in blocks of "block_size" and written through "outmethod" in blocks of "buffer_size" characters
         """
     
 	#attributes = ["uniprotaccession", "uniprotentry", "genesymbol", "geneid"]
@@ -4973,18 +6621,21 @@ class BianaDBaccess(object):
 	#print query
 
         # Set block size not to limit mem usage
-        database_block_limit=1000000
+        database_block_limit=block_size
         database_block_offset=0
 
 	#outmethod("%s\n" % "\t".join(["User Entity Id", "Uniprot Accession", "Uniprot Entry", "Gene Symbol", "Gene Id"]))
-	outmethod("%s\n" % attribute)
+	table_writer = output_utilities.TabulatedTableWriter( out_method = outmethod, columns = [attribute], buffer_size = buffer_size )
+	table_writer.write_header()
         data = self.db.select_db_content( query + " LIMIT %s OFFSET %s" % (database_block_limit, database_block_offset), answer_mode = "raw", remove_duplicates="no" )
 	while len(data) > 0: 
             database_block_offset += database_block_limit
-	    for current_data in data:
-		outmethod("%s\n" % "\t".join(map(str, current_data)))
+	    table_writer.add_rows(data)
+	    if len(data) < database_block_limit:
+		break
 	    data = self.db.select_db_content( query + " LIMIT %s OFFSET %s" % (database_block_limit, database_block_offset), answer_mode = "raw", remove_duplicates="no" )
 
+        table_writer.close()
         return
 
 
@@ -33,6 +33,8 @@ class BianaDatabase(Database):
         self.EXTENDED_EXTERNAL_ENTITY_RELATION_PARTICIPANT_TABLE = None 
         
         self.USER_ENTITY_TABLE = None 
+        self.USER_ENTITY_RELATION_TABLE = None 
+        self.FULLTEXT_TOKEN_INDEX_TABLE = None 
         self.USER_ENTITY_PROTOCOL_TABLE = None 
         self.USER_ENTITY_PROTOCOL_ATOMS_TABLE = None 
         self.USER_ENTITY_PROTOCOL_ATOM_ATTRIBUTES_TABLE = None 
@@ -574,7 +576,51 @@ class BianaDatabase(Database):
                                                                     null = False) ],
                                           primary_key = ("userEntityID","externalEntityID"),
                                           indices = [("externalEntityID","userEntityID")])
+
+        # A table to store the precalculated relations between the user entities of a unification protocol (optional, one for each protocol)
+        # "etype" is the type of the external entity participant of userEntityID2, "nested" is 1 for the relations only found through nested relations
+        # and "self_relation" is 1 for the relations where the participant of userEntityID1 (which is equal to userEntityID2) has cardinality greater than 1
+        # The index is a covering index for the queries by userEntityID1
+        self.USER_ENTITY_RELATION_TABLE = TableDB( table_name = "userEntityRelation_protocol_",
+                                                   table_fields = [ FieldDB( field_name = "userEntityID1",
+                                                                             data_type = "integer(4) unsigned",
+                                                                             null = False ),
+                                                                    FieldDB( field_name = "userEntityID2",
+                                                                             data_type = "integer(4) unsigned",
+                                                                             null = False ),
+                                                                    FieldDB( field_name = self.external_entity_relation_id_col,
+                                                                             data_type = "integer(4) unsigned",
+                                                                             null = False ),
+                                                                    FieldDB( field_name = "type",
+                                                                             data_type = self.enum_eEr_types_col,
+                                                                             null = False ),
+                                                                    FieldDB( field_name = "etype",
+                                                                             data_type = self.enum_eE_types_col,
+                                                                             null = False ),
+                                                                    FieldDB( field_name = self.externalDatabaseID_col,
+                                                                             data_type = self.externalDatabaseID_col_type,
+                                                                             null = False ),
+                                                                    FieldDB( field_name = "nested",
+                                                                             data_type = "tinyint(1) unsigned",
+                                                                             null = False ),
+                                                                    FieldDB( field_name = "self_relation",
+                                                                             data_type = "tinyint(1) unsigned",
+                                                                             null = False ) ],
+                                                   primary_key = ("userEntityID1",self.external_entity_relation_id_col,"userEntityID2","etype","self_relation"),
+                                                   indices = [("userEntityID1","type","nested","self_relation","userEntityID2",self.external_entity_relation_id_col,"etype"),
+                                                              ("userEntityID2","userEntityID1")])
         
+        # A table to store the token index of a descriptive searchable attribute (optional, one for each attribute, named as the attribute table with the suffix "_tokenIndex")
+        # The primary key is used to get the postings (external entities) of each token
+        self.FULLTEXT_TOKEN_INDEX_TABLE = TableDB( table_name = "_tokenIndex",
+                                                   table_fields = [ FieldDB( field_name = "token",
+                                                                             data_type = "varchar(40)",
+                                                                             null = False ),
+                                                                    FieldDB( field_name = "externalEntityID",
+                                                                             data_type = "integer(4) unsigned",
+                                                                             null = False ) ],
+                                                   primary_key = ("token","externalEntityID") )
+
         self.USER_ENTITY_PROTOCOL_TABLE = TableDB( table_name = "userEntityUnificationProtocol",
                                                      table_fields = [ FieldDB( field_name = "unificationProtocolID",
                                                                                data_type = "smallint unsigned auto_increment",
@@ -0,0 +1,732 @@
+"""
+    BIANA: Biologic Interactions and Network Analysis
+    Copyright (C) 2009  Javier Garcia-Garcia, Emre Guney, Baldo Oliva
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+# Read-only access to a unification protocol exported to a SQLite file (see BianaDBaccess.export_unification_protocol_to_sqlite)
+#
+# The exported file contains:
+#   - exportInfo: exported protocol, source database, export date and format version
+#   - externalDatabase, externalEntityRelationType: external databases and valid relation types
+#   - exportedAttribute: exported attributes and the table where the values of each one are stored
+#   - userEntityUnification: user entities of the protocol (userEntityID, externalEntityID)
+#   - externalEntity, externalEntityRelation, externalEntityRelationParticipant: external entities of the protocol and the relations between them
+#   - userEntityRelation: relations between user entities, with the same content as the precalculated relations table of the protocol
+#   - one table per exported attribute (externalEntityID, value, type). Transferred attribute values are stored with type "transferred_<type>"
+
+import os
+import re
+import sys
+import sqlite3
+
+import biana.BianaObjects as BianaObjects
+
+
+SQLITE_EXPORT_VERSION = 1
+
+SQLITE_HEADER = "SQLite format 3\x00"
+
+# Maximum number of parameters bound to a query (SQLITE_MAX_VARIABLE_NUMBER of SQLite versions older than 3.32)
+SQLITE_MAX_VARIABLES = 999
+
+SQLITE_EXPORT_TABLES = [ "CREATE TABLE exportInfo (name TEXT PRIMARY KEY, value TEXT)",
+                         "CREATE TABLE externalDatabase (externalDatabaseID INTEGER PRIMARY KEY, databaseName TEXT, databaseVersion TEXT, parsedFile TEXT, parsedDate TEXT, databaseDescription TEXT, defaultExternalEntityAttribute TEXT, isPromiscuous INTEGER)",
+                         "CREATE TABLE externalEntityRelationType (type TEXT PRIMARY KEY)",
+                         "CREATE TABLE exportedAttribute (attribute TEXT PRIMARY KEY, tableName TEXT, isNumeric INTEGER)",
+                         "CREATE TABLE userEntityUnification (userEntityID INTEGER, externalEntityID INTEGER, PRIMARY KEY (userEntityID, externalEntityID))",
+                         "CREATE TABLE externalEntity (externalEntityID INTEGER PRIMARY KEY, externalDatabaseID INTEGER, type TEXT)",
+                         "CREATE TABLE externalEntityRelation (externalEntityRelationID INTEGER PRIMARY KEY, type TEXT)",
+                         "CREATE TABLE externalEntityRelationParticipant (externalEntityRelationParticipantID INTEGER PRIMARY KEY, externalEntityRelationID INTEGER, externalEntityID INTEGER)",
+                         "CREATE TABLE userEntityRelation (userEntityID1 INTEGER, userEntityID2 INTEGER, externalEntityRelationID INTEGER, type TEXT, etype TEXT, externalDatabaseID INTEGER, nested INTEGER, self_relation INTEGER, PRIMARY KEY (userEntityID1, externalEntityRelationID, userEntityID2, etype, self_relation))" ]
+
+# Indices are created once the data has been inserted
+SQLITE_EXPORT_INDICES = [ "CREATE INDEX userEntityUnification_eE ON userEntityUnification (externalEntityID)",
+                          "CREATE INDEX userEntityRelation_uE2 ON userEntityRelation (userEntityID2, userEntityID1)",
+                          "CREATE INDEX userEntityRelation_eEr ON userEntityRelation (externalEntityRelationID)",
+                          "CREATE INDEX externalEntityRelationParticipant_eEr ON externalEntityRelationParticipant (externalEntityRelationID)",
+                          "CREATE INDEX externalEntityRelationParticipant_eE ON externalEntityRelationParticipant (externalEntityID)" ]
+
+
+def is_sqlite_export(file_name):
+    """
+    Returns True if "file_name" is a SQLite file (it does not check its content)
+    """
+    if not os.path.isfile(file_name):
+        return False
+    fd = open(file_name, 'rb')
+    header = fd.read(len(SQLITE_HEADER))
+    fd.close()
+    return header == SQLITE_HEADER
+
+
+def create_export_tables(connection):
+    """
+    Creates the tables of an exported protocol (except the attribute tables) in the SQLite connection "connection"
+    """
+    for current_query in SQLITE_EXPORT_TABLES:
+        connection.execute(current_query)
+
+
+def create_attribute_table(connection, table_name):
+    """
+    Creates the table where the values of an exported attribute are stored
+
+    Values are stored as text and compared without case, as in BIANA MySQL databases
+    """
+    connection.execute("CREATE TABLE %s (externalEntityID INTEGER, value TEXT COLLATE NOCASE, type TEXT)" %table_name)
+
+
+def create_export_indices(connection, attribute_tables):
+    """
+    Creates the indices of an exported protocol, including the ones of the tables in "attribute_tables"
+    """
+    for current_query in SQLITE_EXPORT_INDICES:
+        connection.execute(current_query)
+    for current_table in attribute_tables:
+        connection.execute("CREATE INDEX %s_eE ON %s (externalEntityID)" %(current_table, current_table))
+        connection.execute("CREATE INDEX %s_value ON %s (value)" %(current_table, current_table))
+    connection.execute("ANALYZE")
+
+
+def to_text(value):
+    """
+    Returns the value to be stored in an exported column
+    """
+    if value is None or isinstance(value, basestring):
+        return value
+    return str(value)
+
+
+
+class BianaSQLiteAccess(object):
+    """
+    Read-only access to a unification protocol exported to a SQLite file
+
+    It implements the subset of the BianaDBaccess query methods used by BianaSessionManager (attribute lookup, relations and external entities),
+    so that sessions can work with the exported protocol without a database server. Only the exported attributes can be used
+
+    Attribute values are compared exactly: ontology expansion and full text search are not available
+    """
+
+    NUMERIC_VALUE_REGEX = re.compile("([><=]*)([\d\.]+)")
+
+    def __init__(self, file_name, max_list_size=10000):
+
+        if not is_sqlite_export(file_name):
+            raise ValueError("%s is not an exported BIANA SQLite file" %file_name)
+
+        self.file_name = file_name
+        self.dbname = file_name
+        self.dbhost = "sqlite"
+        self.max_list_size = max_list_size
+
+        self.connection = None
+        self.reconnect()
+
+        info = dict(self._select("SELECT name, value FROM exportInfo"))
+
+        if int(info.get("version",0)) != SQLITE_EXPORT_VERSION:
+            raise ValueError("BIANA SQLite export version %s not supported" %info.get("version"))
+
+        self.unification_protocol_name = info["unification_protocol"].lower()
+        self.source_database = info.get("database")
+        self.versionable_external_entity_identifier_attributes = set([ x for x in info.get("versionable_attributes","").split(",") if x != "" ])
+
+        self.attribute_tables = {}
+        self.numeric_attributes = set()
+        for (attribute_identifier, table_name, is_numeric) in self._select("SELECT attribute, tableName, isNumeric FROM exportedAttribute"):
+            self.attribute_tables[attribute_identifier.lower()] = table_name
+            if is_numeric:
+                self.numeric_attributes.add(attribute_identifier.lower())
+
+        self.valid_source_database_ids = None
+
+    def __str__(self):
+        return "BIANA SQLite export. File: %s. Unification protocol: %s" %(self.file_name, self.unification_protocol_name)
+
+    def isOptimizedForRunning(self):
+        return True
+
+    def optimize_database_for(self, mode, optimize=False):
+        """
+        Exported files are created optimized for running, and they cannot be modified
+        """
+        return
+
+    def reconnect(self):
+        self.close()
+        self.connection = sqlite3.connect(self.file_name)
+        self.connection.text_factory = str
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    def enable_query_profiler(self, explain_threshold=None):
+        self._not_available("Query profiling")
+
+    def disable_query_profiler(self):
+        self._not_available("Query profiling")
+
+    def get_query_profiler(self):
+        self._not_available("Query profiling")
+
+    def _select(self, sql_query, parameters=()):
+        return self.connection.execute(sql_query, parameters).fetchall()
+
+    def _select_in_chunks(self, get_query, id_list):
+        """
+        Executes the query returned by get_query (a function returning (sql_query, parameters) for a list of ids) for chunks of "id_list"
+        """
+        id_list = list(id_list)
+        results = []
+        for current_index in xrange(0, len(id_list), self.max_list_size):
+            (sql_query, parameters) = get_query(",".join([ str(int(x)) for x in id_list[current_index:current_index+self.max_list_size] ]))
+            results.extend(self._select(sql_query, parameters))
+        return results
+
+    def _check_unification_protocol(self, unification_protocol_name):
+        if str(unification_protocol_name).lower() != self.unification_protocol_name:
+            raise ValueError("Unification protocol %s is not available in %s (it contains %s)" %(unification_protocol_name, self.file_name, self.unification_protocol_name))
+
+    def _get_attribute_table(self, attribute_identifier):
+        try:
+            return self.attribute_tables[attribute_identifier.lower()]
+        except KeyError:
+            raise ValueError("Attribute %s has not been exported to %s" %(attribute_identifier, self.file_name))
+
+    def _not_available(self, method_name):
+        raise ValueError("%s is not available when working with an exported SQLite file" %method_name)
+
+
+    ####################################################################################
+    #                          DATABASE INFORMATION METHODS                            #
+    ####################################################################################
+
+    def get_available_unification_protocols_list(self):
+        return [self.unification_protocol_name]
+
+    def get_valid_external_entity_relation_types(self):
+        return [ x[0] for x in self._select("SELECT type FROM externalEntityRelationType") ]
+
+    def get_versionable_external_entity_identifier_attributes(self):
+        return self.versionable_external_entity_identifier_attributes
+
+    def get_external_database(self, database_id):
+        self._get_valid_source_dbs()
+        return self.valid_source_database_ids[database_id]
+
+    def get_external_database_list(self):
+        self._get_valid_source_dbs()
+        return self.valid_source_database_ids.values()
+
+    def _get_valid_source_dbs(self):
+
+        if self.valid_source_database_ids is None:
+            self.valid_source_database_ids = {}
+            for actual_source in self._select("SELECT externalDatabaseID, databaseName, databaseVersion, parsedFile, parsedDate, databaseDescription, defaultExternalEntityAttribute, isPromiscuous FROM externalDatabase"):
+                databaseObject = BianaObjects.ExternalDatabase( databaseName = actual_source[1],
+                                                                databaseVersion = actual_source[2],
+                                                                databaseFile = actual_source[3],
+                                                                databaseDescription = actual_source[5],
+                                                                defaultExternalEntityAttribute = actual_source[6],
+                                                                databaseDate = actual_source[4],
+                                                                externalDatabaseID = actual_source[0],
+                                                                isPromiscuous = bool(actual_source[7]) )
+                self.valid_source_database_ids[databaseObject.get_id()] = databaseObject
+
+        return self.valid_source_database_ids
+
+    def transform_expanded_attribute_restrictions(self, attribute_restriction_list):
+        """
+        Transferred attribute values are stored in the exported attribute tables, so restrictions do not need to be transformed
+        """
+        return list(set(attribute_restriction_list))
+
+
+    ####################################################################################
+    #                              RESTRICTION METHODS                                 #
+    ####################################################################################
+
+    def _get_value_conditions(self, alias, attribute_identifier, values_list):
+        """
+        Returns a tuple (sql_condition, parameters) to restrict the values of column "alias.value" to the ones in "values_list"
+
+        Values of numeric attributes can be given as comparisons (i.e. ">3.5")
+        """
+
+        conditions = []
+        parameters = []
+        equal_values = []
+
+        for current_value in values_list:
+            current_value = str(current_value).strip()
+            if attribute_identifier.lower() in self.numeric_attributes:
+                m = self.NUMERIC_VALUE_REGEX.match(current_value)
+                if m:
+                    operator = m.group(1)
+                    if operator == "":
+                        operator = "="
+                    conditions.append("CAST(%s.value AS REAL) %s ?" %(alias, operator))
+                    parameters.append(float(m.group(2)))
+                    continue
+            equal_values.append(current_value)
+
+        if len(equal_values) > 0:
+            conditions.append("%s.value IN (%s)" %(alias, ",".join(["?"]*len(equal_values))))
+            parameters.extend(equal_values)
+
+        if len(conditions) == 0:
+            return ("0", parameters)
+
+        return (" AND ".join(conditions), parameters)
+
+    def _get_user_entity_restriction_conditions(self, column, attribute_restrictions, negative_attribute_restrictions):
+        """
+        Returns a tuple (list_of_sql_conditions, parameters) to restrict the user entities in "column" to the ones having the attribute values in
+        all "attribute_restrictions" and none of the values in "negative_attribute_restrictions" (lists of (attribute, comma separated values))
+        """
+
+        conditions = []
+        parameters = []
+
+        for (restrictions, operator) in [ (attribute_restrictions or [], "IN"), (negative_attribute_restrictions or [], "NOT IN") ]:
+            for current_restriction_attribute, current_restriction_values in restrictions:
+                (value_condition, value_parameters) = self._get_value_conditions( alias = "q",
+                                                                                  attribute_identifier = current_restriction_attribute,
+                                                                                  values_list = str(current_restriction_values).split(",") )
+                conditions.append("%s %s (SELECT ru.userEntityID FROM userEntityUnification ru, %s q WHERE q.externalEntityID = ru.externalEntityID AND %s)" %(column, operator, self._get_attribute_table(current_restriction_attribute), value_condition))
+                parameters.extend(value_parameters)
+
+        return (conditions, parameters)
+
+    def _get_relation_restriction_conditions(self, column, dictRelationAttributeRestriction):
+        """
+        Returns a tuple (list_of_sql_conditions, parameters) to restrict the relations in "column" to the ones with the attribute values in "dictRelationAttributeRestriction"
+        """
+
+        conditions = []
+        parameters = []
+
+        for attribute_name, values in dictRelationAttributeRestriction.iteritems():
+            (value_condition, value_parameters) = self._get_value_conditions( alias = "rq",
+                                                                              attribute_identifier = attribute_name,
+                                                                              values_list = values )
+            conditions.append("%s IN (SELECT rq.externalEntityID FROM %s rq WHERE %s)" %(column, self._get_attribute_table(attribute_name), value_condition))
+            parameters.extend(value_parameters)
+
+        return (conditions, parameters)
+
+
+    ####################################################################################
+    #                               USER ENTITY METHODS                                #
+    ####################################################################################
+
+    def get_list_user_entities_IDs_by_attribute(self, unification_protocol_name, attribute_identifier, field_values, attribute_restrictions=None, negative_attribute_restrictions=None, restrict_to_user_entity_ids_list=[], include_type=False, only_uniques=False ):
+        """
+        Returns a list of user entities that match with the attributes specified of type attribute_identifier
+
+        If include_type is set to True, it returns a list of tuples (userEntityID, type)
+        """
+
+        self._check_unification_protocol(unification_protocol_name)
+
+        values_list = []
+        for current_field, current_value in field_values:
+            if current_field.lower() == "value":
+                values_list.append(str(current_value).strip())
+            else:
+                raise ValueError("TO IMPLEMENT")
+
+        tables = ["userEntityUnification u", "%s a" %self._get_attribute_table(attribute_identifier)]
+        conditions = ["a.externalEntityID = u.externalEntityID"]
+        parameters = []
+
+        if include_type:
+            tables.append("externalEntity e")
+            conditions.append("u.externalEntityID = e.externalEntityID")
+            columns = "u.userEntityID, e.type"
+        else:
+            columns = "u.userEntityID"
+
+        if "*" not in values_list:
+            (value_condition, value_parameters) = self._get_value_conditions( alias = "a",
+                                                                              attribute_identifier = attribute_identifier,
+                                                                              values_list = values_list )
+            conditions.append(value_condition)
+            parameters.extend(value_parameters)
+
+        if only_uniques:
+            conditions.append("a.type = 'unique'")
+
+        if len(restrict_to_user_entity_ids_list)>0:
+            conditions.append("u.userEntityID IN (%s)" %",".join([ str(int(x)) for x in restrict_to_user_entity_ids_list ]))
+
+        (restriction_conditions, restriction_parameters) = self._get_user_entity_restriction_conditions( column = "u.userEntityID",
+                                                                                                         attribute_restrictions = attribute_restrictions,
+                                                                                                         negative_attribute_restrictions = negative_attribute_restrictions )
+
+        data = self._select( "SELECT DISTINCT %s FROM %s WHERE %s" %(columns, ", ".join(tables), " AND ".join(conditions+restriction_conditions)),
+                             parameters + restriction_parameters )
+
+        if include_type:
+            return data
+        return [ x[0] for x in data ]
+
+    def get_user_entities_IDs_by_attribute_values(self, unification_protocol_name, attribute_identifier, values_list, attribute_restrictions=None, negative_attribute_restrictions=None, only_uniques=False, temporary_table_min_size=None):
+        """
+        Returns a dictionary { value: list of (userEntityID, type) } with the user entities having each of the values in "values_list" of attribute "attribute_identifier"
+
+        Values are compared case insensitively, keys are the values as given in "values_list". Values without user entities are not included.
+        The value "*" returns all the user entities having the attribute
+        """
+
+        self._check_unification_protocol(unification_protocol_name)
+
+        values_dict = {}    # lower cased value: list of given values
+        for current_value in values_list:
+            current_value = str(current_value).strip()
+            values_dict.setdefault(current_value.lower(), []).append(current_value)
+
+        attr_table = self._get_attribute_table(attribute_identifier)
+
+        conditions = ["a.externalEntityID = u.externalEntityID", "u.externalEntityID = e.externalEntityID"]
+        if only_uniques:
+            conditions.append("a.type = 'unique'")
+
+        (restriction_conditions, restriction_parameters) = self._get_user_entity_restriction_conditions( column = "u.userEntityID",
+                                                                                                         attribute_restrictions = attribute_restrictions,
+                                                                                                         negative_attribute_restrictions = negative_attribute_restrictions )
+
+        return_dict = {}
+
+        if "*" in values_dict:
+            current_uEs = self.get_list_user_entities_IDs_by_attribute( unification_protocol_name = unification_protocol_name,
+                                                                        attribute_identifier = attribute_identifier,
+                                                                        field_values = [("value","*")],
+                                                                        attribute_restrictions = attribute_restrictions,
+                                                                        negative_attribute_restrictions = negative_attribute_restrictions,
+                                                                        include_type = True,
+                                                                        only_uniques = only_uniques )
+            if len(current_uEs) > 0:
+                return_dict["*"] = current_uEs
+            del values_dict["*"]
+
+        # Given values are queried, lower cased values are only used to map the results back
+        query_values = list(set([ x for current_list in values_dict.itervalues() for x in current_list ]))
+        chunk_size = max(1, min(self.max_list_size, SQLITE_MAX_VARIABLES - len(restriction_parameters)))
+
+        for current_index in xrange(0, len(query_values), chunk_size):
+            current_values = query_values[current_index:current_index+chunk_size]
+            sql_query = "SELECT DISTINCT a.value, u.userEntityID, e.type FROM userEntityUnification u, %s a, externalEntity e WHERE %s" %(attr_table, " AND ".join(conditions+["a.value IN (%s)" %",".join(["?"]*len(current_values))]+restriction_conditions))
+            for (value, userEntityID, type) in self._select(sql_query, current_values + restriction_parameters):
+                for current_value in values_dict.get(str(value).lower(), []):
+                    return_dict.setdefault(current_value, []).append((userEntityID, type))
+
+        # A user entity is found once for each value of the same case
+        for current_value, current_uEs in return_dict.iteritems():
+            return_dict[current_value] = list(set(current_uEs))
+
+        return return_dict
+
+    def get_user_entity_attributes(self, unification_protocol_name, listUserEntityID, attribute_identifier, only_uniques=False):
+        """
+        Returns a dictionary with { userEntityID: list of attributes }
+
+        Transferred attribute values are included
+        """
+
+        self._check_unification_protocol(unification_protocol_name)
+
+        attr_table = self._get_attribute_table(attribute_identifier)
+
+        if only_uniques:
+            type_condition = " AND a.type = 'unique'"
+        else:
+            type_condition = ""
+
+        def get_query(user_entities_str):
+            return ("SELECT DISTINCT u.userEntityID, a.value FROM userEntityUnification u, %s a WHERE u.userEntityID IN (%s) AND a.externalEntityID = u.externalEntityID%s" %(attr_table, user_entities_str, type_condition), ())
+
+        return_dict = {}
+
+        for current_data in self._select_in_chunks(get_query, listUserEntityID):
+            return_dict.setdefault(current_data[0],[]).append(str(current_data[1]).replace("\n"," "))
+
+        return return_dict
+
+    def get_user_entity_type(self, unification_protocol_name, user_entity_ids):
+        """
+        Gets types associated with given user entity ids
+
+        Returns a dictionary of user entity id and type
+        """
+
+        self._check_unification_protocol(unification_protocol_name)
+
+        def get_query(user_entities_str):
+            return ("SELECT DISTINCT u.userEntityID, e.type FROM userEntityUnification u, externalEntity e WHERE u.userEntityID IN (%s) AND u.externalEntityID = e.externalEntityID" %user_entities_str, ())
+
+        # gene has type precedence over protein
+        uEId_to_type = {}
+        for uEId, type in self._select_in_chunks(get_query, user_entity_ids):
+            if uEId_to_type.setdefault(uEId, type) != "gene":
+                if type == "gene":
+                    uEId_to_type[uEId] = type
+
+        return uEId_to_type
+
+    def _get_list_eE_for_uE(self, unification_protocol_name, userEntityID):
+
+        self._check_unification_protocol(unification_protocol_name)
+
+        return [ x[0] for x in self._select("SELECT externalEntityID FROM userEntityUnification WHERE userEntityID = ?", (int(userEntityID),)) ]
+
+    def _get_dict_eE_for_uE_list(self, unification_protocol_name, userEntityID_list):
+        """
+        Returns a dictionary { userEntityID: list of externalEntityIDs } with the external entities of the user entities in "userEntityID_list"
+        """
+
+        self._check_unification_protocol(unification_protocol_name)
+
+        def get_query(user_entities_str):
+            return ("SELECT userEntityID, externalEntityID FROM userEntityUnification WHERE userEntityID IN (%s)" %user_entities_str, ())
+
+        return_dict = {}
+        for userEntityID, externalEntityID in self._select_in_chunks(get_query, userEntityID_list):
+            return_dict.setdefault(userEntityID,[]).append(externalEntityID)
+
+        return return_dict
+
+    def get_user_entity_relations(self, unification_protocol_name, userEntityID_list, attribute_restrictions = [], negative_attribute_restrictions = [], listRelationType=[], dictRelationAttributeRestriction={}, use_self_relations=True, limit_to_userEntityID_list=False, use_nested_relations=True, adjacency_cache=None):
+        """
+        Returns the relations of the user entities in "userEntityID_list" as a list of (userEntityID1, userEntityID2, externalEntityRelationID, type, etype)
+
+        "adjacency_cache" is accepted for compatibility with BianaDBaccess, but not used: relations are read from the local file
+        """
+        return self._get_user_entity_relations( unification_protocol_name = unification_protocol_name,
+                                                userEntityID_list = userEntityID_list,
+                                                attribute_restrictions = attribute_restrictions,
+                                                negative_attribute_restrictions = negative_attribute_restrictions,
+                                                listRelationType = listRelationType,
+                                                dictRelationAttributeRestriction = dictRelationAttributeRestriction,
+                                                use_self_relations = use_self_relations,
+                                                limit_to_userEntityID_list = limit_to_userEntityID_list,
+                                                use_nested_relations = use_nested_relations )
+
+    def get_relations(self, unification_protocol_name, attribute_restrictions = [], negative_attribute_restrictions = [], listRelationType = [], dictRelationAttributeRestriction={}, use_self_relations=True, use_nested_relations=True):
+        """
+        Returns all the relations of the protocol as a list of (userEntityID1, userEntityID2, externalEntityRelationID, type, etype)
+        """
+        return self._get_user_entity_relations( unification_protocol_name = unification_protocol_name,
+                                                userEntityID_list = None,
+                                                attribute_restrictions = attribute_restrictions,
+                                                negative_attribute_restrictions = negative_attribute_restrictions,
+                                                listRelationType = listRelationType,
+                                                dictRelationAttributeRestriction = dictRelationAttributeRestriction,
+                                                use_self_relations = use_self_relations,
+                                                use_nested_relations = use_nested_relations )
+
+    def _get_user_entity_relations(self, unification_protocol_name, userEntityID_list=None, attribute_restrictions = [], negative_attribute_restrictions = [], listRelationType=[], dictRelationAttributeRestriction={}, use_self_relations=True, limit_to_userEntityID_list=False, use_nested_relations=True):
+
+        self._check_unification_protocol(unification_protocol_name)
+
+        conditions = []
+        parameters = []
+
+        if userEntityID_list is not None and limit_to_userEntityID_list is True:
+            conditions.append("ur.userEntityID2 IN (%s)" %",".join([ str(int(x)) for x in userEntityID_list ]))
+
+        if len(listRelationType) > 0:
+            conditions.append("ur.type IN (%s)" %",".join(["?"]*len(listRelationType)))
+            parameters.extend(listRelationType)
+
+        if not use_nested_relations:
+            conditions.append("ur.nested = 0")
+
+        if not use_self_relations:
+            conditions.append("ur.self_relation = 0")
+
+        (relation_conditions, relation_parameters) = self._get_relation_restriction_conditions( column = "ur.externalEntityRelationID",
+                                                                                                dictRelationAttributeRestriction = dictRelationAttributeRestriction )
+
+        # In self relations userEntityID2 is equal to userEntityID1
+        (restriction_conditions, restriction_parameters) = self._get_user_entity_restriction_conditions( column = "ur.userEntityID2",
+                                                                                                         attribute_restrictions = attribute_restrictions,
+                                                                                                         negative_attribute_restrictions = negative_attribute_restrictions )
+
+        conditions.extend(relation_conditions + restriction_conditions)
+        parameters.extend(relation_parameters + restriction_parameters)
+
+        def get_query(user_entities_str=None):
+            current_conditions = list(conditions)
+            if user_entities_str is not None:
+                current_conditions.insert(0, "ur.userEntityID1 IN (%s)" %user_entities_str)
+            query = "SELECT DISTINCT ur.userEntityID1, ur.userEntityID2, ur.externalEntityRelationID, ur.type, ur.etype FROM userEntityRelation ur"
+            if len(current_conditions) > 0:
+                query = "%s WHERE %s" %(query, " AND ".join(current_conditions))
+            return (query, parameters)
+
+        if userEntityID_list is None:
+            return self._select(*get_query())
+
+        return self._select_in_chunks(get_query, userEntityID_list)
+
+    def get_user_entity_relations_by_sharing_attributes(self, *args, **kwargs):
+        self._not_available("Getting relations by sharing attributes")
+
+    def get_expanded_entity_relations(self, *args, **kwargs):
+        self._not_available("Getting expanded relations")
+
+    def get_equivalent_external_entities_from_list(self, externalEntitiesList, attribute):
+        """
+        Returns an iterator of lists of external entities (from "externalEntitiesList") that share a value of "attribute" (values are compared case insensitively)
+        """
+
+        attr_table = self._get_attribute_table(attribute)
+
+        def get_query(external_entities_str):
+            return ("SELECT externalEntityID, value FROM %s WHERE externalEntityID IN (%s)" %(attr_table, external_entities_str), ())
+
+        value_to_eE = {}
+        for externalEntityID, value in self._select_in_chunks(get_query, externalEntitiesList):
+            value_to_eE.setdefault(str(value).lower(), []).append(externalEntityID)
+
+        for current_eE_list in value_to_eE.itervalues():
+            if len(current_eE_list) > 1:
+                yield current_eE_list
+
+    def get_ontology(self, *args, **kwargs):
+        self._not_available("Getting ontologies")
+
+
+    ####################################################################################
+    #                             EXTERNAL ENTITY METHODS                              #
+    ####################################################################################
+
+    def get_external_entities_dict(self, externalEntityIdsList, attribute_list=[], relation_attribute_list=[], participant_attribute_list=[], useTransferAttributes=True, only_uniques=False):
+        """
+        Returns a dict of external Entity Objects with the attributes specified in the "attribute_list" and "relation_attribute_list"
+
+        The key in the dictionary corresponds to the external Entity ID
+        """
+
+        if len(externalEntityIdsList)==0:
+            return {}
+
+        eE_dict = {}
+
+        def get_query(external_entities_str):
+            return ("SELECT e.externalEntityID, e.externalDatabaseID, e.type, r.type FROM externalEntity e LEFT JOIN externalEntityRelation r ON r.externalEntityRelationID = e.externalEntityID WHERE e.externalEntityID IN (%s)" %external_entities_str, ())
+
+        eEr_id_list = []
+
+        for (externalEntityID, externalDatabaseID, type, relation_type) in self._select_in_chunks(get_query, externalEntityIdsList):
+            if type == "relation":
+                eE_dict[externalEntityID] = BianaObjects.ExternalEntityRelation( id = externalEntityID,
+                                                                                 source_database = externalDatabaseID,
+                                                                                 relation_type = relation_type )
+                eEr_id_list.append(externalEntityID)
+            else:
+                eE_dict[externalEntityID] = BianaObjects.ExternalEntity( id = externalEntityID,
+                                                                         source_database = externalDatabaseID,
+                                                                         type = type )
+
+        # Add the participants of the relations
+        def get_participants_query(relations_str):
+            return ("SELECT externalEntityRelationID, externalEntityID FROM externalEntityRelationParticipant WHERE externalEntityRelationID IN (%s)" %relations_str, ())
+
+        for (externalEntityRelationID, externalEntityID) in self._select_in_chunks(get_participants_query, eEr_id_list):
+            eE_dict[externalEntityRelationID].add_participant( externalEntityID = externalEntityID )
+
+        attributes = set([ x.lower() for x in attribute_list ])
+        attributes.update([ x.lower() for x in relation_attribute_list ])
+
+        conditions = ""
+        if only_uniques:
+            conditions += " AND type = 'unique'"
+        if useTransferAttributes is not True:
+            conditions += " AND (type IS NULL OR type NOT LIKE 'transferred_%')"
+
+        for current_attribute in attributes:
+
+            if not self.attribute_tables.has_key(current_attribute):
+                sys.stderr.write("Attribute %s is not found in available attributes\n" %(current_attribute))
+                continue
+
+            def get_attribute_query(external_entities_str):
+                return ("SELECT externalEntityID, value, type FROM %s WHERE externalEntityID IN (%s)%s" %(self.attribute_tables[current_attribute], external_entities_str, conditions), ())
+
+            for (externalEntityID, value, type) in self._select_in_chunks(get_attribute_query, eE_dict.keys()):
+                if current_attribute == "proteinsequence":
+                    value = BianaObjects.ProteinSequence(sequence=value)
+                else:
+                    value = str(value).replace("\n"," ")
+                if type is not None and type.startswith("transferred_"):
+                    eE_dict[externalEntityID].add_attribute(BianaObjects.ExternalEntityAttribute( attribute_identifier = current_attribute,
+                                                                                                  value = value,
+                                                                                                  type = type ))
+                else:
+                    eE_dict[externalEntityID].add_attribute(BianaObjects.ExternalEntityAttribute( attribute_identifier = current_attribute,
+                                                                                                  value = value ))
+
+        for current_attribute in set([ x.lower() for x in participant_attribute_list ]):
+            sys.stderr.write("Attribute %s is not found in available relation participant attributes\n" %(current_attribute))
+
+        return eE_dict
+
+    def get_default_external_entity_ids(self, externalEntityIDsList):
+        """
+        Returns a dictionary with the default identifier ("attribute: value") of the external entities, using the default attribute of their external database
+        """
+
+        if len(externalEntityIDsList)==0:
+            return {}
+
+        def get_query(external_entities_str):
+            return ("SELECT e.externalEntityID, d.defaultExternalEntityAttribute FROM externalEntity e, externalDatabase d WHERE d.externalDatabaseID = e.externalDatabaseID AND e.externalEntityID IN (%s)" %external_entities_str, ())
+
+        attribute_identifiers_dict = {}
+        for externalEntityID, defaultAttribute in self._select_in_chunks(get_query, externalEntityIDsList):
+            attribute_identifiers_dict.setdefault(defaultAttribute,[]).append(externalEntityID)
+
+        return_dict = {}
+
+        for current_attribute, list_externalEntityIds in attribute_identifiers_dict.iteritems():
+            if current_attribute is None or not self.attribute_tables.has_key(current_attribute.lower()):
+                for current_eEid in list_externalEntityIds:
+                    return_dict[current_eEid] = ""
+            else:
+                def get_attribute_query(external_entities_str):
+                    return ("SELECT externalEntityID, MIN(value) FROM %s WHERE externalEntityID IN (%s) AND type = 'unique' GROUP BY externalEntityID" %(self.attribute_tables[current_attribute.lower()], external_entities_str), ())
+
+                return_dict.update( dict( [ (x[0],"%s: %s" %(current_attribute,x[1])) for x in self._select_in_chunks(get_attribute_query, list_externalEntityIds) ] ) )
+
+        return return_dict
+
+    def get_relations_hierarchy(self, externalEntityRelationIDs):
+        """
+        Returns a list of tuples (relationID1, relationID2) in where relationID1 is a child of relationID2
+        """
+
+        if len(externalEntityRelationIDs)==0:
+            return []
+
+        relations_str = ",".join([ str(int(x)) for x in externalEntityRelationIDs ])
+
+        return self._select("SELECT externalEntityID, externalEntityRelationID FROM externalEntityRelationParticipant WHERE externalEntityID IN (%s) AND externalEntityRelationID IN (%s)" %(relations_str, relations_str))
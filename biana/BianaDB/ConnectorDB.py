@@ -34,6 +34,11 @@ To see how this class is used, look at any method in BianaDBaccess.py
 #import biana.ext.MySQLdb as MySQLdb
 import mysql.connector as db_connector
 import sys
+import time
+import threading
+import Queue
+from math import ceil
+from query_profiler import QueryProfiler
 
 DEBUG_BUFFER_INSERT_SINGLE = False # Set True to control queries, will insert each query seperately
 DEBUG_PRINT_INSERT_QUERY = False  # Set True to control queries, will print insert_db_content queries
@@ -70,37 +75,7 @@ class DB(object):
         self.dbsocket = dbsocket
 
         # init database connection (different connection parameters depending on user preferences...)
-        if dbsocket is not None or dbsocket=="":
-            if not dbport:
-                if not dbuser is None and not dbpassword is None:
-                    self.db = db_connector.connect(host= dbhost, user=dbuser, passwd=dbpassword, unix_socket=self.dbsocket)
-                elif not dbuser is None:
-                    self.db = db_connector.connect(host= dbhost, user=dbuser, unix_socket=self.dbsocket)
-                else:
-                    self.db = db_connector.connect(host= dbhost, unix_socket=self.dbsocket)
-            else:
-                if not dbuser is None and not dbpassword is None:
-                    self.db = db_connector.connect(host= dbhost, user=dbuser, passwd=dbpassword, port=dbport, unix_socket=self.dbsocket)
-                elif not dbuser is None:
-                    self.db = db_connector.connect(host= dbhost, user=dbuser, port=dbport, unix_socket=self.dbsocket)
-                else:
-                    self.db = db_connector.connect(host= dbhost, port=dbport, unix_socket = self.dbsocket)
-        else:
-            if not dbport:
-                if not dbuser is None and not dbpassword is None:
-                    self.db = db_connector.connect(host= dbhost, user=dbuser, passwd=dbpassword)
-                elif not dbuser is None:
-                    self.db = db_connector.connect(host= dbhost, user=dbuser)
-                else:
-                    self.db = db_connector.connect(host= dbhost)
-            else:
-                if not dbuser is None and not dbpassword is None:
-                    self.db = db_connector.connect(host= dbhost, user=dbuser, passwd=dbpassword, port=dbport)
-                elif not dbuser is None:
-                    self.db = db_connector.connect(host= dbhost, user=dbuser, port=dbport)
-                else:
-                    self.db = db_connector.connect(host= dbhost, port=dbport)
-
+        self.db = self._connect()
 
         # Not necessary to do autocommit as the Engine selected for tables is MyISAM (MyISAM does not accept commit)
         # If anytime this changes, it will be necessary to activate autocommit or to do commit at each parser
@@ -108,6 +83,11 @@ class DB(object):
 
         self.cursor = self.db.cursor(buffered=True)
 
+        self.profiler = None    # QueryProfiler used when query profiling is enabled (see enable_profiler)
+
+        self.max_pool_size = 4  # maximum number of connections used to run queries concurrently (see select_db_content_in_chunks)
+        self.pool = None
+
         self.dbmaxpacket = self._get_max_packet()
         self.lock_frequency = 100 #20000
         self.current_lock_num = 0
@@ -116,6 +96,8 @@ class DB(object):
         self.locked_tables_win = set() # The same as self.locked_tables, but corrected for windows (as table names are case insensitive and they usually are lowercased)
         self.lock_tables = lock_tables
 
+        self.inserted_tables = set()   # tables in which this connection has inserted data (used to undo a failed parsing only in these tables)
+
         # Set dbmaxpacket
         #self.insert_db_content("SET SESSION max_allowed_packet=16777216")
         #self.insert_db_content("SET SESSION max_allowed_packet=4777216")
@@ -126,6 +108,7 @@ class DB(object):
             self.uses_buffer = True
             self.insert_buffer = Buffer(self.dbmaxpacket,self)
             self.autoincrement_values = {}
+            self.num_buffer_flushes = 0     # number of times that (part of) the insert buffer has been sent to the database
         else:
             self.uses_buffer = False
             self.insert_buffer = None
@@ -139,6 +122,43 @@ class DB(object):
         return
 
 
+    def _connect(self):
+        """
+        Opens a new connection to the database server
+        """
+
+        if self.dbsocket is not None or self.dbsocket=="":
+            if not self.dbport:
+                if not self.dbuser is None and not self.dbpassword is None:
+                    return db_connector.connect(host= self.dbhost, user=self.dbuser, passwd=self.dbpassword, unix_socket=self.dbsocket)
+                elif not self.dbuser is None:
+                    return db_connector.connect(host= self.dbhost, user=self.dbuser, unix_socket=self.dbsocket)
+                else:
+                    return db_connector.connect(host= self.dbhost, unix_socket=self.dbsocket)
+            else:
+                if not self.dbuser is None and not self.dbpassword is None:
+                    return db_connector.connect(host= self.dbhost, user=self.dbuser, passwd=self.dbpassword, port=self.dbport, unix_socket=self.dbsocket)
+                elif not self.dbuser is None:
+                    return db_connector.connect(host= self.dbhost, user=self.dbuser, port=self.dbport, unix_socket=self.dbsocket)
+                else:
+                    return db_connector.connect(host= self.dbhost, port=self.dbport, unix_socket = self.dbsocket)
+        else:
+            if not self.dbport:
+                if not self.dbuser is None and not self.dbpassword is None:
+                    return db_connector.connect(host= self.dbhost, user=self.dbuser, passwd=self.dbpassword)
+                elif not self.dbuser is None:
+                    return db_connector.connect(host= self.dbhost, user=self.dbuser)
+                else:
+                    return db_connector.connect(host= self.dbhost)
+            else:
+                if not self.dbuser is None and not self.dbpassword is None:
+                    return db_connector.connect(host= self.dbhost, user=self.dbuser, passwd=self.dbpassword, port=self.dbport)
+                elif not self.dbuser is None:
+                    return db_connector.connect(host= self.dbhost, user=self.dbuser, port=self.dbport)
+                else:
+                    return db_connector.connect(host= self.dbhost, port=self.dbport)
+
+
     def use_database(self, database_name):
         """
         Specifies which database to use
@@ -155,6 +175,7 @@ class DB(object):
 
         odict = self.__dict__.copy() # copy the dict since we are going to change it
         del odict['db']              # remove conexion to MySQL: attribute self.db cannot be pickled
+        odict['pool'] = None         # neither the connections of the pool
         return odict
 
     def __setstate__(self, dict):
@@ -179,6 +200,9 @@ class DB(object):
         self._unlock_tables()
         self.cursor.close()
         self.db.close()
+        if self.pool is not None:
+            self.pool.close()
+            self.pool = None
 
     def check_consistency_with_given_source_version(self, source_code_version):
         #print self._get_source_code_version_in_db(), source_code_version
@@ -232,7 +256,10 @@ class DB(object):
                     sys.stderr.write(actual_query+"\n")
                 try:
                     if( actual_query != "" ):
-                        self.cursor.execute(actual_query)
+                        if self.profiler is None:
+                            self.cursor.execute(actual_query)
+                        else:
+                            self._profiled_execute(actual_query, "insert")
                 except Exception, inst:
                     sys.stderr.write("Attention: this query was not executed due to a mysql exception: <<%s>>\n" %(actual_query))
                     sys.stderr.write("           Error Reported: %s\n" %(inst))
@@ -250,7 +277,10 @@ class DB(object):
                 #pass
                 if unlock == True:
                     self._unlock_tables()
-                self.cursor.execute(sql_query)
+                if self.profiler is None:
+                    self.cursor.execute(sql_query)
+                else:
+                    self._profiled_execute(sql_query, "insert")
                 if unlock == True:
                     self._lock_tables()
             except Exception, inst:
@@ -317,8 +347,11 @@ class DB(object):
 
         if sql_query is not None:
             try:
-                self.cursor.execute(sql_query)
-                answer = self.cursor.fetchall()
+                if self.profiler is None:
+                    self.cursor.execute(sql_query)
+                    answer = self.cursor.fetchall()
+                else:
+                    answer = self._profiled_execute(sql_query, "select")
             except Exception, inst:
                 sys.stderr.write("Attention: this query was not executed due to a mysql exception: <<%s>>\n" %(sql_query))
                 sys.stderr.write("           Error Reported: %s\n" %(inst))
@@ -386,6 +419,196 @@ class DB(object):
         # END OF else: (if answer:)
 
 
+    def enable_profiler(self, explain_threshold=None):
+        """
+        Starts recording time, number of rows and fingerprint of all the queries executed through select_db_content and insert_db_content
+
+        "explain_threshold" is the time (in seconds) from which the EXPLAIN of select queries is stored. If None, EXPLAIN is not used
+
+        Returns the QueryProfiler object, which can be used to obtain the report
+        """
+        self.profiler = QueryProfiler( explain_threshold = explain_threshold )
+        return self.profiler
+
+    def disable_profiler(self):
+        """
+        Stops recording queries. Returns the QueryProfiler object used (or None if it was not enabled)
+        """
+        profiler = self.profiler
+        self.profiler = None
+        return profiler
+
+    def get_profiler(self):
+        return self.profiler
+
+    def _profiled_execute(self, sql_query, query_type):
+        """
+        Executes the query recording it in the profiler. For select queries, returns all the results
+        """
+        initial_time = time.time()
+        self.cursor.execute(sql_query)
+        if query_type == "select":
+            answer = self.cursor.fetchall()
+            num_rows = len(answer)
+        else:
+            answer = None
+            num_rows = self.cursor.rowcount
+        self.profiler.record( sql_query = sql_query, query_type = query_type, elapsed_time = time.time()-initial_time, num_rows = num_rows, cursor = self.cursor )
+        return answer
+
+
+    def select_db_content_in_blocks(self, sql_query, block_size=100000):
+        """
+        Iterates over the results of the select "sql_query" in lists of up to "block_size" rows, read from the server with a single unbuffered cursor
+
+        Used for results too large to be kept in memory. The connection cannot execute other queries until the iteration finishes. Queries are not
+        recorded by the profiler
+        """
+
+        cursor = self.db.cursor(buffered=False)
+        finished = False
+        try:
+            try:
+                cursor.execute(sql_query)
+            except Exception, inst:
+                sys.stderr.write("Attention: this query was not executed due to a mysql exception: <<%s>>\n" %(sql_query))
+                sys.stderr.write("           Error Reported: %s\n" %(inst))
+                raise ValueError(inst)
+            while True:
+                data = cursor.fetchmany(block_size)
+                if not data:
+                    break
+                yield data
+            finished = True
+        finally:
+            if not finished:
+                # Rows not read are discarded, so that the connection can be used again
+                self.db.consume_results()
+            cursor.close()
+
+
+    def select_db_content_in_chunks(self, get_query, id_list, answer_mode="raw", remove_duplicates="no", min_chunk_size=1000):
+        """
+        Returns the content of a select query with a large IN list of identifiers, splitting the list in chunks
+
+        "get_query" is a function that returns the sql query for a list of identifiers. The queries of different chunks must return disjoint results
+        (for example, when the IN list restricts a column returned by the query), as results of all chunks are merged
+
+        "id_list" is the list of identifiers
+
+        "answer_mode" can be "raw" (a list with the rows of all the chunks, in the order of the chunks) or "list" (see select_db_content)
+
+        Chunks are sized so that each query fits in the maximum packet size accepted by the server. When there is more than one chunk, they are
+        executed concurrently using a pool of connections (up to "max_pool_size" connections). Chunks are smaller than "min_chunk_size" only if needed
+        """
+
+        id_list = list(id_list)
+
+        if len(id_list) == 0:
+            answer = []
+        else:
+            chunks = self._get_id_chunks(get_query, id_list, min_chunk_size=min_chunk_size)
+            queries = [ get_query(current_chunk) for current_chunk in chunks ]
+
+            # Locked tables can only be read through the connection that locked them
+            if len(queries) == 1 or self.max_pool_size < 2 or self.is_locked:
+                results = [ self.select_db_content(current_query, answer_mode="raw") for current_query in queries ]
+            else:
+                results = self._select_db_content_in_pool(queries)
+
+            answer = []
+            for current_result in results:
+                answer.extend(current_result)
+
+        if answer_mode == "raw":
+            return answer
+        elif answer_mode == "list":
+            temporal_list = [ element[0] for element in answer ]
+            if remove_duplicates == "yes":
+                return list(set(temporal_list))
+            return temporal_list
+        else:
+            raise ValueError("answer_mode value is not correct")
+
+
+    def _get_id_chunks(self, get_query, id_list, min_chunk_size=1000):
+        """
+        Splits "id_list" in chunks whose query (obtained with "get_query") fits in the maximum packet size, and that can be distributed
+        among the connections of the pool
+        """
+
+        if self.dbmaxpacket is None:
+            max_ids_by_packet = 10000
+        else:
+            # Size of the query without identifiers, and a margin for the rest of the packet
+            available_size = int(self.dbmaxpacket) - len(get_query([])) - 1024
+            id_size = max([ len(str(x)) for x in id_list ]) + 1
+            max_ids_by_packet = max(1, available_size / id_size)
+
+        num_connections = max(1, self.max_pool_size)
+        chunk_size = int(ceil(float(len(id_list)) / num_connections))
+        chunk_size = min(max_ids_by_packet, max(min_chunk_size, chunk_size))
+
+        return [ id_list[current_index:current_index+chunk_size] for current_index in xrange(0, len(id_list), chunk_size) ]
+
+
+    def _select_db_content_in_pool(self, queries):
+        """
+        Executes the select queries concurrently using the connections of the pool. Returns the list of results of the queries, in the same order
+        """
+
+        if self.pool is None:
+            self.pool = ConnectionPool(self, self.max_pool_size)
+
+        results = [ None ] * len(queries)
+        timings = []
+        errors = []
+
+        pending_queries = Queue.Queue()
+        for current_index in xrange(len(queries)):
+            pending_queries.put(current_index)
+
+        def execute_pending_queries():
+            connection = None
+            current_index = None
+            try:
+                connection = self.pool.get_connection()
+                cursor = connection.cursor(buffered=True)
+                while True:
+                    try:
+                        current_index = pending_queries.get_nowait()
+                    except Queue.Empty:
+                        break
+                    initial_time = time.time()
+                    cursor.execute(queries[current_index])
+                    results[current_index] = cursor.fetchall()
+                    timings.append((current_index, time.time()-initial_time))
+                cursor.close()
+            except Exception, inst:
+                errors.append((current_index, inst))
+            if connection is not None:
+                self.pool.release_connection(connection)
+
+        threads = [ threading.Thread(target=execute_pending_queries) for x in xrange(min(self.max_pool_size, len(queries))) ]
+        for current_thread in threads:
+            current_thread.start()
+        for current_thread in threads:
+            current_thread.join()
+
+        if len(errors) > 0:
+            (current_index, inst) = errors[0]
+            if current_index is not None:
+                sys.stderr.write("Attention: this query was not executed due to a mysql exception: <<%s>>\n" %(queries[current_index]))
+            sys.stderr.write("           Error Reported: %s\n" %(inst))
+            raise ValueError(inst)
+
+        if self.profiler is not None:
+            for (current_index, elapsed_time) in timings:
+                self.profiler.record( sql_query = queries[current_index], query_type = "select", elapsed_time = elapsed_time, num_rows = len(results[current_index]) )
+
+        return results
+
+
     def add_autoincrement_columns(self, table, attribute):
         
         if self.uses_buffer is False:
@@ -411,6 +634,16 @@ class DB(object):
         
         return self.autoincrement_values[(table,attribute)]
 
+    def set_current_autoincrement(self, table, attribute, value):
+        """
+        Sets the last autoincrement value used for a column (used when resuming an unfinished parsing from a checkpoint)
+        """
+
+        if not self.autoincrement_values.has_key((table,attribute)):
+            raise ValueError("Trying to set the value of an unexisting autoincrement column")
+
+        self.autoincrement_values[(table,attribute)] = value
+
     def _get_last_stable_autoincrement(self, table, attribute):
         return self.select_db_content(self._get_select_sql_query(tables=["BianaDatabase"], columns=["last_"+attribute]))
 
@@ -735,11 +968,22 @@ class DB(object):
     # INSERT RELATED METHODS
     ####
 
-    def _get_nested_insert_sql_query(self, table, columns, subquery):
+    def _get_nested_insert_sql_query(self, table, columns, subquery, ignore_duplicates=False):
+        """
+        Generates an insert sql statement that inserts the results of "subquery"
+
+        If "ignore_duplicates" is True, rows with duplicated keys are ignored (INSERT IGNORE)
+        """
 
         self._check_locked_table(table)
+        self.inserted_tables.add(str(table))
+
+        if ignore_duplicates:
+            ignore = "IGNORE "
+        else:
+            ignore = ""
         
-        return """INSERT INTO %s (%s) (%s)""" %(table, ",".join(columns), subquery)
+        return """INSERT %sINTO %s (%s) (%s)""" %(ignore, table, ",".join(columns), subquery)
 
 
     def _get_insert_sql_query(self,table,column_values,special_column_values=[],use_buffer=True, max_elements_in_buffer=None, on_duplicate_key="IGNORE"):
@@ -764,6 +1008,7 @@ class DB(object):
         table = "%s" %(table)
 
         self._check_locked_table(table)
+        self.inserted_tables.add(table)
         
         columns = []
         values = []
@@ -836,6 +1081,8 @@ class DB(object):
                 # Empties only the key_buffer requested
                 list_of_buffer_keys = [key_buffer]
 
+            flushed_elements = []
+
             for actual_key in list_of_buffer_keys:
 
                 bufferElement = self.insert_buffer.get_buffer()[actual_key]
@@ -855,7 +1102,12 @@ class DB(object):
 
                     # It not should be here...
                     bufferElement.restart_bufferElement()
+                    flushed_elements.append(bufferElement)
 
+            if len(return_queries)>0:
+                self.num_buffer_flushes += 1
+                for bufferElement in flushed_elements:
+                    bufferElement.last_flush = self.num_buffer_flushes
 
         return return_queries
 
@@ -1006,8 +1258,15 @@ class DB(object):
         
         return
         
-    def _get_update_sql_query(self, table, update_column_values, fixed_conditions=None):
+    def get_inserted_tables(self):
+        """
+        Returns the set of names of the tables in which data has been inserted (using _get_insert_sql_query or _get_nested_insert_sql_query) through this connection
+        """
+        return self.inserted_tables
+
+    def _get_update_sql_query(self, table, update_column_values, fixed_conditions=None, ignore_duplicates=False):
     	"""
+    	If "ignore_duplicates" is True, rows whose update would duplicate a key are not updated (UPDATE IGNORE)
     	"""
     	
     	if fixed_conditions is None:
@@ -1024,7 +1283,12 @@ class DB(object):
     		
         #print """UPDATE %s SET %s %s %s""" %(table, update_values,where_sql,fixed_conditions_sql)
     	
-    	return """UPDATE %s SET %s %s %s""" %(table, update_values,where_sql,fixed_conditions_sql)
+    	if ignore_duplicates:
+    		ignore = "IGNORE "
+    	else:
+    		ignore = ""
+    	
+    	return """UPDATE %s%s SET %s %s %s""" %(ignore, table, update_values,where_sql,fixed_conditions_sql)
     
     	
     ####################################################################################
@@ -1063,18 +1327,44 @@ class DB(object):
         return ["DROP TABLE %s" %x for x in table_list ]
 
 
-    def _empty_buffer(self):
+    def _empty_buffer(self, key_list=None):
         """
         It only can be used if insert buffer is being used
+
+        If "key_list" is given, only the buffer elements with these keys are emptied
         """
 
         # First, obtain the list of all queries to insert
-        queries = self._get_buffer_multiple_queries()
+        if key_list is None:
+            queries = self._get_buffer_multiple_queries()
+        else:
+            queries = []
+            for current_key in key_list:
+                queries.extend(self._get_buffer_multiple_queries(key_buffer=current_key))
 
         for actual_query in queries:
             self.insert_db_content( actual_query, answer_mode=None )
 
 
+    def get_buffer_state(self):
+        """
+        Returns the current state of the insert buffer: the number of buffer flushes done and the keys of the buffer elements with rows not sent yet
+
+        Used with get_uncommitted_buffer_keys to know when the rows buffered at a given moment have been sent to the database, without emptying the buffer
+        """
+
+        return (self.num_buffer_flushes, [ current_key for current_key, bufferElement in self.insert_buffer.get_buffer().iteritems() if bufferElement.num_elements>0 ])
+
+    def get_uncommitted_buffer_keys(self, buffer_state):
+        """
+        Returns the keys of the buffer elements that have not been sent to the database since "buffer_state" (as returned by get_buffer_state) was taken
+        """
+
+        (num_buffer_flushes, key_list) = buffer_state
+
+        return [ current_key for current_key in key_list if self.insert_buffer.get_buffer()[current_key].last_flush <= num_buffer_flushes ]
+
+
 ## BUFFER RELATED METHODS ##
 
 
@@ -1082,6 +1372,60 @@ class DB(object):
 
 
     
+###############################################
+##         CONNECTION POOL                   ##
+###############################################
+
+
+class ConnectionPool(object):
+    """
+    Pool of connections to the database of a DB object, used to execute queries concurrently
+
+    Connections are opened when they are needed, up to "size" connections
+    """
+
+    def __init__(self, parent, size):
+
+        self.parent = parent
+        self.size = size
+        self.connections = []
+        self.free_connections = Queue.Queue()
+        self.lock = threading.Lock()
+
+    def get_connection(self):
+        """
+        Returns a free connection, opening a new one if there is no one free and the pool is not full. Otherwise, it waits for a free connection
+        """
+
+        self.lock.acquire()
+        try:
+            if self.free_connections.empty() and len(self.connections) < self.size:
+                connection = self.parent._connect()
+                if self.parent.dbname is not None:
+                    connection.database = self.parent.dbname
+                self.connections.append(connection)
+                return connection
+        finally:
+            self.lock.release()
+
+        return self.free_connections.get()
+
+    def release_connection(self, connection):
+
+        self.free_connections.put(connection)
+
+    def close(self):
+
+        for connection in self.connections:
+            try:
+                connection.close()
+            except Exception:
+                pass
+        self.connections = []
+        self.free_connections = Queue.Queue()
+
+
+
 ###############################################
 ##         BUFFER RELATED CLASSES            ##
 ###############################################
@@ -1182,6 +1526,8 @@ class BufferElement(object):
         self.max_elements_in_buffer = max_elements_in_buffer
 
         self.num_elements =  1  # it stores the number of elements that the buffer contains (because sometimes it is necessary to put a limit)
+
+        self.last_flush = 0     # value of the number of buffer flushes of the database object when this element was last sent to the database
         
 
         # Sum the length of the column plus 1 (the comma)
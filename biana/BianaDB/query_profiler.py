@@ -0,0 +1,132 @@
+"""
+    BIANA: Biologic Interactions and Network Analysis
+    Copyright (C) 2009  Javier Garcia-Garcia, Emre Guney, Baldo Oliva
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+import re
+import time
+
+
+class QueryProfiler(object):
+    """
+    Records the queries executed through a ConnectorDB object (see ConnectorDB.enable_profiler)
+
+    Queries are aggregated by fingerprint (the query with its literal values, IN lists and inserted values replaced), storing number of calls,
+    total and maximum time and number of rows. Queries slower than "explain_threshold" seconds are kept together with their EXPLAIN output
+    """
+
+    string_regex = re.compile(r"\"(?:[^\"\\]|\\.)*\"|'(?:[^'\\]|\\.)*'")
+    number_regex = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+    in_list_regex = re.compile(r"\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)", re.IGNORECASE)
+    values_regex = re.compile(r"\bVALUES\s*\(.*", re.IGNORECASE | re.DOTALL)
+    spaces_regex = re.compile(r"\s+")
+
+    def __init__(self, explain_threshold=None, max_slow_queries=100):
+        """
+        "explain_threshold" is the time (in seconds) from which a select query is considered slow and its EXPLAIN is stored. If None, EXPLAIN is not used
+
+        "max_slow_queries" is the maximum number of slow queries stored (the slowest ones are kept)
+        """
+
+        self.explain_threshold = explain_threshold
+        self.max_slow_queries = max_slow_queries
+        self.initial_time = time.time()
+        self.reset()
+
+    def reset(self):
+        self.fingerprints = {}      # fingerprint: [query_type, num_calls, total_time, max_time, num_rows]
+        self.slow_queries = []      # list of (time, query, explain_rows)
+
+    def get_fingerprint(self, sql_query):
+        """
+        Returns the normalized form of "sql_query", used to group queries that only differ in their values
+        """
+        fingerprint = self.string_regex.sub("?", sql_query)
+        fingerprint = self.number_regex.sub("?", fingerprint)
+        fingerprint = self.in_list_regex.sub("IN (...)", fingerprint)
+        fingerprint = self.values_regex.sub("VALUES (...)", fingerprint)
+        return self.spaces_regex.sub(" ", fingerprint).strip()
+
+    def record(self, sql_query, query_type, elapsed_time, num_rows, cursor=None):
+        """
+        Records the execution of a query
+
+        "cursor" is used to get the EXPLAIN of slow select queries
+        """
+
+        fingerprint = self.get_fingerprint(sql_query)
+
+        stats = self.fingerprints.get(fingerprint)
+        if stats is None:
+            stats = self.fingerprints[fingerprint] = [query_type, 0, 0.0, 0.0, 0]
+        stats[1] += 1
+        stats[2] += elapsed_time
+        stats[3] = max(stats[3], elapsed_time)
+        if num_rows is not None and num_rows > 0:
+            stats[4] += num_rows
+
+        if self.explain_threshold is not None and elapsed_time >= self.explain_threshold:
+            explain_rows = None
+            if cursor is not None and query_type == "select":
+                try:
+                    cursor.execute("EXPLAIN %s" %sql_query)
+                    explain_rows = cursor.fetchall()
+                except Exception:
+                    explain_rows = None
+            self.slow_queries.append((elapsed_time, sql_query, explain_rows))
+            if len(self.slow_queries) > self.max_slow_queries:
+                self.slow_queries.sort(reverse=True)
+                del self.slow_queries[self.max_slow_queries:]
+
+    def get_report(self, max_fingerprints=50, max_query_length=500):
+        """
+        Returns a string with the aggregated report of the queries executed, sorted by total time
+        """
+
+        total_time = sum([ x[2] for x in self.fingerprints.itervalues() ])
+        total_calls = sum([ x[1] for x in self.fingerprints.itervalues() ])
+
+        lines = [ "Query profile: %s queries (%s distinct) in %.3f seconds (profiling time: %.3f seconds)" %(total_calls, len(self.fingerprints), total_time, time.time()-self.initial_time),
+                  "%8s\t%10s\t%6s\t%10s\t%10s\t%10s\t%s" %("calls", "total(s)", "%", "mean(ms)", "max(ms)", "rows", "query") ]
+
+        sorted_fingerprints = sorted(self.fingerprints.iteritems(), key=lambda x: x[1][2], reverse=True)
+
+        for fingerprint, (query_type, num_calls, query_time, max_time, num_rows) in sorted_fingerprints[:max_fingerprints]:
+            if total_time > 0:
+                percentage = query_time*100/total_time
+            else:
+                percentage = 0.0
+            lines.append("%8d\t%10.3f\t%6.2f\t%10.3f\t%10.3f\t%10d\t%s" %(num_calls, query_time, percentage, query_time*1000/num_calls, max_time*1000, num_rows, fingerprint[:max_query_length]))
+
+        if len(self.slow_queries) > 0:
+            lines.append("")
+            lines.append("Slow queries (more than %s seconds):" %self.explain_threshold)
+            for (query_time, sql_query, explain_rows) in sorted(self.slow_queries, reverse=True):
+                lines.append("%.3f s\t%s" %(query_time, sql_query[:max_query_length]))
+                if explain_rows is not None:
+                    for current_row in explain_rows:
+                        lines.append("\tEXPLAIN: %s" %("\t".join([ str(x) for x in current_row ])))
+
+        return "\n".join(lines)+"\n"
+
+    def write_report(self, file_name, max_fingerprints=50):
+        """
+        Writes the report in "file_name"
+        """
+        report_fd = open(file_name, 'w')
+        report_fd.write(self.get_report(max_fingerprints = max_fingerprints))
+        report_fd.close()
@@ -23,13 +23,17 @@
 import sys
 
 from biana.BianaDB.BianaDBaccess import BianaDBaccess
+from biana.BianaDB.BianaSQLiteAccess import BianaSQLiteAccess
 import UserEntitySet
 import UserEntity
+import session_snapshot
+import query_cache
 
 from ExternalEntityAttribute import ExternalEntityAttribute
 
 import output_utilities
 from biana.utilities import graph_utilities
+from biana.utilities import identifier_utilities
 from BianaReport import *
 import copy
 import traceback
@@ -71,6 +75,31 @@ class BianaSessionManager(object):
     # attribute substitution list for outputting identifiers of nodes in network when none of the external entities in the node has a valid value for given attribute
     substitution_list = [ "uniprotaccession", "geneid" ]
 
+    # number of external entities fetched in each query and size (in characters) of the blocks sent to the output method when writing sequences in fasta format
+    fasta_output_chunk_size = 10000
+    fasta_output_buffer_size = 1048576
+
+    # maximum number of results and maximum memory (in bytes) of the cache of repeated database queries (see _cached_db_call)
+    query_cache_max_entries = 256
+    query_cache_max_memory = 67108864
+
+    # maximum number of identifiers and maximum memory (in bytes) of the cache of identifiers resolved to user entities (see _get_user_entities_by_attribute_values)
+    identifier_cache_max_entries = 200000
+    identifier_cache_max_memory = 67108864
+
+    # maximum number of (relation type, user entity) entries and maximum memory (in bytes) of the cache of user entity relations (see BianaDBaccess.get_user_entity_relations)
+    relations_cache_max_entries = 500000
+    relations_cache_max_memory = 134217728
+
+    # arguments of the cached methods that are lists whose order and repeated elements do not change the result (see query_cache.normalize_argument)
+    query_cache_unordered_arguments = { "get_external_entities_dict": ("externalEntityIdsList", "attribute_list", "relation_attribute_list", "participant_attribute_list"),
+                                        "get_default_external_entity_ids": ("externalEntityIDsList",),
+                                        "get_user_entity_attributes": ("listUserEntityID",),
+                                        "get_relations": ("listRelationType",) }
+
+    # size (in characters) of the blocks sent to the output method when writing tables of user entities and relations (see output_utilities.TableWriter)
+    table_output_buffer_size = 65536
+
     #uE_types_enum = Enum()
     #eEr_types_enum = Enum()
 
@@ -81,8 +110,8 @@ class BianaSessionManager(object):
         ------
         pSessionID: identifier for current session object
         unification_protocol_name: name of the unification protocol to be used while retrieving data from database
-        dbname: name of the mysql database to be used
-        dbhost: host where mysql database resides
+        dbname: name of the mysql database to be used (or the exported SQLite file if dbhost is "sqlite")
+        dbhost: host where mysql database resides. If it is "sqlite", the session uses a unification protocol exported with BianaDBaccess.export_unification_protocol_to_sqlite, without database server
         dbuser: user for the given mysql database
         dbpassword: password for the given mysql database and host
         dbport: port for mysql database connection, if None default value is used
@@ -102,12 +131,7 @@ class BianaSessionManager(object):
         self.dbport=dbport
 
 	OutBianaInterface.send_process_message("Checking database integrity... BIANA will remove data from unfinalized parsing attempts (if there had been any).")
-        self.dbAccess = BianaDBaccess(dbname=dbname,
-                                      dbhost=dbhost,
-                                      dbuser=dbuser,
-                                      dbpassword=dbpassword,
-                                      dbport=dbport,
-				      check_integrity=True)
+        self.dbAccess = self._get_database_access(check_integrity=True)
 	OutBianaInterface.send_end_process_message()
         
         
@@ -120,6 +144,10 @@ class BianaSessionManager(object):
         self.uE_types_dict = {}
         self.eEr_types_dict = {}
 
+        self.identifier_resolution_cache = query_cache.QueryResultCache(max_entries = self.identifier_cache_max_entries, max_memory = self.identifier_cache_max_memory)    # user entities of identifiers already resolved (see _get_user_entities_by_attribute_values)
+        self.user_entity_relations_cache = query_cache.QueryResultCache(max_entries = self.relations_cache_max_entries, max_memory = self.relations_cache_max_memory)    # relations of the user entities already expanded (see BianaDBaccess.get_user_entity_relations)
+        self.query_result_cache = query_cache.QueryResultCache(max_entries = self.query_cache_max_entries, max_memory = self.query_cache_max_memory)
+
         self.idLastUserEntitySet = 0
 
         self.selectedUserEntitySetsIds = set()
@@ -148,6 +176,9 @@ class BianaSessionManager(object):
         odict = self.__dict__.copy() # copy the dict since we change it
         del odict['dbAccess']              # remove database entry
         del odict['outmethod']              # remove static outmethod entry
+        odict['identifier_resolution_cache'] = None   # identifiers are resolved again from database when needed
+        odict['user_entity_relations_cache'] = None
+        odict['query_result_cache'] = None
         return odict
 
     def __setstate__(self, dict):
@@ -157,30 +188,138 @@ class BianaSessionManager(object):
         dict: the dictionary of a previously created and saved BianaSessionManager object
         """
         self.__dict__.update(dict) # update attributes
-        self.dbAccess = BianaDBaccess(dict["dbname"], dict["dbhost"], dict["dbuser"], dict["dbpassword"], dict["dbport"])
+        self._restore_session()
+        return
+
+    def _restore_session(self):
+        """
+        Reconnects a loaded session to the database and sends its user entity sets through the out method
+        """
+        self.dbAccess = self._get_database_access()
         self.outmethod = OutBianaInterface.send_data
+        self.identifier_resolution_cache = query_cache.QueryResultCache(max_entries = self.identifier_cache_max_entries, max_memory = self.identifier_cache_max_memory)
+        self.user_entity_relations_cache = query_cache.QueryResultCache(max_entries = self.relations_cache_max_entries, max_memory = self.relations_cache_max_memory)
+        self.query_result_cache = query_cache.QueryResultCache(max_entries = self.query_cache_max_entries, max_memory = self.query_cache_max_memory)
 
         self.outmethod("<new_session id=\"%s\" dbname=\"%s\" dbhost=\"%s\" unification_protocol=\"%s\" description=\"Session description\"/>" %(self.sessionID,self.dbname,self.dbhost,self.unification_protocol_name))
         
         OutBianaInterface.send_process_message("Sending data...")
-        for idUESet, user_entity_set in self.dictUserEntitySet.iteritems():
-            self._send_complete_user_entity_set_info(user_entity_set=user_entity_set)
+        is_lazy = isinstance(self.dictUserEntitySet, session_snapshot.LazyUserEntitySetDict)
+        for idUESet in self.dictUserEntitySet.keys():
+            chunk = None
+            if is_lazy:
+                chunk = self.dictUserEntitySet.get_chunk(idUESet)
+            if chunk is not None and chunk.summary is not None:
+                # Sets not loaded yet are sent as a summary taken from the snapshot manifest. Their complete content is sent when they are loaded
+                self._send_user_entity_set_summary(idUESet, chunk.summary)
+            elif chunk is not None:
+                # Snapshot saved without summaries: the set is read only to send it, and it is loaded again when it is used
+                self._send_complete_user_entity_set_info(user_entity_set=chunk.load())
+                chunk.all_groups_printed = True
+            else:
+                self._send_complete_user_entity_set_info(user_entity_set=self.dictUserEntitySet[idUESet])
+        if is_lazy:
+            self.dictUserEntitySet.load_method = self._send_loaded_user_entity_set_info
         OutBianaInterface.send_end_process_message()
 
         # Checks if database is optimized for running. If not, optimize it
         if self.dbAccess.isOptimizedForRunning()==False:
             OutBianaInterface.send_process_message("Optimizing database...")
             self.dbAccess.optimize_database_for( mode="running" )
+            self.clear_query_cache()
             OutBianaInterface.send_end_process_message()
 
         return
 
+    def _get_database_access(self, check_integrity=False):
+        """
+        Returns the database access object of the session. If dbhost is "sqlite", dbname is a unification protocol exported to a SQLite file
+        (see BianaDBaccess.export_unification_protocol_to_sqlite) and it is used without database server
+        """
+        if self.dbhost == "sqlite":
+            return BianaSQLiteAccess(self.dbname)
+        return BianaDBaccess(dbname=self.dbname,
+                             dbhost=self.dbhost,
+                             dbuser=self.dbuser,
+                             dbpassword=self.dbpassword,
+                             dbport=self.dbport,
+                             check_integrity=check_integrity)
+
+    def save_snapshot(self, snapshot_dir):
+        """
+        Saves the session as a snapshot in the directory snapshot_dir (see session_snapshot). Only user entity sets that have changed since the last save are written
+        ------
+        snapshot_dir: directory where the snapshot is saved
+        """
+        session_attributes = self.__getstate__()
+        del session_attributes['dictUserEntitySet']
+        session_attributes['dictUserEntity'] = {}    # user entity objects are fetched again from database when needed
+        return session_snapshot.save_snapshot(snapshot_dir, session_attributes, self.dictUserEntitySet)
+
+    def load_snapshot(snapshot_dir):
+        """
+        Returns the session saved as a snapshot in snapshot_dir. User entity sets are loaded when they are used for the first time
+        ------
+        snapshot_dir: directory where the snapshot was saved
+        """
+        (session_attributes, dictUserEntitySet) = session_snapshot.load_snapshot(snapshot_dir)
+        session = BianaSessionManager.__new__(BianaSessionManager)
+        session.__dict__.update(session_attributes)
+        session.dictUserEntitySet = dictUserEntitySet
+        session._restore_session()
+        return session
+
+    load_snapshot = staticmethod(load_snapshot)
+
     def close(self):
         self.dbAccess.close()
 
     
     def reconnect(self):
         self.dbAccess.reconnect()
+        self.clear_query_cache()    # database could have been changed while disconnected
+
+
+    def _cached_db_call(self, method_name, **arguments):
+        """
+        Calls the method "method_name" of the database access object with the keyword "arguments", reusing the result if the same call
+        (with the same unification protocol and database) has been done before. Returned results can be modified by the caller
+        ------
+        method_name: name of the BianaDBaccess method
+        """
+        self.query_result_cache.set_namespace((self.dbname, self.dbhost, self.unification_protocol_name))
+        key = self.query_result_cache.get_key(method_name, arguments, self.query_cache_unordered_arguments.get(method_name, ()))
+        result = self.query_result_cache.get(key, method_name)
+        if result is None:
+            result = getattr(self.dbAccess, method_name)(**arguments)
+            self.query_result_cache.put(key, result)
+        return result
+
+    def clear_query_cache(self):
+        """
+        Removes the results stored in the cache of database queries, the identifiers resolved and the relations of user entities. It has to be called when the database is modified
+        """
+        self.query_result_cache.clear()
+        self.identifier_resolution_cache.clear()
+        self.user_entity_relations_cache.clear()
+
+    def get_query_cache_report(self):
+        """
+        Returns a string with the hit rate of the cache of database queries for each method and its memory usage, followed by the ones of the caches of identifiers resolved and of user entity relations
+        """
+        return self.query_result_cache.get_report() + self.identifier_resolution_cache.get_report() + self.user_entity_relations_cache.get_report()
+
+    def _get_table_writer(self, output_format, out_method, columns, attributes=[]):
+        """
+        Returns the output_utilities.TableWriter used to output a table in "output_format" through "out_method", with the header already written.
+        When the table is sent to the graphical interface, each block is flushed to the socket before producing the next one
+        """
+        if out_method == self.outmethod:
+            flush_method = OutBianaInterface.flush
+        else:
+            flush_method = None
+        return output_utilities.get_table_writer( output_format = output_format, out_method = out_method, columns = columns, attributes = attributes,
+                                                  buffer_size = self.table_output_buffer_size, flush_method = flush_method )
 
 
     def _send_complete_user_entity_set_info(self, user_entity_set):
@@ -196,6 +335,26 @@ class BianaSessionManager(object):
             self.outmethod(self._get_xml(inner_content=user_entity_set._get_xml(inner_content="<update_network_depth levels=\"%s\"/>" %user_entity_set.get_level())))
 
 
+    def _send_user_entity_set_summary(self, user_entity_set_id, summary):
+        """
+        Sends the summary of a user entity set not loaded yet (see session_snapshot.get_user_entity_set_summary) in xml format through self.outmethod
+        ------
+        user_entity_set_id: identifier of the user entity set
+        summary: dictionary with the size, number of edges and levels of the set
+        """
+        set_xml = "<user_entity_set id=\"%s\">%%s</user_entity_set>" %user_entity_set_id
+        self.outmethod(self._get_xml(inner_content="<new_user_entity_set id=\"%s\"/>" %user_entity_set_id))
+        self.outmethod(self._get_xml(inner_content=set_xml %("<user_entity_set_summary size=\"%s\" edges=\"%s\"/>" %(summary["size"], summary["edges"]))))
+        if summary["levels"] is not None:
+            self.outmethod(self._get_xml(inner_content=set_xml %("<update_network_depth levels=\"%s\"/>" %summary["levels"])))
+
+    def _send_loaded_user_entity_set_info(self, user_entity_set):
+        """
+        Sends the complete content of a user entity set loaded from a session snapshot, that was only sent as a summary
+        """
+        self.outmethod(self._get_xml(inner_content=self._get_user_entity_set_xml(user_entity_set)))
+        user_entity_set._printed_groups = set(user_entity_set.relation_groups)
+
     def get_ontology(self, ontology_name, root_attribute_values=[]):
         """
         Fetchs the ontology structure identifier by ontology_name
@@ -208,7 +367,7 @@ class BianaSessionManager(object):
 
         #print "loading ontology from database"
 
-        ontology_obj =  self.dbAccess.get_ontology( ontology_name = ontology_name, root_attribute_values = root_attribute_values, load_external_entities = False )  # Changed True to False
+        ontology_obj =  self._cached_db_call( "get_ontology", ontology_name = ontology_name, root_attribute_values = root_attribute_values, load_external_entities = False )  # Changed True to False
 
         #print "loaded"
 
@@ -309,6 +468,97 @@ class BianaSessionManager(object):
             dictTypeToName.setdefault(identifierType, set()).add(identifierString)
         return dictTypeToName
 
+    def _get_user_entities_by_attribute_values(self, attribute_identifier, values_list, attribute_restriction_list=[], negative_attribute_restriction_list=[], only_uniques=False):
+        """
+        Returns a dictionary { value: list of (userEntityID, type) } with the user entities of the given values (values without user entities are not included)
+        ------
+        attribute_identifier: attribute of the values
+        values_list: list of values to be resolved
+        attribute_restriction_list: list of (attribute, value) tuples that user entities must have
+        negative_attribute_restriction_list: list of (attribute, value) tuples that user entities must not have
+        only_uniques: if True, only values of type unique are used
+
+        All values are resolved with the same query (see BianaDBaccess.get_user_entities_IDs_by_attribute_values). When there are no restrictions,
+        results are kept (in a size bounded cache) for the database and unification protocol of the session, so values already resolved are not queried again
+        """
+
+        use_cache = len(attribute_restriction_list)==0 and len(negative_attribute_restriction_list)==0
+        cache = self.identifier_resolution_cache
+        cache.set_namespace((self.dbname, self.dbhost, self.unification_protocol_name))
+        attribute_identifier = attribute_identifier.lower()
+
+        value_to_user_entities = {}
+        values_to_resolve = []
+        for current_value in values_list:
+            cached_user_entities = None
+            if use_cache:
+                cached_user_entities = cache.get((attribute_identifier, str(current_value).strip().lower(), only_uniques), "resolve_identifiers")
+            if cached_user_entities is not None:
+                if len(cached_user_entities) > 0:
+                    value_to_user_entities[current_value] = cached_user_entities
+            else:
+                values_to_resolve.append(current_value)
+
+        if len(values_to_resolve) > 0:
+            resolved = self.dbAccess.get_user_entities_IDs_by_attribute_values( unification_protocol_name = self.unification_protocol_name,
+                                                                                attribute_identifier = attribute_identifier,
+                                                                                values_list = values_to_resolve,
+                                                                                attribute_restrictions = attribute_restriction_list,
+                                                                                negative_attribute_restrictions = negative_attribute_restriction_list,
+                                                                                only_uniques = only_uniques )
+            for current_value in values_to_resolve:
+                current_user_entities = resolved.get(str(current_value).strip(), [])
+                if use_cache:
+                    cache.put((attribute_identifier, str(current_value).strip().lower(), only_uniques), current_user_entities)
+                if len(current_user_entities) > 0:
+                    value_to_user_entities[current_value] = current_user_entities
+
+        return value_to_user_entities
+
+    def resolve_identifiers(self, identifier_description_list, id_type="embedded", attribute_restriction_list=[], negative_attribute_restriction_list=[], only_uniques=False):
+        """
+        Returns a dictionary { (id_type, identifier): list of (userEntityID, type) } with the user entities of the given identifiers (identifiers without user entities are not included)
+        ------
+        identifier_description_list: list of identifiers
+        id_type: attribute of the identifiers, "embedded" if identifier_description_list is a list of (id_type, identifier) tuples, or "auto" to detect the type of each identifier (see identifier_utilities.detect_identifier_types)
+        attribute_restriction_list: list of (attribute, value) tuples that user entities must have
+        negative_attribute_restriction_list: list of (attribute, value) tuples that user entities must not have
+        only_uniques: if True, only values of type unique are used
+
+        Identifiers are grouped by type and each type is resolved with a single query
+        """
+
+        if id_type == "auto":
+            (type_to_ids, undetected_ids) = identifier_utilities.detect_identifier_types(identifier_description_list)
+            if len(undetected_ids) > 0:
+                sys.stderr.write("Type of %s identifiers could not be detected\n" %len(undetected_ids))
+        else:
+            type_to_ids = {}
+            for identifierDescription in identifier_description_list:
+                if id_type == "embedded":
+                    type_to_ids.setdefault(identifierDescription[0].lower(), []).append(identifierDescription[1])
+                else:
+                    type_to_ids.setdefault(id_type.lower(), []).append(identifierDescription)
+
+        identifier_to_user_entities = {}
+
+        for identifierType, identifier_list in type_to_ids.iteritems():
+            if identifierType == "userentityid":
+                uEId_to_type = self.dbAccess.get_user_entity_type(unification_protocol_name = self.unification_protocol_name, user_entity_ids = identifier_list)
+                for identifierString in identifier_list:
+                    if uEId_to_type.has_key(int(identifierString)):
+                        identifier_to_user_entities[(identifierType, identifierString)] = [(int(identifierString), uEId_to_type[int(identifierString)])]
+            else:
+                value_to_user_entities = self._get_user_entities_by_attribute_values( attribute_identifier = identifierType,
+                                                                                      values_list = identifier_list,
+                                                                                      attribute_restriction_list = attribute_restriction_list,
+                                                                                      negative_attribute_restriction_list = negative_attribute_restriction_list,
+                                                                                      only_uniques = only_uniques )
+                for identifierString, current_user_entities in value_to_user_entities.iteritems():
+                    identifier_to_user_entities[(identifierType, identifierString)] = current_user_entities
+
+        return identifier_to_user_entities
+
     def _get_next_uEs_id(self):
         """
         Private method to obtain automatically the next user entity set default id
@@ -327,8 +577,7 @@ class BianaSessionManager(object):
         original_uEs = self.get_user_entity_set(user_entity_set_id)
 
         if original_uEs is not None:
-            newObj = copy.deepcopy(original_uEs)
-            newObj.id = new_user_entity_set_id
+            newObj = original_uEs.duplicate(new_id = new_user_entity_set_id)
             self.dictUserEntitySet[newObj.id] = newObj
             self._send_complete_user_entity_set_info(user_entity_set=newObj)
         
@@ -347,8 +596,7 @@ class BianaSessionManager(object):
 
         if original_uEs is not None:
             if original_uEs.isNetworkCreated():
-                newObj = copy.deepcopy(original_uEs)
-                newObj.id = new_user_entity_set_id
+                newObj = original_uEs.duplicate(new_id = new_user_entity_set_id)
                 original_network = original_uEs.getNetwork()
 		use_self_relations = original_uEs.getRestrictions(restriction_type="use_self_relations")
                 random_network = graph_utilities.randomize_graph(graph = original_network, randomization_type = type_randomization, allow_self_edges = use_self_relations)
@@ -397,7 +645,7 @@ class BianaSessionManager(object):
         create userEntity objects from given externalEntity ids (or get if already existing) then add them to a userEntitySet
         ------
         identifier_description_list: list with external identifiers of the nodes in the set provided by user 
-        id_type: either list of attrubutes defined in EXTERNAL_ENTITY_TABLES or "embedded" meaning identifier_description_list is a list of (id_type, identifier) tuple in the form [(type1, id1), (type2, id2), ..., (typeN, idN)] 
+        id_type: either list of attrubutes defined in EXTERNAL_ENTITY_TABLES or "embedded" meaning identifier_description_list is a list of (id_type, identifier) tuple in the form [(type1, id1), (type2, id2), ..., (typeN, idN)] or "auto" to detect the type of each identifier (see identifier_utilities.detect_identifier_types)
         new_user_entity_set_id: identifier of the set provided by the user
         attribute_restriction_list: list of tuples provided by the user containing external entity attribute restrictons to be applied. They will be used always in the set (network creation, etc)
         negative_attribute_restriction_list: list of tuples provided by the user containing attributes that may neve appear in the user entity set. They will be used alwyas in the set.
@@ -414,6 +662,13 @@ class BianaSessionManager(object):
             user_entity_set = UserEntitySet.UserEntitySet(new_user_entity_set_id )
 
 
+            if id_type=="auto":
+                (type_to_ids, undetected_ids) = identifier_utilities.detect_identifier_types(identifier_description_list)
+                if len(undetected_ids) > 0:
+                    sys.stderr.write("Type of %s identifiers could not be detected\n" %len(undetected_ids))
+                identifier_description_list = [ (identifierType, x) for identifierType, id_list in type_to_ids.iteritems() for x in id_list ]
+                id_type = "embedded"
+
             # Javi added: transform restrictions (for transferred attributes)
             if id_type=="embedded":
                 identifier_description_list = self.dbAccess.transform_expanded_attribute_restrictions(identifier_description_list)
@@ -451,16 +706,14 @@ class BianaSessionManager(object):
 		    uEId_to_type = self.dbAccess.get_user_entity_type(unification_protocol_name = self.unification_protocol_name, user_entity_ids = setIdentifierName)
 		    listIdUserEntity = uEId_to_type.items() 
                 else:
-                    field_values = []
-                    for identifierName in setIdentifierName:
-                        field_values.append(("value",identifierName))
-                    listIdUserEntity = self.dbAccess.get_list_user_entities_IDs_by_attribute( unification_protocol_name = self.unification_protocol_name, 
-			    attribute_identifier = identifierType,
-			    field_values = field_values, 
-			    attribute_restrictions = attribute_restriction_list, 
-			    negative_attribute_restrictions = negative_attribute_restriction_list, 
-			    include_type = True,
-                only_uniques = only_uniques )
+                    value_to_user_entities = self._get_user_entities_by_attribute_values( attribute_identifier = identifierType,
+                                                                                          values_list = setIdentifierName,
+                                                                                          attribute_restriction_list = attribute_restriction_list,
+                                                                                          negative_attribute_restriction_list = negative_attribute_restriction_list,
+                                                                                          only_uniques = only_uniques )
+                    listIdUserEntity = set()
+                    for current_user_entities in value_to_user_entities.itervalues():
+                        listIdUserEntity.update(current_user_entities)
 
 
                 ## create new userEntity objects if not created (by another external entity that belongs to that userEntity) before 
@@ -506,7 +759,7 @@ class BianaSessionManager(object):
                 relations_str_list.append("<user_entity_relation node1=\"%s\" node2=\"%s\" type=\"%s\" relation_id=\"%s\"/>" %(id1, id2, self.eEr_types_enum.get(current_type), "0" ))  #TO CHECK IF IT IS NECESSARY TO PRINT THE RELATION ID...
 
         default_attributes_dict = dict([ (x,x) for x in user_entity_set_obj.get_groups_ids() ])
-        default_attributes_dict.update(self.dbAccess.get_default_external_entity_ids( externalEntityIDsList=user_entity_set_obj.get_groups_ids() ))
+        default_attributes_dict.update(self._cached_db_call( "get_default_external_entity_ids", externalEntityIDsList=user_entity_set_obj.get_groups_ids() ))
 
         uE_tags_xml = [ "<new_tag tag=\"%s\"/>" %tag for tag in user_entity_set_obj.get_all_user_entity_tags() ]
         uEr_tags_xml = [ "<new_relation_tag tag=\"%s\"/>" %tag for tag in user_entity_set_obj.get_all_user_entity_relation_tags() ]
@@ -549,6 +802,26 @@ class BianaSessionManager(object):
             objUserEntity = self.dictUserEntity[user_entity_id]
         return objUserEntity
 
+    def prefetch_user_entities(self, user_entity_ids):
+        """
+        Fetch externalEntity ids of all given user entities not retrieved before with a query for each chunk of user entities (instead of a query for each user entity as get_user_entity)
+        ------
+        user_entity_ids: list (or any iterable) of user entity identifiers
+        """
+        missing_ids = set([ x for x in user_entity_ids if not self.dictUserEntity.has_key(x) ])
+        if len(missing_ids) == 0:
+            return
+
+        # Only numeric identifiers can be user entities in the database (sets created from sif files can have other identifiers)
+        uE_eE_dict = self.dbAccess._get_dict_eE_for_uE_list(self.unification_protocol_name, [ int(x) for x in missing_ids if str(x).isdigit() ])
+
+        for user_entity_id in missing_ids:
+            listIdExternalEntity = []
+            if str(user_entity_id).isdigit():
+                listIdExternalEntity = uE_eE_dict.get(int(user_entity_id), [])
+            self.dictUserEntity[user_entity_id] = UserEntity.UserEntity(user_entity_id, listIdExternalEntity, self.dbAccess )
+        return
+
     def expand_user_entity_set(self, user_entity_set_id, is_last_level=False):
         """
         Fetchs interactions of userEntities in the last level of the userEntitySet
@@ -583,7 +856,8 @@ class BianaSessionManager(object):
                                                                                 listRelationType = user_entity_set.getRestrictions("relation_type_restrictions"),
                                                                                 dictRelationAttributeRestriction = user_entity_set.getRestrictions("relation_attribute_restrictions"),
                                                                                 use_self_relations = user_entity_set.getRestrictions("use_self_relations"),
-                                                                                limit_to_userEntityID_list = is_last_level) # ramon removes self. that was placed # before each user_entity_set
+                                                                                limit_to_userEntityID_list = is_last_level, # ramon removes self. that was placed # before each user_entity_set
+                                                                                adjacency_cache = self.user_entity_relations_cache)
 
                 OutBianaInterface.send_process_message("Processing information...")
              
@@ -616,7 +890,8 @@ class BianaSessionManager(object):
                                                                                 listRelationType = user_entity_set.getRestrictions("group_relation_type"),
                                                                                 dictRelationAttributeRestriction = user_entity_set.getRestrictions("relation_attribute_restrictions"),
                                                                                 use_self_relations = user_entity_set.getRestrictions("use_self_relations"),
-                                                                                limit_to_userEntityID_list = is_last_level) # ramon removes self. that was placed # before each user_entity_set
+                                                                                limit_to_userEntityID_list = is_last_level, # ramon removes self. that was placed # before each user_entity_set
+                                                                                adjacency_cache = self.user_entity_relations_cache)
 
                 OutBianaInterface.send_process_message("Processing information...")
 
@@ -638,7 +913,7 @@ class BianaSessionManager(object):
                 if len(listTupleIdUserEntity)>0:
 		    #eE_dict = self.dbAccess.get_external_entities_dict( attribute_list=["name"], externalEntityIdsList = user_entity_set.get_groups_ids() )
 		    default_attributes_dict = dict([ (x,x) for x in user_entity_set.get_groups_ids() ])
-		    default_attributes_dict.update(self.dbAccess.get_default_external_entity_ids( externalEntityIDsList=user_entity_set.get_groups_ids() ))
+		    default_attributes_dict.update(self._cached_db_call( "get_default_external_entity_ids", externalEntityIDsList=user_entity_set.get_groups_ids() ))
                     user_entity_set.setGroupsHierarchy( list_hierarchy = self.dbAccess.get_relations_hierarchy( externalEntityRelationIDs = relation_ids_set ) )
                     self.outmethod(self._get_xml(inner_content=user_entity_set._get_xml(inner_content=user_entity_set._get_groups_xml(only_not_printed=True,  group_identifiers = default_attributes_dict ))))     
                     
@@ -658,7 +933,9 @@ class BianaSessionManager(object):
                                                                                     attribute_restrictions = user_entity_set.getRestrictions("attribute_restrictions"),
                                                                                     negative_attribute_restrictions = user_entity_set.getRestrictions("negative_attribute_restrictions"),
                                                                                     dictRelationAttributeRestriction = user_entity_set.getRestrictions("relation_attribute_restrictions"), # Added to restrict also expansion with respect to original relation
-                                                                                    limit_to_userEntityID_list = is_last_level)
+                                                                                    limit_to_userEntityID_list = is_last_level,
+                                                                                    max_user_entities_by_value = user_entity_set.restrictions_dict.get("max_user_entities_by_shared_value"),
+                                                                                    adjacency_cache = self.user_entity_relations_cache)
 
                 for (idUserEntity1, idUserEntity2, externalEntityRelationID, relation_type, partner_type) in listTupleIdUserEntity:
                     self.uE_types_dict.setdefault(idUserEntity2, self.uE_types_enum.get_letter(partner_type))
@@ -684,7 +961,8 @@ class BianaSessionManager(object):
                                                                                                        listAttributes = user_entity_set.getRestrictions("attributeNetworkList"),
                                                                                                        limit_to_userEntityID_list = is_last_level,
                                                                                                        attribute_restrictions = user_entity_set.getRestrictions("attribute_restrictions"),
-                                                                                                       negative_attribute_restrictions = user_entity_set.getRestrictions("negative_attribute_restrictions") )
+                                                                                                       negative_attribute_restrictions = user_entity_set.getRestrictions("negative_attribute_restrictions"),
+                                                                                                       max_user_entities_by_value = user_entity_set.restrictions_dict.get("max_user_entities_by_shared_value") )
 
                 for (idUserEntity1, idUserEntity2, type) in listTupleIdUserEntity:
                     self.uE_types_dict.setdefault(idUserEntity2, self.uE_types_enum.get_letter(type))
@@ -750,7 +1028,7 @@ class BianaSessionManager(object):
             attribute_restriction_list = self.dbAccess.transform_expanded_attribute_restrictions(attribute_restriction_list)
             negative_attribute_restriction_list = self.dbAccess.transform_expanded_attribute_restrictions(negative_attribute_restriction_list)
 
-            listTupleIdUserEntity = self.dbAccess.get_relations( unification_protocol_name= self.unification_protocol_name, 
+            listTupleIdUserEntity = self._cached_db_call( "get_relations", unification_protocol_name= self.unification_protocol_name, 
                                                                  attribute_restrictions = user_entity_set.getRestrictions("attribute_restrictions"), 
                                                                  negative_attribute_restrictions = user_entity_set.getRestrictions("negative_attribute_restrictions"),
                                                                  listRelationType = user_entity_set.getRestrictions("relation_type_restrictions"), 
@@ -794,7 +1072,7 @@ class BianaSessionManager(object):
 
 
 
-    def create_network(self, user_entity_set_id, level=0, include_relations_last_level = True, relation_type_list=[], relation_attribute_restriction_list=[], use_self_relations=True, expansion_attribute_list=[], expansion_relation_type_list=[], expansion_level=2, attribute_network_attribute_list=[], group_relation_type_list=[]):
+    def create_network(self, user_entity_set_id, level=0, include_relations_last_level = True, relation_type_list=[], relation_attribute_restriction_list=[], use_self_relations=True, expansion_attribute_list=[], expansion_relation_type_list=[], expansion_level=2, attribute_network_attribute_list=[], group_relation_type_list=[], max_user_entities_by_shared_value=None):
         """
         Creates network of given user entity set adding relations of nodes as edges.
         ------
@@ -810,6 +1088,7 @@ class BianaSessionManager(object):
         expansion_level: number of relations (edges) to look further while inferring relations based on shared attributes
         attribute_network_attribute_list: tuples of (attribute, value) corresponding to attributes to be used while associating nodes with common attributes - value_dictionary is empty if attribute is not parameterizable
         group_relation_type_list: type of relations that are going to be treated as a group (like pathway, complex, cluster..)
+        max_user_entities_by_shared_value: attribute values shared by more user entities than this (such as very common GO terms or Pfam domains) are not used in shared attribute based relations. If None, all values are used
 
         """
         user_entity_set = self.dictUserEntitySet[user_entity_set_id]
@@ -849,6 +1128,7 @@ class BianaSessionManager(object):
 
             #attribute network related
             user_entity_set.addRestriction("attributeNetworkList", attribute_network_attribute_list)
+            user_entity_set.setRestriction("max_user_entities_by_shared_value", max_user_entities_by_shared_value)
 
             levelStart = user_entity_set.get_level()
 
@@ -889,8 +1169,7 @@ class BianaSessionManager(object):
             user_entity_set_list = [self.get_user_entity_set(x) for x in user_entity_set_list ]
 
         if len(user_entity_set_list) <2:   # TO CHECK IF THIS SHOULD BE DONE LIKE THIS... This line is here to prevent errors when only one userentityset is given
-            new_user_entity_set = copy.deepcopy(user_entity_set_list[0])
-            new_user_entity_set.id = new_user_entity_set_id
+            new_user_entity_set = user_entity_set_list[0].duplicate(new_id = new_user_entity_set_id)
             self.dictUserEntitySet[new_user_entity_set.id] = new_user_entity_set
             return
                 
@@ -1000,6 +1279,41 @@ class BianaSessionManager(object):
     ### OUTPUT METHODS ###
     ######################
 
+    def enable_query_profiler(self, explain_threshold=None):
+        """
+        Starts recording the database queries executed in this session (see output_query_profile)
+        ------
+        explain_threshold: time (in seconds) from which the EXPLAIN of a query is stored. If None, EXPLAIN is not used
+        """
+        self.dbAccess.enable_query_profiler( explain_threshold = explain_threshold )
+        return
+
+    def disable_query_profiler(self):
+        """
+        Stops recording the database queries executed in this session
+        """
+        self.dbAccess.disable_query_profiler()
+        return
+
+    def output_query_profile(self, out_method=None, max_queries=50):
+        """
+        Outputs the report of the database queries executed since the query profiler was enabled, aggregated by kind of query and sorted by total time
+        ------
+        out_method: output method to be used if None overwritten by instance default output method
+        max_queries: maximum number of different queries reported
+        """
+
+        if out_method is None:
+            out_method = self.outmethod
+
+        profiler = self.dbAccess.get_query_profiler()
+        if profiler is None:
+            OutBianaInterface.send_error_notification("Query profiler is not enabled", "Use enable_query_profiler before executing the commands to profile")
+            return
+
+        out_method(profiler.get_report( max_fingerprints = max_queries ))
+        return
+
     def output_ontology(self, ontology_object, additional_attributes = [], out_method=None):
         """
         Outputs the ontology in XML Format
@@ -1036,11 +1350,11 @@ class BianaSessionManager(object):
 
         values = []
 
-        eEr_dict = self.dbAccess.get_external_entities_dict( externalEntityIdsList = [external_entity_relation_id] )
+        eEr_dict = self._cached_db_call( "get_external_entities_dict", externalEntityIdsList = [external_entity_relation_id] )
 
         eEr_obj = eEr_dict[external_entity_relation_id]
 
-        eE_dict = self.dbAccess.get_external_entities_dict( externalEntityIdsList = eEr_obj.get_participant_external_entity_ids_list() )
+        eE_dict = self._cached_db_call( "get_external_entities_dict", externalEntityIdsList = eEr_obj.get_participant_external_entity_ids_list() )
         
         for current_eE in eE_dict.values():
             
@@ -1086,7 +1400,7 @@ class BianaSessionManager(object):
 
         rowIDs = []
 
-        eEr_dict = self.dbAccess.get_external_entities_dict( externalEntityIdsList = external_entity_relation_id_list,
+        eEr_dict = self._cached_db_call( "get_external_entities_dict", externalEntityIdsList = external_entity_relation_id_list,
                                                              attribute_list = node_attributes,
                                                              relation_attribute_list = relation_attributes,
                                                              participant_attribute_list = participant_attributes )
@@ -1096,7 +1410,7 @@ class BianaSessionManager(object):
 
         for current_eEr in eEr_dict.values():
 
-            eE_dict = self.dbAccess.get_external_entities_dict( externalEntityIdsList = current_eEr.get_participant_external_entity_ids_list(), attribute_list = node_attributes )
+            eE_dict = self._cached_db_call( "get_external_entities_dict", externalEntityIdsList = current_eEr.get_participant_external_entity_ids_list(), attribute_list = node_attributes )
 
             for current_participant in current_eEr.get_participant_external_entity_ids_list():
 
@@ -1234,7 +1548,7 @@ class BianaSessionManager(object):
 	user_entity_set = self.dictUserEntitySet[user_entity_set_id]
         new_values = []
 
-        attribute_values_dict = self.dbAccess.get_user_entity_attributes( unification_protocol_name = self.unification_protocol_name,
+        attribute_values_dict = self._cached_db_call( "get_user_entity_attributes", unification_protocol_name = self.unification_protocol_name,
                                                                           listUserEntityID = [user_entity_id],
                                                                           attribute_identifier = attribute, 
 									  only_uniques = output_only_unique_values )
@@ -1283,44 +1597,56 @@ class BianaSessionManager(object):
 	nodes = user_entity_set.get_user_entity_ids()
 	edges = user_entity_set.getRelations()
 
-	added_nodes = set()
-
-	#print len(edges), " edges"
-
-	new_network = graph_utilities.create_graph(allow_multi_edges=False)
+	# Attribute values of all the nodes are fetched at once (one query for each chunk of user entities) and
+	# each distinct (lower cased) value is mapped to an integer, so that edges are projected as sets of integers
+	numeric_nodes = dict([ (int(x), x) for x in nodes if str(x).isdigit() ])
+	attribute_values_dict = self._cached_db_call( "get_user_entity_attributes", unification_protocol_name = self.unification_protocol_name,
+									  listUserEntityID = numeric_nodes.keys(),
+									  attribute_identifier = node_attribute.lower() )
+
+	value_ids = {}
+	value_list = []
+	node_values = {}
+	for current_node, current_values in attribute_values_dict.iteritems():
+		current_value_ids = set()
+		for current_value in current_values:
+			current_value = current_value.lower()
+			current_id = value_ids.get(current_value)
+			if current_id is None:
+				current_id = value_ids[current_value] = len(value_list)
+				value_list.append(current_value)
+			current_value_ids.add(current_id)
+		node_values[numeric_nodes.get(current_node, current_node)] = current_value_ids
+	del attribute_values_dict
+
+	# Neighbours are grouped by node, so the values of each node are joined once with the union of the values of its neighbours
+	neighbours_dict = {}
+	for current_edge in edges:
+		neighbours_dict.setdefault(current_edge[0], set()).add(current_edge[1])
 
 	new_edges_set = set()
-
+	for current_node, current_neighbours in neighbours_dict.iteritems():
+		current_values = node_values.get(current_node)
+		if not current_values:
+			continue
+		neighbour_values = set()
+		for current_neighbour in current_neighbours:
+			neighbour_values.update(node_values.get(current_neighbour, ()))
+		for current_value in current_values:
+			new_edges_set.update([ (current_value, x) for x in neighbour_values ])
+
+	new_network = graph_utilities.create_graph()
+	new_network.add_edges_from([ (value_list[x], value_list[y]) for (x, y) in new_edges_set ])
+
+	# Nodes without relations are added with their values
+	added_nodes = set(neighbours_dict.iterkeys())
 	for current_edge in edges:
-			
-
-		uEobj1 = self.get_user_entity(user_entity_id=current_edge[0])
-		uEobj2 = self.get_user_entity(user_entity_id=current_edge[1])
-
-		added_nodes.add(current_edge[0])
 		added_nodes.add(current_edge[1])
-
-		eE_dict1 = self.dbAccess.get_external_entities_dict( externalEntityIdsList = uEobj1.get_externalEntitiesIds_set(),
-									attribute_list = [node_attribute] )
-		
-		eE_dict2 = self.dbAccess.get_external_entities_dict( externalEntityIdsList = uEobj2.get_externalEntitiesIds_set(),
-                                                                        attribute_list = [node_attribute] )
-
-		for current_eE1 in uEobj1.get_externalEntitiesIds_set():
-			for current_attribute1 in eE_dict1[current_eE1].get_attribute(attribute_identifier=node_attribute):
-				for current_eE2 in uEobj2.get_externalEntitiesIds_set():
-		                        for current_attribute2 in eE_dict2[current_eE2].get_attribute(attribute_identifier=node_attribute):
-						new_edges_set.add((current_attribute1.value.lower(),current_attribute2.value.lower()))
-	
-	new_network.add_edges_from(new_edges_set)
+	isolated_values = set()
 	for current_node in nodes:
 		if current_node not in added_nodes:
-			uEobj = self.get_user_entity(user_entity_id=current_node)
-			eE_dict = self.dbAccess.get_external_entities_dict( externalEntityIdsList = uEobj.get_externalEntitiesIds_set(),
-                                                                        attribute_list = [node_attribute] )
-			for current_eE in uEobj.get_externalEntitiesIds_set():
-				for current_attribute in eE_dict[current_eE].get_attribute(attribute_identifier=node_attribute):
-					new_network.add_node(current_attribute.value.lower())
+			isolated_values.update(node_values.get(current_node, ()))
+	new_network.add_nodes_from([ value_list[x] for x in isolated_values ])
 
 	return new_network
 
@@ -1381,6 +1707,9 @@ class BianaSessionManager(object):
         else:
             edges = user_entity_set.getRelations()
 
+	if len(participant_attributes) > 0:
+	    self.prefetch_user_entities(set([ x[0] for x in edges ] + [ x[1] for x in edges ]))
+
 	import os
 	if not os.path.exists(os.path.abspath(output_path)):
 	    sys.stderr.write("output_user_entity_set_network: given output path does not exist\n")
@@ -1526,6 +1855,9 @@ class BianaSessionManager(object):
         if out_method is None:
             out_method = self.outmethod
 
+        if len(participant_attributes) > 0:
+            self.prefetch_user_entities(set([ x[0] for x in edges ] + [ x[1] for x in edges ]))
+
         # Check excluded relation types
         excluded_relation_types = {}
 
@@ -1561,10 +1893,8 @@ class BianaSessionManager(object):
 	else:
 	    command = ""
 
-	if output_format == "xml":
-	    out_method(output_utilities.get_html_table_header( columns = columns, attributes = [ ("id", "user_entity_set_edges"), ("title","User Entity Set Network Details"),("command",command),("session",self.sessionID) ] ) )
-	elif output_format == "tabulated":                                            # line added by Joan        # REQUIRED TO TAG THE PRINTED COLUMNS 
-	    out_method( output_utilities.get_tabulated_table(values = [columns]) )    # line added by Joan        # REQUIRED TO TAG THE PRINTED COLUMNS 
+	table_writer = self._get_table_writer( output_format = output_format, out_method = out_method, columns = columns,
+					       attributes = [ ("id", "user_entity_set_edges"), ("title","User Entity Set Network Details"),("command",command),("session",self.sessionID) ] )
 
         ## Unconnected node attributes  
         if include_unconnected_nodes:
@@ -1610,9 +1940,7 @@ class BianaSessionManager(object):
 		if include_relation_sources:
 		    new_values.append("-")
 
-		if output_format == "xml"        : out_method(output_utilities.append_html_table_values( rowIDs = [current_rowID], values = [new_values] )) # Added by Joan. 
-		elif output_format == "tabulated": out_method( output_utilities.get_tabulated_table(values = [new_values]) )                                # Added by Joan. 
-		else                             : raise ValueError("output_format is not valid. Valid output formats are ['xml', 'tabulated']\n")         # Added by Joan.   
+		table_writer.add_row( values = new_values, rowID = current_rowID )
 
         # PRINT THE EDGES
         # Get the objects themselves   
@@ -1708,12 +2036,9 @@ class BianaSessionManager(object):
 			    inner_values[source] = n+1
 		    new_values.append(value_seperator.join([ "%s(%s)" % (self.dbAccess.get_external_database(i).get_name(),j) for i,j in inner_values.iteritems()]))
 
-		if output_format == "xml"        : out_method(output_utilities.append_html_table_values( rowIDs = [current_rowID], values = [new_values] ))
-		elif output_format == "tabulated": out_method( output_utilities.get_tabulated_table(values = [new_values]) )
-		else                             : raise ValueError("output_format is not valid. Valid output formats are ['xml', 'tabulated']\n")
+		table_writer.add_row( values = new_values, rowID = current_rowID )
 
-        if output_format == "xml":
-            out_method(output_utilities.get_html_table_foot())
+        table_writer.close()
 	OutBianaInterface.send_end_process_message()
         return
     
@@ -1772,11 +2097,8 @@ class BianaSessionManager(object):
         if out_method is None:
             out_method = self.outmethod
 
-        if output_format == "xml":
-            out_method(output_utilities.get_html_table_header( columns = columns, attributes = [("id", "user_entity_set_nodes"), ("command",command),("title","User Entity Set Details"),("session",self.sessionID)] ) )
-
-        elif output_format == "tabulated":                                            # line added by Joan        # REQUIRED TO TAG THE PRINTED COLUMNS
-            out_method( output_utilities.get_tabulated_table(values = [columns]) )     # line added by Joan        # REQUIRED TO TAG THE PRINTED COLUMNS
+        table_writer = self._get_table_writer( output_format = output_format, out_method = out_method, columns = columns,
+                                               attributes = [("id", "user_entity_set_nodes"), ("command",command),("title","User Entity Set Details"),("session",self.sessionID)] )
 
 
 ##
@@ -1792,6 +2114,8 @@ class BianaSessionManager(object):
 ##                                                                                            listUserEntityID = user_entity_id_list,
 ##                                                                                            attribute_identifier = current_attribute )
 
+        self.prefetch_user_entities(user_entity_id_list)
+
         for current_node in user_entity_id_list:
 
             uEobj = self.get_user_entity(user_entity_id=current_node)
@@ -1836,15 +2160,9 @@ class BianaSessionManager(object):
                 #                                                                          listUserEntityID = [current_node],
                 #                                                                          attribute_identifier = current_attribute )
 
-            if output_format == "tabulated":
-                out_method( output_utilities.get_tabulated_table(values = [new_values]) )
-            elif output_format == "xml":
-                out_method(output_utilities.append_html_table_values( rowIDs = [current_node], values = [new_values] ))
-            else:
-                raise ValueError("output_format is not valid. Valid output formats are ['xml', 'tabulated']\n")
-        
-        if output_format == "xml":
-            out_method(output_utilities.get_html_table_foot())
+            table_writer.add_row( values = new_values, rowID = current_node )
+
+        table_writer.close()
 
         OutBianaInterface.send_end_process_message()
 
@@ -1923,15 +2241,17 @@ class BianaSessionManager(object):
         columns.extend(attributes)
         values = []
 
+        self.prefetch_user_entities(user_entity_id_list)
+
         list_eE_to_search_dict = dict([ (eE_id,x) for x in user_entity_id_list for eE_id in self.get_user_entity(x).get_externalEntitiesIds_set() ])
 
         if (len( list_eE_to_search_dict ) > 0 ):
-            eE_dict = self.dbAccess.get_external_entities_dict( externalEntityIdsList = list_eE_to_search_dict.keys(), attribute_list = attributes )
+            eE_dict = self._cached_db_call( "get_external_entities_dict", externalEntityIdsList = list_eE_to_search_dict.keys(), attribute_list = attributes )
         else:
             raise ValueError("LIST CANNOT BE EMPTY FOR OUTPUT EXTERNAL ENTITY DETAILS...")
 
         default_ids_dict = dict([ (x,"-") for x in eE_dict.keys() ])
-        default_ids_dict.update(self.dbAccess.get_default_external_entity_ids( externalEntityIDsList=eE_dict.keys() ))
+        default_ids_dict.update(self._cached_db_call( "get_default_external_entity_ids", externalEntityIDsList=eE_dict.keys() ))
             
         for current_eE in eE_dict.values():
             current_values = [ current_eE.get_id() ]
@@ -2006,11 +2326,8 @@ class BianaSessionManager(object):
         if out_method is None:
             out_method = self.outmethod
 
-        if output_format == "xml":
-            out_method(output_utilities.get_html_table_header( columns = columns, attributes = [("id", "user_entity_set_nodes"), ("command",command),("title","User Entity Set Details"),("session",self.sessionID)] ) )
-
-        elif output_format == "tabulated":                                            
-            out_method( output_utilities.get_tabulated_table( columns = columns, values = [columns]) )
+        table_writer = self._get_table_writer( output_format = output_format, out_method = out_method, columns = columns,
+                                               attributes = [("id", "user_entity_set_nodes"), ("command",command),("title","User Entity Set Details"),("session",self.sessionID)] )
 
 	#! commented (emre)
 	#list_eE_to_search_dict = dict([ (eE_id,x) for x in user_entity_id_list for eE_id in self.get_user_entity(x).get_externalEntitiesIds_set() ])
@@ -2023,15 +2340,17 @@ class BianaSessionManager(object):
 	#default_ids_dict = dict([ (x,"-") for x in eE_dict.keys() ])
 	#default_ids_dict.update(self.dbAccess.get_default_external_entity_ids( externalEntityIDsList=eE_dict.keys() ))
 
+        self.prefetch_user_entities(user_entity_id_list)
+
         for current_node in user_entity_id_list:
 
             uEobj = self.get_user_entity(user_entity_id=current_node)
 
             # TEMP COMMENTED JAVI #! uncommented and default dict moved here (emre)
-            eE_dict = self.dbAccess.get_external_entities_dict( externalEntityIdsList = uEobj.get_externalEntitiesIds_set(), 
+            eE_dict = self._cached_db_call( "get_external_entities_dict", externalEntityIdsList = uEobj.get_externalEntitiesIds_set(), 
                                                                 attribute_list = attributes, only_uniques = output_only_unique_values )
 	    default_ids_dict = dict([ (x,"-") for x in eE_dict.keys() ])
-	    default_ids_dict.update(self.dbAccess.get_default_external_entity_ids( externalEntityIDsList=eE_dict.keys() ))
+	    default_ids_dict.update(self._cached_db_call( "get_default_external_entity_ids", externalEntityIDsList=eE_dict.keys() ))
 
             new_values = [current_node]
 
@@ -2075,15 +2394,9 @@ class BianaSessionManager(object):
                 #                                                                          listUserEntityID = [current_node],
                 #                                                                          attribute_identifier = current_attribute )
 
-            if output_format == "tabulated":
-                out_method( output_utilities.get_tabulated_table(values = [new_values]) )
-            elif output_format == "xml":
-                out_method(output_utilities.append_html_table_values( rowIDs = [current_node], values = [new_values] ))
-            else:
-                raise ValueError("output_format is not valid. Valid output formats are ['xml', 'tabulated']\n")
-        
-        if output_format == "xml":
-            out_method(output_utilities.get_html_table_foot())
+            table_writer.add_row( values = new_values, rowID = current_node )
+
+        table_writer.close()
 
         OutBianaInterface.send_end_process_message()
 
@@ -2146,65 +2459,71 @@ class BianaSessionManager(object):
         else:
             raise Exception("Unrecognized sequence type: %s !" % type)
 
-        values = []
-        sequences = []
+        self.prefetch_user_entities(user_entity_id_list)
 
         list_eE_to_search_dict = dict([ (eE_id,x) for x in user_entity_id_list for eE_id in self.get_user_entity(x).get_externalEntitiesIds_set() ])
 
 	default_ids_dict = dict([ (x,"-") for x in list_eE_to_search_dict.keys() ])
 	default_ids_dict.update(self.dbAccess.get_default_external_entity_ids( externalEntityIDsList=list_eE_to_search_dict.keys() ))
 
-        for current_eE_id, uE_id in list_eE_to_search_dict.iteritems():
+        import biana.utilities.FastaWriter as FastaWriter
+        fasta_writer = FastaWriter.FastaWriter(out_method = out_method, one_line_per_sequence=one_line_per_sequence, buffer_size=self.fasta_output_buffer_size)
 
-            current_eE = self.dbAccess.get_external_entities_dict( externalEntityIdsList = [current_eE_id], attribute_list = new_attributes, only_uniques = output_only_unique_values )[current_eE_id]
+        database_names_dict = {}
+        eE_id_list = list_eE_to_search_dict.keys()
 
-            #default_ids_dict = self.dbAccess.get_default_external_entity_ids( externalEntityIDsList=[current_eE.get_id()] )
+        # External entities are fetched in chunks (a query for each attribute) and their sequences are written before fetching the next chunk
+        for current_index in xrange(0, len(eE_id_list), self.fasta_output_chunk_size):
 
-            current_values = [ current_eE.get_id() ]
-            current_values.append(uE_id)
-            current_values.append( current_eE.get_type() )
-            default_id = default_ids_dict[current_eE.get_id()]
-            current_values.append(default_id)
-            current_values.append("%s" %self.dbAccess.get_external_database( database_id = current_eE.get_source_database() ) )
+            current_eE_id_list = eE_id_list[current_index:current_index+self.fasta_output_chunk_size]
+            eE_dict = self.dbAccess.get_external_entities_dict( externalEntityIdsList = current_eE_id_list, attribute_list = new_attributes, only_uniques = output_only_unique_values )
 
-            skip = False
+            for current_eE_id in current_eE_id_list:
 
-            if include_tags_info:
-                tags = user_entity_set.get_user_entity_tags( user_entity_id  = uE_id )
-                if len(tags)>0:
-                    current_values.append( ",".join(tags) )
-                else:
-                    current_values.append("-")
+                current_eE = eE_dict[current_eE_id]
+                uE_id = list_eE_to_search_dict[current_eE_id]
 
-            for current_attribute in new_attributes:
-                attribute_values = [ str(y.value).replace("\n"," ") for y in current_eE.get_attribute(attribute_identifier=current_attribute) ]
+                current_values = [ current_eE.get_id() ]
+                current_values.append(uE_id)
+                current_values.append( current_eE.get_type() )
+                current_values.append( default_ids_dict[current_eE.get_id()] )
 
-                if current_attribute == "proteinsequence" or current_attribute == "nucleotidesequence":
-                    if len(attribute_values)>0:
-                        sequences.append(",".join(attribute_values))
-                    else:
-                        skip = True
-                    #else:
-                    #    sequences.append("-")
-                else:
-                    temp_str = ",".join(attribute_values)
+                database_id = current_eE.get_source_database()
+                if not database_names_dict.has_key(database_id):
+                    database_names_dict[database_id] = "%s" %self.dbAccess.get_external_database( database_id = database_id )
+                current_values.append( database_names_dict[database_id] )
 
-                    if temp_str != "":
-                        current_values.append( temp_str )
+                if include_tags_info:
+                    tags = user_entity_set.get_user_entity_tags( user_entity_id  = uE_id )
+                    if len(tags)>0:
+                        current_values.append( ",".join(tags) )
                     else:
                         current_values.append("-")
 
-            if skip is False:
-                values.append(current_values)
-            
-        import biana.utilities.FastaWriter as FastaWriter
-        fasta_writer = FastaWriter.FastaWriter(out_method = out_method, one_line_per_sequence=one_line_per_sequence)
+                sequences = []
 
-        for current_values, sequence in zip(values, sequences):
+                for current_attribute in new_attributes:
+                    attribute_values = [ str(y.value).replace("\n"," ") for y in current_eE.get_attribute(attribute_identifier=current_attribute) ]
+
+                    if current_attribute == "proteinsequence" or current_attribute == "nucleotidesequence":
+                        sequences.extend(attribute_values)
+                    else:
+                        temp_str = ",".join(attribute_values)
+
+                        if temp_str != "":
+                            current_values.append( temp_str )
+                        else:
+                            current_values.append("-")
+
+                if len(sequences) == 0:
+                    continue
+
+                sequence_header = "|".join( map((lambda x, y: x+'|'+str(y)), columns, current_values) )
+                for seq in sequences:
+                    fasta_writer.output_sequence(sequence_header = sequence_header, sequence = seq)
+
+        fasta_writer.flush()
 
-            sequence_header = "|".join( map((lambda x, y: x+'|'+str(y)), columns, current_values) )
-            [ fasta_writer.output_sequence(sequence_header = sequence_header, sequence = seq) for seq in sequence.split(",")]
-            
         return
  
 
@@ -2604,7 +2923,8 @@ class BianaSessionManager(object):
                                                                             listRelationType = relation_type_list,
                                                                             dictRelationAttributeRestriction = dictAttributeToValues,
                                                                             use_self_relations = user_entity_set.getRestrictions("use_self_relations"),
-                                                                            limit_to_userEntityID_list = True)
+                                                                            limit_to_userEntityID_list = True,
+                                                                            adjacency_cache = self.user_entity_relations_cache)
 
             self.select_user_entity_relations_from_user_entity_set( user_entity_set_id = user_entity_set_id, user_entity_relation_id_list = listTupleIdUserEntity, clear_previous_selection = False)
 
@@ -2620,48 +2940,33 @@ class BianaSessionManager(object):
         # Not called by any other method
         """
 
-        # TO CHECK
-
         eE_uE_dict = {}
 
-        #import networkx
-        import biana.ext.networkx as networkx
-        g = networkx.Graph()
-        
-        #for currentUE in self.dictUserEntity.values():
-        #    eE_set = currentUE.get_externalEntitiesIds_set()
-        #    g.add_node(currentUE.id)
-        #    for current_eE_id in eE_set:
-        #        eE_uE_dict[current_eE_id] = currentUE.id
-
         uEs = self.get_user_entity_set(user_entity_set_id)
 
         user_entity_id_list = uEs.get_user_entity_ids()
+        self.prefetch_user_entities(user_entity_id_list)
         for currentUEid in user_entity_id_list: #getListUserEntityId():
             currentUE = self.get_user_entity(currentUEid)
-            eE_set = currentUE.get_externalEntitiesIds_set()
-            g.add_node(currentUE.id)
-            for current_eE_id in eE_set:
+            for current_eE_id in currentUE.get_externalEntitiesIds_set():
                 eE_uE_dict[current_eE_id] = currentUEid
 
-        self.userEntityCluster = {}
-
         equivalent_eE = self.dbAccess.get_equivalent_external_entities_from_list( externalEntitiesList = eE_uE_dict.keys(), attribute=attribute )
 
-        for current_equivalent_list in equivalent_eE:
-            for x in xrange(len(current_equivalent_list)-1):
-                g.add_edge(eE_uE_dict[current_equivalent_list[x]],eE_uE_dict[current_equivalent_list[x+1]])
-
-        uEs.clusterUserEntities(clusters=networkx.connected_components(g))
+        # User entities are clustered with a union-find instead of building a graph with all the equivalences
+        uEs.clusterUserEntities(clusters=graph_utilities.get_connected_components_from_equivalences( node_list = user_entity_id_list,
+                                                                                                    equivalent_node_lists = ( [ eE_uE_dict[x] for x in current_equivalent_list ] for current_equivalent_list in equivalent_eE ) ))
 
         return
     
-    def create_new_user_entity_set_and_network_from_sif_file(self, sif_file_name, new_user_entity_set_id=None): 
+    def create_new_user_entity_set_and_network_from_sif_file(self, sif_file_name, new_user_entity_set_id=None, id_type=None): 
         """
         create userEntity objects and their network from given sif file
         ------
 	sif_file_name: name of the sif file
         new_user_entity_set_id: identifier of the set provided by the user
+        id_type: if None, nodes of the sif file are user entity ids. Otherwise, nodes are identifiers of this attribute (or "auto" to detect the type of each identifier) and they are
+                 replaced by their user entities, resolving all the nodes of the file together (see resolve_identifiers)
         """
         
         OutBianaInterface.send_process_message("Creating new user entity set and its network.\nProcessing information...")
@@ -2681,34 +2986,52 @@ class BianaSessionManager(object):
                     user_entity_set.userProvidedExtIdsLowerDict[k][str(extId).lower()] = extId
 
 	    f = open(sif_file_name)
+	    lines = [ line[:-1].split(" pp ") for line in f.readlines() ]
+	    f.close()
+
+	    # nodes are resolved together before creating the network
+	    node_to_user_entities = None
+	    if id_type is not None:
+		nodes = set()
+		for words in lines:
+		    if len(words) > 2:
+			raise Exception("SIF file format error: %s", " pp ".join(words))
+		    nodes.update(words)
+		node_to_user_entities = {}
+		for (identifierType, identifierString), current_user_entities in self.resolve_identifiers(identifier_description_list = list(nodes), id_type = id_type).iteritems():
+		    node_to_user_entities.setdefault(identifierString, set()).update(current_user_entities)
+
+	    def get_user_entities(node, default_type):
+		if node_to_user_entities is None:
+		    return [(node, default_type)]
+		return node_to_user_entities.get(node, [])
+
 	    user_entity_id = 0
 	    externalEntityRelationID = 0
 	    ## create new userEntity objects (if not created before) via reading from sif file
-	    for line in f.readlines():
-		words = line[:-1].split(" pp ")
+	    for words in lines:
 		if len(words) == 1: 
-		    user_entity_id = words[0] #-= 1
-		    type = "protein"
-                    user_entity_set.addUserEntityId(idUserEntity = user_entity_id, level = 0)
-                    self.uE_types_dict[user_entity_id] = self.uE_types_enum.get_letter(type)
+		    for user_entity_id, type in get_user_entities(words[0], "protein"):
+			user_entity_set.addUserEntityId(idUserEntity = user_entity_id, level = 0)
+			self.uE_types_dict[user_entity_id] = self.uE_types_enum.get_letter(type)
 		elif len(words) == 2:
-		    idUserEntity1, idUserEntity2 = words[0], words[1] 
 		    externalEntityRelationID = "pp" #-= 1
 		    relation_type = "interaction"
-		    partner_type = "protein" 
-		    if not user_entity_set.has_user_entity(idUserEntity1):
-			user_entity_set.addUserEntityId(idUserEntity = idUserEntity1, level = 0)
-			self.uE_types_dict.setdefault(idUserEntity1,self.uE_types_enum.get_letter(partner_type))
-		    if not user_entity_set.has_user_entity(idUserEntity2):
-			user_entity_set.addUserEntityId(idUserEntity = idUserEntity2, level = 0)
-			self.uE_types_dict.setdefault(idUserEntity2,self.uE_types_enum.get_letter(partner_type))
-		    # addUserEntityRelation adds nodes so above should be before a call to it
-		    user_entity_set.addUserEntityRelation(idUserEntity1 = idUserEntity1,
-							     idUserEntity2 = idUserEntity2, 
-							     externalEntityRelationID = externalEntityRelationID)
-		    self.eEr_types_dict[externalEntityRelationID] = self.eEr_types_enum.get_letter(relation_type)
+		    for idUserEntity1, partner_type1 in get_user_entities(words[0], "protein"):
+			for idUserEntity2, partner_type2 in get_user_entities(words[1], "protein"):
+			    if not user_entity_set.has_user_entity(idUserEntity1):
+				user_entity_set.addUserEntityId(idUserEntity = idUserEntity1, level = 0)
+				self.uE_types_dict.setdefault(idUserEntity1,self.uE_types_enum.get_letter(partner_type1))
+			    if not user_entity_set.has_user_entity(idUserEntity2):
+				user_entity_set.addUserEntityId(idUserEntity = idUserEntity2, level = 0)
+				self.uE_types_dict.setdefault(idUserEntity2,self.uE_types_enum.get_letter(partner_type2))
+			    # addUserEntityRelation adds nodes so above should be before a call to it
+			    user_entity_set.addUserEntityRelation(idUserEntity1 = idUserEntity1,
+								     idUserEntity2 = idUserEntity2, 
+								     externalEntityRelationID = externalEntityRelationID)
+			    self.eEr_types_dict[externalEntityRelationID] = self.eEr_types_enum.get_letter(relation_type)
 		else:
-		    raise Exception("SIF file format error: %s", line)
+		    raise Exception("SIF file format error: %s", " pp ".join(words))
         except:
             OutBianaInterface.send_error_notification( message = "New set not created. BIANA ERROR:", error = traceback.format_exc() )
             OutBianaInterface.send_end_process_message()
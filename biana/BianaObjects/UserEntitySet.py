@@ -24,6 +24,11 @@ import time
 #import networkx
 import biana.ext.networkx as networkx
 import copy
+import array
+
+
+# Type of the arrays used to store user entity sets in session snapshots
+SNAPSHOT_ARRAY_TYPE = 'l'
 
 
 class UserEntitySet(object):
@@ -31,6 +36,12 @@ class UserEntitySet(object):
         Class that represents a set of user entities.
         """
 
+	# Groups of attributes that are shared between a set and its duplicates until one of them modifies them (see duplicate)
+	copy_on_write_groups = { "network": ("network", "eErIds2participants"),
+				 "levels": ("listLevelSetIdUserEntity", "nodeLevelsDict"),
+				 "tags": ("uE_tags", "tag_uE", "uER_tags", "tag_uER"),
+				 "groups": ("relation_groups", "uE_groups", "groups_hierarchy", "group_types") }
+
         def __init__(self, id, setIdUserEntity=None, listRelations=None, listLevelSetIdUserEntity=None):
 		"""
 		"""
@@ -119,6 +130,8 @@ class UserEntitySet(object):
 
 		self.eErIds2participants = {}        # Stores the participants in each eErID
 
+		self._shared_groups = set()          # Groups of attributes shared with other sets (see duplicate)
+
 		
 		# TEMP
 		#self.all_shortest_paths = None
@@ -141,6 +154,7 @@ class UserEntitySet(object):
 					   "expansionattributeslist": [],
 					   "include_relations_last_level": False,
 					   "attributenetworklist" : [],
+					   "max_user_entities_by_shared_value": None,
 					   "group_relation_type": []}
 
 	def addRestriction(self, restriction_type, restrictions):
@@ -163,12 +177,31 @@ class UserEntitySet(object):
 	def getRestrictions(self, restriction_type):
 		return self.restrictions_dict[restriction_type.lower()]
 
+	def clusterUserEntities(self, clusters):
+		"""
+		Stores the clusters of the user entities. "clusters" is a list of user entity id lists. The cluster id of each user entity is the position of its cluster in the list
+		"""
+		self.userEntityClusters = {}
+		for cluster_id in xrange(len(clusters)):
+			for current_uE in clusters[cluster_id]:
+				self.userEntityClusters[current_uE] = cluster_id
+
+	def getUserEntityCluster(self, user_entity_id):
+		"""
+		Returns the cluster id of the user entity (None if user entities are not clustered)
+		"""
+		if self.userEntityClusters is None:
+			return None
+		return self.userEntityClusters.get(user_entity_id)
+
 
         def addTagToSelectedUE(self, tag):
              """
 	     Adds a tag to selected user entities in this set
              """
 
+             self._unshare("tags")
+
              if not self.tag_uE.has_key(tag):
                   self.tag_uE[tag] = set()
 
@@ -185,6 +218,8 @@ class UserEntitySet(object):
 	     Adds a tag to selected user entities in this set
              """
 
+             self._unshare("tags")
+
              if not self.tag_uER.has_key(tag):
                   self.tag_uER[tag] = set()
 
@@ -410,11 +445,15 @@ class UserEntitySet(object):
 	    return self.tag_uER.has_key(tag)
 
         def get_user_entity_tags(self, user_entity_id):
+                if self._is_shared("tags"):
+                        return self.uE_tags.get(user_entity_id, set())
                 return self.uE_tags.setdefault(user_entity_id, set())
 
 	#def get_user_entity_relation_tags(self, user_entity_relation_id):
 	def get_external_entity_relation_tags(self, external_entity_relation_id):
 		#return self.uER_tags.setdefault(user_entity_relation_id, set())
+		if self._is_shared("tags"):
+			return self.uER_tags.get(external_entity_relation_id, set())
 		return self.uER_tags.setdefault(external_entity_relation_id, set() )    ### ALERT: Possible performance.... it creates unnecessary sets
 	
         def get_user_entities_for_tag(self, tag):
@@ -473,6 +512,7 @@ class UserEntitySet(object):
              return self.network
 
         def setNetwork(self, netw):
+             self._unshare("network", copy_network=False)
              self.network = netw
 
         def setIsNetworkCreated(self):
@@ -615,6 +655,8 @@ class UserEntitySet(object):
              """
 
              if not self.network.has_node(idUserEntity):
+                  self._unshare("network")
+                  self._unshare("levels")
                   self.network.add_node(idUserEntity)
 
                   if level<=self.current_level:
@@ -640,6 +682,7 @@ class UserEntitySet(object):
 		"list_hierarchy" is a list [(group_id1, group_id2) in which group_id1 is child of group_id2
 		"""
 
+		self._unshare("groups")
 		[ self.groups_hierarchy.setdefault(current_child,current_parent) for (current_child, current_parent) in list_hierarchy ]
 
 
@@ -655,6 +698,7 @@ class UserEntitySet(object):
 		if not self.network.has_node(userEntityID):
 			self.addUserEntityId(idUserEntity=userEntityID,level = self.getNodeLevel(representative_userEntityID)+1)
 
+		self._unshare("groups")
 		self.uE_groups.setdefault(userEntityID,set()).add(group_id)
 		self.relation_groups.setdefault(group_id,set()).add(userEntityID)
 		self.relation_groups.setdefault(group_id,set()).add(representative_userEntityID)
@@ -679,6 +723,8 @@ class UserEntitySet(object):
 	     # First, it is necessary to add the user entity ids to the correct levels
 	     if not self.network.has_node(idUserEntity1) and not self.network.has_node(idUserEntity2):
 		     raise ValueError("Trying to add a relation between two user entities (%s,%s) and any of them belong to this set" %(idUserEntity1,idUserEntity2))
+
+	     self._unshare("network")
 	     
 	     if not self.network.has_node(idUserEntity1):
 		     self.addUserEntityId(idUserEntity=idUserEntity1, level = self.getNodeLevel(idUserEntity2)+1)
@@ -723,6 +769,10 @@ class UserEntitySet(object):
 
 
 	def remove_node(self, nodeID):
+
+		self._unshare("network")
+		self._unshare("levels")
+		self._unshare("tags")
 		
 		for current_neighbor in self.network.neighbors(nodeID):
 			self.remove_edge(nodeID,current_neighbor)
@@ -769,6 +819,8 @@ class UserEntitySet(object):
 		"""
 
 		nodeID1, nodeID2 = self._get_user_entity_relation_id(nodeID1, nodeID2)
+
+		self._unshare("network")
 		
 		eErIds_list = self.network.get_edge(nodeID1, nodeID2)
 
@@ -789,6 +841,7 @@ class UserEntitySet(object):
 				self.network.delete_edge(nodeID1, nodeID2)
 
 			if self.uER_tags.has_key(externalEntityRelationID):
+				self._unshare("tags")
 				for current_tag in self.uER_tags[externalEntityRelationID]:
 					self.tag_uER[current_tag].remove(externalEntityRelationID)
 				del self.uER_tags[externalEntityRelationID]
@@ -909,7 +962,7 @@ class UserEntitySet(object):
 			#for node1, node2, eErIds_list in self.network.edges():
 			for node1, node2 in self.network.edges_iter():
 				eErIds_list = self.network.get_edge(node1,node2)
-				dict_relations[self._getRelationHash(node1,node2)] = copy.deepcopy(eErIds_list)
+				dict_relations[self._getRelationHash(node1,node2)] = list(eErIds_list)
 
 			#for node1, node2, eErIds_list in objUserEntitySet.network.edges():
 			for node1, node2 in objUserEntitySet.network.edges():
@@ -940,7 +993,7 @@ class UserEntitySet(object):
 			for current_node1, current_node2 in self.network.edges_iter(intersection_user_entity_ids_set):
 				if( objUserEntitySet.network.has_node(current_node1) and objUserEntitySet.network.has_node(current_node2) ):
 					eErIdsList = self.network.get_edge(current_node1, current_node2)
-					dict_relations[self._getRelationHash(current_node1,current_node2)] = copy.deepcopy(eErIdsList)
+					dict_relations[self._getRelationHash(current_node1,current_node2)] = list(eErIdsList)
 					#listInteraction.append(current_edge)
 
 			#for current_node1, current_node2, eErIdsList in objUserEntitySet.network.edges_iter(intersection_user_entity_ids_set):
@@ -1006,6 +1059,154 @@ class UserEntitySet(object):
 #                  
 #                  outmethod("<table>%s%s</table>" %(th_str,data_str))
 
+	def duplicate(self, new_id):
+		"""
+		Returns a copy of this set with id "new_id"
+
+		The network, levels, tags and groups are shared between both sets until one of them modifies them (then it takes its own copy), so duplicating a set is fast
+		and does not use additional memory. The rest of attributes (selections, restrictions...) are copied
+		"""
+
+		shared_attributes = set()
+		for current_attributes in self.copy_on_write_groups.itervalues():
+			shared_attributes.update(current_attributes)
+
+		new_set = UserEntitySet.__new__(UserEntitySet)
+		for current_attribute, value in self.__dict__.iteritems():
+			if current_attribute in shared_attributes:
+				new_set.__dict__[current_attribute] = value
+			else:
+				new_set.__dict__[current_attribute] = copy.deepcopy(value)
+		new_set.id = new_id
+
+		self._shared_groups = set(self.copy_on_write_groups)
+		new_set._shared_groups = set(self.copy_on_write_groups)
+
+		return new_set
+
+	def _is_shared(self, group):
+		return group in getattr(self, "_shared_groups", ())
+
+	def _unshare(self, group, copy_network=True):
+		"""
+		Takes an own copy of the attributes of "group" if they are shared with other sets (see duplicate). It must be called before modifying them
+
+		If "copy_network" is False, the network is not copied (used when it is going to be replaced)
+		"""
+
+		if not self._is_shared(group):
+			return
+
+		self._shared_groups.discard(group)
+
+		if group == "network":
+			if copy_network:
+				network = graph_utilities.create_graph()
+				network.add_nodes_from(self.network.nodes())
+				for edge in self.network.edges():
+					network.add_edge( edge[0], edge[1], list(self.network.get_edge(edge[0],edge[1])) )
+				self.network = network
+			self.eErIds2participants = dict([ (x, list(y)) for x, y in self.eErIds2participants.iteritems() ])
+		elif group == "levels":
+			self.listLevelSetIdUserEntity = [ set(x) for x in self.listLevelSetIdUserEntity ]
+			self.nodeLevelsDict = dict(self.nodeLevelsDict)
+		elif group == "tags":
+			self.uE_tags = dict([ (x, set(y)) for x, y in self.uE_tags.iteritems() ])
+			self.tag_uE = dict([ (x, set(y)) for x, y in self.tag_uE.iteritems() ])
+			self.uER_tags = dict([ (x, set(y)) for x, y in self.uER_tags.iteritems() ])
+			self.tag_uER = dict([ (x, set(y)) for x, y in self.tag_uER.iteritems() ])
+		elif group == "groups":
+			self.relation_groups = dict([ (x, set(y)) for x, y in self.relation_groups.iteritems() ])
+			self.uE_groups = dict([ (x, set(y)) for x, y in self.uE_groups.iteritems() ])
+			self.groups_hierarchy = dict(self.groups_hierarchy)
+			self.group_types = dict(self.group_types)
+
+		return
+
+
+	def get_snapshot_data(self):
+		"""
+		Returns the content of this set as a tuple (arrays, attributes), used to store it in session snapshots
+
+		"arrays" is a dictionary of array.array objects with the levels, the network and the participants of each relation
+		"attributes" is a dictionary with the rest of attributes of the set
+
+		Raises TypeError or OverflowError if the identifiers of the set are not integers
+		"""
+
+		attributes = self.__dict__.copy()
+		del attributes["network"]
+		del attributes["listLevelSetIdUserEntity"]
+		del attributes["nodeLevelsDict"]
+		del attributes["eErIds2participants"]
+		attributes.pop("_shared_groups", None)
+
+		arrays = dict([ (x, array.array(SNAPSHOT_ARRAY_TYPE)) for x in ("level_sizes", "level_nodes", "node_level_keys", "node_level_values",
+										 "nodes", "edge_nodes", "edge_sizes", "edge_relations",
+										 "participant_keys", "participant_sizes", "participant_nodes") ])
+
+		for current_level in self.listLevelSetIdUserEntity:
+			arrays["level_sizes"].append(len(current_level))
+			arrays["level_nodes"].extend(current_level)
+
+		for current_node, current_level in self.nodeLevelsDict.iteritems():
+			arrays["node_level_keys"].append(current_node)
+			arrays["node_level_values"].append(current_level)
+
+		arrays["nodes"].extend(self.network.nodes())
+
+		for edge in self.network.edges():
+			eErIds_list = self.network.get_edge(edge[0],edge[1])
+			arrays["edge_nodes"].append(edge[0])
+			arrays["edge_nodes"].append(edge[1])
+			arrays["edge_sizes"].append(len(eErIds_list))
+			arrays["edge_relations"].extend(eErIds_list)
+
+		for current_eErID, participants_list in self.eErIds2participants.iteritems():
+			arrays["participant_keys"].append(current_eErID)
+			arrays["participant_sizes"].append(len(participants_list))
+			arrays["participant_nodes"].extend(participants_list)
+
+		return (arrays, attributes)
+
+
+	def set_snapshot_data(self, arrays, attributes):
+		"""
+		Restores the content of this set from the data returned by get_snapshot_data
+		"""
+
+		self.__dict__.update(attributes)
+		self._shared_groups = set()
+
+		self.listLevelSetIdUserEntity = []
+		position = 0
+		for current_size in arrays["level_sizes"]:
+			self.listLevelSetIdUserEntity.append(set(arrays["level_nodes"][position:position+current_size]))
+			position += current_size
+
+		self.nodeLevelsDict = dict(zip(arrays["node_level_keys"], arrays["node_level_values"]))
+
+		self.network = graph_utilities.create_graph()
+		self.network.add_nodes_from(arrays["nodes"])
+
+		edge_nodes = arrays["edge_nodes"]
+		edge_relations = arrays["edge_relations"]
+		position = 0
+		for current_edge in xrange(len(arrays["edge_sizes"])):
+			current_size = arrays["edge_sizes"][current_edge]
+			self.network.add_edge( edge_nodes[2*current_edge], edge_nodes[2*current_edge+1], edge_relations[position:position+current_size].tolist() )
+			position += current_size
+
+		self.eErIds2participants = {}
+		participant_nodes = arrays["participant_nodes"]
+		position = 0
+		for current_eErID, current_size in zip(arrays["participant_keys"], arrays["participant_sizes"]):
+			self.eErIds2participants[current_eErID] = participant_nodes[position:position+current_size].tolist()
+			position += current_size
+
+		return
+
+
 	def __repr__(self):
 		return "%s / %s" % (self.listLevelSetIdUserEntity, self.network.edges())
 
@@ -49,3 +49,117 @@ def get_tabulated_table(values,columns=None):
 
     return "%s\n" %"\n".join( [ "\t".join(map(str,x)) for x in to_print ] )
 
+
+
+class TableWriter(object):
+    """
+    Writes a table row by row through "out_method", joining the rows in blocks of (at least) "buffer_size" characters
+
+    If "flush_method" is given, it is called after each block is sent, so that a slow receiver (i.e. the graphical interface socket)
+    stops the production of new rows until the previous block has been sent. close() must be called after the last row
+    """
+
+    def __init__(self, out_method, columns=None, buffer_size=65536, flush_method=None):
+        self.out_method = out_method
+        self.columns = columns
+        self.buffer_size = buffer_size
+        self.flush_method = flush_method
+        self.buffer = []
+        self.buffer_length = 0
+        self.num_rows = 0
+
+    def _write(self, data):
+        self.buffer.append(data)
+        self.buffer_length += len(data)
+        if self.buffer_size is None or self.buffer_length >= self.buffer_size:
+            self.flush()
+
+    def write_header(self):
+        pass
+
+    def add_row(self, values, rowID=None):
+        pass
+
+    def add_rows(self, values_list, rowIDs=None):
+        if rowIDs is None:
+            for values in values_list:
+                self.add_row(values)
+        else:
+            for values, rowID in zip(values_list, rowIDs):
+                self.add_row(values, rowID)
+
+    def flush(self):
+        """
+        Sends the rows kept in the buffer
+        """
+        if len(self.buffer) > 0:
+            self.out_method("".join(self.buffer))
+            self.buffer = []
+            self.buffer_length = 0
+            if self.flush_method is not None:
+                self.flush_method()
+
+    def close(self):
+        self.flush()
+
+
+class TabulatedTableWriter(TableWriter):
+    """
+    Writes a tab separated table (same format as get_tabulated_table)
+    """
+
+    def write_header(self):
+        if self.columns is not None:
+            self._write("%s\n" %"\t".join(map(str,self.columns)))
+
+    def add_row(self, values, rowID=None):
+        self.num_rows += 1
+        self._write("%s\n" %"\t".join(map(str,values)))
+
+    def add_rows(self, values_list, rowIDs=None):
+        self.num_rows += len(values_list)
+        self._write("".join([ "%s\n" %"\t".join(map(str,x)) for x in values_list ]))
+
+    def close(self):
+        # An empty table without header is a single line break, as in get_tabulated_table
+        if self.columns is None and self.num_rows == 0:
+            self._write("\n")
+        self.flush()
+
+
+class HTMLTableWriter(TableWriter):
+    """
+    Writes a html table (same format as get_html_table), used in the xml output for the graphical interface
+    """
+
+    def __init__(self, out_method, columns, attributes=[], buffer_size=65536, flush_method=None, omit_special_chars=True):
+        TableWriter.__init__(self, out_method=out_method, columns=columns, buffer_size=buffer_size, flush_method=flush_method)
+        self.attributes = attributes
+        self.omit_special_chars = omit_special_chars
+
+    def write_header(self):
+        self._write(get_html_table_header(self.columns, self.attributes))
+
+    def add_row(self, values, rowID=None):
+        if rowID is None:
+            rowID = self.num_rows
+        self.num_rows += 1
+        self._write(append_html_table_values([values], rowIDs=[rowID], omit_special_chars=self.omit_special_chars))
+
+    def close(self):
+        self._write(get_html_table_foot())
+        self.flush()
+
+
+def get_table_writer(output_format, out_method, columns, attributes=[], buffer_size=65536, flush_method=None):
+    """
+    Returns the TableWriter for "output_format" ("xml" or "tabulated") with its header already written
+    """
+    if output_format == "xml":
+        writer = HTMLTableWriter(out_method=out_method, columns=columns, attributes=attributes, buffer_size=buffer_size, flush_method=flush_method)
+    elif output_format == "tabulated":
+        writer = TabulatedTableWriter(out_method=out_method, columns=columns, buffer_size=buffer_size, flush_method=flush_method)
+    else:
+        raise ValueError("output_format is not valid. Valid output formats are ['xml', 'tabulated']\n")
+    writer.write_header()
+    return writer
@@ -0,0 +1,210 @@
+"""
+    BIANA: Biologic Interactions and Network Analysis
+    Copyright (C) 2009  Javier Garcia-Garcia, Emre Guney, Baldo Oliva
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+# Result cache for the database queries repeated in a session
+#
+# Results are stored in least recently used order, keyed by the name of the BianaDBaccess method and its (normalized) arguments.
+# The cache is bounded both in number of entries and in the (estimated) memory used by the keys and results.
+#
+# Results are copied (see copy_result) so that callers can modify the returned lists and dictionaries, but the objects in them
+# (ExternalEntity, Ontology...) are shared with the cache and must not be modified.
+
+import sys
+
+try:
+    from collections import OrderedDict
+except ImportError:
+    OrderedDict = None
+
+
+def normalize_argument(value, unordered=False):
+    """
+    Returns a hashable form of "value"
+
+    If "unordered" is True, "value" is a list whose order and repeated elements are not relevant (i.e. a list of identifiers).
+    The order of the rest of lists and the case of strings are kept. Sets and dictionaries are always unordered
+    """
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted([ (normalize_argument(x), normalize_argument(y)) for x, y in value.iteritems() ])))
+    if isinstance(value, (set, frozenset)) or (unordered and isinstance(value, (list, tuple))):
+        return ("set", tuple(sorted(set([ normalize_argument(x) for x in value ]))))
+    if isinstance(value, list):
+        return ("list", tuple([ normalize_argument(x) for x in value ]))
+    if isinstance(value, tuple):
+        return ("tuple", tuple([ normalize_argument(x) for x in value ]))
+    hash(value)
+    return value
+
+
+def estimate_size(value, max_depth=10, seen=None):
+    """
+    Returns an estimation (in bytes) of the memory used by "value", including the objects it contains up to "max_depth" levels
+
+    Objects contained more than once are counted once
+    """
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if max_depth == 0:
+        return size
+    if isinstance(value, dict):
+        for current_key, current_value in value.iteritems():
+            size += estimate_size(current_key, max_depth-1, seen) + estimate_size(current_value, max_depth-1, seen)
+    elif isinstance(value, (list, tuple, set, frozenset)):
+        for current_value in value:
+            size += estimate_size(current_value, max_depth-1, seen)
+    elif hasattr(value, "__dict__"):
+        size += estimate_size(value.__dict__, max_depth-1, seen)
+    return size
+
+
+def copy_result(value):
+    """
+    Returns a copy of a cached result that can be modified without changing the cached one. Lists, sets and dictionaries are copied up
+    to the second level (dictionaries of lists), objects in them are shared and must not be modified
+    """
+    if isinstance(value, dict):
+        new_value = {}
+        for current_key, current_value in value.iteritems():
+            if isinstance(current_value, (list, set, dict)):
+                current_value = type(current_value)(current_value)
+            new_value[current_key] = current_value
+        return new_value
+    if isinstance(value, (list, set)):
+        return type(value)(value)
+    return value
+
+
+
+class QueryResultCache(object):
+    """
+    Size bounded least recently used cache of query results
+
+    Entries are separated by namespace (database and unification protocol): when the namespace changes, the cache is emptied
+    """
+
+    def __init__(self, max_entries=256, max_memory=67108864):
+        """
+        "max_entries" is the maximum number of results stored
+
+        "max_memory" is the maximum memory (in bytes, estimated with estimate_size) used by the keys and results stored. Results larger than it are not stored
+        """
+        self.max_entries = max_entries
+        self.max_memory = max_memory
+        self.namespace = None
+        self.method_stats = {}      # method name: [hits, misses]
+        self.clear()
+
+    def clear(self):
+        """
+        Removes all the results stored (hit and miss counts are kept)
+        """
+        if OrderedDict is not None:
+            self.entries = OrderedDict()    # key: (size, result)
+        else:
+            self.entries = {}
+            self.access_order = []
+        self.memory = 0
+        self.num_evictions = 0
+
+    def set_namespace(self, namespace):
+        """
+        Sets the namespace of the results. If it is not the current one, the cache is emptied
+        """
+        if namespace != self.namespace:
+            self.clear()
+            self.namespace = namespace
+
+    def _touch(self, key):
+        if OrderedDict is not None:
+            self.entries[key] = self.entries.pop(key)
+        else:
+            self.access_order.remove(key)
+            self.access_order.append(key)
+
+    def _remove_oldest(self):
+        if OrderedDict is not None:
+            (key, (size, result)) = self.entries.popitem(last=False)
+        else:
+            key = self.access_order.pop(0)
+            (size, result) = self.entries.pop(key)
+        self.memory -= size
+        self.num_evictions += 1
+
+    def get_key(self, method_name, arguments, unordered_arguments=()):
+        """
+        Returns the cache key of a call to "method_name" with the dictionary of keyword arguments "arguments", or None if they cannot be hashed
+
+        "unordered_arguments" are the names of the arguments whose order and repeated elements do not change the result (see normalize_argument)
+        """
+        try:
+            return (method_name, tuple(sorted([ (x, normalize_argument(y, unordered = x in unordered_arguments)) for x, y in arguments.iteritems() ])))
+        except TypeError:
+            return None
+
+    def get(self, key, method_name):
+        """
+        Returns a copy of the result stored with "key", or None if it is not stored
+        """
+        stats = self.method_stats.setdefault(method_name, [0, 0])
+        if key is None or key not in self.entries:
+            stats[1] += 1
+            return None
+        stats[0] += 1
+        self._touch(key)
+        return copy_result(self.entries[key][1])
+
+    def put(self, key, result):
+        """
+        Stores "result" with "key", removing the least recently used results if the cache is full
+        """
+        if key is None or self.max_entries <= 0:
+            return
+        size = estimate_size(key) + estimate_size(result)
+        if self.max_memory is not None and size > self.max_memory:
+            return
+        if key in self.entries:
+            self.memory -= self.entries.pop(key)[0]
+            if OrderedDict is None:
+                self.access_order.remove(key)
+        while len(self.entries) >= self.max_entries or (self.max_memory is not None and len(self.entries) > 0 and self.memory + size > self.max_memory):
+            self._remove_oldest()
+        self.entries[key] = (size, copy_result(result))
+        if OrderedDict is None:
+            self.access_order.append(key)
+        self.memory += size
+
+    def get_report(self):
+        """
+        Returns a string with the number of hits and misses of each method and the memory used
+        """
+        total_hits = sum([ x[0] for x in self.method_stats.itervalues() ])
+        total_misses = sum([ x[1] for x in self.method_stats.itervalues() ])
+        lines = [ "Query cache: %s results stored (%.1f MB of %.1f MB), %s evictions" %(len(self.entries), float(self.memory)/1048576, float(self.max_memory or 0)/1048576, self.num_evictions),
+                  "%10s\t%10s\t%8s\t%s" %("hits", "misses", "hit(%)", "method") ]
+        for method_name, (hits, misses) in sorted(self.method_stats.iteritems()) + [("total", (total_hits, total_misses))]:
+            if hits + misses > 0:
+                hit_rate = hits*100.0/(hits+misses)
+            else:
+                hit_rate = 0.0
+            lines.append("%10d\t%10d\t%8.2f\t%s" %(hits, misses, hit_rate, method_name))
+        return "\n".join(lines)+"\n"
@@ -0,0 +1,314 @@
+"""
+    BIANA: Biologic Interactions and Network Analysis
+    Copyright (C) 2009  Javier Garcia-Garcia, Emre Guney, Baldo Oliva
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+# Session snapshots
+#
+# A snapshot is a directory with:
+#   - "manifest": the session attributes, the list of user entity sets with the chunk file of each one and a summary of each set
+#     (size, number of edges and levels) that is sent to the graphical interface without reading the chunks
+#   - "set_<md5>.chunk": one file per user entity set, with its levels and network stored as compact arrays
+#
+# Chunk files are named by their content, so a set that has not changed since the last save is not written again.
+# When a snapshot is loaded, user entity sets are read from their chunks the first time they are accessed (only then their complete
+# content is sent to the graphical interface).
+
+import os
+import sys
+import array
+import shutil
+import cPickle
+
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import new as md5
+
+from UserEntitySet import UserEntitySet, SNAPSHOT_ARRAY_TYPE
+
+
+SNAPSHOT_VERSION = 1
+MANIFEST_FILE = "manifest"
+
+
+class UserEntitySetChunk(object):
+    """
+    Reference to a user entity set stored in a snapshot chunk file, not loaded yet
+    """
+
+    def __init__(self, snapshot_dir, chunk_file, byteorder=sys.byteorder, summary=None):
+        self.snapshot_dir = snapshot_dir
+        self.chunk_file = chunk_file
+        self.byteorder = byteorder
+        self.summary = summary             # dictionary returned by get_user_entity_set_summary (None in snapshots saved without summaries)
+        self.all_groups_printed = False    # set when the set has been sent completely through the out method after loading the snapshot
+
+    def get_path(self):
+        return os.path.join(self.snapshot_dir, self.chunk_file)
+
+    def load(self):
+        """
+        Reads the chunk file and returns the UserEntitySet object
+        """
+        chunk_fd = open(self.get_path(), 'rb')
+        user_entity_set = decode_user_entity_set(chunk_fd.read(), self.byteorder)
+        chunk_fd.close()
+        if self.all_groups_printed:
+            user_entity_set._printed_groups = set(user_entity_set.relation_groups)
+        return user_entity_set
+
+
+
+class LazyUserEntitySetDict(dict):
+    """
+    Dictionary of user entity sets in which sets stored in a snapshot are loaded the first time they are accessed
+
+    If "load_method" is not None, it is called with each set loaded (i.e. to send its complete content to the graphical interface)
+    """
+
+    load_method = None
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, UserEntitySetChunk):
+            value = value.load()
+            dict.__setitem__(self, key, value)
+            if self.load_method is not None:
+                self.load_method(value)
+        return value
+
+    def get(self, key, default=None):
+        if not dict.has_key(self, key):
+            return default
+        return self[key]
+
+    def pop(self, key, *default):
+        if dict.has_key(self, key):
+            value = self[key]
+            dict.__delitem__(self, key)
+            return value
+        return dict.pop(self, key, *default)
+
+    def iteritems(self):
+        for key in self.keys():
+            yield (key, self[key])
+
+    def itervalues(self):
+        for key in self.keys():
+            yield self[key]
+
+    def items(self):
+        return list(self.iteritems())
+
+    def values(self):
+        return list(self.itervalues())
+
+    def get_chunk(self, key):
+        """
+        Returns the UserEntitySetChunk of "key" if it has not been loaded yet, None otherwise
+        """
+        value = dict.__getitem__(self, key)
+        if isinstance(value, UserEntitySetChunk):
+            return value
+        return None
+
+    def peek(self, key):
+        """
+        Returns the user entity set "key" without keeping it in memory if it has not been loaded yet
+        """
+        value = dict.__getitem__(self, key)
+        if isinstance(value, UserEntitySetChunk):
+            return value.load()
+        return value
+
+    def __reduce__(self):
+        # Pickled as a normal dictionary with all the sets loaded
+        return (dict, (self.items(),))
+
+
+
+def get_user_entity_set_summary(user_entity_set):
+    """
+    Returns a dictionary with the size, the number of edges and the levels (None if the network has not been created) of the user entity set
+    """
+    if user_entity_set.isNetworkCreated():
+        levels = user_entity_set.get_level()
+    else:
+        levels = None
+    return { "size": user_entity_set.getSize(),
+             "edges": user_entity_set.getNumberEdges(),
+             "levels": levels }
+
+
+def encode_user_entity_set(user_entity_set):
+    """
+    Returns the chunk content (string) of the user entity set
+    """
+    try:
+        (arrays, attributes) = user_entity_set.get_snapshot_data()
+        content = { "arrays": dict([ (name, current_array.tostring()) for name, current_array in arrays.iteritems() ]),
+                    "attributes": attributes }
+    except (TypeError, OverflowError):
+        # Identifiers that cannot be stored in arrays: the whole object is pickled
+        content = { "user_entity_set": user_entity_set }
+    return cPickle.dumps(content, cPickle.HIGHEST_PROTOCOL)
+
+
+def decode_user_entity_set(chunk_content, byteorder=sys.byteorder):
+    """
+    Returns the UserEntitySet object stored in "chunk_content"
+    """
+
+    content = cPickle.loads(chunk_content)
+
+    if content.has_key("user_entity_set"):
+        return content["user_entity_set"]
+
+    arrays = {}
+    for name, current_string in content["arrays"].iteritems():
+        arrays[name] = array.array(SNAPSHOT_ARRAY_TYPE)
+        arrays[name].fromstring(current_string)
+        if byteorder != sys.byteorder:
+            arrays[name].byteswap()
+
+    user_entity_set = UserEntitySet.__new__(UserEntitySet)
+    user_entity_set.set_snapshot_data(arrays, content["attributes"])
+    return user_entity_set
+
+
+def read_manifest(snapshot_dir):
+    """
+    Returns the manifest dictionary of the snapshot "snapshot_dir"
+    """
+    manifest_fd = open(os.path.join(snapshot_dir, MANIFEST_FILE), 'rb')
+    manifest = cPickle.load(manifest_fd)
+    manifest_fd.close()
+    if manifest["version"] != SNAPSHOT_VERSION:
+        raise ValueError("Session snapshot version %s not supported" %manifest["version"])
+    return manifest
+
+
+def is_snapshot(file_name):
+    """
+    Returns True if "file_name" is a session snapshot directory
+    """
+    return os.path.isdir(file_name) and os.path.exists(os.path.join(file_name, MANIFEST_FILE))
+
+
+def _write_file(file_name, content):
+    """
+    Writes "content" in a temporal file that is renamed at the end, so that existing files are never left half written
+    """
+    temp_file = file_name + ".tmp"
+    fd = open(temp_file, 'wb')
+    fd.write(content)
+    fd.close()
+    os.rename(temp_file, file_name)
+
+
+def save_snapshot(snapshot_dir, session_attributes, dictUserEntitySet):
+    """
+    Saves a session snapshot in the directory "snapshot_dir"
+
+    "session_attributes" is a (picklable) dictionary with the session attributes, except the user entity sets
+
+    "dictUserEntitySet" is the dictionary of user entity sets of the session (it can be a LazyUserEntitySetDict)
+
+    Only the user entity sets that have changed are written. Returns the number of chunks written
+
+    Existing files are never replaced: "snapshot_dir" must be a snapshot, an empty directory or a new path (i.e. a session saved in a single
+    pickle file has to be saved as a snapshot with another name)
+    """
+
+    if os.path.exists(snapshot_dir) and not is_snapshot(snapshot_dir):
+        if not os.path.isdir(snapshot_dir):
+            raise ValueError("%s exists and it is not a session snapshot (the session has to be saved with another name)" %snapshot_dir)
+        if len(os.listdir(snapshot_dir))>0:
+            raise ValueError("%s is a directory that is not empty and it is not a session snapshot" %snapshot_dir)
+    if not os.path.exists(snapshot_dir):
+        os.makedirs(snapshot_dir)
+
+    sets_list = []
+    summaries = {}
+    num_written = 0
+
+    for current_set_id in dictUserEntitySet.keys():
+
+        chunk = None
+        if isinstance(dictUserEntitySet, LazyUserEntitySetDict):
+            chunk = dictUserEntitySet.get_chunk(current_set_id)
+
+        if chunk is not None and chunk.byteorder == sys.byteorder:
+            # Not loaded, so it has not changed. It only has to be copied if it is saved in another directory
+            target_path = os.path.join(snapshot_dir, chunk.chunk_file)
+            if not os.path.exists(target_path):
+                shutil.copyfile(chunk.get_path(), target_path)
+                num_written += 1
+            chunk_file = chunk.chunk_file
+            summary = chunk.summary
+        else:
+            user_entity_set = dictUserEntitySet[current_set_id]
+            summary = get_user_entity_set_summary(user_entity_set)
+            content = encode_user_entity_set(user_entity_set)
+            chunk_file = "set_%s.chunk" %md5(content).hexdigest()
+            target_path = os.path.join(snapshot_dir, chunk_file)
+            if not os.path.exists(target_path):
+                _write_file(target_path, content)
+                num_written += 1
+            del content
+
+        sets_list.append((current_set_id, chunk_file))
+        if summary is not None:
+            summaries[current_set_id] = summary
+
+    manifest = { "version": SNAPSHOT_VERSION,
+                 "byteorder": sys.byteorder,
+                 "session": session_attributes,
+                 "sets": sets_list,
+                 "summaries": summaries }
+
+    _write_file(os.path.join(snapshot_dir, MANIFEST_FILE), cPickle.dumps(manifest, cPickle.HIGHEST_PROTOCOL))
+
+    # Removes the chunks of sets that have changed or have been removed
+    used_chunks = set([ x[1] for x in sets_list ])
+    for current_file in os.listdir(snapshot_dir):
+        if current_file.startswith("set_") and current_file.endswith(".chunk") and current_file not in used_chunks:
+            os.remove(os.path.join(snapshot_dir, current_file))
+
+    return num_written
+
+
+def load_snapshot(snapshot_dir):
+    """
+    Reads the session snapshot in "snapshot_dir"
+
+    Returns a tuple (session_attributes, dictUserEntitySet), where dictUserEntitySet is a LazyUserEntitySetDict
+    """
+
+    manifest = read_manifest(snapshot_dir)
+
+    summaries = manifest.get("summaries", {})
+
+    dictUserEntitySet = LazyUserEntitySetDict()
+    for (current_set_id, chunk_file) in manifest["sets"]:
+        dict.__setitem__(dictUserEntitySet, current_set_id, UserEntitySetChunk(snapshot_dir = os.path.abspath(snapshot_dir),
+                                                                               chunk_file = chunk_file,
+                                                                               byteorder = manifest["byteorder"],
+                                                                               summary = summaries.get(current_set_id)))
+
+    return (manifest["session"], dictUserEntitySet)
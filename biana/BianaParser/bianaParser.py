@@ -40,6 +40,7 @@ import time
 import gzip
 import traceback
 import os
+import cPickle
 #import tarfile
 
 
@@ -53,6 +54,9 @@ class BianaParser(object):
     General Parser Class to biana
     """
 
+    # Parsers calling self.checkpoint() after inserting each entry set it to True, so that they accept checkpoint-file and resume
+    supports_checkpoints = False
+
     def __init__(self, default_db_description = None,
                  default_script_name = "bianaParser.py",
                  default_script_description = "This file implements a program that fills up tables in database biana with information from distinct databases",
@@ -83,6 +87,10 @@ class BianaParser(object):
                                     ("time-control",None,"prints to stderr a control of the timing of the parser"),
                                     ("database-description=",default_db_description,"Description of the database to be inserted."),
                                     ("optimize-for-parsing",None,"Optimizes database for parsing"),
+                                    ("checkpoint-file=",None,"File where parsing checkpoints (input file offset and last inserted identifiers) are stored while parsing. If parsing fails, it can be resumed from the last checkpoint with --resume. Only available for the parsers that store checkpoints (i.e. uniprot)"),
+                                    ("resume",None,"Resumes an unfinished parsing from the last checkpoint stored in checkpoint-file instead of starting it from scratch"),
+                                    ("profile-queries=",None,"File where a report of the database queries executed during the parsing (calls, time and rows of each kind of query) is written"),
+                                    ("explain-threshold=",None,"Time (in seconds) from which the EXPLAIN of a query is added to the profile-queries report"),
 				    ("promiscuous",False,"sets the database to be parsed as promiscuous (whose entities can be included in multi user entities)") ]
                                     #("mode=","scratch","sets mode to be used by parser. Valid modes are: \"scratch\" (biana database is empty, create it from scratch) or \"tables\" (fill only tables indicated in tables_to_fill (see code)")]   
                                            
@@ -105,6 +113,17 @@ class BianaParser(object):
         self.time_control = self.arguments_dic["time-control"]
         self.log_file = self.arguments_dic["log-file"]
         self.optimize_for_parsing = self.arguments_dic["optimize-for-parsing"]
+        self.checkpoint_file = self.arguments_dic["checkpoint-file"]
+        self.resume = self.arguments_dic["resume"]
+        self.resume_offset = None             # input file offset where the parsing has to be resumed
+        self.checkpoint_buffer_flushes = 0    # number of buffer flushes done when the last checkpoint was taken
+        self.checkpoint_max_buffer_flushes = 100  # number of buffer flushes after which the rows of a pending checkpoint are sent to the database
+        self.pending_checkpoint = None        # (buffer state, pickled checkpoint, checkpoint) of a checkpoint waiting for its rows to be sent to the database
+        self.last_checkpoint = None           # last checkpoint stored in checkpoint-file
+        self.profile_queries_file = self.arguments_dic["profile-queries"]
+        self.explain_threshold = self.arguments_dic["explain-threshold"]
+        if self.explain_threshold is not None:
+            self.explain_threshold = float(self.explain_threshold)
         #self.mode = self.arguments_dic["mode"]
 	self.is_promiscuous = self.arguments_dic["promiscuous"] # Flag deciding whether database gives information that is going to be added to more than one user entiries
 
@@ -164,7 +183,13 @@ class BianaParser(object):
         if self.log_file:
             self.log_file_fd = file(self.log_file, 'w')
 
-        self.biana_access = BianaDBaccess(dbname=self.biana_dbname, dbhost=self.biana_dbhost, dbuser=self.biana_dbuser, use_buffer=True, dbpassword=self.biana_dbpass, lock_tables=True, check_integrity=True )
+        self.check_checkpoint_arguments()
+
+        # When resuming, integrity is not checked as it would delete the unfinished parsing (restoring the checkpoint fixes it instead)
+        self.biana_access = BianaDBaccess(dbname=self.biana_dbname, dbhost=self.biana_dbhost, dbuser=self.biana_dbuser, use_buffer=True, dbpassword=self.biana_dbpass, lock_tables=True, check_integrity=not self.resume )
+
+        if self.profile_queries_file is not None:
+            self.biana_access.db.enable_profiler( explain_threshold = self.explain_threshold )
 
 
         # check data consistency
@@ -176,15 +201,22 @@ class BianaParser(object):
         # Introduce database info into biana database
         #if( self.mode=="scratch" ):
 
-        self.database = ExternalDatabase( databaseName = self.sourcedb_name,
-                                          databaseVersion = self.sourcedb_version,
-                                          databaseFile = self.input_file.split(os.sep)[-1],
-                                          databaseDescription = self.database_description,
-                                          defaultExternalEntityAttribute = self.default_eE_attribute,
-					  isPromiscuous = self.is_promiscuous ) 
-                                          #content_type_list = self.content_type_list)
-
-        self.biana_access.insert_new_external_database( externalDatabase = self.database )
+        if self.resume:
+            self.resume_from_checkpoint()
+        else:
+            # Checkpoints from a previous parsing are not valid anymore
+            if self.checkpoint_file is not None and os.path.exists(self.checkpoint_file):
+                os.remove(self.checkpoint_file)
+
+            self.database = ExternalDatabase( databaseName = self.sourcedb_name,
+                                              databaseVersion = self.sourcedb_version,
+                                              databaseFile = self.input_file.split(os.sep)[-1],
+                                              databaseDescription = self.database_description,
+                                              defaultExternalEntityAttribute = self.default_eE_attribute,
+                                              isPromiscuous = self.is_promiscuous ) 
+                                              #content_type_list = self.content_type_list)
+
+            self.biana_access.insert_new_external_database( externalDatabase = self.database )
                                                                
         # Open the input file descriptor
         # This is a responsability of subclasses method
@@ -206,8 +238,8 @@ class BianaParser(object):
 
         except:
             traceback.print_exc()
-            sys.stderr.write("ERROR WHILE PARSING. ALL MODIFICATIONS ARE GOING TO BE DELETED\n")
-            self.biana_access._rollback()
+            self.rollback_failed_parsing()
+            self.write_query_profile()
             sys.exit(1)
         
 
@@ -219,6 +251,11 @@ class BianaParser(object):
 
 
         self.biana_access.close()
+
+        if self.checkpoint_file is not None and os.path.exists(self.checkpoint_file):
+            os.remove(self.checkpoint_file)
+
+        self.write_query_profile()
         
         if self.time_control:
             sys.stderr.write("Total time: %s seconds\n" %(time.time()-self.initial_time))
@@ -233,6 +270,130 @@ class BianaParser(object):
 
 
 
+    def rollback_failed_parsing(self):
+        """
+        Deletes the information inserted by a failed parsing
+
+        If a checkpoint has been stored, only the information inserted after it is deleted, so that the parsing can be resumed with --resume
+        """
+
+        if self.last_checkpoint is not None:
+            sys.stderr.write("ERROR WHILE PARSING. MODIFICATIONS DONE AFTER THE LAST CHECKPOINT ARE GOING TO BE DELETED. RESUME THE PARSING WITH --resume\n")
+            self.biana_access._rollback( checkpoint = self.last_checkpoint, only_inserted_tables = True )
+        else:
+            sys.stderr.write("ERROR WHILE PARSING. ALL MODIFICATIONS ARE GOING TO BE DELETED\n")
+            self.biana_access._rollback( only_inserted_tables = True )
+
+
+    ## QUERY PROFILING METHODS ##
+    def write_query_profile(self):
+        """
+        Writes the report of the queries executed in profile-queries file (if query profiling is enabled)
+        """
+        if self.profile_queries_file is not None and self.biana_access.db.get_profiler() is not None:
+            self.biana_access.db.get_profiler().write_report(self.profile_queries_file)
+
+
+    ## CHECKPOINT METHODS ##
+    def check_checkpoint_arguments(self):
+        """
+        Exits with an error message if checkpoint-file or resume are given and they cannot be used
+        """
+
+        if self.resume and self.checkpoint_file is None:
+            sys.stderr.write("To resume a parsing it is necessary to give the checkpoint-file of the unfinished parsing\n")
+            sys.exit(1)
+
+        if self.checkpoint_file is not None and not self.supports_checkpoints:
+            sys.stderr.write("%s does not store parsing checkpoints: checkpoint-file and resume cannot be used with it\n" %self.__class__.__name__)
+            sys.exit(1)
+
+
+    def checkpoint(self):
+        """
+        Takes a parsing checkpoint if the insert buffer has been sent to the database since the last one, and stores it in checkpoint-file when it is valid
+
+        Parsers must call it only between entries of the input file: when all previous entries have been inserted and nothing of the next one has been read
+
+        The insert buffer is not emptied: a checkpoint is pending until all the buffer elements with rows when it was taken have been sent to the database.
+        If it is still pending after checkpoint_max_buffer_flushes buffer flushes (tables with few inserts), only the buffer elements it waits for are sent
+        """
+
+        if self.checkpoint_file is None or self.input_file_fd is None:
+            return
+
+        db = self.biana_access.db
+
+        if self.pending_checkpoint is None:
+            if db.num_buffer_flushes == self.checkpoint_buffer_flushes:
+                return
+
+            checkpoint = self.biana_access.get_parsing_checkpoint( externalDatabase = self.database )
+            checkpoint["input_file"] = self.input_file
+            checkpoint["input_file_offset"] = self.input_file_fd.tell()
+            checkpoint["external_database"] = self.database
+            checkpoint["log"] = self.log
+            checkpoint["elapsed_time"] = time.time() - self.initial_time
+
+            # Pickled now, as temporal data, log and external database change with the next entries
+            self.pending_checkpoint = ( db.get_buffer_state(), cPickle.dumps(checkpoint, cPickle.HIGHEST_PROTOCOL), checkpoint )
+            self.checkpoint_buffer_flushes = db.num_buffer_flushes
+
+        (buffer_state, checkpoint_data, checkpoint) = self.pending_checkpoint
+
+        uncommitted_keys = db.get_uncommitted_buffer_keys(buffer_state)
+        if len(uncommitted_keys)>0:
+            if db.num_buffer_flushes - buffer_state[0] < self.checkpoint_max_buffer_flushes:
+                return
+            db._empty_buffer( key_list = uncommitted_keys )
+
+        # Written in a temporal file first, so that a failure never leaves a partial checkpoint
+        temp_file = self.checkpoint_file + ".tmp"
+        checkpoint_fd = file(temp_file, 'wb')
+        checkpoint_fd.write(checkpoint_data)
+        checkpoint_fd.close()
+        os.rename(temp_file, self.checkpoint_file)
+
+        self.pending_checkpoint = None
+        self.last_checkpoint = checkpoint
+
+        if self.verbose:
+            sys.stderr.write("Checkpoint stored (last external entity: %s)\n" %checkpoint["externalEntityID"])
+
+
+    def resume_from_checkpoint(self):
+        """
+        Restores the last checkpoint stored in checkpoint-file: deletes the information inserted after it and sets the input file offset where the parsing has to continue
+        """
+
+        if not os.path.exists(self.checkpoint_file):
+            sys.stderr.write("Checkpoint file %s does not exist. The parsing cannot be resumed\n" %self.checkpoint_file)
+            sys.exit(1)
+
+        checkpoint_fd = file(self.checkpoint_file, 'rb')
+        checkpoint = cPickle.load(checkpoint_fd)
+        checkpoint_fd.close()
+
+        if checkpoint["input_file"] != self.input_file:
+            sys.stderr.write("Checkpoint file %s was stored while parsing %s. The parsing cannot be resumed\n" %(self.checkpoint_file, checkpoint["input_file"]))
+            sys.exit(1)
+
+        self.database = checkpoint["external_database"]
+        self.biana_access.restore_parsing_checkpoint( externalDatabase = self.database, checkpoint = checkpoint )
+
+        self.log = checkpoint["log"]
+        self.initial_time -= checkpoint["elapsed_time"]
+        self.resume_offset = checkpoint["input_file_offset"]
+        self.checkpoint_buffer_flushes = self.biana_access.db.num_buffer_flushes
+        self.last_checkpoint = checkpoint
+
+        # Input file may have been opened by the parser before starting
+        if getattr(self, "input_file_fd", None) is not None:
+            self.input_file_fd.seek(self.resume_offset)
+
+        sys.stderr.write("Resuming parsing from external entity %s\n" %checkpoint["externalEntityID"])
+
+
     ## GENERAL PARSER METHODS ##
     def parseArguments(self):
         """
@@ -430,6 +591,11 @@ class BianaParser(object):
                     self.input_file_fd = gzip.open(self.input_file,'r')
                 else:
                     self.input_file_fd = file(self.input_file, 'r')
+
+                if self.checkpoint_file is not None:
+                    self.input_file_fd = CheckpointedInputFile(self.input_file_fd)
+                    if self.resume_offset is not None:
+                        self.input_file_fd.seek(self.resume_offset)
             elif( os.path.isdir(self.input_file) ):
                 self.input_file_fd = None
 
@@ -439,7 +605,55 @@ class BianaParser(object):
         Method to be overwritten by specific parsers
 
         The method must include the calls to control lock and unlock database procedures
+
+        In order to be resumable, it must call self.checkpoint() after inserting each entry (and set supports_checkpoints to True)
         """
         return
 
 
+
+class CheckpointedInputFile(object):
+    """
+    Input file descriptor that keeps the offset of the lines read so far
+
+    Used when storing checkpoints, as iterating a file object reads ahead and its tell() does not correspond to the lines given to the parser
+    """
+
+    def __init__(self, fd):
+        self.fd = fd
+        self.offset = fd.tell()
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        line = self.fd.readline()
+        if line == "":
+            raise StopIteration
+        self.offset += len(line)
+        return line
+
+    def readline(self, *args):
+        line = self.fd.readline(*args)
+        self.offset += len(line)
+        return line
+
+    def readlines(self):
+        return list(self)
+
+    def read(self, *args):
+        data = self.fd.read(*args)
+        self.offset += len(data)
+        return data
+
+    def tell(self):
+        return self.offset
+
+    def seek(self, offset):
+        self.fd.seek(offset)
+        self.offset = offset
+
+    def __getattr__(self, name):
+        return getattr(self.fd, name)
+
+
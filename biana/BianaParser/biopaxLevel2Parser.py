@@ -30,12 +30,14 @@ Called from :
 from bianaParser import *
 from xml.sax import saxutils, handler, make_parser
 from XMLNode import XMLNode
+from xml_streaming import DiskRecordMap
 import copy
 
 class BiopaxEntity(object):
 
     resources = None
     controlled_relations = None
+    inserted_ids = None    # external entity ids of the inserted elements (elements read from disk do not keep their biana object)
     
     database = None
     dbaccess = None
@@ -128,6 +130,8 @@ class BiopaxEntity(object):
         returns the external entity id assigned to it
         """
 
+        if BiopaxEntity.inserted_ids.has_key(self.rdf_id):
+            return BiopaxEntity.inserted_ids[self.rdf_id]
 
         externalEntity = self._get_biana_object()
 
@@ -231,8 +235,8 @@ class BiopaxEntity(object):
 
         # Check if this external entity (should be a relation) is catalyzed or modulated by other entities. If it is not a relation it will give an exception
         if BiopaxEntity.controlled_relations.has_key('#'+self.rdf_id):
-            for current_controller in BiopaxEntity.controlled_relations['#'+self.rdf_id]:
-                control_obj = BiopaxEntity.resources['#'+current_controller.rdf_id]
+            for current_controller_id in BiopaxEntity.controlled_relations['#'+self.rdf_id]:
+                control_obj = BiopaxEntity.resources['#'+current_controller_id]
                 #print "Current controller: %s" %current_controller.rdf_id
                 #print "Getting %s for control obj %s" %(control_obj.controller_xref,control_obj.rdf_id)
 
@@ -253,6 +257,7 @@ class BiopaxEntity(object):
                                                            participantAttribute = ExternalEntityRelationParticipantAttribute( attribute_identifier = "role", value = control_obj.control_type ) )
 
         BiopaxEntity.dbaccess.insert_new_external_entity( externalEntity = externalEntity )
+        BiopaxEntity.inserted_ids[self.rdf_id] = externalEntity.get_id()
 
         #print "Going to insert ",self.name," to biana"
         #self.biana_external_entity_id = externalEntity.get_id()
@@ -297,6 +302,10 @@ class BiopaxPhysicalEntityParticipant(BiopaxEntity):
             BiopaxEntity.toBiana(BiopaxEntity.resources[self.physical_entity_xref])
             self.biana_object = BiopaxEntity.resources[self.physical_entity_xref]._get_biana_object()
         return self.biana_object
+
+    def toBiana(self):
+        # The participant is the physical entity itself
+        return BiopaxEntity.resources[self.physical_entity_xref].toBiana()
         
     def add_participant_attributes_to_relation(self, eEr):
         """
@@ -529,7 +538,7 @@ class BiopaxControl(BiopaxPhysicalInteraction):
         self.set_attributes(XMLNode)
 
         if self.controlled_xref is not None:
-            BiopaxEntity.controlled_relations.setdefault(self.controlled_xref,[]).append(self)
+            BiopaxEntity.controlled_relations.setdefault(self.controlled_xref,[]).append(self.rdf_id)
 
     def set_attributes(self, XMLNode):
         
@@ -806,17 +815,19 @@ class BiopaxLevel2Parser(BianaParser):
         def get_biana_data_type(self, type):
             return BiopaxLevel2Parser.BiopaxLevel2Handler.datatype_to_biana_type[type.lower()]
 
-        def __init__(self):
+        def __init__(self, biopax_elements=None):
 
             print "initalizing BiopaxLevel2Handler"
 
             self.current_XMLNode = None
             self.step = 0
             self.xmlnode_hierarchylist = []
-            self.biopaxElements = {}
+            # Elements are stored in disk once read (in the DiskRecordMap "biopax_elements", closed by the parser), and they are loaded when they are referenced (by rdf:resource)
+            self.biopaxElements = biopax_elements
             
             BiopaxEntity.resources = self.biopaxElements
             BiopaxEntity.controlled_relations = {}
+            BiopaxEntity.inserted_ids = {}
 
             handler.ContentHandler.__init__(self)
 
@@ -850,7 +861,9 @@ class BiopaxLevel2Parser(BianaParser):
                 self.current_XMLNode = XMLNode(name = name, attrs = attrs)
             else:
                 t = XMLNode(name = name, attrs = attrs)
-                self.current_XMLNode.addChild(t)
+                # Top level elements are not added to the root node, so that they are discarded once they have been processed
+                if len(self.xmlnode_hierarchylist)>0:
+                    self.current_XMLNode.addChild(t)
                 self.xmlnode_hierarchylist.append(self.current_XMLNode)
                 self.current_XMLNode = t
 
@@ -880,8 +893,9 @@ class BiopaxLevel2Parser(BianaParser):
 
 
         def toBiana(self):
-            for current_element in self.biopaxElements.values():
-                current_element.toBiana()
+            for current_key in self.biopaxElements.keys():
+                self.biopaxElements[current_key].toBiana()
+                self.biopaxElements.trim_cache()
                 
 
 
@@ -890,11 +904,11 @@ class BiopaxLevel2Parser(BianaParser):
         Class for parsing individual XML files obeying BIOPAX Level 2 standards
         """
 
-        def __init__(self, flagVerbose=False): #, fileName=None, listEntry=None):
+        def __init__(self, flagVerbose=False, biopax_elements=None): #, fileName=None, listEntry=None):
             self.fileName = None
             self.file = None
             self.listEntry = []
-            self.handler = BiopaxLevel2Parser.BiopaxLevel2Handler()
+            self.handler = BiopaxLevel2Parser.BiopaxLevel2Handler(biopax_elements)
             self.saxParser = make_parser()
             self.saxParser.setContentHandler(self.handler)
             return
@@ -908,14 +922,18 @@ class BiopaxLevel2Parser(BianaParser):
             return  "" 
 
         def parseFile(self, fileName=None):
-            self.__init__() # first reset old contents
-            if fileName is not None:
-                self.fileName = fileName
-                self.file = open(fileName)
-            self.saxParser.parse(self.fileName)
-            self.handler.toBiana()
-            if not self.file.closed:
-                self.file.close()    
+            # The temporal file of the elements read is removed once the file has been inserted, even if the parsing fails
+            with DiskRecordMap(prefix="biana_biopax_") as biopax_elements:
+                self.__init__(biopax_elements = biopax_elements) # first reset old contents
+                if fileName is not None:
+                    self.fileName = fileName
+                    self.file = open(fileName)
+                try:
+                    self.saxParser.parse(self.fileName)
+                    self.handler.toBiana()
+                finally:
+                    if self.file is not None and not self.file.closed:
+                        self.file.close()
             return
 
 
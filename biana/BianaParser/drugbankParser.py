@@ -1,5 +1,5 @@
 from bianaParser import *
-from xml.etree.ElementTree import iterparse
+from xml_streaming import iterparse_stream, DiskRecordMap
 import os, cPickle
 
 class DrugBankParser(BianaParser):                                                        
@@ -98,11 +98,11 @@ class DrugBankParser(BianaParser):
         print(".....PARSING THE DATABASE. THIS CAN LAST SOME MINUTES.....")
 
         parser = DrugBankXMLParser(self.input_file)
-        parser.parse()
 
         # ADD ALL THE INDIVIDUAL DRUG INFORMATION
+        # Each drug is added as soon as it has been read, and then its information is discarded by the XML parser
         print(".....ADDING ALL THE INFORMATION OF THE INDIVIDUAL DRUGS.....")
-        for drug in parser.drugs:
+        def add_drug(drug):
 
             # Create an external entity corresponding to the drug in the database (if it is not already created)
             if not self.external_entity_ids_dict.has_key(drug):
@@ -110,6 +110,8 @@ class DrugBankParser(BianaParser):
                 #print("Adding main drug {}".format(drug))
                 self.create_drug_external_entity(parser, drug)
 
+        parser.parse(drug_callback = add_drug)
+
         # ADD ALL THE DRUG-DRUG INTERACTIONS INFORMATION
         print(".....ADDING ALL THE INFORMATION OF THE DRUG-DRUG INTERACTIONS.....")
         added_ddis = set()
@@ -157,6 +159,10 @@ class DrugBankParser(BianaParser):
 
                                         added_ddis.add(comb1)
 
+                # Interactions read from disk are not needed anymore
+                parser.drug_to_interactions.trim_cache()
+
+        parser.drug_to_interactions.close()
 
         return
 
@@ -372,6 +378,13 @@ class DrugBankParser(BianaParser):
 class DrugBankXMLParser(object):
     NS="{http://www.drugbank.ca}"
 
+    # Dictionaries with the information of each drug (discarded once the drug has been processed when parsing with a drug_callback)
+    drug_dictionaries = [ "drug_to_name", "drug_to_description", "drug_to_type", "drug_to_groups", "drug_to_indication",
+                          "drug_to_pharmacodynamics", "drug_to_moa", "drug_to_toxicity", "drug_to_synonyms", "drug_to_products",
+                          "drug_to_brands", "drug_to_mixtures", "drug_to_uniprot", "drug_to_pubchem", "drug_to_pubchem_substance",
+                          "drug_to_chembl", "drug_to_chebi", "drug_to_kegg", "drug_to_kegg_compound", "drug_to_pharmgkb",
+                          "drug_to_target_to_values", "drug_to_categories", "drug_to_atc_codes", "drug_to_inchi_key", "drug_to_smiles" ]
+
     def __init__(self, filename):
         self.file_name = filename
         self.drugs = set()
@@ -408,14 +421,16 @@ class DrugBankXMLParser(object):
         self.target_to_uniprotentry = {}
         return
 
-    def parse(self):
-        # get an iterable
-        context = iterparse(self.file_name, ["start", "end"])
-        # turn it into an iterator
-        context = iter(context)
-        # get the root element
-        event, root = context.next()
-        state_stack = [ root.tag ]
+    def parse(self, drug_callback=None):
+        """
+        Parses the DrugBank XML file. Processed XML elements are removed from memory while parsing
+
+        If "drug_callback" is given, it is called with the DrugBank id of each drug as soon as the drug has been read. Then, the information
+        of the drug is discarded and its drug-drug interactions are moved to disk (self.drug_to_interactions becomes a DiskRecordMap,
+        that must be closed when it is not needed anymore)
+        """
+        if drug_callback is not None:
+            interactions_map = DiskRecordMap(prefix="biana_drugbank_")
         drug_id = None
         drug_type = None
         drug_id_partner = None
@@ -424,9 +439,8 @@ class DrugBankXMLParser(object):
         current_property = None 
         target_types = set(map(lambda x: self.NS+x, ["target", "enzyme", "carrier", "transporter"]))
         target_types_plural = set(map(lambda x: x+"s", target_types))
-        for (event, elem) in context:
+        for (event, elem, state_stack) in iterparse_stream(self.file_name):
             if event == "start":
-                state_stack.append(elem.tag)
                 if len(state_stack) <= 2 and elem.tag == self.NS+"drug":
                     if "type" in elem.attrib:
                         drug_type = elem.attrib["type"]
@@ -450,6 +464,9 @@ class DrugBankXMLParser(object):
                         drug_type = elem.attrib["type"]
                     else: 
                         drug_type = None
+                    if drug_callback is not None and drug_id is not None:
+                        drug_callback(drug_id.upper())
+                        self._discard_drug(drug_id, interactions_map)
                 if elem.tag == self.NS+"drugbank-id":
                     if state_stack[-2] == self.NS+"drug":
                         if "primary" in elem.attrib:
@@ -587,11 +604,21 @@ class DrugBankXMLParser(object):
                                 self.drug_to_uniprot[drug_id] = elem.text
                             elif resource == "PharmGKB":
                                 self.drug_to_pharmgkb[drug_id] = elem.text
-                elem.clear()
-                state_stack.pop()
-        root.clear()
+        if drug_callback is not None:
+            self.drug_to_interactions = interactions_map
         return 
 
+
+    def _discard_drug(self, drug_id, interactions_map):
+        """
+        Removes the information of a drug already processed, moving its drug-drug interactions to "interactions_map"
+        """
+        for dictionary_name in self.drug_dictionaries:
+            getattr(self, dictionary_name).pop(drug_id, None)
+        if drug_id in self.drug_to_interactions:
+            interactions_map[drug_id] = self.drug_to_interactions.pop(drug_id)
+        return
+
     
     def get_targets(self, target_types = set(["target"]), only_paction=False):
         # Map target ids to uniprot ids
@@ -1,62 +1,247 @@
-obo_name_to_MI = {'red fluorescent protein tag': '0732', 'yellow fluorescent protein tag': '0368', 'epsilon-n-biotinyllysine': '0186', 'attribute name': '0590', '[q:ac]': '0127', "(s)-2-amino-3-([adenosine 5'-(trihydrogen diphosphate) 5'->5'-ester with alpha-d-ribofuranosyl]oxy)-propanoic acid formula": '0531', 'deacetylase radiometric assay': '0508', 'neddylation reaction': '0567', 'lexa b52 complementation': '0727', 'deubiquitination reaction': '0204', 'selex': '0657', 'protein array': '0089', 'glycosyl-cysteine': '0534', 'r1 spin label': '0846', 'acetylvaline': '0142', 'sufficient binding site': '0442', 'o3-phosphoserine': '0176', 'n-acetyl-threonine': '0139', 'n-methyl-alanine': '0158', 'experimental prep': '0346', 'colocalization/visualisation technologies': '0023', 'x-ray powder diffrac': '0824', 'nucleic acid transduction': '0714', '[r:am]': '0145', 'fluorescence polarization spectroscopy': '0053', '(s)-5-oxo-2-pyrrolidinecarboxylic acid': '0183', 'anti tag coimmunoprecipitation': '0007', 'cvtopic': '0590', 'sticky ends': '0853', 'hexa-his-tag': '0521', 'second': '0649', 'atpase assay': '0880', 'polyclonal immunost': '0709', 'n6-[5-((3as,4s,6ar)-hexahydro-2-oxo-1h-thieno[3,4-d]imidazol-4-yl)-1-oxopentyl]-l-lysine': '0186', 'renilla lucirefase': '0896', 'n-acetyl-l-aspartic acid': '0125', '2-amino-3-(hexadecanoylthio)propanoic acid': '0154', 'column chromatography': '0091', 'synt growth defect': '0274', 'participant att name': '0666', 'phosphotyrosine': '0178', 'kub': '0189', 'cbp-prota tagged': '0524', 'protein complex': '0315', 'reactome protein': '0245', 'scintillation proximity assay': '0099', '13c label': '0379', 'n6,n6,n6-trimethyl-l-lysine': '0167', '[k:hypu]': '0187', 'suppression knockout': '0263', 'vesicular stomatitis virus tag': '0884', 'gst tag': '0519', 'beta lactamase complementation': '0011', 'diphthamide': '0185', 'k': '0838', 'weight silver stain': '0817', 'knock out': '0788', 'photoaffinity labelling': '0031', 'in gel phosphatase': '0514', 'prints': '0453', 'methylated-lysine': '0548', 'cds number': '0305', 'n-methyl-l-methionine': '0168', '[c:palm_n]': '0153', 'dna': '0319', 'l-cysteine nitrite ester': '0552', 'sequence based prediction': '0101', 'pubchem': '0730', 'author identifier': '0868', 'nucleic acid passive uptake': '0713', 'ribonucleic acid': '0320', 'id-validation-regexp': '0628', 'multiple parent reference': '0829', 'prot infection': '0725', 'polyprotein frag': '0828', 'gene neighbourhood': '0057', 'tyrosine phosphate': '0178', 'pride': '0738', 'mm': '0650', 'parameter type': '0640', 'mi': '0000', 'dihydrofolate reductase reconstruction': '0111', 'endogenous': '0222', 'molecular interaction': '0000', '(s)-2-amino-3-oxopropanoic acid': '0182', 'two hybrid': '0018', 'n2-acetyl-l-lysine': '0133', 'biotin tag': '0239', 'example': '0616', "2'-[3-carboxamido-3-(trimethylammonio)propyl]-histidine": '0185', 'trojan peptides': '0740', 'fluorescence spectr': '0017', '(s)-2-amino-5-[(imino(methylamino)methyl)amino]pentanoic acid': '0564', 'caution': '0618', 'renilla luciferase protein tag': '0896', 'n-acetyl-phenylalanine': '0136', 'western blot': '0113', '2-[(xi)-3-carboxamido-3-(trimethylammonio)propyl]-4-((s)-2-amino-2-carboxyethyl)-1h-imidazole': '0185', '(s)-2-aminopropanamide': '0144', 'n6-glycyllysine': '0189', 'flag-tagged': '0518', 'palmitoylation': '0216', 'double nonmonotonic interaction': '0801', 'translocation': '0593', 'n5-methyl-glutamine': '0162', 'synt growth increase': '0275', 'nucl microinjection': '0712', 'lac': '0132', 'aspartic 4-phosphoric anhydride': '0172', 'psi-mi': '0488', 'cytoplasmic complementation assay': '0228', 'lambda repressor two hybrid': '0655', 'experimental feature': '0505', 'southern blot': '0103', 'rosetta stone': '0036', 'gpi-anchor amidated alanine': '0540', 'asynthetic': '0795', 'signal recognition particle rna': '0611', 'two hybrid pooling approach': '0398', 'interaction prediction': '0063', 'glutathione s-tranferase tag': '0519', 'glutamatemethylester': '0163', 'genbank protein gi': '0851', '[e:pyro]': '0183', 'n-methyl-phenylalanine': '0169', 'phospho acceptor': '0843', 'methionamine': '0135', 'electron tomography': '0410', 'n-acetyltyrosine': '0141', 'gtpase': '0419', "o3-[alpha-d-ribofuranoside 5'->5'-ester with adenosine 5'-(trihydrogen diphosphate)]-l-serine": '0531', 'adenylate cyclase': '0014', 'n-acetyl-l-methionine': '0135', 'peptide atlas': '0741', 'chromatography': '0091', 'suppression underexpression': '0268', 'molecular weight estimation by coomasie staining': '0818', 'random spore analysis': '0439', 'protein cross-linking with a bifunctional reagent': '0031', "s-alpha-d-ribofuranosyl-l-cysteine 5'->5'-ester with adenosine 5'-(trihydrogen diphosphate)": '0529', 'undetermined sequence position': '0339', 'suppress knockout': '0263', 'ptds': '0740', 'synthetic growth defect': '0274', 'n-acetyl-l-serine': '0138', 'mrna': '0324', 'dna directed dna polymerase assay': '0697', 'luminescence based mammalian interactome mapping': '0729', 'intermolecular force': '0859', 'other biochemic tech': '0079', 'x-ray fiber diffraction': '0825', 'conditional synthetic lethal nutrition-sensitivity': '0600', 'gpi-anchor amidated aspartate': '0542', 'methylation reaction': '0213', 'systematic evolution of ligands by exponential enrichment': '0657', 'experiment descripti': '0591', 'fluorescent dye label': '0857', 'competition binding': '0405', '[f:meth]': '0169', 'partial dna sequence': '0080', 'reverse two hybrid': '0726', 'temperature of interaction': '0836', 'deformylation': '0199', 'dephosphorylation': '0203', 'tag visualisation by fluorescence': '0867', 'protease htrf': '0511', 'n6-acetyl-lysine': '0134', 'fret': '0055', 'pfam': '0451', 'membrane compl': '0230', 'dna cleavage': '0572', 'uniprot knowledge base': '0486', 'immunodepleted coip': '0858', 'interactor type': '0313', 'fmt': '0169', 'prot passive uptake': '0736', 'glutamic acid 5-methyl ester': '0163', 'suppression scalable': '0267', '5-oxopyrrolidine-2-carboxylic acid': '0183', 'iac': '0131', 'search-url': '0615', 'mips': '0464', 'radiolabelled': '0517', 'two hybrid fragment pooling approach': '0399', 'source database': '0489', 'text mining': '0110', 'label transfer techniques': '0031', "3'-methyl-histidine": '0164', 'comig non denat gel': '0404', 'mutation decreasing interaction': '0119', 'genetic interference': '0254', '[a:meth_n]': '0158', 'mmdb': '0459', 'nucleic acid transfection with liposome': '0717', 'ncbi taxonomy': '0849', 'tb3+-dtpa-cs124-emch': '0863', 'adp-ribosylcysteine': '0529', 'phospho-histidine': '0555', 'suppressed gene': '0582', 'biochemical': '0401', 'n-methylglutamine': '0162', '3-selenylalanine': '0180', 'enhancement': '0802', 'rac': '0123', 'ram': '0145', 'coloc fluoresc probe': '0021', 'ub reconstruction': '0112', 'genome knowledge base': '0467', 'n6-methyl-lysine': '0165', 'experimental preparation': '0346', 'l-serinesemialdehyde [misnomer]': '0182', 'dna rna pol assay': '0698', 'mint': '0471', 'cyan fluorescent protein tag': '0733', 'interaction attribute name': '0664', 'phosphorylated residue': '0170', 'one hybrid': '0432', 'ypo': '0178', 'epsilon-dimethyllysine': '0166', 'coip': '0019', 'homogeneous time resolved fluorescence': '0510', 'gal4 ad': '0690', 'rsa': '0439', '2-amino-3-hydroxypropanoic acid 3-phosphate': '0176', 'doi': '0574', 'n(zeta)-acetyllysine': '0134', 'experimental role': '0495', 'm': '0648', 'interaction detect': '0001', 'gpi-anchor amidated asparagine': '0541', 'msd pdb': '0472', 'amidated residue': '0143', 'ribosome display': '0098', 'dye label': '0373', '(s)-3-amino-1,1,3-propanetricarboxylic acid': '0550', 's-palmitoyl-cysteine': '0154', 'bait': '0496', 'biocytin': '0186', 'myc tag coimmunoprecipitation': '0075', 'histidine-3-phosphate [misnomer]': '0174', 'monoclonal immunost': '0708', 'l-alanine amide': '0144', 'epistatic': '0797', 'd2': '0381', 'imaging techniques': '0428', 'experimental info': '0046', "(r)-2-amino-3-([adenosine 5'-(trihydrogen diphosphate) 5'->5'-ester with alpha-d-ribofuranosyl]sulfanyl)propanoic acid": '0529', 'glycerylpo4etohamine': '0184', 'biological feature': '0252', 'epistatic interaction': '0797', 'em5': '0163', 'inhibition': '0623', 'hypusine': '0187', 'gpi-anchor amidated cysteine': '0543', 'phosphoarginine': '0171', 'predictive tm': '0087', 'l-alpha-formylglycine': '0182', 'cleavage reaction': '0194', 'yfp': '0368', 'cyanine label': '0374', 'open reading frame name': '0306', 'protein kinase assay': '0424', 'microscopy': '0428', 'adp ribosylated residue': '0527', 'nucleic acid transfection': '0312', '(r)-2-amino-3-(hexadecanoylsulfanyl)propanoic acid': '0154', 'methylhistidine': '0164', 'palmitoylated aa': '0561', 'identified peptide': '0656', 'dna overhang': '0853', 'mrna cleavage': '0571', 'trimethyllysine': '0167', '4-hydroxy-proline': '0149', 'cofactor': '0682', '(s)-2-aminobutanedioic 4-phosphoric anhydride': '0172', 'random-spore analysis': '0439', 'rna directed rna polymerase assay': '0700', 'acetylasparagine': '0124', 'siezing column': '0071', 'omega-n-glycosyl-l-arginine': '0537', 'go component term': '0354', 'cpps': '0740', 'component': '0354', 'half cystine': '0832', 'dykddddkv epitope tag': '0518', 'poly a': '0679', 'newt': '0247', 'omega-n-glycosyl-arginine': '0537', 'predicted interac': '0063', 'molecular sieving': '0071', '[m:form]': '0147', 'calmodulin binding peptide plus protein a tag': '0524', '(s)-2-methylamino-4-(methylsulfanyl)butanoic acid': '0168', 'n4-glycosyl-l-asparagine': '0538', 'nucleoside triphosphatase reaction': '0881', '[g:myr]': '0155', 'alpha-acetylamino-delta-guanidinovaleric acid': '0123', 'l-arginine amide': '0145', 'feature att name': '0668', 'ss dna': '0680', 'acetyltyrosine': '0141', 'tint': '0836', "(s)-2-amino-4-([adenosine 5'-(trihydrogen diphosphate) 5'->5'-ester with alpha-d-ribofuranosyl]amino)-4-oxobutanoic acid": '0532', 'anti tag immunost': '0707', 'structural proximity': '0576', 'enzymatic footprinting': '0605', 'one-hybrid': '0432', '(s)-2-(acetylamino)propanoic acid': '0122', 'enhancement interaction': '0802', 'author-confidence': '0621', '(s)-5-amino-5-carboxy-n,n,n-trimethylpentanaminium': '0167', 'experiment modification': '0627', 'prot electroporation': '0722', 'omega-n-methyl-arginine': '0564', 'orf name': '0306', '[c:farn]': '0151', 'tyrosine sulfate': '0553', 'pep seq db': '0737', 'protein transduction domains': '0740', 'n-acetyl-l-phenylalanine': '0136', 'covalent interaction': '0196', 'picomolar': '0653', 'palmitoylation reaction': '0216', 'classical fluorescence spectroscopy': '0017', 'protein dna complex': '0233', 'acetylation': '0192', 'mammalian two hybrid': '0728', 'sls': '0104', '2h fragment pooling': '0399', 'demethylation': '0871', 'acetylglycine': '0129', 'n-acetyl-l-tryptophan': '0140', 'feature attribute name': '0668', 'dynamic light scattering': '0038', 'feature prediction from structure': '0577', 'isotope label': '0253', 'rare isotope label': '0378', "s-l-cysteine alpha-d-ribofuranoside 5'->5'-ester with adenosine 5'-(trihydrogen diphosphate)": '0529', 'n6-acetyllysine': '0134', 'demyristoylation reaction': '0201', 'l-aminomalonaldehydic acid': '0182', '(s)-2-amino-5-[2-([([2,3-dihydroxypropyl]oxy)(hydroxy)phosphoryl]oxy)ethyl]amino-5-oxopentanoic acid': '0184', 'n-formyl-methionine': '0147', 'ypydvpdya epitope tag': '0520', 'entrez gene/locuslink': '0477', 'complex': '0314', 'domain profile pairs': '0037', 'protein kinase a complementation': '0895', 'ribonucleoprot compl': '0316', 'beta lactamase': '0011', '[w:ac]': '0140', 'confirmation by molecular weight': '0815', 'yeast one hybrid': '0432', 'filamentous phage': '0048', 'argininamide': '0145', 'l-aspartic 4-phosphoric anhydride': '0172', 'non covalent interaction': '0215', '2h label': '0381', 'knock-down': '0789', 'chebi': '0474', 'nucleic acid uv cross-linking assay': '0430', '(s)-2-acetylamino-5-pentanediamic acid': '0127', 'gpi-alanine': '0540', 'methylmethionine': '0168', 'epr': '0042', 'gene ontology term for cellular component': '0354', 'n6-glycyl-l-lysine': '0189', '[h:po_e]': '0174', "(s)-2-amino-5-poly[2'-adenosine 5'-(trihydrogen diphosphate) 5'->5'-ester with 1alpha-d-ribofuranosyl]oxy-5-oxopentanoic acid": '0530', 'neutron fiber diff': '0891', 'gene ontology': '0448', 'gal4 vp16 complement': '0728', '(s)-2-(acetylamino)butanedioic acid': '0125', 'weight by staining': '0816', 'penetrating tag': '0739', 'hac': '0130', 'imex-primary': '0662', '(s)-2-amino-6-(tetradecanoylamino)hexanoic acid': '0156', 'greater-than': '0336', '2-[3-carboxamido-3-(trimethylammonio)propyl]histidine': '0185', 'acetyltryptophan': '0140', 'hat': '0887', 'library-used': '0672', 'rna': '0320', 'synt growth effect': '0273', 'polyclonal western': '0086', 'thiol lanthanide': '0863', 'genetic interaction': '0208', 'curation request': '0873', 'n-methyl-l-alanine': '0158', 'exp-modification': '0627', 'serine phosphate ester': '0176', 'perturbagens pep': '0259', 'gal4 dna bd': '0693', 'amorph': '0793', '[c:po]': '0173', 'glycosyl-serine': '0535', 'experimental form description': '0596', 'double nonmonotonic': '0801', 'nucleic acid delivery': '0704', 'orf number': '0305', 'flow cytometry': '0054', 'deglycosylation reaction': '0558', 'dimethyllysine': '0166', 'interaction type': '0190', 'transglutamination reaction': '0556', 'phosphothreonine': '0177', 'saxs': '0826', '2 hybrid': '0018', 'uniprotkb': '0486', 'fluorescent resonance energy transfer': '0055', 'n-methylphenylalanine': '0169', '(s)-2-amino-6-(acetylamino)hexanoic acid': '0134', 'over-expressed': '0506', 'phosphotransfer reaction': '0844', '[m:sel]': '0181', 'acetylproline': '0137', 'fusion protein': '0240', 'naturally occurring': '0332', 'array technology': '0008', 'peptideatlas': '0741', 'nucleic acid transfection by treatment': '0718', '(s,r)-2-amino-6-(4-amino-2-hydroxybutylamino)hexanoic acid': '0187', "o3-alpha-d-ribofuranosyl-l-serine 5'->5'-ester with adenosine 5'-(trihydrogen diphosphate)": '0531', 'histidine-1-phosphate [misnomer]': '0175', 'sox': '0182', 'alpha-(aminocarbonyl)-4-(2-amino-2-carboxyethyl)-n,n,n-trimethyl-1h-imidazole-2-propanaminium': '0185', 'n-acetyl-leucine': '0132', 'wac': '0140', 'v5 tag': '0525', 'phosphotransfer': '0844', 'cam  tag': '0812', 'immunodepletion': '0858', '(s)-2-amino-6-dimethylaminohexanoic acid': '0166', 'partial identification of protein sequence': '0433', 'phage display': '0084', 'dna replication elongation': '0701', 'geranylgeranylation': '0209', 'parameter unit': '0647', 'subcellular prep': '0372', 'mts': '0740', 'double stranded deoxyribonucleic acid': '0681', 'n-acetyl-glutamine': '0127', 'lexa b52 transcription complementation': '0727', 'spore germination': '0439', 'khy': '0187', 'molecular weight estimation by staining': '0816', 'predetermined feature': '0823', 'prerequisite-ptm': '0638', 'yeast two hybrid': '0018', 'pubmed': '0446', 'reftype': '0353', 'ion exchange chromatography': '0226', 'nm': '0652', 'collagen film assay': '0513', "histidine-n3'-phosphate": '0175', '[h:po_d]': '0175', 'anti tag western blot': '0705', 'colocalization by immunostaining': '0022', 'bacterial display': '0009', 'n-acetyl-tryptophan': '0140', 'fingerprinting': '0082', 'glycosylarginine': '0537', 'dimethylarginine': '0160', 'intenz': '0585', 'modeled by author': '0363', '15n': '0380', 'in vitro translated': '0589', '(s)-2-amino-n5-methylpentanediamic acid': '0162', 'karyoplasmic interaction ion strategy': '0728', 'n6-biotinyllysine': '0186', 'literature database': '0445', 'kinase scintillation proximity assay': '0425', 'ph of interaction': '0837', 'methyltransferase radiometric assay': '0516', 'affinity technology': '0400', 'protein sequence identification': '0093', 'sumoylated lysine': '0554', 'single nonmonotonic': '0800', 'cond syntetic lethal': '0270', 'carboxyglutamic acid': '0550', 'synthetic interaction': '0794', '[c:palm_s]': '0154', 'lexa dna binding domain': '0694', 'molecular source': '0330', 'knock down': '0789', 'depalmitoylation': '0202', 'atomic force microscopy': '0872', 'n-acetyl-proline': '0137', 'beta-methylthioaspartic acid': '0161', 'ribonucleoprotein complex': '0316', 'electron cryomicroscopy': '0040', 'feature description': '0597', 'mpact': '0464', 'acetylhistidine': '0130', 'knock-out': '0788', 'enzyme target': '0502', 'dip': '0465', 'mutation increasing': '0382', 'phosphorylated': '0170', 'obsolete': '0431', 'prot cationic lipid': '0724', 'electron diffraction': '0894', 'fluorescence technology': '0051', 'immunodepleted coimmunoprecipitation': '0858', 'spin label': '0845', 'n6-(4-amino-2-hydroxybutyl)-lysine': '0187', 'phylogenetic profile': '0085', '[k:ac]': '0133', 'n-acetyl-histidine': '0130', 'i131': '0234', 'nucl electroporation': '0711', 's-nitrosyl-l-cysteine': '0552', 'acetylation assay': '0889', '3d repertoire': '0731', 'participant database': '0473', 'endor': '0041', 'myc tag': '0522', 'feature constrain': '0598', 'subcellular preparation': '0372', 'methylglutamine': '0162', 'kcat': '0645', 'alexa 488 label': '0387', 'methylatedlysine': '0548', 'enhanced green fluorescent protein tag': '0734', 'acetylglutamate': '0128', '[c:ac]': '0126', 'l-gamma-carboxyglutamic acid': '0550', 'micromolar': '0651', 'inference': '0362', 'mutation disrupting interaction': '0573', 'two-hybrid': '0018', 'ms of complexes': '0069', '[d:po]': '0172', 'mrna display': '0073', 'ds dna': '0681', 'copurification': '0025', '(r,e,e,e)-2-amino-3-(3,7,11,15-tetramethyl-2,6,10,14-hexadecatetraenylsulfanyl)propanoic acid': '0152', 'gfp tag': '0367', 'degeranylation reaction': '0200', 'density sedimentatio': '0029', 'prey': '0498', 'n-methyl-methionine': '0168', 'encode': '0850', 'mse': '0181', 'autoradiography': '0833', 'participant identification method': '0002', 'isoform synonym': '0304', 'myristoylglycine': '0155', 'inferred by author': '0363', 'wormbase': '0487', 'triphosphatase react': '0881', 'sequence tag': '0102', 'gal4 dna binding domain': '0693', 'in gel kinase assay': '0423', 'saturation binding': '0440', 'polypeptide': '0327', 'l-3-oxoalanine': '0182', 'validation regular expression': '0628', 'experimental interac': '0045', 'enzymatic footprint': '0605', 'n2-acetyllysine': '0133', 'nitrated tyrosine': '0551', 'eukliseed epitope tag': '0522', 'cac': '0126', 'genetic experimental form': '0787', 'x-ray crystallography': '0114', 'spr': '0107', 'peptide massfingerprinting': '0082', '14c': '0235', 'cyan fluorescent protein': '0733', 'spo': '0176', 'spa': '0099', 's-nitrosocysteine': '0552', 'deneddylation reaction': '0569', '[a:ac]': '0122', 'pros-phosphohistidine': '0175', 'ca po nuc transfect': '0719', 'o-phospho-threonine': '0177', 'static light scattering': '0104', 'histidine-n(epsilon)-phosphate': '0174', 'fps': '0053', 'heterogeneous nuclear rna': '0323', 'fluorescence donor': '0583', 'pathway': '0619', 'x-ray tomography': '0827', 'cell-penetrating peptides': '0740', 'hydroxylated residue': '0148', 'bn-page': '0276', 'ic50': '0641', 'mac': '0135', 'pqs': '0472', 'passive uptake': '0716', '3 prime overhang': '0854', 'experiment attibute name': '0665', 'elongation': '0701', 'n-acetyl-aspartic acid': '0125', 'cse': '0180', "1'-phospho-histidine": '0174', 'so': '0601', "2-amino-3-(4-hydroxyphenyl)propanoic acid 4'-sulfate": '0553', 'homogeneous time-resolved fluorescence': '0420', '3 prime sticky end': '0854', '[a:am]': '0144', 'isoform-comment': '0637', 'anti bait coip': '0006', 'expression level alteration': '0803', 'protein microinjection': '0723', 'qdot': '0890', '[s:ac]': '0138', 'alexa 350 label': '0385', 'acetylarginine': '0123', 'identical object': '0356', 'seldi chip': '0095', 'o-glycosyl-l-serine': '0535', 'nucleic acid microinjection': '0712', 'glycosylation reaction': '0559', 'trna': '0325', 'adenylate cyclase complementation': '0014', 'filter overlay assay': '0049', 'n-asparaginyl-glycosylphosphatidylinositolethanolamine': '0541', 'n transformat cation': '0710', 'suppress overexpress': '0266', 'protein electroporation': '0722', '3d-r-factors': '0631', 'peptide array': '0081', 'methylthioaspartate': '0161', "o4'-sulfo-tyrosine": '0553', 'l-glutamyl 5-glycerophosphorylethanolamine': '0184', 'n-cysteinyl-glycosylphosphatidylinositolethanolamine': '0543', '(s)-2-formylamino-4-(methylsulfanyl)butanoic acid': '0147', 'ubiquitinated lysine': '0189', 'protein complementation assay': '0090', 'neutron diffraction': '0893', 'phosphorylation reaction': '0217', 'molecular weight estimation by autoradiography': '0821', 'tox-r dimerization assay': '0370', 'genbank_nucleotide_gi': '0852', 'ion exchange chrom': '0226', 'deacetylation reaction': '0197', 'cabri': '0246', '(r)-2-amino-3-nitrososulfanyl-propanoic acid': '0552', 'experimental participant identification': '0661', 'dpo': '0172', 'n5-methyl-l-glutamine': '0162', 'glycosyl-threonine': '0536', 'methylation': '0213', '(3as-(3aalpha,4beta,6aalpha))-n6-(5-(hexahydro-2-oxo-1h-thieno(3,4-d)imidazol-4-yl)-1-oxopentyl)-l-lysine': '0186', 'necessary binding site': '0429', 'experiment condition': '0490', 'epsilon-acetyllysine': '0134', 'adp ribosylation': '0557', 'other biochemical technologies': '0079', 'size exclusion chromatography': '0071', 'onl': '0305', 'cy3 label': '0375', 'dephosphorylation reaction': '0203', 'circular dichroism': '0016', 'organism attribute name': '0669', 'nucleotidyltransferase assay': '0696', 'n6-retinal-l-lysine': '0188', 'htrf': '0510', 'cytoplasmic compl': '0228', '(s)-1-carboxy-n,n,n-trimethylethanaminium': '0159', 'cygd (mips)': '0464', 'participant xref': '0473', 'stimulation': '0624', 'prosite': '0455', 'sufficient to bind': '0442', 'ragged n-terminus': '0341', '2-amino-3-[[2-(3-amino-3-carbamoyl-prop-1-enyl)-1,1,3-trimethyl-2,3-dihydroimidazol-5-yl]]propanoic acid': '0185', 'fluorescein isothiocyanate label': '0377', 'exp feature detect': '0659', 'protease accessibility laddering': '0814', 'sample process': '0342', "3'-methyl-l-histidine": '0164', 'surface adhesion force measurement': '0859', 'gtpase reaction': '0883', 'in vitro translated protein': '0589', 'methyltransferase as': '0515', 'transactivating tag': '0735', 'protein footprinting': '0436', 'feature detection method': '0003', 'modelled': '0362', 'alexa 594 label': '0391', 'peptide sequence database': '0737', 'gfp complementation': '0229', 'antibody detection': '0421', 'sac': '0138', '(s)-2-acetylamino-3-hydroxypropanoic acid': '0138', 's-farnesyl-cysteine': '0151', 'green fluorescent protein tag': '0367', 'grna': '0322', 'x-ray powder diffraction': '0824', 'sequence based phylogenetic profile': '0100', 's-nitrosyl-cysteine': '0552', '32p radiolabel': '0236', 'n-palmitoyl-l-cysteine': '0153', 'acetylserine': '0138', 'weight by sybr': '0820', 'hotspot': '0119', 'under expressed level': '0223', 'gkb': '0467', 'fcs': '0052', 'bifc': '0809', 'toxcat': '0370', 'poly adenine': '0679', 'desumoylation reaction': '0568', '2-hexadecanoylamino-3-mercaptopropanoic acid': '0153', '(2s,3r)-2-acetylamino-3-hydroxybutanoic acid': '0139', '2-amino-3-(3,7,11,15-tetramethyl-2,6,10,14-hexadecatetraenylthio)propanoic acid': '0152', 'prot microinjection': '0723', 'participant attribute name': '0666', 'small angle neutron scattering': '0888', 'cy5 label': '0376', 'stimulator': '0840', '2-amino-4-[[5-(2-amino-2-carboxylato-ethyl)-1,1,3-trimethyl-2,3-dihydroimidazol-2-yl]]but-3-enamide': '0185', 'mutated gene': '0804', 'inhibitor small mol': '0260', '<new synonym>': '0616', 'biotinyllysine': '0186', 'ms protein sequence': '0032', 'experimental knowledge based': '0046', 'n-acetyl-l-tyrosine': '0141', 'perturbagens peptides': '0259', 'n6,n6-dimethyl-l-lysine': '0166', 'isothermal titration calorimetry': '0065', 'n-acetyl-l-leucine': '0132', 'protein sequence': '0093', 'defarnesylation': '0198', 'phosphatase htrf': '0509', 'radiolabeled methyl': '0516', 'monoclonal antibody western blot': '0072', 'rna interference': '0256', 'n-acetyl-asparagine': '0124', 'colocalization': '0403', 'flybase': '0478', 'n15': '0380', '[k:n6ac]': '0134', 'inhibitor small molecules': '0260', '[k:biotin]': '0186', 'micro rna': '0610', 'nucleic acid electroporation': '0711', 'zymography': '0512', 'n6-retinal-lysine': '0188', 'n(delta)-methylglutamine': '0162', 'n4-(adp-ribosyl)-asparagine': '0532', 'l-glutamic acid 5-methyl ester': '0163', 'epsilon-myristoyllysine': '0156', 'coloc immunostaining': '0022', 'rm2': '0160', 'adp ribosylation reaction': '0557', 'xref type': '0353', 'x-ray diffraction': '0114', '2-oxopyrrolidine-5-carboxylic acid': '0183', 'retinallysine': '0188', '(s)-2-amino-3-(4-phosphonooxyphenyl)propanoic acid': '0178', 'interface predictor': '0076', '2-amino-3-hydroxypropanoic acid 3-phosphate;o-phosphonoserine;o3-phosphoserine': '0176', 'affinity chromatography technology': '0004', 'protein passive uptake': '0736', '(s)-2-acetylamino-3-(4-hydoxyphenyl)propanoic acid': '0141', 's': '0649', 'e-msd': '0472', 'domain fusion': '0036', 'geranylgeranylation reaction': '0209', 'dicer rna': '0610', 'genbank_protein_gi': '0851', 'gtp hydrolisis': '0419', 'lipid addition': '0211', 'nucl delivery': '0704', 'ria radio immuno assay': '0099', 'methylalanine': '0158', 'author submitted': '0878', 'cdna library': '0343', 'n6-myristoyl-lysine': '0156', 'weight by hoechst': '0822', '(r)-2-amino-3-(phosphonosulfanyl)propanoic acid': '0173', 'alexa 430 label': '0386', 'l-selenomethionine': '0181', 'transcriptional complementation assay': '0232', 'conditional synthetic lethal': '0270', 'protein a tag': '0861', 'ubiquitin binding': '0443', 'experimental interaction detection': '0045', 'surface patches': '0106', 'light scattering': '0067', 'koff': '0835', 'hdp': '0185', 'nucl transfection': '0312', 'reactome complex': '0244', 'homology based interaction prediction': '0064', 'monoclonal antibody immunostaining': '0708', 'selenium cysteine': '0180', 'omega-n,omega-n-dimethyl-arginine': '0160', '2-acetylamino-3-mercaptopropanoic acid': '0126', 'n-acetyl-l-threonine': '0139', 'surface plasmon resonance': '0107', 'wwpdb': '0805', 'methylated arginine': '0563', 'mole per second': '0839', 'n-methyl-l-phenylalanine': '0169', 'myristoylation reaction': '0214', 'protein': '0326', 'acetylglutamic acid': '0128', '[h:ac]': '0130', 'pac': '0137', 'global proteome machine': '0742', 'complex-synonym': '0673', 'pal': '0814', 'in vivo': '0493', 'n-acetyl-l-proline': '0137', 'kelvin': '0838', 'his tag': '0521', '[a:meth_n3]': '0159', 'fentomolar': '0654', 'antibodies': '0671', 'cvaliastype': '0300', 'n-glycyl-glycosylphosphatidylinositolethanolamine': '0544', 'mass detection of residue modification': '0068', 'experiment description': '0591', 'masmtggqqmg epitope tag': '0523', 'reactome': '0467', 'p elisa': '0813', 'temprtr synt lethal': '0271', 'genetic tag insertion': '0309', 'covalent binding': '0195', 'in gel phosphatase assay': '0514', '3d-structure': '0630', 'deacetylation': '0197', 'ecocyc': '0466', 'am3': '0159', '3-carboxy-s-methyl-cysteine': '0161', 'other modification': '0179', 'mobility shift': '0070', 'small interfering rna': '0610', 'disulfide bond': '0408', 'embl': '0475', '(s)-2-amino-6-[(2e,4e,6e,8e)-3,7-dimethyl-9-(2,6,6-trimethylcyclohex-1-en-1-yl)-2,4,6,8-nonatetraenylidene]aminohexanoic acid': '0188', 'endstatus': '0333', 'genome based prediction': '0058', 'predetermined': '0396', 'grid': '0463', 'phosphoaspartic acid': '0172', 'n-acetyl-l-asparagine': '0124', 'weight identificat': '0815', 'amt': '0158', 'trimethylalanine': '0159', 'rrna': '0608', 'beta-methylthio-aspartic acid': '0161', 'light microscopy': '0426', '(2s,3r)-2-amino-3-phosphonooxybutanoic acid': '0177', 'n-formyl-l-methionine': '0147', '[y:po]': '0178', 's-phosphonocysteine': '0173', 'n-myristoyl-glycine': '0155', 'resulting-ptm': '0639', 'n,n,n-trimethyl-alanine': '0159', 'demethylation reaction': '0871', 'mass spectrometry': '0427', 'substitut analysis': '0810', 'intact': '0469', '[m:ac]': '0135', 'enzymatic reaction': '0414', 'predetermined featur': '0823', 'kinase spa': '0425', 'trihybrid': '0437', 'l-isoglutamyl-poly(adp-ribose)': '0530', 'electron acceptor': '0580', 'kmy': '0156', 'ddbj': '0475', 'alexa 568 label': '0390', 'nmr': '0077', 'ha tag coimmunoprecipitation': '0060', 'feature type': '0116', 's-farnesyl-l-cysteine': '0151', '[c:sel]': '0180', 'complementation': '0090', 'alliance for cellular signaling': '0575', '5-methyl-l-glutamate': '0163', '125i radiolabel': '0848', 'n6,n6,n6-trimethyl-lysine': '0167', 'n4-glycosyl-asparagine': '0538', 'far western blotting': '0047', 'tigrfams': '0458', 'acetylphenylalanine': '0136', 'affinity chrom': '0004', 'acetylation reaction': '0192', 'n6-retinyl-lysine': '0188', 'depalmitoylation reaction': '0202', 'antisense rna': '0257', 'two hybrid pooling': '0398', 'genetic': '0418', 'nucl transduction': '0714', 'small molecule': '0328', 'n transfection treat': '0718', '(r)-2-acetylamino-3-sulfanylpropanoic acid': '0126', 'expression level': '0221', 'isoform-parent': '0243', 'suppression expression alteration': '0265', 'n-acetyl-l-valine': '0142', '2-amino-3-(3,7,11-trimethyl-2,6,10-dodecatrienylthio)propanoic acid': '0151', 'kinase homogeneous time resolved fluorescence': '0420', 'originally assigned identifier': '0869', 'non covalent inter': '0215', 'alexa label': '0384', 'anti bait coimmunoprecipitation': '0006', 'myristoylation': '0214', 'cosedimentation through density gradient': '0029', 'n(zeta)-trimethyllysine': '0167', "n4-alpha-d-ribofuranosyl-l-asparagine 5'->5'-ester with adenosine 5'-(trihydrogen diphosphate)": '0532', 'certain': '0335', 'gpi anchor residue': '0539', 'pelisa': '0813', 'immunoprecipitation': '0019', 'green fluorescence protein complementation assay': '0229', '2-amino-3-hydroxybutanoic acid 3-phosphate': '0177', 'methylated alanine': '0562', 'hydroxylation': '0210', 'cross-linking study': '0030', 'dna binding domain': '0688', 'o3-phosphothreonine': '0177', 'n-alanyl-glycosylphosphatidylinositolethanolamine': '0540', 'n-(1-oxahexadecyl)-l-cysteine': '0153', 'protein staining': '0094', 'fluorescent dye': '0857', 'alkylated cysteine': '0549', 'acetylcysteine': '0126', 'nucl conjugation': '0715', 'gpi-asparagine': '0541', 'n-acetyl-glutamic acid': '0128', 'pi-phosphohistidine': '0175', 'cpn': '0153', 'cpo': '0173', 'display technology': '0034', 'amino-terminus': '0340', 'inhibited': '0587', 'cps': '0154', "histidine-n1'-phosphate": '0174', 'ptm': '0120', 'nucleic acid transformation': '0706', 'contact-comment': '0635', 'alanine scanning': '0005', 'blue native page': '0276', 'edman degradation': '0039', 'fluorophore': '0856', 'synthetic': '0794', 'protein rna complex': '0316', 'gpi-cysteine': '0543', 'uniparc': '0485', "n4-[alpha-d-ribofuranoside 5'->5'-ester with adenosine 5'-(trihydrogen diphosphate)]-l-asparagine": '0532', 'sumoylation': '0566', 'genbank': '0475', 'l-glutamyl 5-glycerylphosphorylethanolamine': '0184', 'maltose binding protein tag': '0578', '15n label': '0380', 'glutamyl 5-glycerylphosphorylethanolamine': '0184', '[h:diph]': '0185', '(s)-2-amino-6-[5-((3as,4s,6ar)-hexahydro-2-oxo-1h-thieno[3,4-d]imidazol-4-yl)-1-oxopentyl]aminohexanoic acid': '0186', 'guide rna': '0322', 'fac': '0136', 'o-glycosyl-l-threonine': '0536', 'lumier': '0729', 'sans': '0888', 'potassium permanganate footprinting': '0604', 'phosphorylation': '0217', 'hyp': '0149', 'synthetic phenotype': '0269', 'afcs': '0575', 'anti tag immunostaining': '0707', 'tem': '0020', 'k-mn-04 footprinting': '0604', 'predictive text mining': '0087', 'oligopeptide': '0327', 'deletion analysis': '0033', '(s)-2-aminopentanedioic acid 5-methyl ester': '0163', 'colocalization by fluorescent probes cloning': '0021', '[f:ac]': '0136', 'zz tag': '0862', 'tandem tag': '0677', 'myc tag coip': '0075', '5-oxoproline': '0183', 'o4-sulfotyrosine': '0553', 'structure based prediction': '0105', 'experiment att name': '0665', 'dnase i footprinting': '0606', 'protein in situ array': '0092', 'coimmunoprecipitation': '0019', 'qm5': '0162', 'chromatin immunoprecipitation array': '0225', 'chemical footprinting': '0602', 'epsilon-trimethyllysine': '0167', 'o3-(adp-ribosyl)-l-serine': '0531', 'carboxy-terminus': '0334', 'cell penetrating peptide tag': '0740', 'de novo protein sequencing by mass spectrometry': '0032', 'adpribosylasparagine': '0532', 'mutation decreasing': '0119', 'beta galactosidase complementation': '0010', 'n6-biotinyl-l-lysine': '0186', 'srprna': '0611', '1-methylhistidine [misnomer]': '0164', 'egfp': '0734', 'n(zeta)-myristoyllysine': '0156', 'dna dna pol assay': '0697', 'interologs mapping': '0064', 'n-palmitoyl-cysteine': '0153', 'fluorescence anisotropy': '0053', 'systematic gene number': '0305', 'mutation analysis': '0074', 'substitution analysis': '0810', 'mammalian protein protein interaction trap': '0231', "1'-phospho-l-histidine": '0174', '3-oxoalanine': '0182', 'dansyl tag': '0847', 'glycosylated residue': '0533', 'omega-n-methyl-l-arginine': '0564', 'flag': '0518', 'dye labelled': '0373', 'hrp tag': '0241', 'o-phospho-l-threonine': '0177', 'interaction detection method': '0001', 'palmitoylated residue': '0561', 'multidimensional protein identification technology': '0658', '(s)-2-amino-3-(phosphonooxy)propanoic acid': '0176', 'publication year': '0886', 'translocation end': '0595', 's3-phosphocysteine': '0173', 'in-gel kinase assay': '0423', 'small nucleolar rna': '0609', 'single molecule force measurement': '0859', 'vp16 ad': '0691', '5 prime overhang': '0855', 'molecular weight estimation by bromide staining': '0819', 'fluorescence imaging': '0416', '[r:ac]': '0123', 'huge': '0249', 'cysteine phosphate thioester': '0173', 'sandwich immunoassay': '0678', 's-geranylgeranyl-l-cysteine': '0152', 'alpha-amino-delta-phosphonoguanidinovaleric acid': '0171', 'nucl lipotransfection': '0717', 'immunostaining': '0022', 'nucl ac uv crosslink': '0430', 'peptide parent sequence reference': '0674', '131i radiolabel': '0234', 'weight by bromide': '0819', 'alanineamide': '0144', 'predict from struct': '0105', 'o-(adp-ribosyl)-serine': '0531', 'enzyme tag': '0365', 's-(adp-ribosyl)-cysteine': '0529', '2-(acetylamino)ethanoic acid': '0129', 'epsilon-methyllysine': '0165', 'fm': '0654', 'safe dna gel stain': '0820', 'microinjection': '0311', 'author assigned name': '0345', 'ensembl': '0476', 'ege': '0184', 'fluorescence correlation spectroscopy': '0052', 'n-acetyl-l-glutamine': '0127', 'two hybrid array': '0397', 'itc': '0065', 'inhibitor antibodies': '0258', 'fluorescence accept': '0584', 'interpro': '0449', "o4'-sulfo-l-tyrosine": '0553', 'coloc visual technol': '0023', 'n6,n6-dimethyl-lysine': '0166', 'over expressed level': '0506', 'n(zeta)-methyllysine': '0165', '35s': '0371', '(2s,3s)-2-acetylamino-3-methylpentanoic acid': '0131', 'pca': '0090', 'additive interaction': '0799', 'single nonmonotonic interaction': '0800', 'neural network on interface properties': '0076', 'arginineamide': '0145', '(s)-2-methylaminopropanoic acid': '0158', 'experimental feature detection': '0659', 'myristoyllysine': '0156', 'affinity purification': '0004', 'organism att name': '0669', '2h': '0018', 's-(adp-ribosyl)-l-cysteine': '0529', 'vp16 activation domain': '0691', 'lipid modification': '0150', '3d-resolution': '0632', 'gfp': '0367', '2-amino-3-oxopropionic acid': '0182', 'rfp tag': '0732', 'post translation modification': '0120', 'antimorph': '0792', 'rna rna pol assay': '0700', 'flag tag coip': '0050', 'immunofluorescence staining': '0022', '[v:ac]': '0142', '[r:meth_n7]': '0160', 'mmt': '0168', 'protein tri hybrid': '0437', '2h2': '0381', 'n-acetyl-cysteine': '0126', 'unspecified role': '0499', 'see-also': '0361', 'insertion analysis': '0811', 'primary-reference': '0358', 'monoclonal western': '0072', 'gal4 transcription regeneration': '0018', 'omim': '0480', 'activation domain tag': '0689', 'reverse phase chromatography': '0227', 'alexa 546 label': '0389', 't7 tag': '0523', 'in silico': '0491', "n(omega)-[alpha-d-ribofuranoside 5'->5'-ester with adenosine 5'-(trihydrogen diphosphate)]-l-arginine": '0528', 'gamma-methylglutamine': '0162', '(r)-2-hexadecanoylamino-3-sulfanylpropanoic acid': '0153', 'gpm': '0742', 'kon': '0834', 'flag tag': '0518', 'bacterial two-hybrid': '0014', 'classical two hybrid': '0018', 'genomic tagging': '0309', 'n-acetyl-alanine': '0122', '(s)-2-amino-6-(trimethylammonio)hexanoic acid': '0167', 'c-terminus': '0334', 'c-terminal position': '0334', 'beta galactosidase': '0010', 'gpi-anchor amidated serine': '0545', 'n-acetylglycine': '0129', 'n-acetyl-isoleucine': '0131', '(s)-2-amino-5-[((dimethylamino)iminomethyl)amino]pentanoic acid': '0160', 'adp-ribosylserine': '0531', 'post transcriptional interference': '0255', 'cysteine palmitate thioester': '0154', 'aac': '0122', 'aam': '0144', '35s radiolabel': '0371', 'fluorescence microscopy': '0416', 'phosphoserine': '0176', 'reverse ras recruitment system': '0097', 'n-acetyl-valine': '0142', 'modeled': '0362', 'fluorescein isothiocyanate labbeled': '0377', 'antigen capture assay': '0678', 'enzyme linked immunosorbent assay': '0411', 'ka6': '0134', 'confocal microscopy': '0663', 'phosphotransfer assay': '0841', '[k:ub]': '0189', '(2r,3xi)-2-amino-3-methylsulfanylbutanedioic acid': '0161', 'mudpit': '0658', 'filter binding': '0049', 'self': '0503', 'n6-acetyl-l-lysine': '0134', 'international protein index': '0675', 'elisa': '0411', 'ancillary': '0684', 'experimental form de': '0596', 'phosphoshistidine': '0555', 'required to bind': '0429', 'database citation': '0444', 'kac': '0133', "(s)-2-amino-5-([imino([adenosine 5'-(trihydrogen diphosphate) 5'->5'-ester with alpha-d-ribofuranosyl]amino)methyl]amino)pentanoic acid": '0528', 'optical tweezer': '0859', '[c:ger]': '0152', 'n-acetyl-l-alanine': '0122', 'ka': '0834', 'n6-methyl-l-lysine': '0165', 'kd': '0646', 'tpo': '0177', 'ki': '0643', 'km': '0644', 'protein delivery': '0721', 'cdd': '0450', 'anti tag western': '0705', 'reverse phase chrom': '0227', 'triphosphatase ass': '0879', 'pirsf': '0452', 'peptide synthesis': '0083', 'methyllysine': '0165', '131i': '0234', '(s)-2-acetylamino-3-methylbutanoic acid': '0142', 'protease assay': '0435', 'in silico methods': '0063', 'flag tag coimmunoprecipitation': '0050', 'certain sequence position': '0335', '[l:ac]': '0132', 'enzyme': '0501', 'sequence database': '0683', 'iec': '0226', 'fluorescent protein tag': '0687', 's35 radiolabelled': '0371', 'weight by comassie': '0818', 'pi-methylhistidine': '0164', 'phosphatase homogeneous time resolved fluorescence': '0509', 'c-terminal': '0334', 'sequence cloning': '0078', 'n-acetylthreonine': '0139', 'nucleotide genbank identifier': '0852', 'rfp': '0732', 'inferred by curator': '0364', 'tap tag coimmunoprecipitation': '0109', 'nucleotide sequence identification': '0078', 'feature database': '0447', 'yeast one-hybrid': '0432', 'neutral component': '0497', 'methylphenylalanine': '0169', 'nucleotide sequence': '0078', 'predetermined participant': '0396', 'sec': '0649', 'sem': '0410', 'rna dna pol assay': '0699', 'pull down': '0096', 'tissue list': '0830', 'biological role': '0500', 'lex-a dimerization assay': '0369', 'pisa': '0092', '1-carboxyglutamic acid [misnomer]': '0550', 'nucl transformation': '0706', 'proteinchip(r) on a surface-enhanced laser desorption/ionization': '0095', 'acetylmethionine': '0135', 'secondary accession number': '0360', 'nucleoside triphosphatase assay': '0879', '[e:gpe]': '0184', 'mutation disrupting': '0573', 'comigration in sds': '0808', '3-methylthio-aspartic acid': '0161', 'full identification by sequencing': '0056', 'm-1s-1': '0839', 'genbank indentifier': '0860', '(2s)-1-acetyl-2-pyrrolidinecarboxylic acid': '0137', 'acetylleucine': '0132', 'nucleic acid': '0318', 'emsa': '0413', 'pdb': '0460', 'egfp tag': '0734', 'acetylated residue': '0121', 'nucleic acid delivery by infection': '0720', 'living cell': '0349', 's-geranylgeranyl-cysteine': '0152', 'gene ontology term for cellular process': '0359', 'suppressor gene': '0581', 'pm': '0653', 'search-url-ascii': '0620', 'electrophoretic mobility shift assay': '0413', 'b42 ad': '0692', 'mappit': '0231', 'source reference': '0685', 'gac': '0129', 'ubiquitination': '0220', 'identification by antibody': '0421', 'peptide-parent': '0674', 'hypomorph': '0791', 'comigration in gel': '0807', 'mgd/mgi': '0479', 'fret pair': '0865', 'deglycosylation': '0558', 'ipfam': '0592', 'vsv tag': '0884', 'half of a disulfide bridge': '0832', 'mlz': '0165', 's-palmitoylcysteine': '0154', 'mly': '0166', 'modelled by curator': '0364', 'o-phospho-l-serine': '0176', 'interaction xref': '0461', 'affinity techniques': '0400', 'dansyl label': '0847', 'n-acetyl-l-isoleucine': '0131', '4hydroxyproline': '0149', 'cygd': '0464', '[n:ac]': '0124', '3-phosphohistidine': '0175', 'yfp tag': '0368', 'qac': '0127', '[q:meth_n5]': '0162', 'cysteine hexadecanoate thioester': '0154', 'protein cleavage': '0570', 'tat tag': '0735', 'ec50': '0642', 'sumoylation reaction': '0566', 'nutrition synt letal': '0600', 'go-definition-ref': '0242', '[h:meth_n4]': '0164', 'mutation increasing interaction': '0382', 'catalytic ribonucleic acid': '0321', '[t:po]': '0177', 'go synonym': '0303', 'part of': '0898', 'deacetylase assay': '0406', 's-prenyl-cysteine': '0547', 'b42 activation domain': '0692', 'lambda two hybrid': '0655', 'digital object identifier': '0574', 'n5-[imino(phosphonoamino)methyl]-l-ornithine': '0171', 'yellow fluorescent protein': '0368', 'gene ontology term for cellular function': '0355', 'multiple parent': '0829', 'startstatus': '0333', 'acetylglutamine': '0127', 'molecular weight estimation by hoechst staining': '0822', 'suppress expression': '0265', 'acetylaspartic acid': '0125', 'rgd': '0483', 'asynthetic interaction': '0795', 'affinity blotting': '0047', 'ipi': '0675', 'force measurement': '0859', 'electrophoretic mobility supershift assay': '0412', 'amidation reaction': '0193', 'cell lysate': '0344', 'aggregation': '0191', '[s:po]': '0176', 'biochemical reaction': '0414', '4-carboxyglutamic acid': '0550', 'n-acetyl-l-histidine': '0130', 'hprd': '0468', 'figure legend': '0599', 'neddylated lysine': '0565', 'ubiquitin reconstruction': '0112', 'geranylgeranylcys': '0152', '[e:meth_o5]': '0163', 'acetylalanine': '0122', 'reverse rrs': '0097', 'modeled by curator': '0364', 'tau-phosphohistidine': '0174', 'methylated residue': '0157', 'glycosylation': '0559', 'gamma-carboxyglutamic acid': '0550', 'gel filtration': '0071', 'sgd': '0484', 'his tag coimmunoprecipitation': '0062', 'seldi proteinchip': '0095', 'horseradish peroxidase tag': '0241', 'n-palmitoylcysteine': '0153', 'additive': '0799', 'cgr': '0152', 'synthetic growth increase': '0275', '(s)-2-amino-5-guanidinopentanamide': '0145', '125i': '0848', 'range': '0338', 'binding site': '0117', 'translocation start': '0594', 'formylation': '0207', 'scop superfamily': '0456', 'protein delivery by cationic lipid treatment': '0724', 'predict from sequenc': '0101', 'expression interfer': '0255', '[e:ac]': '0128', '[m:meth]': '0168', 'fitc labelled': '0377', 'micro-injection': '0311', 'dna directed rna polymerase assay': '0698', 'fluorescence-activated cell sorting': '0054', 'acetyllysine': '0526', '6-his-tag': '0521', 'farnesylcysteine': '0151', 'entrezgene/locuslink': '0477', 'conditional': '0798', 'footprinting': '0417', 'demethylase assay': '0870', '(s)-2-amino-3-(3-phosphono-3h-imidazol-4-yl)propanoic acid': '0175', 'glycosylasparagine': '0538', 'feature xref': '0447', 'um': '0651', 'n-terminus': '0340', 'l-amino-malonic acid semialdehyde': '0182', 'n-methylalanine': '0158', 'rnai': '0256', 'author-list': '0636', 'omega-n-phospho-l-arginine': '0171', 'x-ray': '0114', 'suppression overexpression': '0266', 'defarnesylation reaction': '0198', 'phosphatase assay': '0434', 'dnase 1 footprinting': '0606', 's-glycosyl-l-cysteine': '0534', 'tag fluorescence': '0867', "o4'-phospho-tyrosine": '0178', 's-palmitoyl-l-cysteine': '0154', 'nac': '0124', 'n-acetylserine': '0138', 'green fluorescent protein': '0367', 'synthetic growth effect': '0273', '[t:ac]': '0139', '2-methylamino-4-(methylthio)butanoic acid': '0168', 'calmodulin binding protein tag': '0812', 'feature range status': '0333', "3'-phospho-histidine": '0175', '[g:ac]': '0129', 'suppression': '0261', 'controlled vocabulary attribute name': '0667', "n(omega)-alpha-d-ribofuranosyl-l-arginine 5'->5'-ester with adenosine 5'-(trihydrogen diphosphate)": '0528', 'fluorescence': '0051', 'n-term': '0340', 'messenger rna': '0324', 'omega-n-(adp-ribosyl)-l-arginine': '0528', 'lysine derivative lys(y)': '0166', 'glutamic acid gamma-methyl ester': '0163', 'go': '0448', 'sequence ontology': '0601', 'feature detection': '0003', '2-acetylamino-4-(methylthio)butanoic acid': '0135', 'synthetic lethal': '0219', 'mutation': '0118', 'phosphocysteine': '0173', '[k:meth_3]': '0167', 'under-expressed': '0223', 'dimethylsulphate footprinting': '0603', 'membrane bound complementation assay': '0230', 'engineered': '0331', 'enzymatic study': '0415', 'molar': '0648', 'direct interaction': '0407', 'n-acetylcysteine': '0126', 'protein delivery by infection': '0725', 'nuclear magnetic resonance': '0077', 'nucleic acid conjugation': '0715', 'electron crystallography': '0040', 'cfn': '0151', 'rna tri hybrid': '0438', 'nucleic acid transformation by treatment with divalent cation': '0710', 'modified residue ms': '0068', 'n-acetyl-l-glutamic acid': '0128', 'anti tag coip': '0007', '4-hydroxy-l-proline': '0149', 'complex-properties': '0629', 'omega-n,omega-n-dimethyl-l-arginine': '0160', 'cfp': '0733', 'experimental particp': '0661', '3h': '0238', 'nitrosylcysteine': '0552', 'l-selenocysteine': '0180', 'acetylaspartate': '0125', 'electroporation': '0308', 'weight autoradiogra': '0821', 'rcsb pdb': '0460', 'n-seryl-glycosylphosphatidylinositolethanolamine': '0545', 'radiolabel': '0517', 'phospho donor': '0842', 'ubiquitination reaction': '0220', 'snrna': '0607', 'genbank nucleotide': '0852', 'alaninamide': '0144', 'lret': '0012', 'n-threonyl-glycosylphosphatidylinositolethanolamine': '0546', 'm3l': '0167', 'co-immunoprecipitation': '0019', 'gene': '0250', 'thiol reactive lanthanide label': '0863', 'locus name': '0305', 'cohessive ends': '0853', 'protein crosslink': '0031', 'n-terminal position': '0340', 'rna directed dna polymerase assay': '0699', 'sga': '0441', 'gene ontology definition reference': '0242', 'arginine amide': '0145', 'biophysical': '0013', 'cosedimentation': '0027', 'nitro-tyrosine': '0551', 'cross-reference type': '0353', '[k:myr]': '0156', 'gpi-anchor amidated threonine': '0546', 'fixed cell': '0348', '(s)-2-methylamino-3-phenylpropanoic acid': '0169', 'glutamyl-5-poly(adp-ribose)': '0530', '[d:ac]': '0125', 'ng,ng-dimethylarginine': '0160', 'gene3d': '0703', '33p': '0237', 'infection': '0310', 'lipid cleavage': '0212', 'ha tag coip': '0060', 'disaggregation': '0205', 'n6-biotinyl-lysine': '0186', 'alanine amide': '0144', 'phint': '0837', 'partial id prot seq': '0433', 'inhibitor': '0586', 'o-(adp-ribosyl)-l-serine': '0531', 'tap': '0676', 'process': '0359', 'n-acetyl-l-cysteine': '0126', 'deneddylation': '0569', 'coenzyme': '0682', 'tag': '0507', 'tac': '0139', 'chip-chip': '0225', '2-hybrid': '0018', 'afm': '0872', 'docking': '0035', '(r,e,e)-2-amino-3-(3,7,11-trimethyl-2,6,10-dodecatrienylsulfanyl)propanoic acid': '0151', 'sulfotyrosine': '0553', 'l-glutamyl 5-glycerophosphoethanolamine': '0184', '(s)-2-amino-3-(4-sulfooxyphenyl)propanoic acid': '0553', 'confidence-mapping': '0622', 'cv att name': '0667', 'enhanced green fluorescent protein': '0734', 's-phospho-l-cysteine': '0173', 'neddylation': '0567', 'data-processing': '0633', 'ch-ip': '0402', '33p radiolabel': '0237', 'dna footprinting': '0409', 'bind': '0462', '(s)-2-amino-3-(1-phosphono-1h-imidazol-4-yl)propanoic acid': '0174', 'partially purified': '0352', 'optical biosensor': '0107', 'fluorescence acceptor donor pair': '0865', 'sequence tag identification': '0102', 'tap tag coip': '0109', 'gkpipnpllgldst epitope tag': '0525', '[k:meth_2]': '0166', 'protein a': '0861', 'pros-methylhistidine': '0164', 'pdbj': '0806', 'tandem affinity purification': '0676', 'ha tag': '0520', 'kbt': '0186', 'electron microscopy': '0040', 'histone acetylation assay': '0887', 'tritium': '0238', 'go function term': '0355', 'h3': '0238', 'molecular force measurement': '0859', '13c': '0379', 'acetylisoleucine': '0131', 'pure': '0351', 'dac': '0125', 'x-ray fiber diffrac': '0825', 'degeranylation': '0200', 'c-term': '0334', 'kiss': '0728', 'dataset': '0875', 'oxoalanine': '0182', 'formylation reaction': '0207', 'omega-n-phospho-arginine': '0171', 'o3-glycosyl-l-serine': '0535', 'o4-phosphotyrosine': '0178', 'synthetic genetic analysis': '0441', 'alexa 532 label': '0388', 'transfer rna': '0325', 'homogeneous': '0351', 'nucl passive uptake': '0713', 'deubiquitination': '0204', 'suppression partial': '0264', 'n6-myristoyl-l-lysine': '0156', 'polyclonal antibody western blot': '0086', 'physical interaction': '0218', 'conditional interaction': '0798', 'unknown participant': '0329', '(s)-2-(acetylamino)pentanedioic acid': '0128', 'ret': '0055', 'formylmethionine': '0147', 'hydroxylation reaction': '0210', 'primer specific pcr': '0088', 'l-beta-methylthioaspartic acid': '0161', 'adp-ribosylarginine': '0528', '[s:oxal]': '0182', 'gal4 activation domain': '0690', 'asymmetric dimethylarginine': '0160', 'refseq': '0481', 'interaction': '0317', 'isoform parent sequence reference': '0243', 'single stranded deoxyribonucleic acid': '0680', 'molecular weight estimation by sybr staining': '0820', 'lexa b52 complement': '0727', 'i125': '0848', 'bridge assay': '0437', 'endogenous level': '0222', 'snorna': '0609', 'electron resonance': '0043', 'correlated mutations': '0026', 'delivery method': '0307', 'band shift': '0413', '1-phosphohistidine': '0174', 'gallex': '0369', 'dhfr reconstruction': '0111', 'suppress underexpres': '0268', 'amidation': '0193', 'contact-email': '0634', 's35': '0371', '2-formylamino-4-(methylthio)butanoic acid': '0147', 'heterogeneous nuclear ribonucleic acid': '0323', 'crna': '0321', 'cell ontology': '0831', 'n-acetyl-methionine': '0135', 'deformylation reaction': '0199', 'n-acetyl-tyrosine': '0141', 'ordered locus name': '0305', 'n-terminal': '0340', 'his pull down': '0061', 'dna strand elongation': '0701', 'physiological level': '0222', 'gene product': '0251', 'n6-retinylidene-l-lysine': '0188', 'l-glutamyl-5-poly(adp-ribose)': '0530', 'selenomethionine': '0181', 'omega-n-(adp-ribosyl)-arginine': '0528', 'interaction att name': '0664', 'n6-(1-oxotetradecyl)-l-lysine': '0156', 'turnover number': '0645', 'polyprotein fragment': '0828', 'x ray scattering': '0826', 'suppressive interaction': '0796', 'psi-mod': '0897', 'transcription compl': '0232', "2-amino-3-(4-hydroxyphenyl)propanoic acid 4'-phosphate": '0178', 'desumoylation': '0568', 'bacteriomatch': '0655', 'less-than': '0337', 'url': '0614', 'feature struct pred': '0577', 'disease': '0617', 'deuterium': '0381', '32p': '0236', 'mass spectrometry studies of complexes': '0069', 'facs': '0054', 'rfam': '0482', 'bret': '0012', 'millimolar': '0650', 'conformational tm': '0024', 'brenda': '0864', 'original identifier': '0869', 'participant ident': '0002', 'n(zeta)-dimethyllysine': '0166', 'mbp tag': '0578', 'deoxyribonucleic acid': '0319', '[d:meth_b]': '0161', 'feature prediction': '0660', 'nanomolar': '0652', 'histidine-tag': '0521', 'glutathione s tranferase tag': '0519', 'alk phosphatase tag': '0366', 'unspecified method': '0686', 'conditional synthetic lethal temperature-sensitivity': '0271', 'ribosomal rna': '0608', 'peptide': '0327', '[r:po]': '0171', 'alkaline phosphatase tag': '0366', 'genome prediction': '0058', 'n-acetyl-serine': '0138', 'beta-aspartyl phosphate': '0172', 'his tag coip': '0062', 'antagonist': '0626', 't interaction': '0836', 'substrate': '0502', 'biacore(r)': '0107', 'secondary-ac': '0360', 'activation domain': '0689', 'cleavage': '0194', 'red fluorescent protein': '0732', 'protein genbank identifier': '0851', 'predictive': '0491', 'yeast display': '0115', 'kinase htrf': '0420', 'bimolecular fluorescence complementation': '0809', '(s)-2-amino-3-(3-methyl-3h-imidazol-4-yl)propanoic acid': '0164', '(s)-2-amino-6-methylaminohexanoic acid': '0165', 'membrane translocating sequences': '0740', 'atomic force microsc': '0872', 'transfer ribonucleic acid': '0325', 'comigration in sds page': '0808', "2'-[3-carboxamido-3-(trimethylammonio)propyl]-l-histidine": '0185', 'dls': '0038', 'electron donor': '0579', 'comigration in non denaturing gel electrophoresis': '0404', 'alias type': '0300', '[k:meth_1]': '0165', 'experiment xref': '0445', 'protease access': '0814', '[y:ac]': '0141', 'farnesylation': '0206', 'gel retardation assay': '0413', 'undetermined': '0339', 'fluorescent prot tag': '0687', 'n(delta)-methylhistidine': '0164', 'fluorescence acceptor': '0584', '[p:ac]': '0137', 'adp-ribosylated': '0527', 'uniprot': '0486', 'tag visualisation': '0866', 'comment': '0612', 'cd': '0016', 'small nuclear rna': '0607', 'rpo': '0171', 'gpi-threonine': '0546', 'demyristoylation': '0201', 'yac': '0141', '(s)-2-acetylamino-4-(methylsulfanyl)butanoic acid': '0135', 'dna binding domain tag': '0688', 'partial dna sequence identification by hybridization': '0080', 'threonine phosphate ester': '0177', 'n-aspartyl-glycosylphosphatidylinositolethanolamine': '0542', 'nucl infection': '0720', 't7 phage display': '0108', 'prodom': '0454', 'n-methylmethionine': '0168', 'go process term': '0359', 'agonist': '0625', 'biopolymer': '0383', '14c radiolabel': '0235', 'solid phase assay': '0892', 'sirna': '0610', 'participant type': '0313', 'lambda phage': '0066', 'lambda phage display': '0066', '(s)-2-acetylamino-6-aminohexanoic acid': '0133', 'protein modification ontology': '0897', 'n4-(adp-ribosyl)-l-asparagine': '0532', 'atpase reaction': '0882', 'n-acetyl-lysine': '0526', 'n-acetylvaline': '0142', 'histidine-n(delta)-phosphate': '0175', '5-dimethylaminonaphthalene-1-sulfonyl tag': '0847', 'putative self': '0898', 'identity': '0356', 'encyclopedia of dna elements': '0850', 'acetylthreonine': '0139', 'in vitro': '0492', 'protease homogeneous time resolved fluorescence': '0511', 'methyltransferase assay': '0515', 'catalytic rna': '0321', '2-pyrrolidone-5-carboxylic acid': '0183', 'method reference': '0357', 'cosedimentation in solution': '0028', 'sequence phylogeny': '0100', 'adp-ribosylglutamate': '0530', 'mfm': '0147', 'purified': '0350', 'radiolabeled acetate': '0508', 'panther': '0702', '[i:ac]': '0131', 'filamentous phage display': '0048', 'gmy': '0155', 'chromatography technology': '0091', 'c13': '0379', 'smart': '0457', 'c14': '0235', 'chromatin immunoprecipitation assays': '0402', 'polyclonal antibody immunostaining': '0709', 'imex': '0670', 'three hybrid system': '0438', 'farnesylation reaction': '0206', 'prenylcysteine': '0547', 'o-phospho-serine': '0176', 'proximity enzyme linked immunosorbent assay': '0813', 'resid': '0248', 'comigration in gel electrophoresis': '0807', 'dms footprinting': '0603', '[p:hy_g]': '0149', 'solution sedimentati': '0028', 's-phospho-cysteine': '0173', 'hpe': '0174', 'polymerase assay': '0696', 'neutron fiber diffraction': '0891', '3 hybrid method': '0588', 'calcium phosphate nucleic acid transfection': '0719', 'mhs': '0164', '(s)-2-amino-5-[imino(phosphonoamino)methyl]aminopentanoic acid': '0171', 'in vitro evolution of nucleic acids': '0657', 'gpi-glycine': '0544', 'o-phosphonoserine': '0176', 'molecular weight estimation by silver staining': '0817', 'myristoylated aa': '0560', "o4'-phospho-l-tyrosine": '0178', 'esr': '0042', 'pka complementation': '0895', 'bioluminescence resonance energy transfer': '0012', 'n2-acetyl-arginine': '0123', 'gene name': '0301', 'tap tagged': '0524', 'electron paramagnetic resonance': '0042', 'journal': '0885', 'gene ontology synonym': '0303', 'selenocysteine': '0180', 'transglutamination': '0556', 'p32': '0236', 'p33': '0237', 'formylated residue': '0146', 'hnrna': '0323', 'aceturic acid': '0129', 'participant detection': '0002', 'phosphotransfer assa': '0841', 'gal4 vp16 complementation': '0728', 'krt': '0188', 'interaction database': '0461', 'chemical footprint': '0602', 'fret analysis': '0055', 'gene name synonym': '0302', 'gst pull down': '0059', 'gpi-aspartate': '0542', '[k:retin]': '0188', 'electron nuclear double resonance': '0041', 'cvfuzzytype': '0333', 't7 phage': '0108', 'ddbj/embl/genbank': '0475', 'vac': '0142', 'antibody array': '0678', 'dm2': '0161', 'suppression partial alteration': '0264', '5 prime sticky end': '0855', 'function': '0355', 'kegg': '0470', 'eac': '0128', 'n,n,n-trimethyl-l-alanine': '0159', 'n2-acetyl-lysine': '0133', 'gpi-serine': '0545', 'immuno blot': '0113', 'myristoylated residue': '0560', 'transmission electron microscopy': '0020', 'in situ': '0494', 'tele-phosphohistidine': '0174', '(s)-2-amino-6-[(aminoacetyl)amino]hexanoic acid': '0554', 'ng-methylarginine;': '0564', 'hypermorph': '0790', 'n6-(4-amino-2-hydroxybutyl)-l-lysine': '0187', 'confirmational text mining': '0024', 'emsa supershift': '0412', 'gpi-anchor amidated glycine': '0544', 'lexa dna bd': '0694', 'o3-glycosyl-l-threonine': '0536', 'suppression mutation': '0262', 'cvxrefqualifier': '0353', 'pyroglutamic acid': '0183', 'hpd': '0175', '(s)-2-(trimethylammonio)propanoic acid': '0159', 'modelled by author': '0363', 'co-ip': '0019', 'full dna sequence': '0056', 'methylarginine': '0564', 'crosslink': '0030', 'cfp tag': '0733', 'gtpase assay': '0419', 'radiolabeled': '0517', 'n2-acetyl-l-arginine': '0123', '3h radiolabel': '0238',
-
-                  'biochemical activity': "0401",
-                  'co-crystal structure': "0114",
-                  'fred': "0055",
-                  'co-localization': "0403",
-                  'co-purification': "0025",
-                  'invitro': "0492",
-                  'two-hybrid': "0018",
-                  'two-hybrid-test': "0018",
-                  'far western': "0047",
-                  'invivo': "0493",
-                  'phenotypic enhancement': "0802",
-                  'phenotypic suppression': "0796",
-                  'affinity capture-western': "0004", #i "0113",
-                  'co-fractionation': "0027",
-                  'affinity capture-rna': "0004", #i ~"0709"
-                  'affinity capture-ms': "0004", #i "0427"
-                  'synthetic rescue': "0262",
-                  'reconstituted complex': "0492",
-                  'dosage rescue': "0261",
-                  'protein-peptide': "0084",
-                  'affinity capture-luminescence': "0004", #i ~"0729" 
-                  'protein-rna': "0316",
-                  'synthetic lethality': "0441",
-                  'dosage growth defect': "0274",
-                  'dosage lethality': "0441",
-                  'synthetic growth defect': "0274",
-                  'pca': "0090", # Protein Complementation assy'AffinityCapture-MS': '0004',
-                  'affinitycapture-ms': "0004",
-                  'three-dimensional-structure': "0105",
-                  'affinity-chromatography': "0004",
-                  'coip_ coimmunoprecipitation': "0019",
-                  'resonance-energy-transfer': "0055",
-                  'cross-linking': "0030",
-                  'far-western': "0047",
-                  'colocalization-visua': "0403",
-                  'colocalization by im': "0403",
-                  'synthetic haploinsufficiency': None,
-                  'sucrose-gradient-sedimentation': "0029" ,
-                  'surface-plasmon-resonance-chip': "0107",
-                  'electron-microscopy': "0040",
-                  'gel-retardation-assays': "0413",
-                  'competition-binding': "0405",
-                  'phage-display': "0084",
-                  'fluorescence-anisotropy': "0053",
-                  'monoclonal-antibody-blockade': None,
-                  'enzymatic studies': "0415",
-                  'coloc by immunost': "0403",
-                  'elisa_ enzyme-linked immunosorbent assay': "0411",
-                  'gel-filtration-chromatography': None,
-                  'cross-linking studies': "0030",
-                  'mass-spectrometry': "0661",
-                  'immunoblotting': None,
-                  'transient-coexpression': None,
-                  'light-scattering': "0067",
-                  'coloc by immunost.': "0403",
-                  'other biochemical te': None,
-                  'interaction-adhesion-assay': None
-                  }
+"""
+    BIANA: Biologic Interactions and Network Analysis
+    Copyright (C) 2009  Javier Garcia-Garcia, Emre Guney, Baldo Oliva
 
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
 
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+# Index from PSI-MI term names (and synonyms) to MI identifiers, used by PSI-MI based parsers (iRefIndex)
+#
+# The index is a text file sorted by name, with one "name<TAB>MI" line per name. It is memory-mapped the first time
+# it is used and names are searched with a binary search, so importing this module does not load anything.
+#
+# To build the index from a PSI-MI obo file:
+#       python obo_index.py psi-mi.obo [index_file]
+#
+# Indices of obo files given by the user (see get_obo_index) are stored in INDEX_CACHE_DIR, never next to the obo file.
+
+import sys
+import os
+import re
+import mmap
+
+try:
+    from hashlib import md5
+except ImportError:
+    from md5 import new as md5
+
+
+DEFAULT_INDEX_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "psi-mi.obo.idx")
+
+INDEX_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".biana", "obo_index")
+
+
+class OBOIndex(object):
+    """
+    Read-only index from lowercased ontology term names to ontology identifiers, with the same interface than a dictionary lookup
+    """
+
+    def __init__(self, index_file, index_content=None):
+        """
+        "index_file" is a sorted index file created with build_obo_index
+
+        If "index_content" is not None, it is the content of the index (a string returned by get_index_content) and "index_file" is not used
+        """
+        self.index_file = index_file
+        self.index_map = index_content
+
+    def _load(self):
+        index_fd = file(self.index_file, 'rb')
+        if os.path.getsize(self.index_file) == 0:
+            self.index_map = ""
+        else:
+            self.index_map = mmap.mmap(index_fd.fileno(), 0, access=mmap.ACCESS_READ)
+        index_fd.close()
+
+    def _search(self, name):
+        """
+        Returns the identifier string stored for "name" or None if "name" is not in the index
+        """
+
+        if self.index_map is None:
+            self._load()
+
+        # [low, high) always starts and ends at the beginning of a line
+        low = 0
+        high = len(self.index_map)
+        while low < high:
+            middle = (low+high)/2
+            start = self.index_map.rfind("\n", 0, middle) + 1
+            end = self.index_map.find("\n", start)
+            (current_name, current_id) = self.index_map[start:end].split("\t")
+            if current_name < name:
+                low = end + 1
+            elif current_name > name:
+                high = start
+            else:
+                return current_id
+        return None
+
+    def get(self, name, default=None):
+        """
+        Returns the identifier for the term "name" (case insensitive). Names without identifier return None
+        """
+        current_id = self._search(name.lower())
+        if current_id is None:
+            return default
+        if current_id == "":
+            return None
+        return current_id
+
+    def has_key(self, name):
+        return self._search(name.lower()) is not None
+
+    def __contains__(self, name):
+        return self.has_key(name)
+
+    def __getitem__(self, name):
+        current_id = self._search(name.lower())
+        if current_id is None:
+            raise KeyError(name)
+        if current_id == "":
+            return None
+        return current_id
+
+    def close(self):
+        if isinstance(self.index_map, mmap.mmap):
+            self.index_map.close()
+        self.index_map = None
+
+
+
+def read_obo_names(obo_file):
+    """
+    Returns a dictionary { lowercased name: MI identifier } with the names and synonyms of the terms in "obo_file" (OBO 1.2 formatted PSI-MI ontology)
+    """
+
+    id_regex = re.compile("^id:\s*MI:(\d+)")
+    name_regex = re.compile("^name:\s+(.+)$")
+    synonym_regex = re.compile("^(?:exact_|related_|narrow_|broad_)?synonym:\s+\"((?:[^\"\\\\]|\\\\.)*)\"")
+
+    name_to_id = {}
+
+    def add_term(term_id, term_names):
+        if term_id is None:
+            return
+        for current_name in term_names:
+            current_name = current_name.replace("\\\"","\"").replace("\t"," ").strip().lower()
+            if current_name != "":
+                name_to_id.setdefault(current_name, term_id)
+
+    term_id = None
+    term_names = []
+    is_term = False
+
+    obo_fd = file(obo_file, 'r')
+    for line in obo_fd:
+        line = line.rstrip("\r\n")
+        if line.startswith("["):
+            add_term(term_id, term_names)
+            term_id = None
+            term_names = []
+            is_term = line.strip() == "[Term]"
+        elif is_term:
+            m = id_regex.match(line)
+            if m:
+                term_id = m.group(1)
+                continue
+            m = name_regex.match(line)
+            if m:
+                term_names.append(m.group(1))
+                continue
+            m = synonym_regex.match(line)
+            if m:
+                term_names.append(m.group(1))
+    add_term(term_id, term_names)
+    obo_fd.close()
+
+    return name_to_id
+
+
+def get_index_content(name_to_id):
+    """
+    Returns the content of the sorted index of the dictionary "name_to_id" returned by read_obo_names
+    """
+    return "".join([ "%s\t%s\n" %(current_name, name_to_id[current_name]) for current_name in sorted(name_to_id.keys()) ])
+
+
+def build_obo_index(obo_file, index_file):
+    """
+    Creates the sorted index file "index_file" with the names and synonyms of the terms in "obo_file" (OBO 1.2 formatted PSI-MI ontology)
+    """
+
+    name_to_id = read_obo_names(obo_file)
+
+    # Written in a temporal file first, so that an index being read is never modified
+    temp_file = index_file + ".tmp"
+    index_fd = file(temp_file, 'wb')
+    try:
+        index_fd.write(get_index_content(name_to_id))
+    finally:
+        index_fd.close()
+    os.rename(temp_file, index_file)
+
+    return len(name_to_id)
+
+
+def get_obo_index(obo_file=None, cache_dir=None):
+    """
+    Returns the OBOIndex of "obo_file", building it if it does not exist or it is older than the obo file
+
+    The index is stored in "cache_dir" (INDEX_CACHE_DIR by default), named after the path of the obo file. If it cannot be written there,
+    the index is kept in memory
+
+    If "obo_file" is None, returns the index distributed with BIANA
+    """
+
+    if obo_file is None:
+        return OBOIndex(DEFAULT_INDEX_FILE)
+
+    if cache_dir is None:
+        cache_dir = INDEX_CACHE_DIR
+
+    obo_file = os.path.abspath(obo_file)
+    index_file = os.path.join(cache_dir, "%s_%s.idx" %(os.path.basename(obo_file), md5(obo_file).hexdigest()))
+
+    if os.path.exists(index_file) and os.path.getmtime(index_file) >= os.path.getmtime(obo_file):
+        return OBOIndex(index_file)
+
+    try:
+        if not os.path.exists(cache_dir):
+            os.makedirs(cache_dir)
+        build_obo_index(obo_file, index_file)
+    except (IOError, OSError):
+        sys.stderr.write("The index of %s cannot be written in %s. It is kept in memory\n" %(obo_file, cache_dir))
+        return OBOIndex(None, index_content = get_index_content(read_obo_names(obo_file)))
+
+    return OBOIndex(index_file)
+
+
+# Kept for compatibility with parsers using the old dictionary
+obo_name_to_MI = OBOIndex(DEFAULT_INDEX_FILE)
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 2:
+        sys.stderr.write("Usage: python obo_index.py psi-mi.obo [index_file]\n")
+        sys.exit(2)
+
+    if len(sys.argv) > 2:
+        output_file = sys.argv[2]
+    else:
+        output_file = sys.argv[1] + ".idx"
+
+    print "%s names indexed in %s" %(build_obo_index(sys.argv[1], output_file), output_file)
@@ -29,6 +29,7 @@ class UniprotParser(BianaParser):
     description = "This file implements a program that fills up tables in database biana with information of uniprot databases"
     external_entity_definition = "A external entity represents a protein"
     external_entity_relations = ""
+    supports_checkpoints = True
 
     def __init__(self):
 
@@ -219,6 +220,7 @@ class UniprotParser(BianaParser):
 
                     # Insert
                     self.biana_access.insert_new_external_entity( externalEntity = uniprotObject )
+                    self.checkpoint()
 
 
                 # Start new object
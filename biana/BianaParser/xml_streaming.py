@@ -0,0 +1,149 @@
+"""
+    BIANA: Biologic Interactions and Network Analysis
+    Copyright (C) 2009  Javier Garcia-Garcia, Emre Guney, Baldo Oliva
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+# Helpers used by parsers of big XML files (DrugBank, BioPAX) to keep memory bounded while parsing:
+#
+#   - iterparse_stream: iterates the elements of a XML file, removing them from the tree once they have been processed
+#   - DiskRecordMap: dictionary-like object that keeps its records in a temporal file and only their offsets in memory,
+#                    used to resolve references between elements (such as rdf:resource) once the file has been read
+
+import os
+import tempfile
+import cPickle
+from xml.etree.ElementTree import iterparse
+
+
+def iterparse_stream(source, events=("start","end")):
+    """
+    Iterates the elements of the XML file "source" yielding (event, element, tag_stack) tuples
+
+    "tag_stack" is the list of tags from the root to the current element (both included). It is the same list object in all iterations
+
+    When the element of an "end" event has been processed (when next element is requested), it is cleared and removed from its parent,
+    so that the tree never keeps processed elements. The content of an element must be used in its own "end" event
+    """
+
+    tag_stack = []
+    element_stack = []
+
+    for (event, elem) in iterparse(source, ("start","end")):
+        if event == "start":
+            tag_stack.append(elem.tag)
+            element_stack.append(elem)
+            if "start" in events:
+                yield (event, elem, tag_stack)
+        else:
+            if "end" in events:
+                yield (event, elem, tag_stack)
+            tag_stack.pop()
+            element_stack.pop()
+            elem.clear()
+            # All previous siblings have already been removed, so the element is the only child of its parent
+            if len(element_stack) > 0:
+                del element_stack[-1][:]
+
+    return
+
+
+
+class DiskRecordMap(object):
+    """
+    Dictionary-like object storing picklable records in a temporal file
+
+    Only the offset of each record is kept in memory. Records read are cached until trim_cache is called, so that the same object
+    is returned while it is being used
+
+    It can be used as a context manager, removing the temporal file at the end of the with block (even if an exception is raised)
+    """
+
+    def __init__(self, max_cached_records=50000, prefix="biana_records_"):
+
+        (fd, self.file_name) = tempfile.mkstemp(prefix=prefix)
+        os.close(fd)
+        self.file = open(self.file_name, 'w+b')
+        self.offsets = {}
+        self.keys_list = []
+        self.cache = {}
+        self.max_cached_records = max_cached_records
+
+    def __setitem__(self, key, record):
+
+        if not self.offsets.has_key(key):
+            self.keys_list.append(key)
+
+        self.file.seek(0, 2)
+        self.offsets[key] = self.file.tell()
+        cPickle.dump(record, self.file, cPickle.HIGHEST_PROTOCOL)
+        self.cache.pop(key, None)
+
+    def __getitem__(self, key):
+
+        if self.cache.has_key(key):
+            return self.cache[key]
+
+        self.file.seek(self.offsets[key])
+        record = cPickle.load(self.file)
+        self.cache[key] = record
+        return record
+
+    def get(self, key, default=None):
+        if not self.offsets.has_key(key):
+            return default
+        return self[key]
+
+    def has_key(self, key):
+        return self.offsets.has_key(key)
+
+    def __contains__(self, key):
+        return self.offsets.has_key(key)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def keys(self):
+        """
+        Returns the keys in insertion order
+        """
+        return list(self.keys_list)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def trim_cache(self):
+        """
+        Empties the cache of read records if it has more records than allowed. It must be called only when no record is being used
+        """
+        if len(self.cache) > self.max_cached_records:
+            self.cache.clear()
+
+    def close(self):
+        """
+        Removes the temporal file
+        """
+        self.cache.clear()
+        self.offsets.clear()
+        self.keys_list = []
+        if not self.file.closed:
+            self.file.close()
+        if os.path.exists(self.file_name):
+            os.remove(self.file_name)
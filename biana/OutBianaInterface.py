@@ -20,16 +20,108 @@
 import traceback
 import socket
 import sys
+import threading
+import zlib
+
+
+class BufferedSocketWriter(object):
+    """
+    Writes messages to a socket joining them in blocks, instead of sending each message separately
+
+    Buffered messages are sent when the buffer reaches "max_buffer_size" bytes, when "max_delay" seconds have passed since the first
+    buffered message, or when flush is called. If "compress" is True, the stream is compressed with zlib (each block is sent with
+    a sync flush, so that the receiver can decompress everything sent so far)
+    """
+
+    def __init__(self, socket_obj, max_buffer_size=65536, max_delay=0.1, compress=False):
+
+        self.socket = socket_obj
+        self.max_buffer_size = max_buffer_size
+        self.max_delay = max_delay
+
+        if compress:
+            self.compressor = zlib.compressobj()
+        else:
+            self.compressor = None
+
+        self.buffer = []
+        self.buffer_size = 0
+        self.timer = None
+        self.lock = threading.Lock()
+
+        # Messages are already joined here, so Nagle algorithm would only delay them
+        try:
+            self.socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (socket.error, AttributeError):
+            pass
+
+    def write(self, message):
+        if isinstance(message, unicode):
+            message = message.encode("utf-8")
+        self.lock.acquire()
+        try:
+            self.buffer.append(message)
+            self.buffer_size += len(message)
+            if self.buffer_size >= self.max_buffer_size:
+                self._flush()
+            elif self.timer is None:
+                self.timer = threading.Timer(self.max_delay, self.flush)
+                self.timer.setDaemon(True)
+                self.timer.start()
+        finally:
+            self.lock.release()
+
+    def flush(self):
+        self.lock.acquire()
+        try:
+            self._flush()
+        finally:
+            self.lock.release()
+
+    def _flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+        if self.buffer_size == 0:
+            return
+
+        data = "".join(self.buffer)
+        self.buffer = []
+        self.buffer_size = 0
+
+        if self.compressor is not None:
+            data = self.compressor.compress(data) + self.compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        # sendall, as send can write only part of the data
+        self.socket.sendall(data)
+
+    def close(self):
+        self.lock.acquire()
+        try:
+            self._flush()
+            if self.compressor is not None:
+                self.socket.sendall(self.compressor.flush())
+                self.compressor = None
+        finally:
+            self.lock.release()
+
+
 
 class OutBianaInterface(object):
 
     outmethod = None
     out_format = "xml"
+    writer = None    # BufferedSocketWriter used when connected to the graphical interface
+    thread_output = threading.local()    # output of each thread of the session server (see set_thread_writer)
 
-    def connect_to_socket(port,server="127.0.0.1"):
+    def connect_to_socket(port,server="127.0.0.1",compress=False,max_buffer_size=65536,max_delay=0.1):
         """
         Changes the default outmethod to a socket
         It should not be used by users, only graphical interface should use this method
+
+        Messages are buffered and sent in blocks of up to "max_buffer_size" bytes, or after "max_delay" seconds.
+        If "compress" is True, the stream is compressed with zlib (the graphical interface must decompress it)
         """
         
         serverHost = server
@@ -39,9 +131,11 @@ class OutBianaInterface(object):
             # Start socket communication
             s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)    # create a TCP socket
             s.connect((serverHost, serverPort)) # connect to server on the port
-            s.send("<?xml version=\"1.0\"?>\r\n")
-            s.send("<biana_to_gui>")
-            OutBianaInterface.outmethod = s.send
+            OutBianaInterface.writer = BufferedSocketWriter(s, max_buffer_size=max_buffer_size, max_delay=max_delay, compress=compress)
+            OutBianaInterface.writer.write("<?xml version=\"1.0\"?>\r\n")
+            OutBianaInterface.writer.write("<biana_to_gui>")
+            OutBianaInterface.writer.flush()
+            OutBianaInterface.outmethod = OutBianaInterface.writer.write
         except:
             print "Impossible to connect to port %s" %port
             traceback.print_exc()
@@ -50,29 +144,62 @@ class OutBianaInterface(object):
     connect_to_socket = staticmethod(connect_to_socket)
 
     def set_outmethod(method):
+        OutBianaInterface.flush()
+        OutBianaInterface.writer = None
         OutBianaInterface.outmethod = method
 
     set_outmethod = staticmethod(set_outmethod)
 
+    def set_thread_writer(writer):
+        """
+        Sends the messages of the current thread to "writer" (an object with write and flush methods) instead of the default outmethod.
+        Used by the session server (see session_server), where each client is served by its own threads. If "writer" is None, the default is used again
+        """
+        OutBianaInterface.thread_output.writer = writer
+
+    set_thread_writer = staticmethod(set_thread_writer)
+
+    def get_thread_writer():
+        return getattr(OutBianaInterface.thread_output, "writer", None)
+
+    get_thread_writer = staticmethod(get_thread_writer)
+
     def send_data(message):
-        if OutBianaInterface.outmethod is not None:
+        thread_writer = OutBianaInterface.get_thread_writer()
+        if thread_writer is not None:
+            thread_writer.write(message)
+        elif OutBianaInterface.outmethod is not None:
             OutBianaInterface.outmethod(message)
             #sys.stderr.write("M: %s\n"%message)
         #sys.stderr.write("M: %s\n"%message)
 
     send_data = staticmethod(send_data)
 
+    def flush():
+        """
+        Sends the messages buffered to the graphical interface
+        """
+        thread_writer = OutBianaInterface.get_thread_writer()
+        if thread_writer is not None:
+            thread_writer.flush()
+        elif OutBianaInterface.writer is not None:
+            OutBianaInterface.writer.flush()
+
+    flush = staticmethod(flush)
+
     def send_process_message(message):
         if OutBianaInterface.out_format == "xml":
             OutBianaInterface.send_data("<start_biana_process process=\"%s\" />" %message)
         else:
             OutBianaInterface.send_data("%s\n" %message)
+        OutBianaInterface.flush()
 
     send_process_message = staticmethod(send_process_message)
 
     def send_end_process_message():
         if OutBianaInterface.out_format == "xml":
             OutBianaInterface.send_data("<end_biana_process />")
+        OutBianaInterface.flush()
 
     send_end_process_message = staticmethod(send_end_process_message)
 
@@ -84,8 +211,9 @@ class OutBianaInterface(object):
             #sys.stderr.write("M: %s\nE: %s\n" % (message, error))
         else:
             OutBianaInterface.send_data("\n!%s:\n\n%s\n" %(message, error))
+        OutBianaInterface.flush()
 
-        if OutBianaInterface.outmethod is None:
+        if OutBianaInterface.outmethod is None and OutBianaInterface.get_thread_writer() is None:
             sys.stderr.write(message)
             sys.stderr.write("\n")
             sys.stderr.write(error)
@@ -99,12 +227,15 @@ class OutBianaInterface(object):
             OutBianaInterface.send_data("<info_message>%s</info_message>" %(message))
         else:
             OutBianaInterface.send_data("%s" %message)
+        OutBianaInterface.flush()
 
     send_info_message = staticmethod(send_info_message)
 
 
     def close():
         OutBianaInterface.send_data("</biana_to_gui>")
+        if OutBianaInterface.writer is not None:
+            OutBianaInterface.writer.close()
 
 
     close = staticmethod(close)
@@ -19,12 +19,86 @@
 
 import traceback
 import sys
+import threading
+import UserDict
 from OutBianaInterface import OutBianaInterface
 
 # Change prompt
 sys.ps1 = "BIANA> "
 
-available_sessions = {}    # Dictionary to store all available sessions
+
+class SessionRegistry(UserDict.DictMixin):
+    """
+    Dictionary of available sessions
+
+    When commands are executed by a client of the session server (see session_server), each thread uses the sessions of its client
+    (set with set_client), so that clients only see their own sessions. Otherwise, all the sessions of the process are used
+    """
+
+    def __init__(self):
+        self.default_sessions = {}
+        self.thread_client = threading.local()
+
+    def set_client(self, client):
+        """
+        Sets the client of the session server served by the current thread. "client" must have the attribute "sessions" (a dictionary)
+        and the methods reserve_session(), release_session() and close(). If it is None, the sessions of the process are used again
+        """
+        self.thread_client.client = client
+
+    def get_client(self):
+        return getattr(self.thread_client, "client", None)
+
+    def _get_sessions(self):
+        client = self.get_client()
+        if client is None:
+            return self.default_sessions
+        return client.sessions
+
+    def __getitem__(self, key):
+        return self._get_sessions()[key]
+
+    def __setitem__(self, key, value):
+        self._get_sessions()[key] = value
+
+    def __delitem__(self, key):
+        del self._get_sessions()[key]
+
+    def __contains__(self, key):
+        return key in self._get_sessions()
+
+    def __iter__(self):
+        return iter(self._get_sessions().keys())
+
+    def __len__(self):
+        return len(self._get_sessions())
+
+    def keys(self):
+        return self._get_sessions().keys()
+
+    def __repr__(self):
+        return repr(self._get_sessions())
+
+
+available_sessions = SessionRegistry()    # Dictionary to store all available sessions
+
+
+def _reserve_session():
+    """
+    Reserves a session in the session server for the current client (each session uses its own database connection). Returns False
+    if the maximum number of sessions has been reached. The reservation must be released with _release_session once the session
+    has been added to available_sessions (or it has failed)
+    """
+    client = available_sessions.get_client()
+    if client is not None and not client.reserve_session():
+        OutBianaInterface.send_error_notification("Error in session creation.", "Maximum number of sessions reached in the session server")
+        return False
+    return True
+
+def _release_session():
+    client = available_sessions.get_client()
+    if client is not None:
+        client.release_session()
 
 #####################################
 ## DATABASE ADMINISTRATION METHODS ##
@@ -187,7 +261,7 @@ class administration:
     check_database = staticmethod(check_database)
 
 
-    def create_unification_protocol(unification_protocol_name, list_unification_atom_elements, dbname,dbhost,dbuser,dbpassword,dbport=None,unify_self=True):
+    def create_unification_protocol(unification_protocol_name, list_unification_atom_elements, dbname,dbhost,dbuser,dbpassword,dbport=None,unify_self=True,incremental=False,precalculate_relations=False):
         """
         Creates a new unification protocol
         
@@ -206,6 +280,10 @@ class administration:
         "dbport" is the mysql port (not required in most systems)
 
         "unify_self" Unify the external entities in one database with themselves (default = True)
+
+        "incremental" If True, the unification protocol must exist, and it is updated with the external entities parsed after its creation and the new databases and attributes in "list_unification_atom_elements", instead of being created from scratch (default = False)
+
+        "precalculate_relations" If True, the relations between the user entities of the protocol are precalculated and stored in database, which speeds up network expansions. They are kept up to date when the protocol is updated incrementally (default = False)
         """
 
         import BianaDB, BianaObjects
@@ -261,9 +339,15 @@ class administration:
 			    uProtocol.add_unification_atom_elements( BianaObjects.UnificationAtomElement(externalDatabaseID_A=db_ids[current_db1_pos],
                                                                                                          externalDatabaseID_B=db_ids[current_db2_pos],
                                                                                                          externalAttribute=attr_list) )        
-            dbaccess.create_new_user_entities(uProtocol)
+            if incremental:
+                dbaccess.update_user_entities(uProtocol)
+                OutBianaInterface.send_info_message("Unification protocol successfully updated.")
+            else:
+                dbaccess.create_new_user_entities(uProtocol)
+                OutBianaInterface.send_info_message("New unification protocol successfully created. You can start a working session with it by using \"Create session\" option and selecting database and unification protocol.")
 
-            OutBianaInterface.send_info_message("New unification protocol successfully created. You can start a working session with it by using \"Create session\" option and selecting database and unification protocol.")
+            if precalculate_relations:
+                dbaccess.create_user_entity_relations_table(unification_protocol_name, replace = not incremental)
 
             #OutBianaInterface.send_data(uProtocol.get_xml()) # TO CHECK WHY IS IT COMMENTED
 
@@ -278,6 +362,57 @@ class administration:
     create_unification_protocol = staticmethod(create_unification_protocol)
 
 
+    def export_unification_protocol_to_sqlite(unification_protocol_name, file_name, dbname, dbhost, dbuser, dbpassword, dbport=None, attribute_list=[], relation_attribute_list=[]):
+        """
+        Exports a unification protocol to a SQLite file, so that sessions can be started with it without database server (using "sqlite" as dbhost and the file as dbname)
+
+        "unification_protocol_name" is the name of the unification protocol to export (required)
+
+        "file_name" is the path of the SQLite file. If it exists, it is replaced (required)
+
+        "dbname": Biana database name
+
+        "dbhost" is the machine with the mysql server that holds the biana database (required)
+
+        "dbuser" is the mysql user (not required in most systems)
+
+        "dbpassword" is the mysql password (not required in most systems)
+
+        "dbport" is the mysql port (not required in most systems)
+
+        "attribute_list" is the list of external entity attributes to export. Only exported attributes can be used in the sessions. The default attributes of the external databases are always exported
+
+        "relation_attribute_list" is the list of relation attributes to export
+        """
+
+        import BianaDB
+
+        OutBianaInterface.send_process_message("Exporting unification protocol. This process can take long time.")
+
+        try:
+            dbaccess = BianaDB.BianaDBaccess( dbname = dbname,
+                                              dbhost = dbhost,
+                                              dbuser = dbuser,
+                                              dbpassword = dbpassword,
+                                              dbport = dbport )
+
+            dbaccess.export_unification_protocol_to_sqlite( unification_protocol_name = unification_protocol_name,
+                                                            file_name = file_name,
+                                                            attribute_list = attribute_list,
+                                                            relation_attribute_list = relation_attribute_list )
+
+            dbaccess.close()
+            OutBianaInterface.send_info_message("Unification protocol successfully exported to %s." %file_name)
+        except:
+            OutBianaInterface.send_error_notification("Error while exporting unification protocol",traceback.format_exc())
+
+        OutBianaInterface.send_end_process_message()
+
+        return
+
+    export_unification_protocol_to_sqlite = staticmethod(export_unification_protocol_to_sqlite)
+
+
 
 
 
@@ -425,42 +560,63 @@ def create_new_session(sessionID, dbname,dbhost,dbuser,dbpassword,unification_pr
 
     "sessionID" is the identifier for the session. It must be unique! (required)
 
+    If "dbhost" is "sqlite", "dbname" is a file created with administration.export_unification_protocol_to_sqlite and the session works without database server
+
     "unification_protocol"
     """
 
-    import BianaObjects.BianaSessionManager as BianaSessionManager
-    
     if sessionID in available_sessions:
         OutBianaInterface.send_error_notification("Trying to create two sessions with the same ID","Error in session creation")
         return
 
+    if not _reserve_session():
+        return
+
+    import BianaObjects.BianaSessionManager as BianaSessionManager
+
     try:
-        available_sessions[sessionID] = BianaSessionManager.BianaSessionManager(pSessionID = sessionID,
-                                                                                unification_protocol_name = unification_protocol,
-                                                                                dbname = dbname,
-                                                                                dbhost = dbhost,
-                                                                                dbuser = dbuser,
-                                                                                dbport = dbport,
-                                                                                dbpassword = dbpassword,
-                                                                                out_method = OutBianaInterface.send_data)
-        return available_sessions[sessionID]
-    except:
-        OutBianaInterface.send_error_notification("Error in session creation.", traceback.format_exc())
-
-
-def save_session(sessionID, file_name):
+        try:
+            available_sessions[sessionID] = BianaSessionManager.BianaSessionManager(pSessionID = sessionID,
+                                                                                    unification_protocol_name = unification_protocol,
+                                                                                    dbname = dbname,
+                                                                                    dbhost = dbhost,
+                                                                                    dbuser = dbuser,
+                                                                                    dbport = dbport,
+                                                                                    dbpassword = dbpassword,
+                                                                                    out_method = OutBianaInterface.send_data)
+            return available_sessions[sessionID]
+        except:
+            OutBianaInterface.send_error_notification("Error in session creation.", traceback.format_exc())
+    finally:
+        _release_session()
+
+
+def save_session(sessionID, file_name, format="pickle"):
     """
     Saves the Session in the specified file
 
     "sessionID" is the identifier of the session
 
     "fileName" is the absolute or relative path where the session must be saved
+
+    "format" can be "pickle" (default) or "snapshot". "pickle" saves the whole session in a single file. Snapshots are directories in which each
+    user entity set is stored in a separate file, and only sets that have changed since the last save are written again. A snapshot is never saved
+    over an existing file. Both formats are read by load_session
     """
-    import cPickle
-    outfile_fd = open(file_name, 'w')
     objBianaSessionManager = available_sessions[sessionID]
-    cPickle.dump(objBianaSessionManager, outfile_fd, cPickle.HIGHEST_PROTOCOL)
-    outfile_fd.close()
+
+    if format == "snapshot":
+        try:
+            objBianaSessionManager.save_snapshot(file_name)
+        except ValueError, e:
+            OutBianaInterface.send_error_notification("Save session error", str(e))
+    elif format == "pickle":
+        import cPickle
+        outfile_fd = open(file_name, 'w')
+        cPickle.dump(objBianaSessionManager, outfile_fd, cPickle.HIGHEST_PROTOCOL)
+        outfile_fd.close()
+    else:
+        OutBianaInterface.send_error_notification("Save session error","Unknown session format %s" %format)
     return
 
 
@@ -481,23 +637,42 @@ def remove_session(sessionID):
 
 def load_session(file_name):
     """
-    Loads a saved biana session
+    Loads a saved biana session (saved either as a snapshot or as a pickle file)
     """
-    import cPickle
-    infile_fd = open(file_name)
-    session = cPickle.load(infile_fd)
-    if available_sessions.has_key(session.sessionID):
-        OutBianaInterface.send_error_notification("Load session error","Trying to load an existing session (same ID)")
-    else:
-        available_sessions[session.sessionID] = session
+    import BianaObjects.session_snapshot as session_snapshot
+
+    if not _reserve_session():
+        return
+
+    try:
+        if session_snapshot.is_snapshot(file_name):
+            import BianaObjects.BianaSessionManager as BianaSessionManager
+            session = BianaSessionManager.BianaSessionManager.load_snapshot(file_name)
+        else:
+            import cPickle
+            infile_fd = open(file_name)
+            session = cPickle.load(infile_fd)
+            infile_fd.close()
+
+        if available_sessions.has_key(session.sessionID):
+            OutBianaInterface.send_error_notification("Load session error","Trying to load an existing session (same ID)")
+        else:
+            available_sessions[session.sessionID] = session
+    finally:
+        _release_session()
 
-    infile_fd.close()
     return
 
 def ping():
     OutBianaInterface.send_data("<biana_ping_response />")
+    OutBianaInterface.flush()
 
 def close():
+    client = available_sessions.get_client()
+    if client is not None:
+        # Only the connection of the client is closed, not the session server
+        client.close()
+        return
     OutBianaInterface.close()
     sys.exit()
     
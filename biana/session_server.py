@@ -0,0 +1,411 @@
+"""
+    BIANA: Biologic Interactions and Network Analysis
+    Copyright (C) 2009  Javier Garcia-Garcia, Emre Guney, Baldo Oliva
+
+    This program is free software: you can redistribute it and/or modify
+    it under the terms of the GNU General Public License as published by
+    the Free Software Foundation, either version 3 of the License, or
+    (at your option) any later version.
+
+    This program is distributed in the hope that it will be useful,
+    but WITHOUT ANY WARRANTY; without even the implied warranty of
+    MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+    GNU General Public License for more details.
+
+    You should have received a copy of the GNU General Public License
+    along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+# Session server
+#
+# Serves several clients (i.e. graphical interfaces) from the same BIANA process, through a local TCP or Unix socket.
+#
+# Each client sends the same commands it would write to the BIANA python interpreter (one line each, multi-line commands
+# are finished with an empty line, as in the interpreter) and receives the xml output of its commands through the same
+# connection (the same format sent with OutBianaInterface.connect_to_socket). For each client:
+#   - commands are executed in order by a worker thread, so that a long command does not block other clients
+#   - the sessions created are only visible to that client (see biana_commands.SessionRegistry) and are closed when it disconnects
+#   - each command is enclosed between <biana_command_start id="..."/> and <biana_command_end id="..." status="..."/>, where status
+#     is "done", "error" or "cancelled"
+#   - the line "#cancel" cancels the command being executed. As python threads cannot be interrupted, "#cancel" only takes effect
+#     the next time the command sends output (i.e. a process message): a command that does not send output (for example, waiting
+#     for a long database query) runs until it finishes or sends output, and it keeps its command slot until then
+#
+# Security: clients execute arbitrary python code with the permissions of the server process (and the database passwords given
+# to it), so only trusted local users must be able to connect. By default, the server listens in a Unix socket only accessible
+# by its owner (permissions 0600). The TCP server requires a shared secret: the first line sent by each client must be the secret,
+# otherwise the connection is closed. Do not listen in other hosts than the local one, as the connection is not encrypted.
+#
+# The number of commands executed at the same time and the number of sessions are bounded. Each session keeps its own database
+# connection instead of taking one from a pool shared by all the sessions, because BianaDBaccess uses per connection state between
+# queries (locked tables, temporary tables, unbuffered results). Queries split in chunks open up to ConnectorDB.DB.max_pool_size more
+# connections (see ConnectorDB.ConnectionPool), so the server uses at most max_sessions*(1+max_pool_size) database connections.
+
+import code
+import hmac
+import os
+import socket
+import sys
+import threading
+import traceback
+import Queue
+import SocketServer
+
+import biana_commands
+from OutBianaInterface import OutBianaInterface, BufferedSocketWriter
+
+
+CANCEL_COMMAND = "#cancel"
+
+DEFAULT_SOCKET_FILE = os.path.join(os.path.expanduser("~"), ".biana_session_server.sock")
+
+SECRET_ENVIRONMENT_VARIABLE = "BIANA_SESSION_SERVER_SECRET"
+
+
+def is_valid_secret(secret, line):
+    """
+    Compares the secret sent by a client with the one of the server in constant time
+    """
+    if hasattr(hmac, "compare_digest"):
+        return hmac.compare_digest(secret, line)
+    if len(secret) != len(line):
+        return False
+    return sum([ ord(x) ^ ord(y) for x, y in zip(secret, line) ]) == 0
+
+
+class CommandCancelled(Exception):
+    """
+    Raised in the thread of a command when the client cancels it
+    """
+    pass
+
+
+class ClientConsole(code.InteractiveConsole):
+    """
+    Python interpreter that executes the commands of a client
+    """
+
+    def __init__(self, client, locals):
+        code.InteractiveConsole.__init__(self, locals=locals)
+        self.client = client
+
+    def runcode(self, code_obj):
+        command_id = self.client.begin_command()
+        status = "done"
+        error = None
+        try:
+            exec code_obj in self.locals
+        except CommandCancelled:
+            status = "cancelled"
+        except SystemExit:
+            self.client.close()
+        except:
+            status = "error"
+            error = traceback.format_exc()
+        self.client.end_command(command_id, status, error)
+
+    def write(self, data):
+        # Syntax errors
+        OutBianaInterface.send_error_notification("Error in command", data)
+
+
+
+class SessionClient(object):
+    """
+    Connection of a client to the session server
+    """
+
+    def __init__(self, server, socket_obj):
+
+        self.server = server
+        self.socket = socket_obj
+        self.writer = BufferedSocketWriter(socket_obj, max_buffer_size=server.max_buffer_size, max_delay=server.max_delay)
+        self.sessions = {}
+        self.commands = Queue.Queue()
+        self.cancel_requested = threading.Event()
+        self.current_command = None
+        self.num_commands = 0
+        self.closed = False
+
+        namespace = {}
+        exec "from biana import *" in namespace
+        self.console = ClientConsole(self, namespace)
+
+        self.worker = threading.Thread(target=self._execute_commands)
+        self.worker.setDaemon(True)
+
+    def start(self):
+        self.writer.write("<?xml version=\"1.0\"?>\r\n")
+        self.writer.write("<biana_to_gui>")
+        self.writer.flush()
+        self.worker.start()
+
+    # Output methods, used through OutBianaInterface by the commands of this client (see OutBianaInterface.set_thread_writer)
+    def write(self, message):
+        if self.cancel_requested.isSet() and threading.currentThread() is self.worker:
+            raise CommandCancelled()
+        self.writer.write(message)
+
+    def flush(self):
+        self.writer.flush()
+
+    def add_command_line(self, line):
+        """
+        Receives a line sent by the client
+        """
+        if line.strip() == CANCEL_COMMAND:
+            if self.current_command is not None:
+                self.cancel_requested.set()
+        else:
+            self.commands.put(line)
+
+    def _execute_commands(self):
+        OutBianaInterface.set_thread_writer(self)
+        biana_commands.available_sessions.set_client(self)
+        while True:
+            line = self.commands.get()
+            if line is None or self.closed:
+                break
+            self.server.command_slots.acquire()
+            try:
+                try:
+                    self.console.push(line)
+                except socket.error:
+                    # Client disconnected while sending the output
+                    self.closed = True
+            finally:
+                self.server.command_slots.release()
+        self._close_sessions()
+
+    def begin_command(self):
+        self.num_commands += 1
+        self.current_command = self.num_commands
+        self.cancel_requested.clear()
+        self.writer.write("<biana_command_start id=\"%s\"/>" %self.current_command)
+        return self.current_command
+
+    def end_command(self, command_id, status, error=None):
+        self.current_command = None
+        self.cancel_requested.clear()
+        if error is not None:
+            OutBianaInterface.send_error_notification("Error executing command", error)
+        self.writer.write("<biana_command_end id=\"%s\" status=\"%s\"/>" %(command_id, status))
+        self.writer.flush()
+
+    def reserve_session(self):
+        return self.server.reserve_session()
+
+    def release_session(self):
+        self.server.release_session()
+
+    def close(self):
+        """
+        Closes the connection with the client. Its sessions are closed when its pending commands finish
+        """
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self.writer.write("</biana_to_gui>")
+            self.writer.close()
+            self.socket.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+
+    def disconnect(self):
+        """
+        Called when the client has disconnected: cancels its current command and stops the worker
+        """
+        self.closed = True
+        if self.current_command is not None:
+            self.cancel_requested.set()
+        self.commands.put(None)
+
+    def _close_sessions(self):
+        for session_id in self.sessions.keys():
+            try:
+                self.sessions.pop(session_id).close()
+            except:
+                sys.stderr.write("Error closing session %s\n%s" %(session_id, traceback.format_exc()))
+
+
+
+class SessionRequestHandler(SocketServer.StreamRequestHandler):
+
+    def authenticate(self):
+        """
+        Reads the secret sent by the client in its first line, if the server has a secret. Returns True if the client can send commands
+        """
+        if self.server.secret is None:
+            return True
+        self.request.settimeout(self.server.authentication_timeout)
+        try:
+            try:
+                line = self.rfile.readline(len(self.server.secret)+3)
+            except socket.error:
+                return False
+        finally:
+            self.request.settimeout(None)
+        return is_valid_secret(self.server.secret, line.rstrip("\r\n"))
+
+    def handle(self):
+        if not self.authenticate():
+            return
+        client = SessionClient(self.server, self.request)
+        self.server.add_client(client)
+        try:
+            client.start()
+            while not client.closed:
+                try:
+                    line = self.rfile.readline()
+                except socket.error:
+                    break
+                if line == "":
+                    break
+                client.add_command_line(line.rstrip("\r\n"))
+        finally:
+            client.disconnect()
+            client.worker.join(self.server.disconnect_timeout)
+            self.server.remove_client(client)
+
+
+
+class SessionServerMixIn(object):
+    """
+    Attributes and methods shared by the TCP and Unix socket session servers
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def _init_session_server(self, max_running_commands, max_sessions, secret=None, max_buffer_size=65536, max_delay=0.1, disconnect_timeout=5, authentication_timeout=10):
+        self.command_slots = threading.BoundedSemaphore(max_running_commands)
+        self.max_sessions = max_sessions
+        self.num_reserved_sessions = 0
+        self.secret = secret
+        self.authentication_timeout = authentication_timeout
+        self.max_buffer_size = max_buffer_size
+        self.max_delay = max_delay
+        self.disconnect_timeout = disconnect_timeout
+        self.clients = []
+        self.clients_lock = threading.Lock()
+
+    def add_client(self, client):
+        self.clients_lock.acquire()
+        try:
+            self.clients.append(client)
+        finally:
+            self.clients_lock.release()
+
+    def remove_client(self, client):
+        self.clients_lock.acquire()
+        try:
+            self.clients.remove(client)
+        finally:
+            self.clients_lock.release()
+
+    def get_number_of_sessions(self):
+        self.clients_lock.acquire()
+        try:
+            return sum([ len(x.sessions) for x in self.clients ])
+        finally:
+            self.clients_lock.release()
+
+    def reserve_session(self):
+        """
+        Reserves a session if the maximum number of sessions has not been reached. Returns False otherwise
+
+        Sessions being created (reserved) are counted until release_session is called, so that concurrent clients cannot exceed the maximum
+        """
+        self.clients_lock.acquire()
+        try:
+            if sum([ len(x.sessions) for x in self.clients ]) + self.num_reserved_sessions >= self.max_sessions:
+                return False
+            self.num_reserved_sessions += 1
+            return True
+        finally:
+            self.clients_lock.release()
+
+    def release_session(self):
+        self.clients_lock.acquire()
+        try:
+            self.num_reserved_sessions -= 1
+        finally:
+            self.clients_lock.release()
+
+
+class TCPSessionServer(SessionServerMixIn, SocketServer.ThreadingTCPServer):
+
+    def __init__(self, port, secret, host="127.0.0.1", max_running_commands=4, max_sessions=8, **kwargs):
+        if not secret:
+            raise ValueError("A secret is required to start the session server in a TCP port")
+        SocketServer.ThreadingTCPServer.__init__(self, (host, port), SessionRequestHandler)
+        self._init_session_server(max_running_commands, max_sessions, secret=secret, **kwargs)
+
+
+if hasattr(SocketServer, "ThreadingUnixStreamServer"):
+
+    class UnixSessionServer(SessionServerMixIn, SocketServer.ThreadingUnixStreamServer):
+
+        def __init__(self, socket_file, max_running_commands=4, max_sessions=8, secret=None, **kwargs):
+            SocketServer.ThreadingUnixStreamServer.__init__(self, socket_file, SessionRequestHandler)
+            self._init_session_server(max_running_commands, max_sessions, secret=secret, **kwargs)
+
+        def server_bind(self):
+            # The socket is created only accessible by its owner (the permissions of the file are the ones checked to connect)
+            previous_umask = os.umask(0177)
+            try:
+                SocketServer.ThreadingUnixStreamServer.server_bind(self)
+            finally:
+                os.umask(previous_umask)
+            os.chmod(self.server_address, 0600)
+
+        def server_close(self):
+            SocketServer.ThreadingUnixStreamServer.server_close(self)
+            if os.path.exists(self.server_address):
+                os.remove(self.server_address)
+
+
+def start_session_server(port=None, socket_file=None, host="127.0.0.1", max_running_commands=4, max_sessions=8, secret=None):
+    """
+    Starts the session server and serves clients until the process is interrupted
+
+    "port" is the TCP port where the server listens (only local connections by default, see "host"). It requires a "secret"
+
+    "socket_file" is the Unix socket used instead of the TCP port (only accessible by the user running the server). If neither "port"
+    nor "socket_file" are given, DEFAULT_SOCKET_FILE is used
+
+    "max_running_commands" is the maximum number of commands (of any client) executed at the same time
+
+    "max_sessions" is the maximum number of sessions (of all the clients) open at the same time, each one uses its own database connection
+
+    "secret" is the string that clients must send in their first line before any command. If it is None, it is read from the environment
+    variable BIANA_SESSION_SERVER_SECRET (if defined)
+    """
+    if secret is None:
+        secret = os.environ.get(SECRET_ENVIRONMENT_VARIABLE)
+    if port is not None:
+        server = TCPSessionServer(port, secret, host=host, max_running_commands=max_running_commands, max_sessions=max_sessions)
+    else:
+        if socket_file is None:
+            socket_file = DEFAULT_SOCKET_FILE
+        server = UnixSessionServer(socket_file, max_running_commands=max_running_commands, max_sessions=max_sessions, secret=secret)
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+
+    from optparse import OptionParser
+
+    parser = OptionParser(usage="python -m biana.session_server [--port PORT | --socket FILE]")
+    parser.add_option("--port", dest="port", type="int", default=None, help="TCP port (local connections only). The secret sent by clients is read from the environment variable %s" %SECRET_ENVIRONMENT_VARIABLE)
+    parser.add_option("--socket", dest="socket_file", default=None, help="Unix socket file (default: %s)" %DEFAULT_SOCKET_FILE)
+    parser.add_option("--max-running-commands", dest="max_running_commands", type="int", default=4)
+    parser.add_option("--max-sessions", dest="max_sessions", type="int", default=8)
+    (options, args) = parser.parse_args()
+
+    start_session_server(port=options.port, socket_file=options.socket_file, max_running_commands=options.max_running_commands, max_sessions=options.max_sessions)
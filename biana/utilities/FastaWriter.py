@@ -27,12 +27,17 @@ class FastaWriter(object):
     # Sequence field in fasta file should not contain lines more than 80 characters (79 amino acids/nucleotides + '\n')
     symbol_per_line = 79
 
-    def __init__(self, out_method, one_line_per_sequence=False):
+    def __init__(self, out_method, one_line_per_sequence=False, buffer_size=None):
         """
             FastaWriter constructer, creates an instance of FastaWriter
+
+            buffer_size: if not None, sequences are sent to out_method in blocks of (at least) this number of characters. flush() must be called after the last sequence
         """
         self.out_method = out_method
 	self.one_line_per_seq = one_line_per_sequence
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.buffer_length = 0
         return
 
     def _convert_sequence_to_fasta(self, sequence_header, sequence):
@@ -53,7 +58,24 @@ class FastaWriter(object):
         """
             Outputs given sequence using out_method given in the initialization
         """
-        self.out_method(self._convert_sequence_to_fasta(sequence_header, sequence))
+        if self.buffer_size is None:
+            self.out_method(self._convert_sequence_to_fasta(sequence_header, sequence))
+            return
+        fasta_str = self._convert_sequence_to_fasta(sequence_header, sequence)
+        self.buffer.append(fasta_str)
+        self.buffer_length += len(fasta_str)
+        if self.buffer_length >= self.buffer_size:
+            self.flush()
+        return
+
+    def flush(self):
+        """
+            Outputs the sequences kept in the buffer
+        """
+        if len(self.buffer) > 0:
+            self.out_method("".join(self.buffer))
+            self.buffer = []
+            self.buffer_length = 0
         return
 
 
@@ -112,6 +112,50 @@ def get_connected_components(G, return_as_graph_list=True):
     return result_list
 
 
+def get_connected_components_from_equivalences(node_list, equivalent_node_lists):
+    """
+        Finds connected components of the nodes in node_list, where the nodes in each list of equivalent_node_lists are connected to each other
+        Returns list of node lists corresponding nodes in connected components (from larger to smaller), as get_connected_components
+
+        Uses a union-find over arrays of node indices instead of creating a graph, so memory does not depend on the number of edges
+        equivalent_node_lists can be any iterable (i.e. a generator reading equivalences from database)
+    """
+    import array
+
+    node_list = list(node_list)
+    node_to_index = dict([ (node, index) for index, node in enumerate(node_list) ])
+    parent = array.array('l', xrange(len(node_list)))
+    size = array.array('l', [1]) * len(node_list)
+
+    def find(index):
+        while parent[index] != index:
+            parent[index] = parent[parent[index]]   # path halving
+            index = parent[index]
+        return index
+
+    for current_list in equivalent_node_lists:
+        root1 = None
+        for current_node in current_list:
+            root2 = find(node_to_index[current_node])
+            if root1 is None:
+                root1 = root2
+            elif root1 != root2:
+                # union by size
+                if size[root1] < size[root2]:
+                    root1, root2 = root2, root1
+                parent[root2] = root1
+                size[root1] += size[root2]
+
+    components = {}
+    for index in xrange(len(node_list)):
+        components.setdefault(find(index), []).append(node_list[index])
+
+    result_list = components.values()
+    result_list.sort(key=len, reverse=True)
+
+    return result_list
+
+
 def create_network_from_sif_file(network_file_in_sif, use_edge_data = False, delim = None, include_unconnected=True):
     setNode, setEdge, dictDummy, dictEdge = get_nodes_and_edges_from_sif_file(network_file_in_sif, store_edge_type = use_edge_data, delim = delim)
     g=networkx.Graph()
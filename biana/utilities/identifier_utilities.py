@@ -31,6 +31,7 @@ def read_identifier_list_from_file(file_name, id_type=None):
     fileIdentifierList = open(file_name)
     line = fileIdentifierList.readline()
     identifier_description_list = []
+    auto_identifier_list = []
 
     ## read input file
     while line:
@@ -44,11 +45,7 @@ def read_identifier_list_from_file(file_name, id_type=None):
 	    if id_type is None:
 		identifier_description_list.append(identifierString)
 	    elif id_type == "auto":
-		detected_id_type = detect_identifier_type(identifierString)
-		if detected_id_type is None:
-		    print "Warning: Can not auto-detect type of %s" % identifierString
-		else:
-		    identifier_description_list.append((detected_id_type, identifierString))
+		auto_identifier_list.append(identifierString)
 	    else:
 		identifier_description_list.append((id_type, identifierString))
 	else:
@@ -56,49 +53,68 @@ def read_identifier_list_from_file(file_name, id_type=None):
 
 	line = fileIdentifierList.readline()
 
+    if len(auto_identifier_list) > 0:
+	(type_to_ids, undetected_ids) = detect_identifier_types(auto_identifier_list)
+	for identifierString in undetected_ids:
+	    print "Warning: Can not auto-detect type of %s" % identifierString
+	for detected_id_type, id_list in type_to_ids.iteritems():
+	    identifier_description_list.extend([ (detected_id_type, identifierString) for identifierString in id_list ])
+
     return identifier_description_list
 
 
 
+# Patterns used to detect identifier types, in order of precedence. They are combined in a single regular expression (see detect_identifier_types)
+IDENTIFIER_TYPE_PATTERNS = [ ("uniprotaccession", "[A-Z]\d\w{3}\d(?:-\d{1,3}){0,1}$"),
+                             ("uniprotentry", "\w+_[A-Z]+$"),
+                             ("ensembl", "ENS[A-Z]+\d{11}$"),
+                             ("accessionnumber", "(?:[A-Z]){1,2}\d{3,7}(?:.\d{1,3}){0,1}$"),
+                             #("orfname", "[A-Z]{1,3}\d{3,4}[W|C|](?:.\d{1,3}){0,1}$"),
+                             ("ipi", "IPI"),
+                             ("ec", "EC"),
+                             ("pfam", "PF") ]
+
+_re_identifier_type = None
+
+
+def _get_identifier_type_regex():
+    global _re_identifier_type
+    if _re_identifier_type is None:
+        import re
+        _re_identifier_type = re.compile("|".join([ "(?P<%s>%s)" %(id_type, pattern) for id_type, pattern in IDENTIFIER_TYPE_PATTERNS ]))
+    return _re_identifier_type
+
+
 def detect_identifier_type(id):
     """
     Return auto-detected type of the given id
 
     Works for ids with strict regular format (such as Q7Z4I7-1, RAW1_HUMAN, ENSP00000215832, AC1423234.1, IPI00157836, EC1.2.3.12, PF681234, ...)
     """
-    import re
+    m = _get_identifier_type_regex().match(id)
+    if m is None:
+        return None
+    return m.lastgroup
+
 
-    re_uniprot_entry = re.compile("\w+_[A-Z]+$")
-    re_uniprot_accession = re.compile("[A-Z]\d\w{3}\d(-\d{1,3}){0,1}$")
-    re_ensembl = re.compile("ENS[A-Z]+\d{11}$")
-    re_accession_number = re.compile("([A-Z]){1,2}\d{3,7}(.\d{1,3}){0,1}$")
-    #re_ipi = re.compile("IPI\d{8}$")
-    #re_ec = re.compile("EC\d{1,2}")
-    #re_ordered_locus_name = re.compile("[A-Z]{1,3}\d{3,4}[W|C|](.\d{1,3}){0,1}$")
-
-    detected_type = None
-    if re_uniprot_accession.match(id):
-	detected_type = "uniprotaccession"
-    elif re_uniprot_entry.match(id):
-	detected_type = "uniprotentry"
-    #elif id.startswith("ENS"):
-    elif re_ensembl.match(id):
-	detected_type = "ensembl"
-    #elif id.startswith("AC"):
-    elif re_accession_number.match(id):
-	detected_type = "accessionnumber"
-    #elif re_orf_name.search(id):
-    #    detected_type = "orfname"
-    elif id.startswith("IPI"):
-	detected_type = "ipi"
-    elif id.startswith("EC"):
-	detected_type = "ec"
-    elif id.startswith("PF"):
-	detected_type = "pfam"
-    #else: # handled in the caller
-    #    print "Warning: Undetermined type: %s" % id
-
-    return detected_type
+def detect_identifier_types(id_list):
+    """
+    Return a tuple (dictionary of detected type: list of ids, list of ids whose type could not be detected)
+
+    Types are detected as in detect_identifier_type, matching each id against a single combined regular expression
+    """
+    match = _get_identifier_type_regex().match
+
+    type_to_ids = {}
+    undetected_ids = []
+    for id in id_list:
+        m = match(id)
+        if m is None:
+            undetected_ids.append(id)
+        else:
+            type_to_ids.setdefault(m.lastgroup, []).append(id)
+
+    return (type_to_ids, undetected_ids)
 
 
 def select_swissprot_accessions(uniprot_ids):
@@ -57,7 +57,7 @@ setup( name = 'biana',
                    'biana.ext.networkx.tests'],
 
        package_dir = {'': 'src'+os.sep},
-       package_data = {"biana": ["BianaDB/unify", "BianaDB/win_unify.exe","ext/MySQLdb/_mysql.so"]} )
+       package_data = {"biana": ["BianaDB/unify", "BianaDB/win_unify.exe","ext/MySQLdb/_mysql.so","BianaParser/psi-mi.obo.idx"]} )
        #ext_package = 'biana.BianaDB',
        #ext_modules = [Extension('C_functions', 
        #                         #include_dirs = ['/usr/include/mysql'],
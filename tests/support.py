@@ -0,0 +1,144 @@
+"""
+Helpers shared by the tests
+
+Tests are run from the root of the repository with python2:
+
+    python -m unittest discover -s tests -t .
+
+Tests that need a MySQL server are skipped unless BIANA_TEST_DBHOST (and BIANA_TEST_DBUSER, BIANA_TEST_DBPASSWORD) give one where databases can be created
+"""
+
+import os
+import re
+import sys
+import sqlite3
+import unittest
+
+root_path = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if root_path not in sys.path[1:]:
+    # Not first in the path: biana.BianaParser looks for the biana package from the second entry on
+    sys.path.insert(1, root_path)
+
+
+def _load_networkx():
+    # The networkx copy in biana/ext is used if it can be imported. Otherwise, an installed networkx with the same interface (0.99) is used instead
+    # (imported before biana, which adds biana/ext to the path)
+    try:
+        import networkx
+    except ImportError:
+        networkx = None
+    try:
+        import biana.ext.networkx
+        return
+    except ImportError:
+        ext_path = os.path.join(root_path, "biana", "ext")
+        for module_name, module in sys.modules.items():
+            if module_name.startswith("biana.ext.networkx") or (module is not None and getattr(module, "__file__", "").startswith(ext_path)):
+                del sys.modules[module_name]
+    if networkx is not None and hasattr(networkx.Graph, "get_edge"):
+        import biana.ext
+        sys.modules["networkx"] = networkx
+        sys.modules["biana.ext.networkx"] = networkx
+        biana.ext.networkx = networkx
+
+_load_networkx()
+
+from biana.BianaDB import ConnectorDB
+
+
+def get_mysql_parameters():
+    """
+    Returns the connection parameters of the MySQL server used by the tests, or None if it is not configured
+    """
+    if os.environ.get("BIANA_TEST_DBHOST") is None:
+        return None
+    return { "dbhost": os.environ["BIANA_TEST_DBHOST"],
+             "dbuser": os.environ.get("BIANA_TEST_DBUSER"),
+             "dbpassword": os.environ.get("BIANA_TEST_DBPASSWORD") }
+
+def skip_without_mysql(test_item):
+    return unittest.skipIf(get_mysql_parameters() is None, "MySQL server not configured (BIANA_TEST_DBHOST)")(test_item)
+
+
+
+CREATE_TABLE_ENGINE_REGEX = re.compile(r"\)\s*ENGINE\s*=?\s*\w+\s*;?\s*$")
+SHOW_TABLES_REGEX = re.compile(r"^\s*SHOW TABLES LIKE ('[^']*')\s*$")
+NESTED_INSERT_REGEX = re.compile(r"^(\s*INSERT (?:OR IGNORE )?INTO \w+ \([^)]*\)) \((SELECT .*)\)\s*$", re.DOTALL)
+
+
+class SQLiteCursor(object):
+    """
+    Cursor translating the MySQL specific statements used by ConnectorDB to SQLite
+    """
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def execute(self, sql_query):
+        sql_query = sql_query.replace("INSERT IGNORE INTO", "INSERT OR IGNORE INTO")
+        if sql_query.lstrip().startswith("CREATE TABLE"):
+            sql_query = CREATE_TABLE_ENGINE_REGEX.sub(")", sql_query.replace(" unsigned", ""))
+        sql_query = NESTED_INSERT_REGEX.sub(r"\1 \2", sql_query)
+        sql_query = SHOW_TABLES_REGEX.sub(r"SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE \1 ESCAPE '\\'", sql_query)
+        self.cursor.execute(sql_query)
+
+    def fetchall(self):
+        return self.cursor.fetchall()
+
+    def fetchmany(self, size):
+        return self.cursor.fetchmany(size)
+
+    def close(self):
+        self.cursor.close()
+
+
+class SQLiteConnection(object):
+
+    def __init__(self):
+        self.connection = sqlite3.connect(":memory:")
+        self.connection.text_factory = str
+
+    def cursor(self, **kwargs):
+        return SQLiteCursor(self.connection.cursor())
+
+    def consume_results(self):
+        pass
+
+    def close(self):
+        self.connection.close()
+
+
+class SQLiteDB(ConnectorDB.DB):
+    """
+    ConnectorDB.DB object working on an in-memory SQLite database instead of a MySQL server
+
+    Executed queries are kept in "queries"
+    """
+
+    def __init__(self, max_packet=1000000, **kwargs):
+        self.max_packet = max_packet
+        self.queries = []
+        ConnectorDB.DB.__init__(self, **kwargs)
+
+    def _connect(self):
+        return SQLiteConnection()
+
+    def _get_max_packet(self):
+        return self.max_packet
+
+    def execute(self, sql_query, parameters=()):
+        """
+        Executes a query directly in the SQLite database (used to prepare and check the test data)
+        """
+        return self.db.connection.execute(sql_query, parameters).fetchall()
+
+    def insert_db_content(self, sql_query, answer_mode=None, unlock=False):
+        if isinstance(sql_query, list):
+            self.queries.extend(sql_query)
+        elif sql_query is not None:
+            self.queries.append(sql_query)
+        return ConnectorDB.DB.insert_db_content(self, sql_query, answer_mode=answer_mode, unlock=unlock)
+
+    def select_db_content(self, sql_query=None, answer_mode="single", remove_duplicates="yes", number_of_selected_elems=1):
+        self.queries.append(sql_query)
+        return ConnectorDB.DB.select_db_content(self, sql_query, answer_mode=answer_mode, remove_duplicates=remove_duplicates, number_of_selected_elems=number_of_selected_elems)
@@ -0,0 +1,77 @@
+"""
+Tests of the temporal file used by the BioPAX level 2 parser to store the elements read (xml_streaming.DiskRecordMap)
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests import support
+
+from biana.BianaParser.biopaxLevel2Parser import BiopaxLevel2Parser, BiopaxEntity
+from biana.BianaParser.xml_streaming import DiskRecordMap
+
+
+OWL_CONTENT = """<?xml version="1.0"?>
+<rdf:RDF xmlns:rdf="http://www.w3.org/1999/02/22-rdf-syntax-ns#" xmlns:bp="http://www.biopax.org/release/biopax-level2.owl#">
+<bp:unificationXref rdf:ID="UniProt_P12345">
+<bp:DB>UniProt</bp:DB>
+<bp:ID>P12345</bp:ID>
+</bp:unificationXref>
+<bp:unificationXref rdf:ID="UniProt_P67890">
+<bp:DB>UniProt</bp:DB>
+<bp:ID>P67890</bp:ID>
+</bp:unificationXref>
+"""
+
+
+class BiopaxTemporalFileTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.temp_directory = os.path.join(self.directory, "temp")
+        os.mkdir(self.temp_directory)
+        self.previous_tempdir = tempfile.tempdir
+        tempfile.tempdir = self.temp_directory
+
+    def tearDown(self):
+        tempfile.tempdir = self.previous_tempdir
+        shutil.rmtree(self.directory)
+
+    def write_owl(self, content):
+        file_name = os.path.join(self.directory, "test.owl")
+        fd = open(file_name, 'w')
+        fd.write(content)
+        fd.close()
+        return file_name
+
+    def test_temporal_file_is_removed(self):
+        parser = BiopaxLevel2Parser.BiopaxLevel2XMLParser()
+        parser.parseFile(self.write_owl(OWL_CONTENT + "</rdf:RDF>\n"))
+        self.assertEqual(BiopaxEntity.resources.keys(), [])
+        self.assertEqual(os.listdir(self.temp_directory), [])
+        self.assertTrue(parser.file.closed)
+
+    def test_temporal_file_is_removed_when_the_parsing_fails(self):
+        parser = BiopaxLevel2Parser.BiopaxLevel2XMLParser()
+        # The document is not closed
+        self.assertRaises(Exception, parser.parseFile, self.write_owl(OWL_CONTENT))
+        self.assertEqual(os.listdir(self.temp_directory), [])
+        self.assertTrue(parser.file.closed)
+
+    def test_context_manager(self):
+        try:
+            with DiskRecordMap() as records:
+                records["a"] = [1, 2]
+                self.assertEqual(records["a"], [1, 2])
+                self.assertEqual(len(os.listdir(self.temp_directory)), 1)
+                raise KeyError("b")
+        except KeyError:
+            pass
+        self.assertEqual(len(records), 0)
+        self.assertEqual(os.listdir(self.temp_directory), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
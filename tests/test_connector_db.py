@@ -0,0 +1,31 @@
+"""
+Tests of the query helpers of ConnectorDB.DB
+"""
+
+import unittest
+
+from tests import support
+
+
+class SelectInBlocksTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = support.SQLiteDB()
+        self.db.execute("CREATE TABLE a (id INTEGER, value TEXT)")
+        for x in xrange(25):
+            self.db.execute("INSERT INTO a VALUES (?, ?)", (x, "value_%s" %x))
+
+    def test_blocks(self):
+        blocks = list(self.db.select_db_content_in_blocks("SELECT id, value FROM a", block_size=10))
+        self.assertEqual([ len(x) for x in blocks ], [10, 10, 5])
+        self.assertEqual(sorted(sum(blocks, [])), [ (x, "value_%s" %x) for x in xrange(25) ])
+
+    def test_unfinished_iteration(self):
+        blocks = self.db.select_db_content_in_blocks("SELECT id FROM a", block_size=10)
+        self.assertEqual(len(blocks.next()), 10)
+        blocks.close()
+        self.assertEqual(self.db.select_db_content("SELECT COUNT(*) FROM a"), 25)
+
+
+if __name__ == "__main__":
+    unittest.main()
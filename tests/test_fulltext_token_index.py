@@ -0,0 +1,156 @@
+"""
+Tests of the token indices used to search descriptive attributes (BianaDBaccess.create_fulltext_token_indices)
+"""
+
+import os
+import unittest
+
+from tests import support
+
+from biana.BianaDB import ConnectorDB
+from biana.BianaDB.BianaDBaccess import BianaDBaccess
+from biana.BianaDB.BianaDatabase import BianaDatabase
+
+
+DESCRIPTIONS = { 1: "Protein kinase domain",
+                 2: "Serine protein kinase",
+                 3: "Kinase inhibitor",
+                 4: "DNA binding protein",
+                 5: "Zinc finger protein",
+                 7: "Protein phosphatase 2A",
+                 9: "Tyrosine kinase receptor",
+                 12: "Binding domain of unknown function" }
+
+# Searches (list of values, any of them can match) and the external entities found
+SEARCHES = [ (["kinase"], set([1, 2, 3, 9])),
+             (["protein kinase"], set([1, 2])),
+             (["Protein", "zinc"], set([1, 2, 4, 5, 7])),
+             (["kin*"], set([1, 2, 3, 9])),
+             (["protein dom*"], set([1])),
+             (["protein kinase", "binding dom*"], set([1, 2, 12])),
+             (["missing"], set()) ]
+
+
+def create_biana_access(db):
+    """
+    Returns a BianaDBaccess object using "db", with a descriptive searchable attribute "description" (BianaDBaccess.__init__ needs a complete BIANA database)
+    """
+    biana_access = BianaDBaccess.__new__(BianaDBaccess)
+    biana_access.db = db
+    biana_access.db_optimized_for = "running"
+    biana_access.fulltext_token_index_tables = {}
+    biana_access.biana_database = BianaDatabase()
+    biana_access.biana_database.add_valid_identifier_reference_type("unique")
+    biana_access.biana_database.create_specific_database_tables()
+    biana_access.biana_database.add_valid_external_entity_attribute_type("Description", "text", "eE descriptive searchable attribute")
+    return biana_access
+
+
+def search(biana_access, values_list, use_token_index=True):
+    """
+    Returns the set of external entities whose description matches "values_list" as searched by _get_list_external_entities_IDs_by_attribute_SQLstat
+
+    If "use_token_index" is False, the equivalent MATCH ... AGAINST condition (all the words of a value are required) is used
+    """
+    table = biana_access.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT["description"]
+    match_condition = ("MATCH (%s.value)" %table, "AGAINST",
+                       "('%s' IN BOOLEAN MODE)" %" ".join([ "+%s" %x for x in values_list[0].split() ]))
+    if use_token_index:
+        condition = biana_access._get_fulltext_search_condition( attribute_identifier = "description",
+                                                                 table = table,
+                                                                 values_list = values_list,
+                                                                 match_condition = match_condition )
+    else:
+        condition = match_condition
+    return set(biana_access.db.select_db_content( biana_access.db._get_select_sql_query( tables = [table],
+                                                                                         columns = ["%s.externalEntityID" %table],
+                                                                                         join_conditions = [condition] ),
+                                                  answer_mode = "list" ))
+
+
+def insert_descriptions(biana_access, descriptions):
+    table = biana_access.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT["description"]
+    for external_entity_id, description in sorted(descriptions.iteritems()):
+        biana_access.db.insert_db_content( biana_access.db._get_insert_sql_query( table = table,
+                                                                                  column_values = (("value", description), ("externalEntityID", external_entity_id)),
+                                                                                  use_buffer = False ) )
+
+
+class TokenIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.biana_access = create_biana_access(support.SQLiteDB())
+        self.biana_access.db.execute("CREATE TABLE externalEntityDescription (value TEXT NOT NULL, externalEntityID INTEGER NOT NULL, type TEXT)")
+        insert_descriptions(self.biana_access, DESCRIPTIONS)
+        # Small blocks, so that descriptions are read in several ranges of identifiers
+        self.biana_access.create_fulltext_token_indices( block_size = 3 )
+
+    def test_index_content(self):
+        tokens = self.biana_access.db.execute("SELECT token, externalEntityID FROM externalEntityDescription_tokenIndex")
+        expected = set()
+        for external_entity_id, description in DESCRIPTIONS.iteritems():
+            expected.update([ (x, external_entity_id) for x in description.lower().split() ])
+        self.assertEqual(set(tokens), expected)
+
+    def test_searches(self):
+        for values_list, expected in SEARCHES:
+            self.assertEqual(search(self.biana_access, values_list), expected, values_list)
+
+    def test_condition_does_not_list_identifiers(self):
+        condition = self.biana_access._get_fulltext_search_condition( attribute_identifier = "description",
+                                                                      table = "A",
+                                                                      values_list = ["kinase"],
+                                                                      match_condition = None )
+        self.assertTrue("SELECT" in condition[2] and "externalEntityDescription_tokenIndex" in condition[2])
+
+    def test_boolean_operators_use_match(self):
+        match_condition = ("MATCH (A.value)", "AGAINST", "('+kinase -protein' IN BOOLEAN MODE)")
+        self.assertEqual(self.biana_access._get_fulltext_search_condition( attribute_identifier = "description",
+                                                                           table = "A",
+                                                                           values_list = ["+kinase -protein"],
+                                                                           match_condition = match_condition ), match_condition)
+
+    def test_index_is_dropped(self):
+        self.biana_access.drop_fulltext_token_indices()
+        self.assertEqual(self.biana_access.db.execute("SELECT name FROM sqlite_master WHERE name LIKE '%tokenIndex'"), [])
+        # Without index, MATCH ... AGAINST is used
+        match_condition = ("MATCH (A.value)", "AGAINST", "('kinase' IN BOOLEAN MODE)")
+        self.assertEqual(self.biana_access._get_fulltext_search_condition( attribute_identifier = "description",
+                                                                           table = "A",
+                                                                           values_list = ["kinase"],
+                                                                           match_condition = match_condition ), match_condition)
+
+
+class TokenIndexMatchTest(unittest.TestCase):
+    """
+    Compares the token index results with the ones of MATCH ... AGAINST in a MySQL server (searched words are longer than the minimum length of full text indices)
+    """
+
+    def setUp(self):
+        parameters = support.get_mysql_parameters()
+        self.dbname = "biana_test_token_index_%s" %os.getpid()
+        db = ConnectorDB.DB( dbhost = parameters["dbhost"], dbuser = parameters["dbuser"], dbpassword = parameters["dbpassword"] )
+        db.insert_db_content("CREATE DATABASE %s" %self.dbname)
+        db.use_database(self.dbname)
+        self.biana_access = create_biana_access(db)
+        db.insert_db_content( self.biana_access.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT["description"].create_mysql_query() )
+        insert_descriptions(self.biana_access, DESCRIPTIONS)
+        self.biana_access.create_fulltext_token_indices( block_size = 3 )
+
+    def tearDown(self):
+        self.biana_access.db.insert_db_content("DROP DATABASE %s" %self.dbname)
+        self.biana_access.db.close()
+
+    def test_searches(self):
+        for values_list, expected in SEARCHES:
+            match_results = set()
+            for current_value in values_list:
+                match_results.update(search(self.biana_access, [current_value], use_token_index=False))
+            self.assertEqual(search(self.biana_access, values_list), match_results, values_list)
+            self.assertEqual(match_results, expected, values_list)
+
+TokenIndexMatchTest = support.skip_without_mysql(TokenIndexMatchTest)
+
+
+if __name__ == "__main__":
+    unittest.main()
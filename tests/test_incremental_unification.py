@@ -0,0 +1,149 @@
+"""
+Tests of the incremental unification (BianaDBaccess.update_user_entities), comparing its partition of the external entities with the one of
+create_new_user_entities
+"""
+
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from tests import support
+
+import biana
+from biana.BianaDB.BianaDBaccess import BianaDBaccess
+
+
+if sys.platform.lower().startswith("win"):
+    UNIFY_PROGRAM = os.path.join(biana.__path__[0], "BianaDB", "win_unify.exe")
+else:
+    UNIFY_PROGRAM = os.path.join(biana.__path__[0], "BianaDB", "unify")
+
+
+def can_run_unify():
+    try:
+        subprocess.call([UNIFY_PROGRAM], stdout=open(os.devnull, 'w'), stderr=subprocess.STDOUT)
+    except OSError:
+        return False
+    return True
+
+
+def get_partition(rows):
+    """
+    Returns the partition of the external entities given by the list of (userEntityID, externalEntityID) rows, as a set of frozensets
+    """
+    user_entities_dict = {}
+    for (userEntityID, externalEntityID) in rows:
+        user_entities_dict.setdefault(userEntityID, set()).add(externalEntityID)
+    return set([ frozenset(x) for x in user_entities_dict.itervalues() ])
+
+
+def unify(directory, external_entities, equivalences):
+    """
+    Returns the (userEntityID, externalEntityID) rows obtained with the program used by create_new_user_entities
+    """
+    equivalences_file = os.path.join(directory, "equivalences")
+    all_file = os.path.join(directory, "all")
+    output_file = os.path.join(directory, "unification")
+    fd = open(equivalences_file, 'w')
+    fd.write("".join([ "%s\t%s\n" %x for x in equivalences ]))
+    fd.close()
+    fd = open(all_file, 'w')
+    fd.write("".join([ "%s\n" %x for x in external_entities ]))
+    fd.close()
+    subprocess.check_call([UNIFY_PROGRAM, equivalences_file, all_file, output_file], stdout=open(os.devnull, 'w'), stderr=subprocess.STDOUT)
+    fd = open(output_file)
+    rows = [ tuple(map(int, line.split())) for line in fd if line.strip() != "" ]
+    fd.close()
+    return rows
+
+
+def get_random_equivalences(rand, num_external_entities, num_equivalences):
+    """
+    Returns random equivalences between external entities 1..num_external_entities, with repeated pairs, pairs in both orders and self equivalences
+    """
+    equivalences = []
+    for x in xrange(num_equivalences):
+        eE1 = rand.randint(1, num_external_entities)
+        if rand.random() < 0.7:
+            # Equivalences are more frequent between close identifiers (i.e. entities of the same database)
+            eE2 = min(num_external_entities, max(1, eE1 + rand.randint(-10, 10)))
+        else:
+            eE2 = rand.randint(1, num_external_entities)
+        equivalences.append((eE1, eE2))
+        if rand.random() < 0.05:
+            equivalences.append((eE2, eE1))
+    return equivalences
+
+
+
+class IncrementalUnificationTest(unittest.TestCase):
+
+    def setUp(self):
+        if not can_run_unify():
+            self.skipTest("The unification program cannot be executed")
+        self.directory = tempfile.mkdtemp()
+        self.biana_access = BianaDBaccess.__new__(BianaDBaccess)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def update(self, rows, new_external_entities, equivalences):
+        """
+        Returns the rows of the unification table after merging "new_external_entities" (as update_user_entities does)
+
+        "equivalences" are the equivalences involving at least one of the new external entities
+        """
+        new_external_entities_set = set(new_external_entities)
+        external_entity_user_entity_dict = dict([ (y, x) for x, y in rows if y not in new_external_entities_set ])
+        external_entity_user_entity_dict = dict([ (x, external_entity_user_entity_dict[x]) for eq in equivalences for x in eq if x in external_entity_user_entity_dict ])
+        next_user_entity_id = max([ x[0] for x in rows ] + [0]) + 1
+
+        (new_rows, merged_user_entities) = self.biana_access._merge_user_entity_components( equivalences = equivalences,
+                                                                                           new_external_entities = new_external_entities,
+                                                                                           external_entity_user_entity_dict = external_entity_user_entity_dict,
+                                                                                           next_user_entity_id = next_user_entity_id )
+        for userEntityID, target_userEntityID in merged_user_entities.iteritems():
+            self.assertTrue(target_userEntityID < userEntityID)
+        self.assertEqual(len(new_rows), len(new_external_entities_set))
+
+        return [ (merged_user_entities.get(x, x), y) for x, y in rows ] + new_rows
+
+    def test_random_updates(self):
+        for seed in xrange(20):
+            rand = random.Random(seed)
+            num_external_entities = rand.randint(50, 400)
+            equivalences = get_random_equivalences(rand, num_external_entities, rand.randint(num_external_entities/2, num_external_entities*2))
+
+            # External entities are added in batches with increasing identifiers, as parsed databases
+            limits = sorted(rand.sample(xrange(1, num_external_entities), rand.randint(1, 5))) + [num_external_entities]
+
+            rows = unify(self.directory, range(1, limits[0]+1), [ x for x in equivalences if max(x) <= limits[0] ])
+
+            for previous_limit, limit in zip(limits[:-1], limits[1:]):
+                new_external_entities = range(previous_limit+1, limit+1)
+                new_equivalences = [ x for x in equivalences if max(x) > previous_limit and max(x) <= limit ]
+                rows = self.update(rows, new_external_entities, new_equivalences)
+
+                expected_rows = unify(self.directory, range(1, limit+1), [ x for x in equivalences if max(x) <= limit ])
+                self.assertEqual(get_partition(rows), get_partition(expected_rows), "seed %s, external entities up to %s" %(seed, limit))
+                # Each external entity is in a single user entity
+                self.assertEqual(len(rows), limit)
+
+    def test_updates_without_equivalences(self):
+        rows = unify(self.directory, range(1, 11), [(1, 2), (3, 4)])
+        rows = self.update(rows, range(11, 16), [])
+        self.assertEqual(get_partition(rows), get_partition(unify(self.directory, range(1, 16), [(1, 2), (3, 4)])))
+
+    def test_new_entity_merges_existing_user_entities(self):
+        rows = unify(self.directory, range(1, 5), [(1, 2), (3, 4)])
+        rows = self.update(rows, [5], [(2, 5), (5, 4)])
+        self.assertEqual(get_partition(rows), set([frozenset([1, 2, 3, 4, 5])]))
+        self.assertEqual(len(set([ x[0] for x in rows ])), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
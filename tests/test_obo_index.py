@@ -0,0 +1,83 @@
+"""
+Tests of the index from PSI-MI term names to MI identifiers (BianaParser.obo_index)
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests import support
+
+from biana.BianaParser import obo_index
+
+
+OBO_CONTENT = """format-version: 1.2
+
+[Term]
+id: MI:0018
+name: two hybrid
+exact_synonym: "2 hybrid"
+related_synonym: "Y2H"
+
+[Term]
+id: MI:0006
+name: anti bait coimmunoprecipitation
+
+[Typedef]
+id: part_of
+name: part of
+"""
+
+
+class OBOIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.obo_dir = os.path.join(self.directory, "ontologies")
+        os.mkdir(self.obo_dir)
+        self.obo_file = os.path.join(self.obo_dir, "psi-mi.obo")
+        obo_fd = open(self.obo_file, 'w')
+        obo_fd.write(OBO_CONTENT)
+        obo_fd.close()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def check_index(self, index):
+        self.assertEqual(index.get("Two Hybrid"), "0018")
+        self.assertEqual(index["y2h"], "0018")
+        self.assertEqual(index.get("anti bait coimmunoprecipitation"), "0006")
+        self.assertFalse(index.has_key("part of"))
+        self.assertRaises(KeyError, index.__getitem__, "missing")
+
+    def test_index_is_written_in_the_cache_directory(self):
+        cache_dir = os.path.join(self.directory, "cache")
+        index = obo_index.get_obo_index(self.obo_file, cache_dir=cache_dir)
+        self.check_index(index)
+        index.close()
+        self.assertEqual(os.listdir(self.obo_dir), ["psi-mi.obo"])
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+
+        # The index is reused until the obo file changes
+        index_file = os.path.join(cache_dir, os.listdir(cache_dir)[0])
+        os.utime(self.obo_file, (1000, 1000))
+        os.utime(index_file, (2000, 2000))
+        self.assertEqual(obo_index.get_obo_index(self.obo_file, cache_dir=cache_dir).index_file, index_file)
+        self.assertEqual(os.path.getmtime(index_file), 2000)
+        os.utime(self.obo_file, (3000, 3000))
+        self.check_index(obo_index.get_obo_index(self.obo_file, cache_dir=cache_dir))
+        self.assertTrue(os.path.getmtime(index_file) > 3000)
+
+    def test_index_in_memory_when_it_cannot_be_written(self):
+        # A file is used as cache directory, so that the index cannot be written even if tests are run as root
+        cache_dir = os.path.join(self.directory, "not_a_directory")
+        open(cache_dir, 'w').close()
+        index = obo_index.get_obo_index(self.obo_file, cache_dir=cache_dir)
+        self.check_index(index)
+        index.close()
+        self.assertEqual(os.listdir(self.obo_dir), ["psi-mi.obo"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+"""
+Tests of the buffered table writers (output_utilities.TableWriter), comparing their output with get_tabulated_table and get_html_table
+"""
+
+import random
+import unittest
+
+from tests import support
+
+from biana.BianaObjects import output_utilities
+
+
+COLUMNS = ["User Entity Id", "Name", "Value"]
+
+
+def get_random_rows(rand, num_rows):
+    return [ (rand.randint(1, 100000), rand.choice(["protein", "a & b", "<b>gene</b>", "", "x"*rand.randint(1, 50)]), rand.choice([None, 1.5, 0, "P12345"]))
+             for x in xrange(num_rows) ]
+
+
+
+class TableWriterTest(unittest.TestCase):
+
+    def setUp(self):
+        self.blocks = []
+        self.num_flushes = 0
+
+    def out_method(self, data):
+        self.blocks.append(data)
+
+    def flush_method(self):
+        self.num_flushes += 1
+
+    def check_blocks(self, buffer_size):
+        # Blocks are sent when they reach buffer_size (the last one is sent by close)
+        self.assertTrue(len(self.blocks) > 2)
+        for current_block in self.blocks[:-1]:
+            self.assertTrue(len(current_block) >= buffer_size)
+        self.assertEqual(self.num_flushes, len(self.blocks))
+
+    def test_tabulated_table(self):
+        rand = random.Random(0)
+        rows = get_random_rows(rand, 200)
+        for add_rows in (False, True):
+            self.blocks = []
+            self.num_flushes = 0
+            writer = output_utilities.get_table_writer("tabulated", self.out_method, COLUMNS, buffer_size=100, flush_method=self.flush_method)
+            if add_rows:
+                for current_index in xrange(0, len(rows), 7):
+                    writer.add_rows(rows[current_index:current_index+7])
+            else:
+                for current_row in rows:
+                    writer.add_row(current_row)
+            writer.close()
+            self.assertEqual("".join(self.blocks), output_utilities.get_tabulated_table(rows, COLUMNS))
+            self.assertEqual(writer.num_rows, len(rows))
+            self.check_blocks(100)
+
+    def test_tabulated_table_without_columns(self):
+        rows = get_random_rows(random.Random(1), 50)
+        writer = output_utilities.TabulatedTableWriter(self.out_method, buffer_size=64)
+        writer.write_header()
+        writer.add_rows(rows[:10])
+        for current_row in rows[10:]:
+            writer.add_row(current_row)
+        writer.close()
+        self.assertEqual("".join(self.blocks), output_utilities.get_tabulated_table(rows))
+
+    def test_empty_tables(self):
+        for columns in (None, COLUMNS):
+            self.blocks = []
+            writer = output_utilities.TabulatedTableWriter(self.out_method, columns=columns, buffer_size=10)
+            writer.write_header()
+            writer.close()
+            self.assertEqual("".join(self.blocks), output_utilities.get_tabulated_table([], columns))
+        self.blocks = []
+        writer = output_utilities.get_table_writer("xml", self.out_method, COLUMNS, attributes=[("id", "biana")], buffer_size=10)
+        writer.close()
+        self.assertEqual("".join(self.blocks), output_utilities.get_html_table(COLUMNS, [], attributes=[("id", "biana")]))
+
+    def test_html_table(self):
+        rand = random.Random(2)
+        rows = get_random_rows(rand, 200)
+        attributes = [("id", "biana"), ("title", "Table")]
+        writer = output_utilities.get_table_writer("xml", self.out_method, COLUMNS, attributes=attributes, buffer_size=256, flush_method=self.flush_method)
+        for current_row in rows:
+            writer.add_row(current_row)
+        writer.close()
+        self.assertEqual("".join(self.blocks), output_utilities.get_html_table(COLUMNS, rows, attributes=attributes))
+        self.check_blocks(256)
+
+    def test_html_table_with_row_ids(self):
+        rand = random.Random(3)
+        rows = get_random_rows(rand, 100)
+        row_ids = [ "uE%s" %x[0] for x in rows ]
+        writer = output_utilities.HTMLTableWriter(self.out_method, COLUMNS, buffer_size=128, flush_method=self.flush_method)
+        writer.write_header()
+        writer.add_rows(rows[:30], row_ids[:30])
+        for current_row, current_row_id in zip(rows[30:], row_ids[30:]):
+            writer.add_row(current_row, current_row_id)
+        writer.close()
+        self.assertEqual("".join(self.blocks), output_utilities.get_html_table(COLUMNS, rows, rowIDs=row_ids))
+        self.check_blocks(128)
+
+    def test_invalid_format(self):
+        self.assertRaises(ValueError, output_utilities.get_table_writer, "csv", self.out_method, COLUMNS)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,269 @@
+"""
+Tests of the parsing checkpoints (BianaParser.checkpoint) and of the rollback of failed parsings
+"""
+
+import cPickle
+import os
+import re
+import shutil
+import StringIO
+import sys
+import tempfile
+import time
+import unittest
+
+from tests import support
+
+from biana.BianaDB.BianaDBaccess import BianaDBaccess
+from biana.BianaDB.BianaDatabase import BianaDatabase
+from biana.BianaParser.bianaParser import BianaParser, CheckpointedInputFile
+from biana.BianaParser.uniprotParser import UniprotParser
+
+
+class ExternalDatabaseStub(object):
+
+    def get_id(self):
+        return 1
+
+
+class ParsingCheckpointTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+        db = support.SQLiteDB()
+        db.execute("CREATE TABLE BianaDatabase (last_externalEntityID INTEGER, last_externalEntityRelationParticipantID INTEGER, last_proteinSequenceID INTEGER, last_nucleotideSequenceID INTEGER, last_keyID INTEGER)")
+        db.execute("INSERT INTO BianaDatabase VALUES (10, 0, 0, 0, 0)")
+        db.execute("CREATE TABLE externalDatabase (externalDatabaseID INTEGER, parsingTime INTEGER)")
+        db.execute("INSERT INTO externalDatabase VALUES (1, NULL)")
+        db.execute("CREATE TABLE externalEntity (externalEntityID INTEGER PRIMARY KEY, type TEXT)")
+        db.execute("CREATE TABLE ExternalEntityOntology (externalEntityID INTEGER PRIMARY KEY, name TEXT)")
+        db.is_locked = True
+
+        biana_access = BianaDBaccess.__new__(BianaDBaccess)
+        # BianaDBaccess.__init__ needs a MySQL server: only the attributes used by the checkpoints and the rollback are set
+        biana_access.db = db
+        biana_access.biana_database = BianaDatabase()
+        biana_access.key_attribute_ids = {}
+        biana_access.temporal_data = { "relations_hierarchy_parents": {} }
+        for table, attribute in [ ("externalEntity", "externalEntityID"), ("externalEntityRelationParticipant", "externalEntityRelationParticipantID"),
+                                  ("sequenceProtein", "proteinSequenceID"), ("sequenceNucleotide", "nucleotideSequenceID"),
+                                  ("externalDatabaseAttributeTransfer", "keyID") ]:
+            db.add_autoincrement_columns( table = table, attribute = attribute )
+
+        self.lines = [ "entry %s\n" %x for x in xrange(200) ]
+
+        parser = BianaParser.__new__(BianaParser)
+        parser.biana_access = biana_access
+        parser.checkpoint_file = os.path.join(self.temp_dir, "checkpoint")
+        parser.input_file = "input.txt"
+        parser.input_file_fd = CheckpointedInputFile(StringIO.StringIO("".join(self.lines)))
+        parser.database = ExternalDatabaseStub()
+        parser.log = {}
+        parser.verbose = False
+        parser.initial_time = time.time()
+        parser.checkpoint_buffer_flushes = 0
+        parser.checkpoint_max_buffer_flushes = 20
+        parser.pending_checkpoint = None
+        parser.last_checkpoint = None
+        self.parser = parser
+        self.db = db
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def parse_entries(self, number_of_entries):
+        """
+        Inserts the next entries of the input file as the parsers do. The rows of the ontology table are sent every 3 entries, and the ones of the external entity
+        table only when the buffer is emptied
+        """
+        for x in xrange(number_of_entries):
+            line = self.parser.input_file_fd.readline()
+            external_entity_id = self.parser.biana_access._get_new_external_entity_id()
+            self.db.insert_db_content( self.db._get_insert_sql_query( table = "externalEntity",
+                                                                      column_values = (("externalEntityID", external_entity_id), ("type", "protein")) ) )
+            self.db.insert_db_content( self.db._get_insert_sql_query( table = "ExternalEntityOntology",
+                                                                      column_values = (("externalEntityID", external_entity_id), ("name", line.strip())),
+                                                                      max_elements_in_buffer = 3 ) )
+            self.parser.checkpoint()
+
+    def get_ids(self, table):
+        return [ x[0] for x in self.db.execute("SELECT externalEntityID FROM %s ORDER BY externalEntityID" %table) ]
+
+    def test_checkpoint_does_not_empty_buffer(self):
+        self.parse_entries(10)
+        # Rows of the external entity table are kept in the buffer until the checkpoint has waited for checkpoint_max_buffer_flushes flushes
+        self.assertEqual(self.get_ids("externalEntity"), [])
+        self.assertEqual(self.parser.last_checkpoint, None)
+        self.assertFalse(os.path.exists(self.parser.checkpoint_file))
+
+    def test_stored_checkpoint_is_committed(self):
+        self.parse_entries(100)
+        self.assertNotEqual(self.parser.last_checkpoint, None)
+
+        checkpoint_fd = file(self.parser.checkpoint_file, 'rb')
+        checkpoint = cPickle.load(checkpoint_fd)
+        checkpoint_fd.close()
+
+        last_id = checkpoint["externalEntityID"]
+        self.assertEqual(last_id, self.parser.last_checkpoint["externalEntityID"])
+        # All the rows of the entries before the checkpoint are in the database and the offset points to the next entry
+        self.assertEqual([ x for x in self.get_ids("externalEntity") if x <= last_id ], range(11, last_id+1))
+        self.assertEqual([ x for x in self.get_ids("ExternalEntityOntology") if x <= last_id ], range(11, last_id+1))
+        self.assertEqual(checkpoint["input_file_offset"], len("".join(self.lines[:last_id-10])))
+
+    def test_rollback_after_checkpoint(self):
+        self.parse_entries(100)
+        last_id = self.parser.last_checkpoint["externalEntityID"]
+        self.parse_entries(25)
+        self.assertTrue(max(self.get_ids("ExternalEntityOntology")) > last_id)
+
+        self.parser.rollback_failed_parsing()
+
+        self.assertEqual(self.get_ids("externalEntity"), range(11, last_id+1))
+        self.assertEqual(self.get_ids("ExternalEntityOntology"), range(11, last_id+1))
+        # The external database being parsed is kept to resume the parsing
+        self.assertEqual(self.db.execute("SELECT externalDatabaseID FROM externalDatabase"), [(1,)])
+        self.assertTrue(os.path.exists(self.parser.checkpoint_file))
+
+    def test_rollback_without_checkpoint(self):
+        self.parse_entries(10)
+        self.db._empty_buffer()
+        self.assertEqual(len(self.get_ids("externalEntity")), 10)
+
+        self.parser.rollback_failed_parsing()
+
+        self.assertEqual(self.get_ids("externalEntity"), [])
+        self.assertEqual(self.get_ids("ExternalEntityOntology"), [])
+        self.assertEqual(self.db.execute("SELECT externalDatabaseID FROM externalDatabase"), [])
+
+
+class RollbackInsertedTablesTest(unittest.TestCase):
+
+    TABLE_REGEX = re.compile("(?:FROM|INTO|UPDATE|JOIN|TABLE)\s+(\w+)", re.IGNORECASE)
+
+    def setUp(self):
+        db = support.SQLiteDB()
+        db.execute("CREATE TABLE BianaDatabase (last_externalEntityID INTEGER, last_externalEntityRelationParticipantID INTEGER, last_proteinSequenceID INTEGER, last_nucleotideSequenceID INTEGER, last_keyID INTEGER)")
+        db.execute("INSERT INTO BianaDatabase VALUES (10, 0, 0, 0, 0)")
+        db.execute("CREATE TABLE externalDatabase (externalDatabaseID INTEGER, parsingTime INTEGER)")
+        db.execute("INSERT INTO externalDatabase VALUES (1, 100)")
+        db.execute("CREATE TABLE externalEntity (externalEntityID INTEGER PRIMARY KEY, type TEXT)")
+        db.execute("CREATE TABLE externalEntityuniprotAccession (value TEXT, externalEntityID INTEGER)")
+        db.execute("INSERT INTO externalEntity VALUES (5, 'protein')")
+        db.is_locked = True
+
+        biana_access = BianaDBaccess.__new__(BianaDBaccess)
+        biana_access.db = db
+        biana_access.biana_database = BianaDatabase()
+        # Tables of the database that are not modified by the parsing (and are not created in the SQLite database)
+        biana_access.biana_database.add_valid_identifier_reference_type("unique")
+        biana_access.biana_database.add_valid_external_entity_relation_type("interaction")
+        biana_access.biana_database.create_specific_database_tables()
+        for attribute in ("uniprotAccession", "geneSymbol", "taxID"):
+            biana_access.biana_database.add_valid_external_entity_attribute_type(attribute, "varchar(255)", "eE identifier attribute")
+        biana_access.key_attribute_ids = {}
+        for table, attribute in [ ("externalEntity", "externalEntityID"), ("externalEntityRelationParticipant", "externalEntityRelationParticipantID"),
+                                  ("sequenceProtein", "proteinSequenceID"), ("sequenceNucleotide", "nucleotideSequenceID"),
+                                  ("externalDatabaseAttributeTransfer", "keyID") ]:
+            db.add_autoincrement_columns( table = table, attribute = attribute )
+        self.biana_access = biana_access
+        self.db = db
+
+    def insert_entries(self, number_of_entries):
+        """
+        Inserts a new external database and its external entities through the BianaDBaccess connection, as a parser does
+        """
+        self.db.insert_db_content( self.db._get_insert_sql_query( table = "externalDatabase",
+                                                                  column_values = (("externalDatabaseID", 2),) ) )
+        for x in xrange(number_of_entries):
+            external_entity_id = self.biana_access._get_new_external_entity_id()
+            self.db.insert_db_content( self.db._get_insert_sql_query( table = "externalEntity",
+                                                                      column_values = (("externalEntityID", external_entity_id), ("type", "protein")) ) )
+            self.db.insert_db_content( self.db._get_insert_sql_query( table = "externalEntityuniprotAccession",
+                                                                      column_values = (("value", "P%s" %x), ("externalEntityID", external_entity_id)) ) )
+        self.db._empty_buffer()
+
+    def test_only_inserted_tables_are_queried(self):
+        self.insert_entries(25)
+        inserted_tables = set(self.db.get_inserted_tables())
+        self.assertEqual(inserted_tables, set(["externalDatabase", "externalEntity", "externalEntityuniprotAccession"]))
+        self.assertTrue(len([ x for x in self.biana_access.biana_database.get_tables() if x.has_field("externalEntityID") ]) > len(inserted_tables))
+
+        num_queries = len(self.db.queries)
+        stderr = sys.stderr
+        sys.stderr = StringIO.StringIO()    # progress of the rollback
+        try:
+            self.biana_access._rollback(only_inserted_tables=True, chunk_size=10)
+        finally:
+            sys.stderr = stderr
+        rollback_queries = self.db.queries[num_queries:]
+
+        for query in rollback_queries:
+            tables = set(self.TABLE_REGEX.findall(query))
+            self.assertTrue(len(tables) > 0, query)
+            if query.upper().startswith("SELECT"):
+                # Last stable identifiers are read from the version table
+                tables.discard("BianaDatabase")
+            self.assertTrue(tables.issubset(inserted_tables), query)
+        # Rows are deleted by ranges of chunk_size identifiers
+        self.assertEqual(len([ x for x in rollback_queries if x.startswith("DELETE FROM externalEntity ") ]), 3)
+
+        self.assertEqual(self.db.execute("SELECT externalEntityID FROM externalEntity"), [(5,)])
+        self.assertEqual(self.db.execute("SELECT externalEntityID FROM externalEntityuniprotAccession"), [])
+        self.assertEqual(self.db.execute("SELECT externalDatabaseID FROM externalDatabase"), [(1,)])
+
+
+
+class CheckpointArgumentsTest(unittest.TestCase):
+
+    def check_arguments(self, parser_class, checkpoint_file, resume):
+        parser = parser_class.__new__(parser_class)
+        parser.checkpoint_file = checkpoint_file
+        parser.resume = resume
+        stderr = sys.stderr
+        sys.stderr = StringIO.StringIO()
+        try:
+            parser.check_checkpoint_arguments()
+        except SystemExit:
+            return sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+        return None
+
+    def test_parsers_without_checkpoints(self):
+        self.assertTrue("does not store parsing checkpoints" in self.check_arguments(BianaParser, "checkpoint", None))
+        self.assertTrue("does not store parsing checkpoints" in self.check_arguments(BianaParser, "checkpoint", True))
+        self.assertEqual(self.check_arguments(BianaParser, None, None), None)
+
+    def test_parsers_with_checkpoints(self):
+        self.assertEqual(self.check_arguments(UniprotParser, "checkpoint", None), None)
+        self.assertEqual(self.check_arguments(UniprotParser, "checkpoint", True), None)
+        self.assertTrue("checkpoint-file" in self.check_arguments(UniprotParser, None, True))
+
+
+
+class BufferStateTest(unittest.TestCase):
+
+    def test_uncommitted_buffer_keys(self):
+        db = support.SQLiteDB()
+        db.execute("CREATE TABLE a (id INTEGER)")
+        db.execute("CREATE TABLE b (id INTEGER)")
+        db.insert_db_content( db._get_insert_sql_query( table = "a", column_values = (("id", 1),), max_elements_in_buffer = 1 ) )
+        db.insert_db_content( db._get_insert_sql_query( table = "b", column_values = (("id", 1),) ) )
+
+        buffer_state = db.get_buffer_state()
+        self.assertEqual(len(db.get_uncommitted_buffer_keys(buffer_state)), 2)
+
+        # Buffer element of "a" is full and sent with the next insert
+        db.insert_db_content( db._get_insert_sql_query( table = "a", column_values = (("id", 2),), max_elements_in_buffer = 1 ) )
+        self.assertEqual(db.get_uncommitted_buffer_keys(buffer_state), [db._get_buffer_key("b", ["id"])])
+
+        db._empty_buffer( key_list = db.get_uncommitted_buffer_keys(buffer_state) )
+        self.assertEqual(db.get_uncommitted_buffer_keys(buffer_state), [])
+        self.assertEqual(db.execute("SELECT id FROM a"), [(1,)])
+        self.assertEqual(db.execute("SELECT id FROM b"), [(1,)])
+
+
+if __name__ == "__main__":
+    unittest.main()
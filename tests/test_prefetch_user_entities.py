@@ -0,0 +1,79 @@
+"""
+Tests of the number of queries used to get the user entities of a session (BianaSessionManager.prefetch_user_entities)
+"""
+
+import re
+import unittest
+
+from tests import support
+
+from biana.BianaDB.BianaDBaccess import BianaDBaccess
+from biana.BianaDB.BianaDatabase import BianaDatabase
+from biana.BianaObjects.BianaSessionManager import BianaSessionManager
+
+
+NUM_USER_ENTITIES = 25000
+
+
+def create_session(db):
+    """
+    Returns a BianaSessionManager object using a BianaDBaccess object on "db", with the unification protocol "test".
+    User entity i has the external entities 2*i and 2*i+1 (BianaSessionManager.__init__ needs a complete BIANA database)
+    """
+    biana_access = BianaDBaccess.__new__(BianaDBaccess)
+    biana_access.db = db
+    biana_access.available_unification_protocols = { "test": None }
+    biana_access.biana_database = BianaDatabase()
+    biana_access.biana_database.create_specific_database_tables()
+
+    user_entity_table = biana_access.biana_database.USER_ENTITY_TABLE.get_table_name()
+    db.execute("CREATE TABLE %s (userEntityID INTEGER, externalEntityID INTEGER)" %user_entity_table)
+    db.db.connection.executemany("INSERT INTO %s VALUES (?, ?)" %user_entity_table,
+                                 [ (x, 2*x+y) for x in xrange(1, NUM_USER_ENTITIES+1) for y in (0, 1) ])
+
+    session = BianaSessionManager.__new__(BianaSessionManager)
+    session.dbAccess = biana_access
+    session.unification_protocol_name = "test"
+    session.dictUserEntity = {}
+    return session
+
+
+
+class PrefetchUserEntitiesTest(unittest.TestCase):
+
+    def setUp(self):
+        # Without maximum packet size, chunks have 10000 user entities. Chunks are executed through the same connection
+        self.db = support.SQLiteDB(max_packet=None)
+        self.db.max_pool_size = 1
+        self.session = create_session(self.db)
+
+    def get_num_queries(self, function, *args):
+        num_queries = len(self.db.queries)
+        function(*args)
+        return len(self.db.queries) - num_queries
+
+    def test_one_query_by_chunk(self):
+        user_entity_ids = range(1, NUM_USER_ENTITIES+1)
+        self.assertEqual(self.get_num_queries(self.session.prefetch_user_entities, user_entity_ids), 3)
+        self.assertEqual(self.session.get_user_entity(1).get_externalEntitiesIds_set(), set([2, 3]))
+        self.assertEqual(self.session.get_user_entity(NUM_USER_ENTITIES).get_externalEntitiesIds_set(), set([2*NUM_USER_ENTITIES, 2*NUM_USER_ENTITIES+1]))
+
+    def test_prefetched_user_entities_are_not_queried(self):
+        self.session.prefetch_user_entities(range(1, 101))
+        self.assertEqual(self.get_num_queries(self.session.prefetch_user_entities, range(1, 101)), 0)
+        self.assertEqual(self.get_num_queries(lambda: [ self.session.get_user_entity(x) for x in xrange(1, 101) ]), 0)
+        # Only the user entities not fetched before are queried
+        self.assertEqual(self.get_num_queries(self.session.prefetch_user_entities, range(51, 151)), 1)
+        queried_ids = re.search(r"IN \((.*?)\)", self.db.queries[-1]).group(1).split(",")
+        self.assertEqual(sorted(map(int, queried_ids)), range(101, 151))
+
+    def test_get_user_entity_queries_each_user_entity(self):
+        self.assertEqual(self.get_num_queries(lambda: [ self.session.get_user_entity(x) for x in xrange(1, 101) ]), 100)
+
+    def test_non_numeric_identifiers_are_not_queried(self):
+        self.assertEqual(self.get_num_queries(self.session.prefetch_user_entities, ["node_a", "node_b"]), 0)
+        self.assertEqual(self.session.get_user_entity("node_a").get_externalEntitiesIds_set(), set())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+"""
+Tests of the unification of promiscuous external entities (BianaDBaccess._unify_promiscuous_external_entities), comparing the grouped queries with
+the previous query for each unification atom element
+"""
+
+import random
+import unittest
+
+from tests import support
+
+from biana.BianaDB.BianaDBaccess import BianaDBaccess
+from biana.BianaDB.BianaDatabase import BianaDatabase
+from biana.BianaObjects.ExternalDatabase import ExternalDatabase
+from biana.BianaObjects.UnificationProtocol import UnificationProtocol, UnificationAtomElement
+
+
+ATTRIBUTES = ["uniprotAccession", "geneSymbol", "taxID", "pdb"]
+PROMISCUOUS_DATABASES = set([5, 6])
+
+UNIFICATION_ATOMS = [ (1, 5, ["uniprotAccession"]),
+                      (2, 5, ["uniprotAccession"]),
+                      (3, 5, ["geneSymbol", "taxID"]),
+                      (5, 2, ["taxID", "geneSymbol"]),      # Same group as the previous one
+                      (4, 5, ["geneSymbol"]),
+                      (1, 6, ["pdb"]),
+                      (3, 6, ["pdb"]),
+                      (2, 6, ["uniprotAccession", "taxID"]),
+                      (1, 2, ["uniprotAccession"]),         # Not promiscuous
+                      (5, 6, ["uniprotAccession"]) ]        # Both promiscuous
+
+
+def create_promiscuous_access(db, seed, num_external_entities=300):
+    """
+    Returns a BianaDBaccess object using "db", with the unification protocol "test", random external entities of the databases 1 to 6 (5 and 6 are
+    promiscuous) and the user entities of the non promiscuous ones
+    """
+
+    rand = random.Random(seed)
+
+    biana_access = BianaDBaccess.__new__(BianaDBaccess)
+    biana_access.db = db
+    biana_access.available_unification_protocols = { "test": UnificationProtocol("test", 1, id="1") }
+    biana_access.validSources = True
+    biana_access.valid_source_database_ids = dict([ (x, ExternalDatabase("db%s" %x, "1", "", "", "uniprotAccession", externalDatabaseID=x, isPromiscuous=x in PROMISCUOUS_DATABASES))
+                                                    for x in xrange(1, 7) ])
+    biana_access.biana_database = BianaDatabase()
+    biana_access.biana_database.add_valid_identifier_reference_type("unique")
+    biana_access.biana_database.add_valid_identifier_reference_type("previous")
+    biana_access.biana_database.add_valid_external_entity_relation_type("interaction")
+    biana_access.biana_database.create_specific_database_tables()
+    for attribute in ATTRIBUTES[:-1]:
+        biana_access.biana_database.add_valid_external_entity_attribute_type(attribute, "varchar(255)", "eE identifier attribute")
+    biana_access.biana_database.add_valid_external_entity_attribute_type("pdb", "char(4)", "ee special attribute", [("chain", "char(1)", 1)])
+
+    protocol = UnificationProtocol("test", 1, id="1")
+    for database_id_A, database_id_B, attribute_list in UNIFICATION_ATOMS:
+        protocol.add_unification_atom_elements(UnificationAtomElement(database_id_A, database_id_B, attribute_list))
+
+    unification_table = biana_access._get_user_entity_table_name("test")
+    db.execute("CREATE TABLE externalEntity (externalEntityID INTEGER PRIMARY KEY, externalDatabaseID INTEGER, type TEXT)")
+    for attribute in ATTRIBUTES:
+        if attribute == "pdb":
+            db.execute("CREATE TABLE externalEntitypdb (value TEXT, externalEntityID INTEGER, type TEXT, chain TEXT)")
+        else:
+            db.execute("CREATE TABLE externalEntity%s (value TEXT, externalEntityID INTEGER, type TEXT)" %attribute)
+    db.execute("CREATE TABLE %s (userEntityID INTEGER, externalEntityID INTEGER, PRIMARY KEY (userEntityID, externalEntityID))" %unification_table)
+
+    user_entity_id = 0
+    for external_entity_id in xrange(1, num_external_entities+1):
+        database_id = rand.randint(1, 6)
+        db.execute("INSERT INTO externalEntity VALUES (?, ?, ?)", (external_entity_id, database_id, rand.choice(["protein", "protein", "relation"])))
+        for attribute in ATTRIBUTES:
+            for x in xrange(rand.choice([0, 1, 1, 2])):
+                value = "%s%s" %(attribute, rand.randint(1, 15))
+                reference_type = rand.choice(["unique", "unique", "unique", "previous"])
+                if attribute == "pdb":
+                    db.execute("INSERT INTO externalEntitypdb VALUES (?, ?, ?, ?)", (value, external_entity_id, reference_type, rand.choice(["A", "B"])))
+                else:
+                    db.execute("INSERT INTO externalEntity%s VALUES (?, ?, ?)" %attribute, (value, external_entity_id, reference_type))
+        if database_id not in PROMISCUOUS_DATABASES:
+            if user_entity_id == 0 or rand.random() < 0.8:
+                user_entity_id += 1
+            db.execute("INSERT INTO %s VALUES (?, ?)" %unification_table, (user_entity_id, external_entity_id))
+
+    return (biana_access, protocol)
+
+
+def get_atom_equivalences(biana_access, protocol, min_external_entity_id=None):
+    """
+    Returns the set of (userEntityID, externalEntityID) rows selected by the previous unification of promiscuous external entities, with a query for
+    each unification atom element
+    """
+
+    unification_table = biana_access._get_user_entity_table_name(unification_protocol_name=protocol.description)
+    equivalences = set()
+
+    for actual_unification_atom_element in protocol.get_unification_atom_elements():
+        db_id_A = actual_unification_atom_element.get_externalDatabaseID_A()
+        db_id_B = actual_unification_atom_element.get_externalDatabaseID_B()
+        if not (biana_access.get_external_database(database_id = db_id_A).get_promiscuity() ^ biana_access.get_external_database(database_id = db_id_B).get_promiscuity()):
+            continue
+        if biana_access.get_external_database(database_id = db_id_A).get_promiscuity():
+            promiscuous_db_id, non_promiscuous_db_id = db_id_A, db_id_B
+        else:
+            promiscuous_db_id, non_promiscuous_db_id = db_id_B, db_id_A
+
+        attribute_list = actual_unification_atom_element.get_external_attribute_list()
+
+        tables = [ (unification_table, "u"),
+                   (biana_access.biana_database.EXTERNAL_ENTITY_TABLE, "eE1"),
+                   (biana_access.biana_database.EXTERNAL_ENTITY_TABLE, "eE2") ]
+        join_conditions = [ ("eE1.externalEntityID", "=", "u.externalEntityID") ]
+        fixed_conditions = [ ("eE2.type","!=","relation"), ("eE1.externalDatabaseID","=",non_promiscuous_db_id), ("eE2.externalDatabaseID","=",promiscuous_db_id) ]
+        for attribute_index in xrange(len(attribute_list)):
+            unifying_attribute = attribute_list[attribute_index]
+            tables.append( (biana_access.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[unifying_attribute], "a1_%s" % attribute_index) )
+            tables.append( (biana_access.biana_database.EXTERNAL_ENTITY_ATTRIBUTE_TABLES_DICT[unifying_attribute], "a2_%s" % attribute_index) )
+            join_conditions.append( ("a1_%s.value" % attribute_index,"=","a2_%s.value" % attribute_index) )
+            join_conditions.append( ("eE1.externalEntityID","=","a1_%s.externalEntityID" % attribute_index) )
+            join_conditions.append( ("eE2.externalEntityID","=","a2_%s.externalEntityID" % attribute_index) )
+            fixed_conditions.append( ("a1_%s.type" % attribute_index,"!=","previous") )
+            fixed_conditions.append( ("a2_%s.type" % attribute_index,"!=","previous") )
+            if unifying_attribute.lower()=="pdb":
+                join_conditions.append( ("a1_%s.chain"%attribute_index,"=","a2_%s.chain"%attribute_index) )
+
+        rows = biana_access.db.select_db_content( biana_access.db._get_select_sql_query( tables = tables,
+                                                                                         columns = ["userEntityID", "eE2.externalEntityID", "eE1.externalEntityID"],
+                                                                                         join_conditions = join_conditions,
+                                                                                         fixed_conditions = fixed_conditions ),
+                                                  answer_mode = "raw" )
+        equivalences.update([ (int(x[0]), int(x[1])) for x in rows if min_external_entity_id is None or max(int(x[1]), int(x[2])) > min_external_entity_id ])
+
+    return equivalences
+
+
+
+class PromiscuousUnificationTest(unittest.TestCase):
+
+    def create_access(self, seed):
+        self.db = support.SQLiteDB()
+        self.db.max_pool_size = 1
+        return create_promiscuous_access(self.db, seed)
+
+    def get_rows(self, biana_access):
+        return self.db.execute("SELECT userEntityID, externalEntityID FROM %s" %biana_access._get_user_entity_table_name("test"))
+
+    def test_grouped_queries_add_the_same_rows(self):
+        for seed in xrange(10):
+            (biana_access, protocol) = self.create_access(seed)
+            previous_rows = set(self.get_rows(biana_access))
+            expected_rows = previous_rows | get_atom_equivalences(biana_access, protocol)
+            self.assertTrue(len(expected_rows) > len(previous_rows))
+
+            num_queries = len(self.db.queries)
+            biana_access._unify_promiscuous_external_entities( protocol = protocol )
+            # A query for each promiscuous database and set of unifying attributes (instead of one for each of the 8 atoms with a promiscuous database)
+            self.assertEqual(len(self.db.queries) - num_queries, 5)
+
+            rows = self.get_rows(biana_access)
+            self.assertEqual(len(rows), len(set(rows)))
+            self.assertEqual(set(rows), expected_rows, "seed %s" %seed)
+
+            # Promiscuous external entities unified again are ignored
+            biana_access._unify_promiscuous_external_entities( protocol = protocol )
+            self.assertEqual(sorted(self.get_rows(biana_access)), sorted(rows))
+
+    def test_only_new_equivalences(self):
+        for seed in xrange(5):
+            (biana_access, protocol) = self.create_access(seed)
+            # External entities after 200 are the new ones, already in the user entities table as when update_user_entities unifies the promiscuous ones
+            min_external_entity_id = 200
+            previous_rows = set(self.get_rows(biana_access))
+            expected_rows = previous_rows | get_atom_equivalences(biana_access, protocol, min_external_entity_id = min_external_entity_id)
+
+            biana_access._unify_promiscuous_external_entities( protocol = protocol, min_external_entity_id = min_external_entity_id )
+            self.assertEqual(set(self.get_rows(biana_access)), expected_rows, "seed %s" %seed)
+
+
+if __name__ == "__main__":
+    unittest.main()
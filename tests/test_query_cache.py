@@ -0,0 +1,198 @@
+"""
+Tests of the cache of database query results of a session (query_cache.QueryResultCache and BianaSessionManager._cached_db_call)
+"""
+
+import sys
+import unittest
+
+from tests import support
+
+from biana.BianaObjects import query_cache
+from biana.BianaObjects.BianaSessionManager import BianaSessionManager
+from biana.BianaObjects.UserEntitySet import UserEntitySet
+
+
+class Element(object):
+
+    def __init__(self, value):
+        self.value = value
+
+
+class FakeDBaccess(object):
+    """
+    Database access object whose methods return new results built from their arguments, counting the calls of each method
+    """
+
+    def __init__(self):
+        self.calls = {}
+
+    def get_default_external_entity_ids(self, externalEntityIDsList):
+        self.calls["get_default_external_entity_ids"] = self.calls.get("get_default_external_entity_ids", 0) + 1
+        return dict([ (x, ["id%s" %x]) for x in externalEntityIDsList ])
+
+    def get_relations(self, unification_protocol_name, listRelationType=[]):
+        self.calls["get_relations"] = self.calls.get("get_relations", 0) + 1
+        return [ (1, 2, 100, x, "protein") for x in listRelationType ]
+
+    def get_user_entities_IDs_by_attribute_values(self, unification_protocol_name, attribute_identifier, values_list, attribute_restrictions=[], negative_attribute_restrictions=[], only_uniques=False):
+        self.calls["get_user_entities_IDs_by_attribute_values"] = self.calls.get("get_user_entities_IDs_by_attribute_values", 0) + len(values_list)
+        return dict([ (x, [(int(x[1:]), "protein")]) for x in values_list if x.startswith("P") ])
+
+
+def create_session():
+    """
+    Returns a BianaSessionManager object using a FakeDBaccess object (BianaSessionManager.__init__ needs a BIANA database)
+    """
+    session = BianaSessionManager.__new__(BianaSessionManager)
+    session.dbAccess = FakeDBaccess()
+    session.dbname = "test"
+    session.dbhost = "localhost"
+    session.unification_protocol_name = "test"
+    session.query_result_cache = query_cache.QueryResultCache()
+    session.identifier_resolution_cache = query_cache.QueryResultCache(max_entries=100)
+    session.user_entity_relations_cache = query_cache.QueryResultCache()
+    return session
+
+
+
+class NormalizeArgumentTest(unittest.TestCase):
+
+    def test_order_and_case_are_kept(self):
+        self.assertNotEqual(query_cache.normalize_argument(["b", "a"]), query_cache.normalize_argument(["a", "b"]))
+        self.assertNotEqual(query_cache.normalize_argument(("a", "b")), query_cache.normalize_argument(("b", "a")))
+        self.assertNotEqual(query_cache.normalize_argument(["a", "a"]), query_cache.normalize_argument(["a"]))
+        self.assertNotEqual(query_cache.normalize_argument("Name"), query_cache.normalize_argument("name"))
+        self.assertNotEqual(query_cache.normalize_argument([("name", "A")]), query_cache.normalize_argument([("name", "a")]))
+
+    def test_unordered_arguments(self):
+        self.assertEqual(query_cache.normalize_argument([3, 1, 2, 1], unordered=True), query_cache.normalize_argument([1, 2, 3], unordered=True))
+        self.assertEqual(query_cache.normalize_argument(set([1, 2])), query_cache.normalize_argument(set([2, 1])))
+        self.assertNotEqual(query_cache.normalize_argument(["A"], unordered=True), query_cache.normalize_argument(["a"], unordered=True))
+        # Only the elements of unordered arguments are unordered
+        self.assertNotEqual(query_cache.normalize_argument([(1, 2)], unordered=True), query_cache.normalize_argument([(2, 1)], unordered=True))
+
+    def test_keys(self):
+        cache = query_cache.QueryResultCache()
+        self.assertEqual(cache.get_key("method", {"ids": [2, 1], "attributes": ["a", "b"]}, ("ids",)),
+                         cache.get_key("method", {"ids": [1, 2, 2], "attributes": ["a", "b"]}, ("ids",)))
+        self.assertNotEqual(cache.get_key("method", {"ids": [1], "attributes": ["a", "b"]}, ("ids",)),
+                            cache.get_key("method", {"ids": [1], "attributes": ["b", "a"]}, ("ids",)))
+        self.assertEqual(cache.get_key("method", {"ids": [bytearray("1")]}), None)
+
+
+
+class MemoryTest(unittest.TestCase):
+
+    def test_nested_objects_are_counted(self):
+        small = [ Element({"values": set(["a"])}) ]
+        large = [ Element({"values": set([ "value%s" %x for x in xrange(1000) ])}) ]
+        self.assertTrue(query_cache.estimate_size(large) > query_cache.estimate_size(small) + 1000*sys.getsizeof("value0"))
+
+    def test_shared_objects_are_counted_once(self):
+        element = Element("x"*10000)
+        self.assertTrue(query_cache.estimate_size([element]*10) < 2*query_cache.estimate_size([element]))
+
+    def test_keys_are_counted(self):
+        cache = query_cache.QueryResultCache(max_memory=100000)
+        key = cache.get_key("method", {"ids": range(20000)})
+        cache.put(key, [])
+        self.assertEqual(len(cache.entries), 0)
+        key = cache.get_key("method", {"ids": range(100)})
+        cache.put(key, [])
+        self.assertEqual(cache.memory, query_cache.estimate_size(key) + query_cache.estimate_size([]))
+
+    def test_least_recently_used_are_removed(self):
+        cache = query_cache.QueryResultCache(max_entries=2)
+        for current_value in ("a", "b", "c"):
+            cache.put(cache.get_key("method", {"value": current_value}), [current_value])
+        self.assertEqual(cache.get(cache.get_key("method", {"value": "a"}), "method"), None)
+        self.assertEqual(cache.get(cache.get_key("method", {"value": "c"}), "method"), ["c"])
+
+
+
+class CachedCallTest(unittest.TestCase):
+
+    def setUp(self):
+        self.session = create_session()
+
+    def test_repeated_calls_are_cached(self):
+        result = self.session._cached_db_call("get_default_external_entity_ids", externalEntityIDsList=[2, 1])
+        self.assertEqual(self.session._cached_db_call("get_default_external_entity_ids", externalEntityIDsList=[1, 2, 2]), result)
+        self.assertEqual(self.session.dbAccess.calls["get_default_external_entity_ids"], 1)
+
+    def test_ordered_arguments_are_not_mixed(self):
+        self.session._cached_db_call("get_relations", unification_protocol_name="test", listRelationType=["interaction", "complex"])
+        result = self.session._cached_db_call("get_relations", unification_protocol_name="test", listRelationType=["Interaction"])
+        self.assertEqual(result, [(1, 2, 100, "Interaction", "protein")])
+        self.assertEqual(self.session.dbAccess.calls["get_relations"], 2)
+
+    def test_modified_results_do_not_change_the_cache(self):
+        result = self.session._cached_db_call("get_default_external_entity_ids", externalEntityIDsList=[1, 2])
+        result[1].append("other")
+        del result[2]
+        result[3] = ["id3"]
+        self.assertEqual(self.session._cached_db_call("get_default_external_entity_ids", externalEntityIDsList=[1, 2]),
+                         { 1: ["id1"], 2: ["id2"] })
+        self.assertEqual(self.session.dbAccess.calls["get_default_external_entity_ids"], 1)
+
+    def test_modified_set_arguments(self):
+        # Arguments taken from a user entity set: once the set changes, the result of the previous content is not reused
+        user_entity_set = UserEntitySet("set", setIdUserEntity=[1, 2])
+        user_entity_set.addUserEntitiesToGroup(10, 1, 2, "complex")
+        self.assertEqual(self.session._cached_db_call("get_default_external_entity_ids", externalEntityIDsList=user_entity_set.get_groups_ids()),
+                         { 10: ["id10"] })
+        user_entity_set.addUserEntitiesToGroup(11, 1, 2, "complex")
+        self.assertEqual(self.session._cached_db_call("get_default_external_entity_ids", externalEntityIDsList=user_entity_set.get_groups_ids()),
+                         { 10: ["id10"], 11: ["id11"] })
+        duplicate = user_entity_set.duplicate("duplicate")
+        duplicate.remove_node(1)
+        self.assertEqual(self.session._cached_db_call("get_default_external_entity_ids", externalEntityIDsList=user_entity_set.get_groups_ids()),
+                         { 10: ["id10"], 11: ["id11"] })
+        self.assertEqual(self.session.dbAccess.calls["get_default_external_entity_ids"], 2)
+
+    def test_namespaces(self):
+        self.session._cached_db_call("get_default_external_entity_ids", externalEntityIDsList=[1])
+        self.session.unification_protocol_name = "other"
+        self.session._cached_db_call("get_default_external_entity_ids", externalEntityIDsList=[1])
+        self.assertEqual(self.session.dbAccess.calls["get_default_external_entity_ids"], 2)
+
+
+
+class IdentifierCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.session = create_session()
+
+    def resolve(self, values_list):
+        return self.session._get_user_entities_by_attribute_values("uniprotaccession", values_list)
+
+    def get_num_resolved(self):
+        return self.session.dbAccess.calls.get("get_user_entities_IDs_by_attribute_values", 0)
+
+    def test_resolved_values_are_not_queried_again(self):
+        self.assertEqual(self.resolve(["P1", "missing"]), { "P1": [(1, "protein")] })
+        self.assertEqual(self.resolve(["P1", "missing", "P2"]), { "P1": [(1, "protein")], "P2": [(2, "protein")] })
+        self.assertEqual(self.get_num_resolved(), 3)
+
+    def test_cache_is_cleared_with_the_query_cache(self):
+        self.resolve(["P1"])
+        self.session.clear_query_cache()
+        self.resolve(["P1"])
+        self.assertEqual(self.get_num_resolved(), 2)
+
+    def test_cache_is_bounded(self):
+        self.resolve([ "P%s" %x for x in xrange(1000) ])
+        self.assertEqual(len(self.session.identifier_resolution_cache.entries), 100)
+        # The least recently resolved values are queried again
+        self.resolve(["P999", "P0"])
+        self.assertEqual(self.get_num_resolved(), 1001)
+
+    def test_namespaces(self):
+        self.resolve(["P1"])
+        self.session.unification_protocol_name = "other"
+        self.resolve(["P1"])
+        self.assertEqual(self.get_num_resolved(), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
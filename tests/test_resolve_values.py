@@ -0,0 +1,131 @@
+"""
+Tests of the resolution of lists of attribute values to user entities (get_user_entities_IDs_by_attribute_values)
+"""
+
+import os
+import shutil
+import sqlite3
+import tempfile
+import unittest
+
+from tests import support
+
+from biana.BianaDB.BianaSQLiteAccess import BianaSQLiteAccess, SQLITE_EXPORT_VERSION, create_attribute_table, create_export_tables
+from biana.BianaDB.BianaDBaccess import BianaDBaccess
+from biana.BianaDB.BianaDatabase import BianaDatabase
+
+
+# externalEntityID: (userEntityID, identifier). Identifiers with different case are different values in binary columns
+IDENTIFIERS = { 1: (10, "UPI0000000A1"),
+                2: (20, "upi0000000a1"),
+                3: (30, "UPI0000000B2") }
+
+
+def create_biana_access(db):
+    """
+    Returns a BianaDBaccess object using "db", with the identifier attribute "uniparc" and the unification protocol "test"
+
+    SQLite compares text case sensitively, as MySQL does with binary columns
+    """
+    biana_access = BianaDBaccess.__new__(BianaDBaccess)
+    biana_access.db = db
+    biana_access.db_optimized_for = "running"
+    biana_access.fulltext_token_index_tables = {}
+    biana_access.ontology_linked_attributes = set()
+    biana_access.available_unification_protocols = { "test": None }
+    biana_access.biana_database = BianaDatabase()
+    biana_access.biana_database.add_valid_identifier_reference_type("unique")
+    biana_access.biana_database.create_specific_database_tables()
+    biana_access.biana_database.add_valid_external_entity_attribute_type("UniParc", "binary(10)", "eE identifier attribute")
+
+    user_entity_table = biana_access.biana_database.USER_ENTITY_TABLE.get_table_name()
+    db.execute("CREATE TABLE externalEntity (externalEntityID INTEGER PRIMARY KEY, type TEXT)")
+    db.execute("CREATE TABLE %s (userEntityID INTEGER, externalEntityID INTEGER)" %user_entity_table)
+    db.execute("CREATE TABLE externalEntityUniParc (externalEntityID INTEGER, value BLOB, type TEXT)")
+
+    for external_entity_id, (user_entity_id, identifier) in IDENTIFIERS.iteritems():
+        db.execute("INSERT INTO externalEntity (externalEntityID, type) VALUES (?, 'protein')", (external_entity_id,))
+        db.execute("INSERT INTO %s (userEntityID, externalEntityID) VALUES (?, ?)" %user_entity_table, (user_entity_id, external_entity_id))
+        db.execute("INSERT INTO externalEntityUniParc (externalEntityID, value, type) VALUES (?, ?, 'unique')", (external_entity_id, identifier))
+
+    return biana_access
+
+
+def create_sqlite_export(file_name, num_values):
+    """
+    Creates an exported protocol with the attribute "uniprotaccession" and "num_values" user entities, each one with the value "P<userEntityID>"
+    """
+    connection = sqlite3.connect(file_name)
+    create_export_tables(connection)
+    create_attribute_table(connection, "attribute_uniprotaccession")
+    connection.executemany("INSERT INTO exportInfo VALUES (?, ?)", [("version", str(SQLITE_EXPORT_VERSION)), ("unification_protocol", "test")])
+    connection.execute("INSERT INTO exportedAttribute VALUES ('uniprotaccession', 'attribute_uniprotaccession', 0)")
+    for current_id in xrange(1, num_values+1):
+        connection.execute("INSERT INTO externalEntity VALUES (?, 1, 'protein')", (current_id,))
+        connection.execute("INSERT INTO userEntityUnification VALUES (?, ?)", (current_id, current_id))
+        connection.execute("INSERT INTO attribute_uniprotaccession VALUES (?, ?, 'unique')", (current_id, "P%s" %current_id))
+    connection.commit()
+    connection.close()
+
+
+
+class ResolveValuesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = support.SQLiteDB()
+        self.biana_access = create_biana_access(self.db)
+
+    def resolve(self, values_list):
+        return self.biana_access.get_user_entities_IDs_by_attribute_values( unification_protocol_name = "test",
+                                                                            attribute_identifier = "uniparc",
+                                                                            values_list = values_list,
+                                                                            negative_attribute_restrictions = [],
+                                                                            temporary_table_min_size = 1000 )
+
+    def test_given_values_are_queried(self):
+        self.assertEqual(self.resolve(["UPI0000000A1", "UPI0000000B2", "UPI0000000C3"]),
+                         { "UPI0000000A1": [(10, "protein")], "UPI0000000B2": [(30, "protein")] })
+
+    def test_values_are_mapped_back_as_given(self):
+        # Each value finds its own user entity, both are returned for the two given forms
+        result = self.resolve(["UPI0000000A1", "upi0000000a1"])
+        self.assertEqual(sorted(result.keys()), ["UPI0000000A1", "upi0000000a1"])
+        for current_value in result:
+            self.assertEqual(sorted(result[current_value]), [(10, "protein"), (20, "protein")])
+
+    def test_wildcard(self):
+        result = self.resolve(["*", "UPI0000000B2"])
+        self.assertEqual(sorted(result["*"]), [(10, "protein"), (20, "protein"), (30, "protein")])
+        self.assertEqual(result["UPI0000000B2"], [(30, "protein")])
+
+
+
+class SQLiteResolveValuesTest(unittest.TestCase):
+
+    NUM_VALUES = 2500
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        file_name = os.path.join(self.directory, "export.db")
+        create_sqlite_export(file_name, self.NUM_VALUES)
+        self.access = BianaSQLiteAccess(file_name)
+
+    def tearDown(self):
+        self.access.close()
+        shutil.rmtree(self.directory)
+
+    def test_more_values_than_sqlite_variables(self):
+        values_list = [ "p%s" %x for x in xrange(1, self.NUM_VALUES+1) ] + ["P1", "missing"]
+        result = self.access.get_user_entities_IDs_by_attribute_values("test", "uniprotaccession", values_list)
+        self.assertEqual(len(result), self.NUM_VALUES+1)
+        self.assertEqual(result["p2500"], [(2500, "protein")])
+        self.assertEqual(result["p1"], [(1, "protein")])
+        self.assertEqual(result["P1"], [(1, "protein")])
+
+    def test_wildcard(self):
+        result = self.access.get_user_entities_IDs_by_attribute_values("test", "uniprotaccession", ["*"])
+        self.assertEqual(len(result["*"]), self.NUM_VALUES)
+
+
+if __name__ == "__main__":
+    unittest.main()
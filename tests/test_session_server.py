@@ -0,0 +1,232 @@
+"""
+Tests of the session server (several clients executing commands in the same BIANA process)
+"""
+
+import os
+import re
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+import time
+import unittest
+
+from tests import support
+from tests.test_resolve_values import create_sqlite_export
+
+from biana import session_server
+
+
+COMMAND_END_REGEX = re.compile("<biana_command_end id=\"(\d+)\" status=\"(\w+)\"/>")
+
+
+class Client(object):
+    """
+    Client of the session server that sends commands and reads their output
+    """
+
+    def __init__(self, address, family=socket.AF_UNIX, secret=None, timeout=10):
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        self.socket.settimeout(timeout)
+        self.socket.connect(address)
+        self.output = ""
+        self.read_position = 0
+        self.num_commands = 0
+        if secret is not None:
+            self.socket.sendall("%s\n" %secret)
+
+    def send(self, command):
+        """
+        Sends a command (a multiline command must end with an empty line) and returns its id
+        """
+        self.socket.sendall("%s\n" %command)
+        self.num_commands += 1
+        return self.num_commands
+
+    def cancel(self):
+        self.socket.sendall("%s\n" %session_server.CANCEL_COMMAND)
+
+    def read(self):
+        data = self.socket.recv(65536)
+        if data == "":
+            raise EOFError()
+        self.output += data
+
+    def read_until(self, text):
+        """
+        Reads the output until "text" is received, and returns the output received since the previous call
+        """
+        while self.output.find(text, self.read_position) == -1:
+            self.read()
+        end_position = self.output.find(text, self.read_position) + len(text)
+        output = self.output[self.read_position:end_position]
+        self.read_position = end_position
+        return output
+
+    def wait_command(self, command_id):
+        """
+        Returns (status, output) of the command "command_id"
+        """
+        output = self.read_until("<biana_command_end id=\"%s\"" %command_id)
+        output += self.read_until("/>")
+        return (COMMAND_END_REGEX.search(output).group(2), output)
+
+    def run(self, command):
+        return self.wait_command(self.send(command))
+
+    def close(self):
+        self.socket.close()
+
+
+
+class UnixSessionServerTest(unittest.TestCase):
+
+    def setUp(self):
+        if not hasattr(session_server, "UnixSessionServer"):
+            self.skipTest("Unix sockets are not available")
+        self.directory = tempfile.mkdtemp()
+        self.socket_file = os.path.join(self.directory, "server.sock")
+        self.server = session_server.UnixSessionServer(self.socket_file, max_running_commands=4, max_sessions=1)
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.setDaemon(True)
+        self.server_thread.start()
+        self.clients = []
+
+    def tearDown(self):
+        for client in self.clients:
+            client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+
+    def connect(self):
+        client = Client(self.socket_file)
+        self.clients.append(client)
+        client.read_until("<biana_to_gui>")
+        return client
+
+    def wait_sessions(self, number_of_sessions):
+        for current_try in xrange(100):
+            if self.server.get_number_of_sessions() == number_of_sessions:
+                return
+            time.sleep(0.05)
+        self.fail("The server has %s sessions" %self.server.get_number_of_sessions())
+
+    def test_socket_permissions(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.socket_file).st_mode), 0600)
+
+    def test_concurrent_clients(self):
+        clients = [ self.connect() for x in xrange(2) ]
+        for current_client in clients:
+            self.assertEqual(current_client.run("import time")[0], "done")
+        start_time = time.time()
+        command_ids = [ current_client.send("time.sleep(0.5); OutBianaInterface.send_data('<client id=\"%s\"/>')" %x) for x, current_client in enumerate(clients) ]
+        results = [ current_client.wait_command(command_id) for current_client, command_id in zip(clients, command_ids) ]
+        # Commands of different clients are executed at the same time
+        self.assertTrue(time.time()-start_time < 0.95)
+        for x, (status, output) in enumerate(results):
+            self.assertEqual(status, "done")
+            self.assertTrue("<client id=\"%s\"/>" %x in output)
+            self.assertFalse("<client id=\"%s\"/>" %(1-x) in output)
+
+    def test_errors(self):
+        client = self.connect()
+        (status, output) = client.run("undefined_name")
+        self.assertEqual(status, "error")
+        self.assertTrue("NameError" in output)
+        self.assertEqual(client.run("x = 1")[0], "done")
+
+    def test_session_limit(self):
+        export_file = os.path.join(self.directory, "export.db")
+        create_sqlite_export(export_file, 10)
+        command = "create_new_session('%%s', '%s', 'sqlite', None, None, 'test')" %export_file
+
+        client1 = self.connect()
+        client2 = self.connect()
+        self.assertEqual(client1.run(command %"session1")[0], "done")
+        self.assertEqual(client1.run("OutBianaInterface.send_data('<sessions list=\"%s\"/>' %available_sessions.keys())")[1].count("session1"), 1)
+
+        (status, output) = client2.run(command %"session2")
+        self.assertTrue("Maximum number of sessions reached" in output)
+        # Sessions of other clients are not visible
+        self.assertFalse("session1" in client2.run("OutBianaInterface.send_data('<sessions list=\"%s\"/>' %available_sessions.keys())")[1])
+
+        # Sessions are closed when their client disconnects
+        client1.close()
+        self.wait_sessions(0)
+        (status, output) = client2.run(command %"session2")
+        self.assertFalse("error_notification" in output)
+        self.assertEqual(self.server.get_number_of_sessions(), 1)
+
+    def test_session_reservations(self):
+        results = []
+        def reserve():
+            results.append(self.server.reserve_session())
+        threads = [ threading.Thread(target=reserve) for x in xrange(10) ]
+        [ x.start() for x in threads ]
+        [ x.join() for x in threads ]
+        self.assertEqual(results.count(True), 1)
+        self.server.release_session()
+        self.assertTrue(self.server.reserve_session())
+        self.assertFalse(self.server.reserve_session())
+
+    def test_cancel(self):
+        client = self.connect()
+        client.run("import time")
+        command_id = client.send("for x in xrange(1000):\n    OutBianaInterface.send_process_message('step %s' %x); time.sleep(0.01)\n")
+        client.read_until("step 0")
+        start_time = time.time()
+        client.cancel()
+        (status, output) = client.wait_command(command_id)
+        self.assertEqual(status, "cancelled")
+        self.assertTrue(time.time()-start_time < 5)
+        self.assertFalse("step 999" in output)
+        # The client can execute commands after cancelling one
+        self.assertEqual(client.run("x = 1")[0], "done")
+
+    def test_cancel_without_running_command(self):
+        client = self.connect()
+        client.cancel()
+        self.assertEqual(client.run("x = 1")[0], "done")
+
+
+
+class TCPSessionServerTest(unittest.TestCase):
+
+    SECRET = "test secret"
+
+    def setUp(self):
+        self.server = session_server.TCPSessionServer(0, self.SECRET, authentication_timeout=2)
+        self.address = self.server.server_address
+        self.server_thread = threading.Thread(target=self.server.serve_forever)
+        self.server_thread.setDaemon(True)
+        self.server_thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_secret_is_required(self):
+        self.assertRaises(ValueError, session_server.TCPSessionServer, 0, None)
+
+    def test_valid_secret(self):
+        client = Client(self.address, family=socket.AF_INET, secret=self.SECRET)
+        try:
+            client.read_until("<biana_to_gui>")
+            self.assertEqual(client.run("x = 1")[0], "done")
+        finally:
+            client.close()
+
+    def test_invalid_secret(self):
+        for secret in ("wrong secret", self.SECRET+"x", ""):
+            client = Client(self.address, family=socket.AF_INET, secret=secret)
+            try:
+                client.send("x = 1")
+                self.assertRaises(EOFError, client.read_until, "<biana_to_gui>")
+            finally:
+                client.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
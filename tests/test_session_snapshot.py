@@ -0,0 +1,164 @@
+"""
+Tests of the session snapshots (save_session with format="snapshot")
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from tests import support
+
+from tests.test_resolve_values import create_sqlite_export
+
+from biana.OutBianaInterface import OutBianaInterface
+from biana.BianaObjects import session_snapshot
+from biana.BianaObjects.BianaSessionManager import BianaSessionManager, Enum
+from biana.BianaObjects.UserEntitySet import UserEntitySet
+
+
+class Writer(object):
+    """
+    Writer that keeps the messages sent through OutBianaInterface
+    """
+
+    def __init__(self):
+        self.messages = []
+
+    def write(self, message):
+        self.messages.append(message)
+
+    def flush(self):
+        pass
+
+    def get_output(self):
+        return "".join(self.messages)
+
+
+class SessionSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        user_entity_set = UserEntitySet("set_1", setIdUserEntity=range(1, 6))
+        user_entity_set.addUserEntityRelation(1, 2, 100)
+        user_entity_set.addUserEntityRelation(2, 7, 101)
+        self.sets = { "set_1": user_entity_set }
+        self.attributes = { "sessionID": "session" }
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_save_and_load(self):
+        snapshot_dir = os.path.join(self.temp_dir, "session")
+        self.assertEqual(session_snapshot.save_snapshot(snapshot_dir, self.attributes, self.sets), 1)
+
+        (attributes, sets) = session_snapshot.load_snapshot(snapshot_dir)
+        self.assertEqual(attributes, self.attributes)
+        self.assertEqual(sorted(sets["set_1"].get_user_entity_ids()), sorted(self.sets["set_1"].get_user_entity_ids()))
+        self.assertEqual(sorted(sets["set_1"].getRelations()), sorted(self.sets["set_1"].getRelations()))
+
+        # Sets not loaded are not written again
+        (attributes, sets) = session_snapshot.load_snapshot(snapshot_dir)
+        self.assertEqual(session_snapshot.save_snapshot(snapshot_dir, attributes, sets), 0)
+
+    def test_existing_file_is_not_replaced(self):
+        pickle_file = os.path.join(self.temp_dir, "session.dat")
+        fd = open(pickle_file, 'w')
+        fd.write("old session")
+        fd.close()
+
+        self.assertRaises(ValueError, session_snapshot.save_snapshot, pickle_file, self.attributes, self.sets)
+
+        fd = open(pickle_file)
+        self.assertEqual(fd.read(), "old session")
+        fd.close()
+
+    def test_directory_with_other_files_is_not_used(self):
+        other_dir = os.path.join(self.temp_dir, "other")
+        os.mkdir(other_dir)
+        open(os.path.join(other_dir, "set_1.chunk"), 'w').close()
+
+        self.assertRaises(ValueError, session_snapshot.save_snapshot, other_dir, self.attributes, self.sets)
+        self.assertEqual(os.listdir(other_dir), ["set_1.chunk"])
+
+
+
+class SessionRestoreTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        export_file = os.path.join(self.temp_dir, "export.db")
+        create_sqlite_export(export_file, 10)
+
+        session = BianaSessionManager.__new__(BianaSessionManager)
+        session.sessionID = "session"
+        session.dbname = export_file
+        session.dbhost = "sqlite"
+        session.unification_protocol_name = "test"
+        session.dbAccess = None
+        session.outmethod = None
+        session.dictUserEntity = {}
+        session.uE_types_enum = Enum()
+        session.eEr_types_enum = Enum()
+        session.uE_types_dict = dict([ (x, session.uE_types_enum.get_letter("protein")) for x in xrange(1, 8) ])
+        session.eEr_types_dict = { 100: session.eEr_types_enum.get_letter("interaction"), 101: session.eEr_types_enum.get_letter("interaction") }
+        session.identifier_resolution_cache = {}
+        session.user_entity_relations_cache = {}
+        session.query_result_cache = None
+
+        user_entity_set = UserEntitySet("set_1", setIdUserEntity=range(1, 6))
+        user_entity_set.addUserEntityRelation(1, 2, 100)
+        user_entity_set.addUserEntityRelation(2, 7, 101)
+        user_entity_set.setIsNetworkCreated()
+        session.dictUserEntitySet = { "set_1": user_entity_set, "set_2": UserEntitySet("set_2", setIdUserEntity=[3]) }
+
+        self.snapshot_dir = os.path.join(self.temp_dir, "session")
+        session.save_snapshot(self.snapshot_dir)
+
+        self.writer = Writer()
+        OutBianaInterface.set_thread_writer(self.writer)
+
+        self.num_decoded = 0
+        self.decode_user_entity_set = session_snapshot.decode_user_entity_set
+        def decode(*args):
+            self.num_decoded += 1
+            return self.decode_user_entity_set(*args)
+        session_snapshot.decode_user_entity_set = decode
+
+    def tearDown(self):
+        session_snapshot.decode_user_entity_set = self.decode_user_entity_set
+        OutBianaInterface.set_thread_writer(None)
+        shutil.rmtree(self.temp_dir)
+
+    def test_sets_are_sent_without_decoding_them(self):
+        session = BianaSessionManager.load_snapshot(self.snapshot_dir)
+        output = self.writer.get_output()
+        self.assertEqual(self.num_decoded, 0)
+        self.assertTrue("<user_entity_set id=\"set_1\"><user_entity_set_summary size=\"6\" edges=\"2\"/></user_entity_set>" in output)
+        self.assertTrue("<user_entity_set id=\"set_1\"><update_network_depth levels=\"1\"/></user_entity_set>" in output)
+        self.assertTrue("<user_entity_set id=\"set_2\"><user_entity_set_summary size=\"1\" edges=\"0\"/></user_entity_set>" in output)
+        self.assertFalse("update_network_depth levels=\"0\"" in output)
+        session.close()
+
+    def test_sets_are_decoded_and_sent_when_they_are_accessed(self):
+        session = BianaSessionManager.load_snapshot(self.snapshot_dir)
+        self.writer.messages = []
+        user_entity_set = session.dictUserEntitySet["set_1"]
+        session.dictUserEntitySet["set_1"]
+        self.assertEqual(self.num_decoded, 1)
+        self.assertEqual(sorted(user_entity_set.get_user_entity_ids()), [1, 2, 3, 4, 5, 7])
+        self.assertEqual(self.writer.get_output().count("<user_entity id=\""), 6)
+        session.close()
+
+    def test_snapshot_without_summaries(self):
+        manifest = session_snapshot.read_manifest(self.snapshot_dir)
+        del manifest["summaries"]
+        session_snapshot._write_file(os.path.join(self.snapshot_dir, session_snapshot.MANIFEST_FILE), session_snapshot.cPickle.dumps(manifest))
+        session = BianaSessionManager.load_snapshot(self.snapshot_dir)
+        self.assertEqual(self.num_decoded, 2)
+        self.assertEqual(self.writer.get_output().count("<user_entity id=\""), 7)
+        session.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Tests of the export of unification protocols to SQLite (BianaDBaccess.export_unification_protocol_to_sqlite), comparing the results of a
+BianaSQLiteAccess object reading the export with the ones of the exported database
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from tests import support
+from tests.test_user_entity_relations import create_relations_access, create_relations_table
+
+from biana.BianaDB.BianaSQLiteAccess import BianaSQLiteAccess
+from biana.BianaObjects.ExternalDatabase import ExternalDatabase
+
+
+def prepare_export(biana_access):
+    """
+    Sets the attributes of "biana_access" used by the export that are read from the database by BianaDBaccess.__init__
+    """
+    biana_access.dbname = "test"
+    biana_access.dbhost = "localhost"
+    biana_access.versionable_external_entity_identifier_attributes = set()
+    biana_access.transferred_attributes = {}
+    biana_access.key_attribute_ids = {}
+    biana_access.validSources = True
+    biana_access.valid_source_database_ids = dict([ (x, ExternalDatabase("db%s" %x, "1", "", "", "uniprotAccession", externalDatabaseID=x)) for x in xrange(1, 4) ])
+
+
+
+class SQLiteExportTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.file_name = os.path.join(self.directory, "export.db")
+        self.db = support.SQLiteDB()
+        self.db.max_pool_size = 1
+        self.biana_access = create_relations_access(self.db, seed=5)
+        prepare_export(self.biana_access)
+        self.sqlite_access = None
+
+    def tearDown(self):
+        if self.sqlite_access is not None:
+            self.sqlite_access.close()
+        shutil.rmtree(self.directory)
+
+    def export(self, **arguments):
+        self.biana_access.export_unification_protocol_to_sqlite("test", self.file_name, **arguments)
+        self.sqlite_access = BianaSQLiteAccess(self.file_name)
+
+    def get_user_entity_ids(self):
+        return [ x[0] for x in self.db.execute("SELECT DISTINCT userEntityID FROM %s" %self.biana_access._get_user_entity_table_name("test")) ]
+
+    def check_relations(self):
+        rand = random.Random(6)
+        user_entity_ids_list = self.get_user_entity_ids()
+        for x in xrange(30):
+            user_entity_ids = rand.sample(user_entity_ids_list, 15)
+            arguments = { "listRelationType": rand.choice([[], ["interaction"], ["complex"]]),
+                          "use_self_relations": rand.choice([True, False]),
+                          "use_nested_relations": rand.choice([True, False]),
+                          "limit_to_userEntityID_list": rand.choice([True, False]),
+                          "attribute_restrictions": rand.choice([[], [("uniprotaccession", "A")]]),
+                          "negative_attribute_restrictions": rand.choice([[], [("uniprotaccession", "B")]]) }
+            expected_relations = sorted(set(self.biana_access.get_user_entity_relations("test", user_entity_ids, **arguments)))
+            self.assertEqual(sorted(set(self.sqlite_access.get_user_entity_relations("test", user_entity_ids, **arguments))), expected_relations, arguments)
+
+        self.assertEqual(sorted(set(self.sqlite_access.get_user_entity_relations("test", user_entity_ids_list))),
+                         sorted(set(self.biana_access.get_user_entity_relations("test", user_entity_ids_list))))
+
+    def check_attributes(self):
+        user_entity_ids = self.get_user_entity_ids()
+        for only_uniques in (False, True):
+            expected_attributes = self.biana_access.get_user_entity_attributes("test", user_entity_ids, "uniprotaccession", only_uniques=only_uniques)
+            attributes = self.sqlite_access.get_user_entity_attributes("test", user_entity_ids, "uniprotaccession", only_uniques=only_uniques)
+            self.assertEqual(sorted(attributes.keys()), sorted(expected_attributes.keys()))
+            for current_uE, values in expected_attributes.iteritems():
+                self.assertEqual(sorted(attributes[current_uE]), sorted(values))
+
+    def test_export(self):
+        self.export(attribute_list=["uniprotAccession"])
+        self.check_relations()
+        self.check_attributes()
+
+    def test_export_of_precalculated_relations(self):
+        create_relations_table(self.biana_access)
+        # Blocks smaller than the number of rows
+        self.export(block_size=7)
+        self.assertEqual(self.biana_access._get_user_entity_relation_table_name("test"), "userEntityRelation_protocol_1")
+        self.check_relations()
+        self.check_attributes()
+
+
+if __name__ == "__main__":
+    unittest.main()
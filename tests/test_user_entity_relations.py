@@ -0,0 +1,244 @@
+"""
+Tests of the relations between user entities (BianaDBaccess.get_user_entity_relations and the cache of relations of a session)
+"""
+
+import random
+import unittest
+
+from tests import support
+
+from biana.BianaDB.BianaDBaccess import BianaDBaccess
+from biana.BianaDB.BianaDatabase import BianaDatabase
+from biana.BianaObjects import query_cache
+from biana.BianaObjects.UnificationProtocol import UnificationProtocol
+
+
+RELATION_TYPES = ["interaction", "complex"]
+
+
+def create_relations_access(db, seed=0, num_user_entities=60, num_relations=120):
+    """
+    Returns a BianaDBaccess object using "db", with the unification protocol "test" and random relations between its user entities.
+    The result is the same for the same "seed"
+
+    Some user entities have two external entities, relations have two or three participants, some participants have cardinality 2 (self relations),
+    some relations have an additional nested participant, and external entities have a "uniprotaccession" ("A" or "B") used in restrictions
+    """
+
+    rand = random.Random(seed)
+
+    biana_access = BianaDBaccess.__new__(BianaDBaccess)
+    biana_access.db = db
+    biana_access.db_optimized_for = "running"
+    biana_access.fulltext_token_index_tables = {}
+    biana_access.ontology_linked_attributes = set()
+    biana_access.available_unification_protocols = { "test": UnificationProtocol("test", 1, id="1") }
+    biana_access.user_entity_relation_tables = {}
+    biana_access.biana_database = BianaDatabase()
+    biana_access.biana_database.add_valid_identifier_reference_type("unique")
+    for current_type in RELATION_TYPES:
+        biana_access.biana_database.add_valid_external_entity_relation_type(current_type)
+    biana_access.biana_database.create_specific_database_tables()
+    biana_access.biana_database.add_valid_external_entity_attribute_type("uniprotAccession", "varchar(255)", "eE identifier attribute")
+    biana_access.biana_database.add_valid_external_entity_relation_participant_attribute_type("cardinality", "smallint unsigned", "eerp attribute", [])
+
+    user_entity_table = biana_access._get_user_entity_table_name("test")
+    db.execute("CREATE TABLE externalEntity (externalEntityID INTEGER PRIMARY KEY, externalDatabaseID INTEGER, type TEXT)")
+    db.execute("CREATE TABLE externalEntityRelation (externalEntityRelationID INTEGER PRIMARY KEY, type TEXT)")
+    for current_table in ("externalEntityRelationParticipant", "extendedExternalEntityRelationParticipant"):
+        db.execute("CREATE TABLE %s (externalEntityRelationParticipantID INTEGER, externalEntityRelationID INTEGER, externalEntityID INTEGER)" %current_table)
+    db.execute("CREATE TABLE externalEntityRelationParticipantcardinality (externalEntityRelationParticipantID INTEGER, value INTEGER)")
+    db.execute("CREATE TABLE externalEntityuniprotAccession (value TEXT, externalEntityID INTEGER, type TEXT)")
+    db.execute("CREATE TABLE %s (userEntityID INTEGER, externalEntityID INTEGER)" %user_entity_table)
+
+    external_entity_id = 0
+    for user_entity_id in xrange(1, num_user_entities+1):
+        for x in xrange(rand.choice([1, 1, 2])):
+            external_entity_id += 1
+            db.execute("INSERT INTO externalEntity VALUES (?, 1, ?)", (external_entity_id, rand.choice(["protein", "protein", "gene"])))
+            db.execute("INSERT INTO %s VALUES (?, ?)" %user_entity_table, (user_entity_id, external_entity_id))
+            db.execute("INSERT INTO externalEntityuniprotAccession VALUES (?, ?, 'unique')", (rand.choice(["A", "B"]), external_entity_id))
+    num_external_entities = external_entity_id
+
+    participant_id = 0
+    for x in xrange(num_relations):
+        external_entity_id += 1
+        relation_id = external_entity_id
+        db.execute("INSERT INTO externalEntity VALUES (?, ?, 'relation')", (relation_id, rand.choice([2, 3])))
+        db.execute("INSERT INTO externalEntityRelation VALUES (?, ?)", (relation_id, rand.choice(RELATION_TYPES)))
+        participants = rand.sample(xrange(1, num_external_entities+1), rand.choice([2, 2, 3]))
+        nested_participants = participants + rand.sample(xrange(1, num_external_entities+1), rand.choice([0, 0, 1]))
+        for current_participant in set(nested_participants):
+            participant_id += 1
+            if current_participant in participants:
+                db.execute("INSERT INTO externalEntityRelationParticipant VALUES (?, ?, ?)", (participant_id, relation_id, current_participant))
+            db.execute("INSERT INTO extendedExternalEntityRelationParticipant VALUES (?, ?, ?)", (participant_id, relation_id, current_participant))
+            if rand.random() < 0.1:
+                db.execute("INSERT INTO externalEntityRelationParticipantcardinality VALUES (?, 2)", (participant_id,))
+
+    return biana_access
+
+
+def create_relations_table(biana_access):
+    """
+    Creates the table of precalculated relations of the protocol "test" (create_user_entity_relations_table creates it with MySQL types)
+    """
+    relation_table_name = "%s1" %biana_access.biana_database.USER_ENTITY_RELATION_TABLE.get_table_name()
+    biana_access.db.execute("CREATE TABLE %s (userEntityID1 INTEGER, userEntityID2 INTEGER, externalEntityRelationID INTEGER, type TEXT, etype TEXT, externalDatabaseID INTEGER, "
+                            "nested INTEGER, self_relation INTEGER, PRIMARY KEY (userEntityID1, externalEntityRelationID, userEntityID2, etype, self_relation))" %relation_table_name)
+    biana_access._insert_user_entity_relations("test", relation_table_name)
+    biana_access.user_entity_relation_tables = {}
+    return relation_table_name
+
+
+
+class RelationsCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.db = support.SQLiteDB()
+        self.db.max_pool_size = 1
+        self.biana_access = create_relations_access(self.db)
+        self.biana_access._get_user_entity_relation_table_name("test")    # checks that relations are not precalculated before counting queries
+        self.cache = query_cache.QueryResultCache(max_entries=100000, max_memory=None)
+
+    def get_relations(self, user_entity_ids, adjacency_cache=None, **arguments):
+        return sorted(set(self.biana_access.get_user_entity_relations("test", user_entity_ids, adjacency_cache=adjacency_cache, **arguments)))
+
+    def test_cached_relations_are_the_same(self):
+        rand = random.Random(1)
+        for x in xrange(20):
+            user_entity_ids = rand.sample(xrange(1, 61), 10)
+            arguments = { "listRelationType": rand.choice([[], ["interaction"], ["complex"]]),
+                          "use_self_relations": rand.choice([True, False]),
+                          "use_nested_relations": rand.choice([True, False]),
+                          "limit_to_userEntityID_list": rand.choice([True, False]),
+                          "attribute_restrictions": rand.choice([[], [("uniprotaccession", "A")]]),
+                          "negative_attribute_restrictions": rand.choice([[], [("uniprotaccession", "B")]]) }
+            self.assertEqual(self.get_relations(user_entity_ids, self.cache, **arguments), self.get_relations(user_entity_ids, **arguments), arguments)
+
+    def test_limited_relations_are_not_cached(self):
+        user_entity_ids = range(1, 21)
+        num_queries = len(self.db.queries)
+        self.get_relations(user_entity_ids, self.cache, limit_to_userEntityID_list=True)
+        # The limited query is used (relations and self relations), and its partial lists are not stored
+        self.assertEqual(len(self.db.queries) - num_queries, 2)
+        self.assertTrue("u2.userEntityID IN" in self.db.queries[-2])
+        self.assertEqual(len(self.cache.entries), 0)
+
+        # Once the relations are cached, they are used for the limited relations
+        self.get_relations(user_entity_ids, self.cache)
+        num_queries = len(self.db.queries)
+        self.assertEqual(self.get_relations(user_entity_ids, self.cache, limit_to_userEntityID_list=True), self.get_relations(user_entity_ids, limit_to_userEntityID_list=True))
+        self.assertEqual(len(self.db.queries) - num_queries, 2)
+
+    def test_cached_relations_are_not_queried_again(self):
+        self.get_relations(range(1, 31), self.cache)
+        num_queries = len(self.db.queries)
+        self.get_relations(range(1, 31), self.cache)
+        self.get_relations(range(10, 20), self.cache, listRelationType=["complex"])
+        self.assertEqual(len(self.db.queries), num_queries)
+
+    def test_cache_is_bounded(self):
+        cache = query_cache.QueryResultCache(max_entries=10)
+        self.assertEqual(self.get_relations(range(1, 61), cache), self.get_relations(range(1, 61)))
+        self.assertEqual(len(cache.entries), 10)
+
+
+
+class PrecalculatedRelationsTest(unittest.TestCase):
+    """
+    The relations read from the precalculated relations table are the same as the ones obtained joining the unification and participant tables
+    """
+
+    def setUp(self):
+        self.db = support.SQLiteDB()
+        self.db.max_pool_size = 1
+        self.biana_access = create_relations_access(self.db, seed=2)
+        self.relation_table_name = create_relations_table(self.biana_access)
+
+    def get_relations(self, precalculated, user_entity_ids, **arguments):
+        if precalculated:
+            self.biana_access.user_entity_relation_tables["test"] = self.relation_table_name
+        else:
+            self.biana_access.user_entity_relation_tables["test"] = None
+        return sorted(set(self.biana_access.OLDget_user_entity_relations("test", user_entity_ids, **arguments)))
+
+    def check_relations(self, rand, user_entity_ids_list):
+        for x in xrange(40):
+            user_entity_ids = rand.sample(user_entity_ids_list, 15)
+            arguments = { "listRelationType": rand.choice([[], ["interaction"], ["complex"], ["interaction", "complex"]]),
+                          "use_self_relations": rand.choice([True, False]),
+                          "use_nested_relations": rand.choice([True, False]),
+                          "limit_to_userEntityID_list": rand.choice([True, False]),
+                          "attribute_restrictions": rand.choice([[], [("uniprotaccession", "A")]]),
+                          "negative_attribute_restrictions": rand.choice([[], [("uniprotaccession", "B")]]) }
+            self.assertEqual(self.get_relations(True, user_entity_ids, **arguments), self.get_relations(False, user_entity_ids, **arguments), arguments)
+
+        # Nested and self relations are found
+        all_relations = self.get_relations(True, user_entity_ids_list)
+        self.assertTrue(len(all_relations) > len(self.get_relations(True, user_entity_ids_list, use_self_relations=False)))
+        self.assertTrue(len(all_relations) > len(self.get_relations(True, user_entity_ids_list, use_nested_relations=False)))
+
+        # Table rows can be obtained in a single query as well
+        self.assertEqual(sorted(set(self.biana_access._get_precalculated_user_entity_relations(self.relation_table_name, "test"))), all_relations)
+
+    def get_user_entity_ids(self):
+        return [ x[0] for x in self.db.execute("SELECT DISTINCT userEntityID FROM %s" %self.biana_access._get_user_entity_table_name("test")) ]
+
+    def test_full_build(self):
+        self.check_relations(random.Random(3), self.get_user_entity_ids())
+
+    def test_updated_relations(self):
+        rand = random.Random(4)
+        user_entity_table = self.biana_access._get_user_entity_table_name("test")
+        user_entity_ids = self.get_user_entity_ids()
+        changed_user_entities = set()
+        removed_user_entities = set()
+
+        # Merged user entities, as in update_user_entities
+        for x in xrange(5):
+            (target_uE, merged_uE) = rand.sample([ x for x in user_entity_ids if x not in removed_user_entities ], 2)
+            self.db.execute("UPDATE %s SET userEntityID = ? WHERE userEntityID = ?" %user_entity_table, (target_uE, merged_uE))
+            changed_user_entities.add(target_uE)
+            changed_user_entities.discard(merged_uE)
+            removed_user_entities.add(merged_uE)
+
+        # New external entities, in new and existing user entities, participating in new relations with existing external entities
+        (last_external_entity_id, last_participant_id) = self.db.execute("SELECT MAX(e.externalEntityID), MAX(p.externalEntityRelationParticipantID) FROM externalEntity e, extendedExternalEntityRelationParticipant p")[0]
+        existing_external_entities = [ x[0] for x in self.db.execute("SELECT externalEntityID FROM %s" %user_entity_table) ]
+        new_user_entity_id = max(user_entity_ids) + 1
+        for x in xrange(10):
+            external_entity_id = last_external_entity_id + 2*x + 1
+            if x % 2 == 0:
+                user_entity_id = new_user_entity_id + x
+            else:
+                user_entity_id = rand.choice([ x for x in user_entity_ids if x not in removed_user_entities ])
+            changed_user_entities.add(user_entity_id)
+            self.db.execute("INSERT INTO externalEntity VALUES (?, 4, 'protein')", (external_entity_id,))
+            self.db.execute("INSERT INTO %s VALUES (?, ?)" %user_entity_table, (user_entity_id, external_entity_id))
+            self.db.execute("INSERT INTO externalEntityuniprotAccession VALUES (?, ?, 'unique')", (rand.choice(["A", "B"]), external_entity_id))
+
+            relation_id = external_entity_id + 1
+            self.db.execute("INSERT INTO externalEntity VALUES (?, 4, 'relation')", (relation_id,))
+            self.db.execute("INSERT INTO externalEntityRelation VALUES (?, ?)", (relation_id, rand.choice(RELATION_TYPES)))
+            for participant in [external_entity_id, rand.choice(existing_external_entities)]:
+                last_participant_id += 1
+                self.db.execute("INSERT INTO externalEntityRelationParticipant VALUES (?, ?, ?)", (last_participant_id, relation_id, participant))
+                self.db.execute("INSERT INTO extendedExternalEntityRelationParticipant VALUES (?, ?, ?)", (last_participant_id, relation_id, participant))
+                if participant == external_entity_id and x % 3 == 0:
+                    self.db.execute("INSERT INTO externalEntityRelationParticipantcardinality VALUES (?, 2)", (last_participant_id,))
+
+        self.biana_access.user_entity_relation_tables["test"] = self.relation_table_name
+        self.biana_access._update_user_entity_relations("test", changed_user_entities, removed_user_entities, max_list_size=4)
+
+        self.check_relations(rand, self.get_user_entity_ids())
+
+        # The updated table has the same rows as a table built from scratch
+        updated_rows = sorted(self.db.execute("SELECT * FROM %s" %self.relation_table_name))
+        self.db.execute("DROP TABLE %s" %self.relation_table_name)
+        create_relations_table(self.biana_access)
+        self.assertEqual(updated_rows, sorted(self.db.execute("SELECT * FROM %s" %self.relation_table_name)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+"""
+Tests of the copies of user entity sets that share their structures until they are modified (UserEntitySet.duplicate)
+"""
+
+import copy
+import unittest
+
+from tests import support
+
+from biana.BianaObjects.UserEntitySet import UserEntitySet
+from biana.utilities import graph_utilities
+
+
+def create_user_entity_set():
+    """
+    Returns a set with user entities 1, 2, 3 (level 0) and 4 (level 1), relations 100 (1-2), 101 (2-3) and 102 (1-4),
+    tags for user entity 1 and relation 100, and a group with user entities 1 and 4
+    """
+    user_entity_set = UserEntitySet("original", setIdUserEntity=[1, 2, 3])
+    user_entity_set.addUserEntityRelation(1, 2, 100)
+    user_entity_set.addUserEntityRelation(2, 3, 101)
+    user_entity_set.addUserEntityRelation(1, 4, 102)
+    user_entity_set.select_user_entities([1])
+    user_entity_set.addTagToSelectedUE("tag")
+    user_entity_set.selectUserEntityRelations([100])
+    user_entity_set.addTagToSelectedUER("relation_tag")
+    user_entity_set.clear_user_entity_selection()
+    user_entity_set.clear_user_entity_relation_selection()
+    user_entity_set.addUserEntitiesToGroup("group", 4, 1, "complex")
+    return user_entity_set
+
+
+def get_state(user_entity_set):
+    """
+    Returns a copy of the content of "user_entity_set" that can be compared
+    """
+    edges = sorted([ (min(x,y), max(x,y), sorted(user_entity_set.network.get_edge(x,y))) for x, y in user_entity_set.network.edges() ])
+    return copy.deepcopy({ "nodes": sorted(user_entity_set.network.nodes()),
+                           "edges": edges,
+                           "size": user_entity_set.getSize(),
+                           "levels": user_entity_set.listLevelSetIdUserEntity,
+                           "node_levels": user_entity_set.nodeLevelsDict,
+                           "participants": user_entity_set.eErIds2participants,
+                           "tags": (user_entity_set.uE_tags, user_entity_set.tag_uE, user_entity_set.uER_tags, user_entity_set.tag_uER),
+                           "groups": (user_entity_set.relation_groups, user_entity_set.uE_groups, user_entity_set.groups_hierarchy, user_entity_set.group_types),
+                           "selection": (user_entity_set.setIdUserEntitySelected, user_entity_set.setIdUserEntityRelationSelected) })
+
+
+def tag_user_entity(user_entity_set):
+    user_entity_set.select_user_entities([3])
+    user_entity_set.addTagToSelectedUE("tag")
+
+
+def tag_relation(user_entity_set):
+    user_entity_set.selectUserEntityRelations([101])
+    user_entity_set.addTagToSelectedUER("relation_tag")
+
+
+# Modifications of a set: (name, function)
+MODIFICATIONS = [ ("add node", lambda x: x.addUserEntityId(10, level=0)),
+                  ("add relation with a new node", lambda x: x.addUserEntityRelation(1, 11, 110)),
+                  ("add relation to an existing edge", lambda x: x.addUserEntityRelation(1, 2, 120)),
+                  ("remove node", lambda x: x.remove_node(1)),
+                  ("remove edge", lambda x: x.remove_edge(1, 2)),
+                  ("remove relation", lambda x: x.remove_external_entity_relation(100)),
+                  ("remove unconnected nodes", lambda x: (x.remove_edge(2, 3), x.remove_unconnected_nodes())),
+                  ("tag user entity", tag_user_entity),
+                  ("tag relation", tag_relation),
+                  ("add to group", lambda x: x.addUserEntitiesToGroup("group", 12, 1, "complex")),
+                  ("add to new group", lambda x: x.addUserEntitiesToGroup("group2", 3, 2, "pathway", parentGroupID="group")),
+                  ("set groups hierarchy", lambda x: x.setGroupsHierarchy([("group", "parent_group")])),
+                  ("set network", lambda x: x.setNetwork(graph_utilities.create_graph())) ]
+
+
+
+class DuplicateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.original = create_user_entity_set()
+        self.original_state = get_state(self.original)
+
+    def test_duplicate_has_the_same_content(self):
+        duplicate = self.original.duplicate("duplicate")
+        self.assertEqual(duplicate.id, "duplicate")
+        self.assertEqual(get_state(duplicate), self.original_state)
+
+    def test_modifying_the_duplicate_does_not_change_the_original(self):
+        for name, modify in MODIFICATIONS:
+            duplicate = self.original.duplicate("duplicate")
+            modify(duplicate)
+            self.assertEqual(get_state(self.original), self.original_state, name)
+
+    def test_modifying_the_original_does_not_change_the_duplicate(self):
+        for name, modify in MODIFICATIONS:
+            original = create_user_entity_set()
+            duplicate = original.duplicate("duplicate")
+            modify(original)
+            self.assertEqual(get_state(duplicate), self.original_state, name)
+
+    def test_duplicate_of_a_duplicate(self):
+        for name, modify in MODIFICATIONS:
+            duplicate = self.original.duplicate("duplicate")
+            second_duplicate = duplicate.duplicate("second_duplicate")
+            modify(duplicate)
+            self.assertEqual(get_state(self.original), self.original_state, name)
+            self.assertEqual(get_state(second_duplicate), self.original_state, name)
+
+    def test_modifications_are_the_same_as_in_a_deep_copy(self):
+        for name, modify in MODIFICATIONS:
+            duplicate = self.original.duplicate("duplicate")
+            deep_copy = copy.deepcopy(create_user_entity_set())
+            modify(duplicate)
+            modify(deep_copy)
+            self.assertEqual(get_state(duplicate), get_state(deep_copy), name)
+
+    def test_modifications_of_both_sets(self):
+        duplicate = self.original.duplicate("duplicate")
+        duplicate.addUserEntityRelation(1, 3, 103)
+        self.original.remove_node(3)
+        self.assertTrue(duplicate.has_relation(1, 3))
+        self.assertTrue(duplicate.has_user_entity(3))
+        self.assertFalse(self.original.has_user_entity(3))
+        self.assertEqual(duplicate.get_external_entity_relation_participants(101), [2, 3])
+
+    def test_getters_do_not_modify_shared_tags(self):
+        duplicate = self.original.duplicate("duplicate")
+        self.assertEqual(duplicate.get_user_entity_tags(2), set())
+        self.assertEqual(duplicate.get_external_entity_relation_tags(101), set())
+        self.assertEqual(get_state(self.original), self.original_state)
+
+
+if __name__ == "__main__":
+    unittest.main()